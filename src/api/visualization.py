@@ -4,23 +4,54 @@
 このモジュールは、データセットの可視化機能を提供するAPIエンドポイントを定義します。
 """
 
+import os
 from pathlib import Path
 from typing import Optional, Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
 
+from ..data.jobs import JobError, JobQueue, JobStatus
+from ..data.models import AccessLevel
 from ..data.visualization import VisualizationService
-from ..data.service import DatasetService
+from ..data.service import AccessControlError, AccessControlService, DatasetService
 from ..security.auth import get_current_user
 from ..database import get_db
 from ..models import User
 
 router = APIRouter(prefix="/api/v1/visualization", tags=["visualization"])
 
+# データファイルの保存ベースパス
+DATASET_STORAGE_PATH = os.environ.get("DATASET_STORAGE_PATH", "data/datasets")
+
+# 統計情報の再計算ジョブのキュー（同時に実行する再計算の数を制限する）
+statistics_jobs = JobQueue(max_workers=int(os.environ.get("STATISTICS_JOB_WORKERS", "2")))
+
+
+def get_dataset_service(db: Session = Depends(get_db)) -> DatasetService:
+    """データセットサービスのインスタンスを取得"""
+    return DatasetService(db, DATASET_STORAGE_PATH)
+
 
 def get_visualization_service(db: Session = Depends(get_db)) -> VisualizationService:
     """可視化サービスのインスタンスを取得"""
-    return VisualizationService(db, DatasetService(db))
+    return VisualizationService(db, get_dataset_service(db))
+
+
+def _check_dataset_access(db: Session, dataset_id: int, user_id: int) -> None:
+    """
+    ユーザーがデータセットを読み取れることを確認
+
+    Raises:
+        HTTPException: データセットが存在しない場合（404）、またはアクセス権限がない場合（403）
+    """
+    try:
+        allowed = AccessControlService(db).check_dataset_access(
+            dataset_id, user_id, AccessLevel.READ,
+        )
+    except AccessControlError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if not allowed:
+        raise HTTPException(status_code=403, detail="データセットへのアクセス権限がありません")
 
 
 @router.get("/datasets/{dataset_id}/statistics")
@@ -29,18 +60,30 @@ async def get_statistics_dashboard(
     version: Optional[str] = None,
     output_format: str = Query("json", enum=["json", "html"]),
     output_path: Optional[str] = None,
+    approximate: bool = False,
+    sample_rows: Optional[int] = Query(None, gt=0),
+    error_target: Optional[float] = Query(None, gt=0, lt=1),
     current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
     visualization_service: VisualizationService = Depends(get_visualization_service),
 ) -> Dict[str, Any]:
     """
     データセットの統計情報ダッシュボードを取得
 
+    approximate を指定すると、統計情報がキャッシュにない場合は標本から推定した近似値で
+    ダッシュボードを作成し、厳密な値の再計算をバックグラウンドのジョブとして登録します。
+    この場合、レスポンスには推定の情報（estimation）と再計算のジョブ（exact_job）が含まれます。
+
     Args:
         dataset_id: データセットID
         version: バージョン（指定しない場合は最新バージョン）
         output_format: 出力形式（json/html）
         output_path: 出力先のパス（指定しない場合はレスポンスとして返す）
+        approximate: 統計情報がキャッシュにない場合に近似値を使うかどうか
+        sample_rows: 近似値の標本の行数
+        error_target: 近似値で比率の推定誤差の目標
         current_user: 現在のユーザー
+        db: データベースセッション
         visualization_service: 可視化サービス
 
     Returns:
@@ -49,6 +92,8 @@ async def get_statistics_dashboard(
     Raises:
         HTTPException: データセットが存在しない場合、またはアクセス権限がない場合
     """
+    # 標本の抽出や再計算の登録より前に確認する
+    _check_dataset_access(db, dataset_id, current_user.id)
     try:
         if output_path:
             output_path = Path(output_path)
@@ -61,16 +106,33 @@ async def get_statistics_dashboard(
             dataset_id=dataset_id,
             version=version,
             output_path=output_path if output_path else None,
+            engine="sample" if approximate else "exact",
+            sample_rows=sample_rows,
+            error_target=error_target,
         )
 
         if output_path:
-            return {"output_path": str(output_path)}
-        else:
-            return result
+            result["output_path"] = str(output_path)
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    # 近似値を返した場合は厳密な値の再計算を登録する（キューが満杯の場合は登録しない）
+    if "estimation" in result:
+        try:
+            result["exact_job"] = statistics_jobs.submit(
+                ("statistics", dataset_id, version, "exact"),
+                _recalculate_statistics,
+                sessionmaker(bind=db.get_bind()),
+                dataset_id,
+                version,
+                "exact",
+                owner=current_user.id,
+            ).to_dict()
+        except JobError:
+            result["exact_job"] = None
+    return result
+
 
 @router.get("/datasets/{dataset_id}/version-comparison")
 async def get_version_comparison_dashboard(
@@ -80,6 +142,7 @@ async def get_version_comparison_dashboard(
     output_format: str = Query("json", enum=["json", "html"]),
     output_path: Optional[str] = None,
     current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
     visualization_service: VisualizationService = Depends(get_visualization_service),
 ) -> Dict[str, Any]:
     """
@@ -92,6 +155,7 @@ async def get_version_comparison_dashboard(
         output_format: 出力形式（json/html）
         output_path: 出力先のパス（指定しない場合はレスポンスとして返す）
         current_user: 現在のユーザー
+        db: データベースセッション
         visualization_service: 可視化サービス
 
     Returns:
@@ -100,6 +164,7 @@ async def get_version_comparison_dashboard(
     Raises:
         HTTPException: データセットまたはバージョンが存在しない場合、またはアクセス権限がない場合
     """
+    _check_dataset_access(db, dataset_id, current_user.id)
     try:
         if output_path:
             output_path = Path(output_path)
@@ -130,6 +195,7 @@ async def get_quality_metrics_dashboard(
     output_format: str = Query("json", enum=["json", "html"]),
     output_path: Optional[str] = None,
     current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
     visualization_service: VisualizationService = Depends(get_visualization_service),
 ) -> Dict[str, Any]:
     """
@@ -140,6 +206,7 @@ async def get_quality_metrics_dashboard(
         output_format: 出力形式（json/html）
         output_path: 出力先のパス（指定しない場合はレスポンスとして返す）
         current_user: 現在のユーザー
+        db: データベースセッション
         visualization_service: 可視化サービス
 
     Returns:
@@ -148,6 +215,7 @@ async def get_quality_metrics_dashboard(
     Raises:
         HTTPException: データセットが存在しない場合、またはアクセス権限がない場合
     """
+    _check_dataset_access(db, dataset_id, current_user.id)
     try:
         if output_path:
             output_path = Path(output_path)
@@ -170,30 +238,113 @@ async def get_quality_metrics_dashboard(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.post("/datasets/{dataset_id}/statistics/refresh")
+def _recalculate_statistics(
+    session_factory: sessionmaker,
+    dataset_id: int,
+    version: Optional[str],
+    engine: str,
+) -> Dict[str, Any]:
+    """統計情報を再計算（ジョブのワーカーで実行され、専用のセッションを使う）"""
+    with session_factory() as db:
+        dataset_service = DatasetService(db, DATASET_STORAGE_PATH)
+        return dataset_service.get_statistics(
+            dataset_id, version, recalculate=True, engine=engine,
+        )
+
+
+@router.post("/datasets/{dataset_id}/statistics/refresh", status_code=202)
 async def refresh_statistics(
     dataset_id: int,
     version: Optional[str] = None,
+    engine: str = Query("exact", enum=["exact", "streaming"]),
     current_user: User = Depends(get_current_user),
-    dataset_service: DatasetService = Depends(lambda db: DatasetService(db)),
+    db: Session = Depends(get_db),
 ) -> Dict[str, Any]:
     """
-    データセットの統計情報を再計算
+    データセットの統計情報の再計算を登録
+
+    再計算はバックグラウンドのジョブとして実行され、ジョブIDがすぐに返されます。
+    同じバージョンの再計算が実行待ちまたは実行中の場合は、そのジョブのIDが返されます。
+    進捗は /jobs/{job_id}、結果は /jobs/{job_id}/result で取得できます。
 
     Args:
         dataset_id: データセットID
         version: バージョン（指定しない場合は最新バージョン）
+        engine: 計算エンジン（exact/streaming）
         current_user: 現在のユーザー
-        dataset_service: データセットサービス
+        db: データベースセッション（ジョブは同じデータベースに専用のセッションで接続する）
 
     Returns:
-        再計算された統計情報
+        登録されたジョブの情報
 
     Raises:
-        HTTPException: データセットが存在しない場合、またはアクセス権限がない場合
+        HTTPException: データセットが存在しない場合、アクセス権限がない場合、
+            またはジョブキューが満杯の場合
     """
+    _check_dataset_access(db, dataset_id, current_user.id)
     try:
-        stats = dataset_service.get_statistics(dataset_id, version, force_recalculate=True)
-        return stats
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e)) 
\ No newline at end of file
+        job = statistics_jobs.submit(
+            ("statistics", dataset_id, version, engine),
+            _recalculate_statistics,
+            sessionmaker(bind=db.get_bind()),
+            dataset_id,
+            version,
+            engine,
+            owner=current_user.id,
+        )
+    except JobError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """
+    ジョブの状態を取得
+
+    Args:
+        job_id: ジョブID
+        current_user: 現在のユーザー
+
+    Returns:
+        ジョブの状態
+
+    Raises:
+        HTTPException: ジョブが存在しない場合、または現在のユーザーが登録したジョブでない場合
+    """
+    job = statistics_jobs.get(job_id, owner=current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"ジョブ {job_id} は存在しません")
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """
+    ジョブの結果を取得
+
+    Args:
+        job_id: ジョブID
+        current_user: 現在のユーザー
+
+    Returns:
+        再計算された統計情報
+
+    Raises:
+        HTTPException: ジョブが存在しない場合（現在のユーザーが登録したジョブでない場合を含む）、
+            完了していない場合、または失敗した場合
+    """
+    job = statistics_jobs.get(job_id, owner=current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"ジョブ {job_id} は存在しません")
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=400, detail=job.error)
+    if job.status != JobStatus.SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"ジョブ {job_id} は完了していません")
+    return job.result
@@ -5,7 +5,15 @@
 データセットのバージョン管理、メタデータ管理、データ品質の検証などの機能を含みます。
 """
 
-from .models import Dataset, DatasetVersion, Metadata, QualityMetrics
+from .models import (
+    Dataset,
+    DatasetVersion,
+    Metadata,
+    QualityMetrics,
+    StatisticsCache,
+    StorageMode,
+    VersionDiffCache,
+)
 from .service import DatasetService, ValidationService
 
 __all__ = [
@@ -13,6 +21,9 @@ __all__ = [
     'DatasetVersion',
     'Metadata',
     'QualityMetrics',
+    'StatisticsCache',
+    'StorageMode',
+    'VersionDiffCache',
     'DatasetService',
     'ValidationService',
 ] 
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+アクセスインデックスの再構築
+
+このモジュールは、ユーザーごとのアクセス可能なデータセットを保存するアクセスインデックス
+（dataset_access_index テーブル）を、データセットの作成者とグループのアクセス権限から
+作り直すコマンドを提供します。データベースを直接変更したときなど、インデックスの一部が
+古くなった場合に実行してください（テーブルがない、または空の場合はサービスの作成時に
+自動的に作成されます）。
+
+使い方:
+    python -m src.data.access_index --database-url sqlite:///data.db
+"""
+
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from ..security.models import Base
+from .models import DatasetAccessIndex
+from .service import AccessControlService
+
+
+def rebuild(database_url: str) -> int:
+    """
+    アクセスインデックスを作り直す
+
+    Args:
+        database_url: データベースのURL
+
+    Returns:
+        インデックスの行数
+    """
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine, tables=[DatasetAccessIndex.__table__])
+    session = sessionmaker(bind=engine)()
+    try:
+        return AccessControlService(session).rebuild_access_index()
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """コマンドラインのエントリーポイント"""
+    parser = argparse.ArgumentParser(description="アクセスインデックスを再構築します")
+    parser.add_argument(
+        "--database-url",
+        default=os.environ.get("DATABASE_URL"),
+        help="データベースのURL（指定しない場合は環境変数 DATABASE_URL）",
+    )
+    args = parser.parse_args(argv)
+    if not args.database_url:
+        parser.error("--database-url または環境変数 DATABASE_URL を指定してください")
+
+    count = rebuild(args.database_url)
+    print(f"アクセスインデックスを再構築しました: {count} 件")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,405 @@
+"""
+データセットのアーカイブ
+
+このモジュールは、データセットのエクスポートで使用するアーカイブの書き込みと圧縮の機能を提供します。
+データはブロック単位に分割され、ブロックごとに独立したgzipメンバーとして複数のスレッドで
+並列に圧縮されます（pigz や bgzip と同様の方式）。gzipメンバーを連結したファイルは通常の
+gzipファイルとして展開できるため、既存の tar.gz の読み込み処理（tarfile の "r:gz" や
+gzip コマンド）でそのまま読み込めます。zlib は圧縮中にGILを解放するため、スレッドの数だけ
+CPUコアを使用できます。
+
+zip 形式（zip64）では、メンバーごとに独立して圧縮され、末尾の中央ディレクトリにメンバーの位置が
+記録されます。そのため、アーカイブ全体を展開せずに一部のバージョンだけを読み込めます。
+
+エクスポートごとに、アーカイブと同じ場所にマニフェスト（<名前>.manifest.json）が保存されます。
+マニフェストはベースとなるエクスポートのIDと復元に必要なブロブの一覧を持ち、差分エクスポートの
+連鎖をたどるために使用されます。
+"""
+
+import gzip
+import io
+import os
+import shutil
+import tarfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, BinaryIO, Deque, Dict, Iterable, Optional, Union
+
+from .storage import DEFAULT_CHUNK_SIZE
+
+# 独立に圧縮するブロックのサイズの既定値（1MiB）
+DEFAULT_COMPRESS_BLOCK_SIZE = 1024 * 1024
+
+# 圧縮レベルの既定値（gzip の既定値と同じ）
+DEFAULT_COMPRESS_LEVEL = 6
+
+# アーカイブと同じ場所に保存するエクスポートのマニフェストの拡張子
+MANIFEST_SUFFIX = ".manifest.json"
+
+# アーカイブの形式
+#   tar.gz: ブロック単位で並列に圧縮した tar.gz（先頭から順にしか読めない）
+#   zip: メンバーごとに独立して圧縮した zip64（末尾の中央ディレクトリから任意のメンバーを直接読める）
+ARCHIVE_FORMATS = ("tar.gz", "zip")
+
+# アーカイブの拡張子
+ARCHIVE_SUFFIXES = (".tar.gz", ".zip")
+
+
+class ArchiveError(Exception):
+    """アーカイブ関連のエラーを表す例外クラス"""
+    pass
+
+
+def _compress_block(block: bytes, level: int) -> bytes:
+    """ブロックを1つのgzipメンバーとして圧縮"""
+    return gzip.compress(block, compresslevel=level, mtime=0)
+
+
+class ParallelGzipWriter(io.RawIOBase):
+    """
+    ブロック単位で並列に圧縮しながら書き込むgzipストリーム
+
+    書き込まれたデータはブロックサイズごとにスレッドプールで圧縮され、書き込まれた順に
+    出力先に書き出されます。圧縮待ちのブロック数は「スレッド数 × 2」までに制限されるため、
+    メモリ使用量はおおよそ「ブロックサイズ × スレッド数 × 2」です。
+
+    close しても出力先のストリームは閉じません。
+    """
+
+    def __init__(
+        self,
+        fileobj: BinaryIO,
+        level: int = DEFAULT_COMPRESS_LEVEL,
+        workers: Optional[int] = None,
+        block_size: int = DEFAULT_COMPRESS_BLOCK_SIZE,
+    ):
+        """
+        初期化
+
+        Args:
+            fileobj: 出力先のバイナリストリーム
+            level: 圧縮レベル（1〜9）
+            workers: 圧縮に使うスレッド数（指定しない場合はCPUコア数）
+            block_size: 独立に圧縮するブロックのサイズ（バイト）
+
+        Raises:
+            ArchiveError: パラメータが不正な場合
+        """
+        super().__init__()
+        if not 1 <= level <= 9:
+            raise ArchiveError(f"圧縮レベルは1から9の整数である必要があります: {level}")
+        if block_size <= 0:
+            raise ArchiveError(f"ブロックサイズは正の整数である必要があります: {block_size}")
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        if self.workers < 1:
+            raise ArchiveError(f"スレッド数は1以上である必要があります: {self.workers}")
+        self.fileobj = fileobj
+        self.level = level
+        self.block_size = block_size
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._buffer = bytearray()
+        self._pending: Deque[Future] = deque()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="gzip")
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        if self.closed:
+            raise ValueError("閉じたストリームには書き込めません")
+        data = memoryview(data).cast("B")
+        self._buffer += data
+        self.bytes_in += len(data)
+        while len(self._buffer) >= self.block_size:
+            self._submit(bytes(self._buffer[:self.block_size]))
+            del self._buffer[:self.block_size]
+        return len(data)
+
+    def _submit(self, block: bytes) -> None:
+        # 圧縮待ちのブロックが多すぎる場合は、先頭のブロックを書き出してから追加
+        while len(self._pending) >= 2 * self.workers:
+            self._write_next()
+        self._pending.append(self._executor.submit(_compress_block, block, self.level))
+
+    def _write_next(self) -> None:
+        compressed = self._pending.popleft().result()
+        self.fileobj.write(compressed)
+        self.bytes_out += len(compressed)
+
+    def flush(self) -> None:
+        """バッファのデータを圧縮し、全てのブロックを出力先に書き出す"""
+        if self.closed:
+            return
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer = bytearray()
+        while self._pending:
+            self._write_next()
+        self.fileobj.flush()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            self.flush()
+            # 空のストリームも有効なgzipファイルになるよう、空のメンバーを書き出す
+            if self.bytes_out == 0:
+                compressed = _compress_block(b"", self.level)
+                self.fileobj.write(compressed)
+                self.bytes_out += len(compressed)
+        finally:
+            self._executor.shutdown(wait=True)
+            super().close()
+
+
+class TarArchiveWriter:
+    """
+    tar.gz 形式のアーカイブの書き込み
+
+    tar のストリームを ParallelGzipWriter で並列に圧縮しながら書き込みます。
+    """
+
+    def __init__(
+        self,
+        fileobj: BinaryIO,
+        level: int = DEFAULT_COMPRESS_LEVEL,
+        workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        """
+        初期化
+
+        Args:
+            fileobj: 出力先のバイナリストリーム
+            level: 圧縮レベル（1〜9）
+            workers: 圧縮に使うスレッド数（指定しない場合はCPUコア数）
+            chunk_size: 読み込み時のチャンクサイズ（バイト）
+        """
+        self._gzip = ParallelGzipWriter(fileobj, level, workers)
+        self._tar = tarfile.open(fileobj=self._gzip, mode="w|")
+        self._tar.copybufsize = chunk_size
+        self.workers = self._gzip.workers
+
+    @property
+    def bytes_in(self) -> int:
+        """圧縮前のバイト数"""
+        return self._gzip.bytes_in
+
+    @property
+    def bytes_out(self) -> int:
+        """圧縮後のバイト数"""
+        return self._gzip.bytes_out
+
+    def add(self, arcname: str, src: BinaryIO, size: int) -> None:
+        """
+        メンバーを追加
+
+        Args:
+            arcname: アーカイブ内の名前
+            src: 読み込み元のストリーム
+            size: バイト数
+        """
+        info = tarfile.TarInfo(arcname)
+        info.size = size
+        info.mtime = int(time.time())
+        self._tar.addfile(info, src)
+
+    def close(self) -> None:
+        try:
+            self._tar.close()
+        finally:
+            self._gzip.close()
+
+    def __enter__(self) -> "TarArchiveWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ZipArchiveWriter:
+    """
+    zip64 形式のアーカイブの書き込み
+
+    メンバーは独立して圧縮され、アーカイブの末尾にメンバーの位置の一覧（中央ディレクトリ）が
+    書き込まれます。読み込み時は一覧から必要なメンバーの位置に直接シークできます。
+    メンバーは1つずつ圧縮されるため、スレッド数は常に1です。
+    """
+
+    def __init__(
+        self,
+        fileobj: BinaryIO,
+        level: int = DEFAULT_COMPRESS_LEVEL,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        """
+        初期化
+
+        Args:
+            fileobj: 出力先のバイナリストリーム（シーク可能であること）
+            level: 圧縮レベル（1〜9）
+            chunk_size: 読み込み時のチャンクサイズ（バイト）
+        """
+        if not 1 <= level <= 9:
+            raise ArchiveError(f"圧縮レベルは1から9の整数である必要があります: {level}")
+        self._fileobj = fileobj
+        self._start = fileobj.tell()
+        self._zip = zipfile.ZipFile(
+            fileobj, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=level, allowZip64=True,
+        )
+        self.chunk_size = chunk_size
+        self.workers = 1
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def add(self, arcname: str, src: BinaryIO, size: int) -> None:
+        """
+        メンバーを追加
+
+        Args:
+            arcname: アーカイブ内の名前
+            src: 読み込み元のストリーム
+            size: バイト数
+        """
+        with self._zip.open(arcname, "w", force_zip64=size >= zipfile.ZIP64_LIMIT) as dst:
+            shutil.copyfileobj(src, dst, self.chunk_size)
+        self.bytes_in += size
+
+    def close(self) -> None:
+        self._zip.close()
+        self.bytes_out = self._fileobj.tell() - self._start
+
+    def __enter__(self) -> "ZipArchiveWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_archive_writer(
+    archive_format: str,
+    fileobj: BinaryIO,
+    level: int = DEFAULT_COMPRESS_LEVEL,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Union[TarArchiveWriter, ZipArchiveWriter]:
+    """
+    形式に応じたアーカイブの書き込みを開始
+
+    Args:
+        archive_format: アーカイブの形式（ARCHIVE_FORMATS のいずれか）
+        fileobj: 出力先のバイナリストリーム
+        level: 圧縮レベル（1〜9）
+        workers: 圧縮に使うスレッド数（tar.gz のみ）
+        chunk_size: 読み込み時のチャンクサイズ（バイト）
+
+    Returns:
+        アーカイブの書き込み
+
+    Raises:
+        ArchiveError: 形式が不正な場合
+    """
+    if archive_format == "tar.gz":
+        return TarArchiveWriter(fileobj, level, workers, chunk_size)
+    if archive_format == "zip":
+        return ZipArchiveWriter(fileobj, level, chunk_size)
+    raise ArchiveError(f"無効なアーカイブの形式: {archive_format}")
+
+
+class ThroughputMeter:
+    """
+    アーカイブの読み書きのスループットを計測
+
+    処理したデータのバイト数と経過時間から、1秒あたりのバイト数を求めます。
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+
+    def stop(self) -> None:
+        """計測を終了"""
+        self.finished_at = time.perf_counter()
+
+    @property
+    def seconds(self) -> float:
+        """経過秒数"""
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    def report(self, bytes_in: int, bytes_out: int, **extra: Any) -> Dict[str, Any]:
+        """
+        スループットの報告を作成
+
+        Args:
+            bytes_in: 圧縮前のバイト数
+            bytes_out: 圧縮後のバイト数
+            **extra: 報告に追加する項目
+
+        Returns:
+            経過秒数、バイト数、スループット（バイト/秒）、圧縮率を含む辞書
+        """
+        seconds = self.seconds
+        report = {
+            "seconds": seconds,
+            "bytes_in": bytes_in,
+            "bytes_out": bytes_out,
+            "throughput": bytes_in / seconds if seconds > 0 else None,
+            "compression_ratio": bytes_out / bytes_in if bytes_in else None,
+        }
+        report.update(extra)
+        return report
+
+
+def manifest_path_for(archive_path: Union[str, Path]) -> Path:
+    """
+    アーカイブのマニフェストのパスを取得
+
+    Args:
+        archive_path: アーカイブのパス（例: export.tar.gz）
+
+    Returns:
+        マニフェストのパス（例: export.manifest.json）
+    """
+    archive_path = Path(archive_path)
+    name = archive_path.name
+    for suffix in ARCHIVE_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+            break
+    return archive_path.with_name(f"{name}{MANIFEST_SUFFIX}")
+
+
+def member_name(member: tarfile.TarInfo) -> str:
+    """アーカイブのメンバー名を正規化（先頭の "./" や "/" を除く）"""
+    name = member.name
+    while name.startswith("./"):
+        name = name[2:]
+    return name.lstrip("/")
+
+
+def match_version(filename: str, versions: Iterable[str]) -> Optional[str]:
+    """
+    アーカイブ内のファイル名に対応するバージョン番号を取得
+
+    ファイル名は「バージョン番号 + 拡張子」です。バージョン番号にもドットが含まれるため、
+    一致するもののうち最も長いバージョン番号を返します（"1.0.0.jsonl" は "1.0" ではなく
+    "1.0.0" に対応します）。
+
+    Args:
+        filename: ディレクトリを除いたファイル名
+        versions: バージョン番号
+
+    Returns:
+        バージョン番号（対応するものがない場合はNone）
+    """
+    matched = None
+    for version in versions:
+        if filename == version or filename.startswith(f"{version}."):
+            if matched is None or len(version) > len(matched):
+                matched = version
+    return matched
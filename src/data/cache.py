@@ -0,0 +1,98 @@
+"""
+プロセス内キャッシュ
+
+このモジュールは、統計情報や差分などの計算結果をプロセス内に保持するためのLRUキャッシュを提供します。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    スレッドセーフなLRUキャッシュ
+
+    エントリ数（またはエントリのサイズの合計）が上限を超えると、最も長く参照されていない
+    エントリから削除されます。
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: Optional[int] = None):
+        """
+        初期化
+
+        Args:
+            max_entries: 保持するエントリ数の上限
+            max_bytes: エントリのサイズの合計の上限（指定しない場合は制限なし）
+        """
+        if max_entries <= 0:
+            raise ValueError(f"エントリ数の上限は正の整数である必要があります: {max_entries}")
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError(f"サイズの上限は正の整数である必要があります: {max_bytes}")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total_bytes(self) -> int:
+        """エントリのサイズの合計"""
+        return self._total_bytes
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """エントリを取得（存在しない場合は default）"""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any, size: int = 0) -> None:
+        """
+        エントリを追加または更新
+
+        Args:
+            key: キー
+            value: 値
+            size: エントリのサイズ（バイト数）。サイズの上限を超えるエントリは保持しない
+        """
+        with self._lock:
+            self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._total_bytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._total_bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Hashable) -> Any:
+        value = self._entries.pop(key, None)
+        self._total_bytes -= self._sizes.pop(key, 0)
+        return value
+
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """エントリを削除して返す"""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            return self._remove(key)
+
+    def clear(self) -> None:
+        """全てのエントリを削除"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
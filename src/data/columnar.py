@@ -0,0 +1,170 @@
+"""
+列指向フォーマット（Parquet）のサイドカー
+
+このモジュールは、JSONLのバージョンファイルから列指向のParquetファイルを作成する機能を提供します。
+統計情報の計算などでJSONを毎回解析する代わりに、必要な列だけを型付きで読み込めるようになります。
+Parquetの読み書きには pyarrow が必要です。
+"""
+
+import os
+import uuid
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, TextIO, Tuple, Union
+
+import pandas as pd
+
+from .storage import StorageError
+
+# サイドカーファイルの拡張子
+COLUMNAR_SUFFIX = ".parquet"
+
+# JSONLを変換する際に1度に読み込む行数
+DEFAULT_CHUNK_ROWS = 100000
+
+
+def _require_pyarrow():
+    """pyarrow をインポート（インストールされていない場合は StorageError）"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise StorageError("列指向フォーマットの利用には pyarrow が必要です")
+    return pyarrow, pyarrow.parquet
+
+
+def write_columnar(
+    open_source: Callable[[], TextIO],
+    dst_path: Union[str, Path],
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Path:
+    """
+    JSONLファイルをParquetファイルに変換
+
+    1回目の走査でチャンクごとのスキーマを統合し（例: 整数と浮動小数点数が混在する列は浮動小数点数）、
+    2回目の走査で統合したスキーマに揃えて書き込みます。いずれもチャンク単位で処理するため、
+    メモリ使用量はファイルサイズに依存しません。
+
+    Args:
+        open_source: JSONLファイルをテキストストリームとして開く関数
+        dst_path: 出力先のパス
+        chunk_rows: 1度に読み込む行数
+
+    Returns:
+        出力したParquetファイルのパス
+
+    Raises:
+        StorageError: pyarrow がない場合、または変換に失敗した場合
+    """
+    pa, pq = _require_pyarrow()
+    dst_path = Path(dst_path)
+    tmp_path = dst_path.with_name(f"{dst_path.name}.{uuid.uuid4().hex}.part")
+
+    def iter_tables():
+        with open_source() as f:
+            for chunk in pd.read_json(f, lines=True, chunksize=chunk_rows):
+                yield pa.Table.from_pandas(chunk, preserve_index=False)
+
+    try:
+        schemas = [table.schema for table in iter_tables()]
+        if not schemas:
+            raise StorageError("データファイルに行がありません")
+        schema = pa.unify_schemas(schemas, promote_options="permissive")
+
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            for table in iter_tables():
+                # 後のチャンクにしか現れない列は欠損値で補完
+                columns = [
+                    table.column(field.name).cast(field.type)
+                    if field.name in table.column_names
+                    else pa.nulls(table.num_rows, type=field.type)
+                    for field in schema
+                ]
+                writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+
+        os.replace(tmp_path, dst_path)
+    except StorageError:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    except Exception as e:
+        tmp_path.unlink(missing_ok=True)
+        raise StorageError(f"列指向ファイルの作成に失敗しました: {e}")
+
+    return dst_path
+
+
+def read_columnar(
+    path: Union[str, Path],
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Parquetファイルを読み込む
+
+    Args:
+        path: Parquetファイルのパス
+        columns: 読み込む列（指定しない場合は全ての列）
+
+    Returns:
+        読み込んだデータフレーム
+
+    Raises:
+        StorageError: pyarrow がない場合、または読み込みに失敗した場合
+    """
+    _require_pyarrow()
+    try:
+        return pd.read_parquet(path, columns=columns)
+    except Exception as e:
+        raise StorageError(f"列指向ファイルの読み込みに失敗しました: {e}")
+
+
+def columnar_layout(path: Union[str, Path]) -> Tuple[int, List[str]]:
+    """
+    Parquetファイルの行グループ数と列名を取得
+
+    Args:
+        path: Parquetファイルのパス
+
+    Returns:
+        (行グループ数, 列名のリスト)
+
+    Raises:
+        StorageError: pyarrow がない場合、または読み込みに失敗した場合
+    """
+    _, pq = _require_pyarrow()
+    try:
+        parquet_file = pq.ParquetFile(path)
+        return parquet_file.num_row_groups, list(parquet_file.schema_arrow.names)
+    except Exception as e:
+        raise StorageError(f"列指向ファイルの読み込みに失敗しました: {e}")
+
+
+def iter_columnar(
+    path: Union[str, Path],
+    columns: Optional[List[str]] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    row_groups: Optional[List[int]] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Parquetファイルをチャンク単位で読み込む
+
+    Args:
+        path: Parquetファイルのパス
+        columns: 読み込む列（指定しない場合は全ての列）
+        chunk_rows: 1度に読み込む行数
+        row_groups: 読み込む行グループ（指定しない場合は全ての行グループ）
+
+    Yields:
+        チャンクごとのデータフレーム
+
+    Raises:
+        StorageError: pyarrow がない場合、または読み込みに失敗した場合
+    """
+    _, pq = _require_pyarrow()
+    try:
+        parquet_file = pq.ParquetFile(path)
+        batches = parquet_file.iter_batches(
+            batch_size=chunk_rows, row_groups=row_groups, columns=columns,
+        )
+        for batch in batches:
+            yield batch.to_pandas()
+    except Exception as e:
+        raise StorageError(f"列指向ファイルの読み込みに失敗しました: {e}")
@@ -0,0 +1,361 @@
+"""
+チャンク単位の差分ストレージ
+
+このモジュールは、コンテンツ定義チャンキング（Gearローリングハッシュ）でファイルを
+可変長のチャンクに分割し、データセット内の全バージョンでチャンクを重複排除して保存する機能を提供します。
+各バージョンはチャンクの並びを記録したマニフェストとして表現され、読み込み時に透過的に再構成されます。
+"""
+
+import bisect
+import hashlib
+import io
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from .storage import DEFAULT_CHUNK_SIZE, PrefixHash, ProgressCallback, StorageError
+
+# チャンクサイズの下限・上限（バイト）
+MIN_CHUNK_SIZE = 4 * 1024
+MAX_CHUNK_SIZE = 64 * 1024
+
+# 境界判定に使うハッシュのビット数（平均チャンクサイズは MIN_CHUNK_SIZE + 2^13 バイト程度）
+_BOUNDARY_BITS = 13
+_BOUNDARY_MASK = np.uint32(((1 << _BOUNDARY_BITS) - 1) << (32 - _BOUNDARY_BITS))
+
+# Gearハッシュのテーブル（バージョン間でチャンク境界が変わらないよう固定値から生成）
+_GEAR = np.array(
+    [
+        int.from_bytes(hashlib.sha256(b"gear" + bytes([i])).digest()[:4], "little")
+        for i in range(256)
+    ],
+    dtype=np.uint32,
+)
+
+MANIFEST_FORMAT = 1
+
+
+def _boundary_candidates(data: bytes) -> np.ndarray:
+    """
+    Gearローリングハッシュ（窓幅32バイト）が境界条件を満たす位置を求める
+
+    位置 i のハッシュは ``sum(GEAR[data[i - k]] << k for k in range(32))`` で、
+    窓幅を倍々に広げることで5回のベクトル演算で全位置のハッシュを計算します。
+    """
+    h = _GEAR[np.frombuffer(data, dtype=np.uint8)]
+    shifted = np.empty_like(h)
+    width = 1
+    while width < 32:
+        np.left_shift(h[:-width], width, out=shifted[width:])
+        h[width:] += shifted[width:]
+        width *= 2
+    return np.flatnonzero((h & _BOUNDARY_MASK) == 0)
+
+
+def iter_chunks(
+    src: BinaryIO,
+    read_size: int = DEFAULT_CHUNK_SIZE,
+    min_size: int = MIN_CHUNK_SIZE,
+    max_size: int = MAX_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    ストリームをコンテンツ定義の可変長チャンクに分割
+
+    境界はチャンク先頭から min_size バイト以降の内容のみで決まるため、
+    ファイルの一部が変更されても、変更箇所から離れたチャンクは同じ境界で分割されます。
+
+    Args:
+        src: 読み込み元のストリーム
+        read_size: 1回に読み込むバイト数
+        min_size: チャンクサイズの下限
+        max_size: チャンクサイズの上限
+
+    Yields:
+        チャンクのバイト列
+    """
+    pending = b""
+    eof = False
+    while not eof:
+        block = src.read(read_size)
+        if not block:
+            eof = True
+        pending += block
+
+        candidates = _boundary_candidates(pending) if pending else np.empty(0, dtype=np.intp)
+        start = 0
+        while True:
+            # チャンク先頭から min_size 以降にある最初の境界候補を探す
+            idx = np.searchsorted(candidates, start + min_size - 1)
+            if idx < len(candidates) and candidates[idx] < start + max_size:
+                end = int(candidates[idx]) + 1
+            elif len(pending) - start >= max_size:
+                end = start + max_size
+            else:
+                break
+            yield pending[start:end]
+            start = end
+
+        pending = pending[start:]
+
+    if pending:
+        yield pending
+
+
+class ChunkStore:
+    """
+    データセット単位のチャンクストア
+
+    チャンクは ``<root>/chunks/<ハッシュ先頭2文字>/<SHA-256>`` に、
+    マニフェストは ``<root>/manifests/<ファイル全体のSHA-256><拡張子>.json`` に保存されます。
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        """
+        初期化
+
+        Args:
+            root: データセットのストレージディレクトリ
+        """
+        self.root = Path(root)
+        self.chunks_dir = self.root / "chunks"
+        self.manifests_dir = self.root / "manifests"
+        self.chunks_dir.mkdir(parents=True, exist_ok=True)
+        self.manifests_dir.mkdir(parents=True, exist_ok=True)
+
+    def chunk_path(self, chunk_hash: str) -> Path:
+        """チャンクの保存パスを取得"""
+        return self.chunks_dir / chunk_hash[:2] / chunk_hash
+
+    def put(
+        self,
+        src_path: Union[str, Path],
+        suffix: str = "",
+        read_size: int = DEFAULT_CHUNK_SIZE,
+        progress_callback: Optional[ProgressCallback] = None,
+        prefix: Optional[PrefixHash] = None,
+    ) -> Tuple[str, Path, int]:
+        """
+        ファイルをチャンクに分割して保存し、マニフェストを作成
+
+        既に保存されているチャンクは書き込まれないため、前のバージョンとの差分が
+        小さいほど書き込み量も小さくなります。
+
+        Args:
+            src_path: 保存するファイルのパス
+            suffix: 元ファイルの拡張子
+            read_size: 1回に読み込むバイト数
+            progress_callback: 進捗コールバック
+            prefix: 先頭から指定したバイト数のハッシュを記録する場合に指定
+
+        Returns:
+            (ファイル全体のSHA-256ハッシュ, マニフェストのパス, 新たに書き込んだバイト数)
+
+        Raises:
+            StorageError: 保存に失敗した場合
+        """
+        src_path = Path(src_path)
+        file_hasher = hashlib.sha256()
+        chunks = []
+        processed = 0
+        written = 0
+
+        try:
+            total_size = src_path.stat().st_size
+            with open(src_path, "rb") as src:
+                for chunk in iter_chunks(src, read_size=read_size):
+                    if prefix is not None:
+                        prefix.update(file_hasher, memoryview(chunk), processed)
+                    else:
+                        file_hasher.update(chunk)
+                    chunk_hash = hashlib.sha256(chunk).hexdigest()
+                    if self._write_chunk(chunk_hash, chunk):
+                        written += len(chunk)
+                    chunks.append([chunk_hash, len(chunk)])
+                    processed += len(chunk)
+                    if progress_callback:
+                        progress_callback(processed, total_size)
+
+            file_hash = file_hasher.hexdigest()
+            manifest_path = self._write_manifest(f"{file_hash}{suffix}", {
+                "format": MANIFEST_FORMAT,
+                "file_hash": file_hash,
+                "size": processed,
+                "suffix": suffix,
+                "chunks": chunks,
+            })
+        except OSError as e:
+            raise StorageError(f"チャンクの保存に失敗しました: {e}")
+
+        return file_hash, manifest_path, written
+
+    def _write_chunk(self, chunk_hash: str, data: bytes) -> bool:
+        """チャンクを書き込む（既に存在する場合は何もしない）"""
+        path = self.chunk_path(chunk_hash)
+        if path.exists():
+            return False
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.part")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        return True
+
+    def _write_manifest(self, name: str, manifest: Dict[str, Any]) -> Path:
+        """マニフェストをアトミックに書き込む"""
+        path = self.manifests_dir / f"{name}.json"
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.part")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+        return path
+
+    def remove_manifest(self, manifest_path: Union[str, Path]) -> None:
+        """マニフェストを削除"""
+        manifest_path = Path(manifest_path)
+        if manifest_path.parent == self.manifests_dir:
+            manifest_path.unlink(missing_ok=True)
+
+    def collect_unreferenced_chunks(self) -> int:
+        """
+        どのマニフェストからも参照されていないチャンクを削除
+
+        Returns:
+            削除されたチャンク数
+        """
+        referenced: Set[str] = set()
+        for manifest_path in self.manifests_dir.glob("*.json"):
+            manifest = read_manifest(manifest_path)
+            referenced.update(chunk_hash for chunk_hash, _ in manifest["chunks"])
+
+        removed = 0
+        for path in self.chunks_dir.glob("??/*"):
+            if path.name not in referenced:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+def read_manifest(manifest_path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    マニフェストを読み込む
+
+    Args:
+        manifest_path: マニフェストのパス
+
+    Returns:
+        マニフェストの内容
+
+    Raises:
+        StorageError: 読み込みに失敗した場合
+    """
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise StorageError(f"マニフェストの読み込みに失敗しました: {e}")
+
+    if manifest.get("format") != MANIFEST_FORMAT:
+        raise StorageError(f"未対応のマニフェスト形式です: {manifest.get('format')}")
+    return manifest
+
+
+def open_manifest(manifest_path: Union[str, Path]) -> io.BufferedReader:
+    """
+    マニフェストからファイルを再構成するバッファ付きストリームを開く
+
+    Args:
+        manifest_path: マニフェストのパス
+
+    Returns:
+        バイナリストリーム
+
+    Raises:
+        StorageError: マニフェストの読み込みに失敗した場合
+    """
+    return io.BufferedReader(ManifestReader(manifest_path))
+
+
+class ManifestReader(io.RawIOBase):
+    """
+    マニフェストからファイルを再構成して読み込むストリーム
+
+    チャンクは読み込み位置に応じて順に開かれるため、メモリ使用量はファイルサイズに依存しません。
+    任意の位置へのシークにも対応しています。
+    """
+
+    def __init__(self, manifest_path: Union[str, Path]):
+        """
+        初期化
+
+        Args:
+            manifest_path: マニフェストのパス
+        """
+        super().__init__()
+        manifest_path = Path(manifest_path)
+        manifest = read_manifest(manifest_path)
+        self._chunks_dir = manifest_path.parent.parent / "chunks"
+        self._hashes: List[str] = [chunk_hash for chunk_hash, _ in manifest["chunks"]]
+        self._offsets: List[int] = []
+        offset = 0
+        for _, size in manifest["chunks"]:
+            self._offsets.append(offset)
+            offset += size
+        self._size = offset
+        self._pos = 0
+        self._current_index: Optional[int] = None
+        self._current_file: Optional[BinaryIO] = None
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError(f"無効なwhence: {whence}")
+        if pos < 0:
+            raise ValueError(f"負の位置にはシークできません: {pos}")
+        self._pos = pos
+        return pos
+
+    def readinto(self, buffer) -> int:
+        if self._pos >= self._size:
+            return 0
+
+        index = bisect.bisect_right(self._offsets, self._pos) - 1
+        if index != self._current_index:
+            self._close_current()
+            chunk_hash = self._hashes[index]
+            self._current_file = open(self._chunks_dir / chunk_hash[:2] / chunk_hash, "rb")
+            self._current_index = index
+
+        self._current_file.seek(self._pos - self._offsets[index])
+        n = self._current_file.readinto(buffer)
+        if not n:
+            raise StorageError(f"チャンク {self._hashes[index]} が破損しています")
+        self._pos += n
+        return n
+
+    def _close_current(self) -> None:
+        if self._current_file is not None:
+            self._current_file.close()
+            self._current_file = None
+            self._current_index = None
+
+    def close(self) -> None:
+        self._close_current()
+        super().close()
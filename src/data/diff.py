@@ -0,0 +1,461 @@
+"""
+行単位のバージョン差分
+
+このモジュールは、2つのJSONLファイルの差分を行単位で求める機能を提供します。
+ファイル全体をメモリに載せてテキストの差分を取る代わりに、各ファイルを1回ずつ読み込んで
+行ごとのハッシュ（とキー列の値のハッシュ）をハッシュの値で分割したファイルに書き出し、
+分割ごとに突き合わせます。メモリ使用量は1つの分割に入る行数に比例します。
+
+差分の求め方は2通りです。
+
+- ハッシュ（キー列を指定しない場合）: 行の内容を多重集合として比較し、追加された行と
+  削除された行を数えます。変更された行は、削除と追加の組として数えられます
+- キー（キー列を指定した場合）: 内容が一致しない行のうち、キー列の値が同じ行の組を
+  変更された行として数えます。キーが重複する場合は、ファイル内の出現順に組にします。
+  キー列の値が欠損している行は対応付けられないため、追加または削除された行として数えます
+
+行の比較は値に基づくため、列の順序の違い、整数と浮動小数点数の表記の違い（1 と 1.0）、
+欠損値と列がないことの違いは差分になりません。
+
+列単位の差分（column_diff）は、データファイルを読み込まずにバージョンごとの統計情報と
+スケッチから列の追加・削除、データ型の変化、欠損率の変化、分布の変化（PSI と
+Kolmogorov-Smirnov 統計量）を求めます。計算量は列数に比例します。
+"""
+
+import io
+import json
+import tempfile
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .duplicates import hash_rows, hash_values
+from .statistics import KLLSketch
+
+# 差分の求め方（テキストの差分、行単位の差分）
+DIFF_MODES = ("text", "rows")
+
+# 差分の計算方法のバージョン（結果が変わる変更を加えた場合は更新し、キャッシュを無効化する）
+DIFF_ENGINE_VERSION = 2
+
+# 書き出すファイルの分割数の既定値
+DEFAULT_DIFF_PARTITIONS = 64
+
+# 1度に読み込む行数の既定値
+DEFAULT_DIFF_CHUNK_ROWS = 100000
+
+# 差分のサンプルとして返す行数の既定値
+DEFAULT_SAMPLE_SIZE = 20
+
+# PSI を求める区間の数（スケッチから求める場合）
+PSI_BINS = 10
+
+# PSI で割合が0の区間に使う値
+_PSI_EPSILON = 1e-4
+
+# 分割ファイルに書き出すレコード（キーのハッシュ、行のハッシュ、行の先頭の位置、キーがあるかどうか）
+# キーがない行は、キーのハッシュの代わりに行のハッシュで分割する
+_RECORD = np.dtype([("key", "<u8"), ("row", "<u8"), ("offset", "<i8"), ("keyed", "?")])
+
+
+class DiffError(Exception):
+    """差分の計算に関するエラーを表す例外クラス"""
+    pass
+
+
+def _iter_rows(
+    open_binary: Callable[[], BinaryIO],
+    chunk_rows: int,
+) -> Iterator[Tuple[np.ndarray, pd.DataFrame]]:
+    """JSONLファイルを行の先頭の位置とともにチャンク単位で読み込む"""
+    with open_binary() as f:
+        position = 0
+        lines: List[bytes] = []
+        offsets: List[int] = []
+        for line in f:
+            if line.strip():
+                lines.append(line)
+                offsets.append(position)
+            position += len(line)
+            if len(lines) >= chunk_rows:
+                yield np.array(offsets, dtype=np.int64), pd.read_json(
+                    io.BytesIO(b"".join(lines)), lines=True,
+                )
+                lines, offsets = [], []
+        if lines:
+            yield np.array(offsets, dtype=np.int64), pd.read_json(
+                io.BytesIO(b"".join(lines)), lines=True,
+            )
+
+
+def _partition_path(directory: Path, side: int, partition: int) -> Path:
+    return directory / f"{side}-{partition:05d}.bin"
+
+
+def _write_partitions(
+    open_binary: Callable[[], BinaryIO],
+    directory: Path,
+    side: int,
+    key_column: Optional[str],
+    partitions: int,
+    chunk_rows: int,
+) -> int:
+    """ファイルの行のレコードをキーのハッシュで分割して書き出し、行数を返す"""
+    rows = 0
+    key_seen = key_column is None
+    for offsets, df in _iter_rows(open_binary, chunk_rows):
+        records = np.empty(len(df), dtype=_RECORD)
+        records["row"] = hash_rows(df)
+        records["offset"] = offsets
+        if key_column is None:
+            records["key"] = records["row"]
+            records["keyed"] = False
+        elif key_column in df.columns:
+            key_seen = True
+            hashes, present = hash_values(df[key_column])
+            records["key"] = np.where(present, hashes, records["row"])
+            records["keyed"] = present
+        else:
+            records["key"] = records["row"]
+            records["keyed"] = False
+        rows += len(df)
+
+        parts = (records["key"] % np.uint64(partitions)).astype(np.intp)
+        order = np.argsort(parts, kind="stable")
+        bounds = np.searchsorted(parts[order], np.arange(partitions + 1))
+        records = records[order]
+        for partition in range(partitions):
+            start, end = bounds[partition], bounds[partition + 1]
+            if end > start:
+                with open(_partition_path(directory, side, partition), "ab") as f:
+                    records[start:end].tofile(f)
+
+    if rows and not key_seen:
+        raise DiffError(f"キー列 {key_column} が存在しません")
+    return rows
+
+
+def _read_partition(directory: Path, side: int, partition: int) -> np.ndarray:
+    path = _partition_path(directory, side, partition)
+    if not path.exists():
+        return np.empty(0, dtype=_RECORD)
+    return np.fromfile(path, dtype=_RECORD)
+
+
+def _unmatched(values: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """
+    多重集合として突き合わせたときに相手に対応する値がない位置
+
+    同じ値が複数ある場合は、出現順に相手の同じ値の個数までを対応するものとします。
+    """
+    order = np.argsort(values, kind="stable")
+    sorted_values = values[order]
+    rank = np.arange(len(values)) - np.searchsorted(sorted_values, sorted_values, side="left")
+    sorted_others = np.sort(others)
+    counts = (
+        np.searchsorted(sorted_others, sorted_values, side="right")
+        - np.searchsorted(sorted_others, sorted_values, side="left")
+    )
+    mask = np.empty(len(values), dtype=bool)
+    mask[order] = rank >= counts
+    return mask
+
+
+def _diff_partition(
+    old: np.ndarray,
+    new: np.ndarray,
+    keyed: bool,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    1つの分割の差分
+
+    Returns:
+        (追加された行, 削除された行, 変更前の行, 変更後の行)。いずれもファイル内の順に並ぶ
+    """
+    removed = old[_unmatched(old["row"], new["row"])]
+    added = new[_unmatched(new["row"], old["row"])]
+    changed_from = changed_to = np.empty(0, dtype=_RECORD)
+
+    if keyed:
+        # 内容が一致しない行のうち、キーが同じ行を出現順に組にする（キーがない行は組にしない）
+        removed_keyed, added_keyed = removed["keyed"], added["keyed"]
+        paired_old = np.zeros(len(removed), dtype=bool)
+        paired_new = np.zeros(len(added), dtype=bool)
+        paired_old[removed_keyed] = ~_unmatched(
+            removed["key"][removed_keyed], added["key"][added_keyed],
+        )
+        paired_new[added_keyed] = ~_unmatched(
+            added["key"][added_keyed], removed["key"][removed_keyed],
+        )
+        changed_from = removed[paired_old]
+        changed_to = added[paired_new]
+        changed_from = changed_from[np.lexsort((changed_from["offset"], changed_from["key"]))]
+        changed_to = changed_to[np.lexsort((changed_to["offset"], changed_to["key"]))]
+        # 変更前の行の位置の順に並べる
+        order = np.argsort(changed_from["offset"], kind="stable")
+        changed_from, changed_to = changed_from[order], changed_to[order]
+        removed = removed[~paired_old]
+        added = added[~paired_new]
+
+    added = added[np.argsort(added["offset"], kind="stable")]
+    removed = removed[np.argsort(removed["offset"], kind="stable")]
+    return added, removed, changed_from, changed_to
+
+
+def _read_rows(open_binary: Callable[[], BinaryIO], offsets: List[int]) -> Dict[int, Any]:
+    """指定した位置の行を読み込む"""
+    rows = {}
+    with open_binary() as f:
+        for offset in sorted(set(offsets)):
+            f.seek(offset)
+            rows[offset] = json.loads(f.readline())
+    return rows
+
+
+def row_diff(
+    open_old: Callable[[], BinaryIO],
+    open_new: Callable[[], BinaryIO],
+    key_column: Optional[str] = None,
+    page: int = 0,
+    page_size: int = DEFAULT_SAMPLE_SIZE,
+    partitions: int = DEFAULT_DIFF_PARTITIONS,
+    chunk_rows: int = DEFAULT_DIFF_CHUNK_ROWS,
+    work_dir: Optional[Union[str, Path]] = None,
+) -> Dict[str, Any]:
+    """
+    2つのJSONLファイルの行単位の差分
+
+    差分の件数と、追加・削除・変更された行のサンプルを返します。サンプルは種類ごとに
+    page_size 件ずつのページに分けられ、page でページを指定します（同じファイルの組に対して
+    ページの内容は決まっています）。
+
+    Args:
+        open_old: 比較元のファイルをシーク可能なバイナリストリームとして開く関数
+        open_new: 比較先のファイルをシーク可能なバイナリストリームとして開く関数
+        key_column: 行を対応付けるキー列（指定しない場合は行の内容のハッシュで比較）
+        page: サンプルのページ番号（0から）
+        page_size: 1ページのサンプルの件数
+        partitions: 書き出すファイルの分割数
+        chunk_rows: 1度に読み込む行数
+        work_dir: 一時ファイルを作成する親ディレクトリ（指定しない場合はシステムの一時ディレクトリ）
+
+    Returns:
+        差分の情報
+
+    Raises:
+        DiffError: キー列が存在しない場合、またはページの指定が無効な場合
+    """
+    if page < 0 or page_size < 0:
+        raise DiffError("ページ番号とページの件数は0以上である必要があります")
+
+    start, end = page * page_size, (page + 1) * page_size
+    counts = {"added": 0, "removed": 0, "changed": 0}
+    samples: Dict[str, List[np.ndarray]] = {"added": [], "removed": [], "changed_from": [],
+                                            "changed_to": []}
+
+    def take(name: str, records: np.ndarray) -> slice:
+        """ページの範囲に入るレコードの範囲を求め、件数を加算"""
+        seen = counts[name]
+        counts[name] += len(records)
+        return slice(max(0, start - seen), max(0, min(len(records), end - seen)))
+
+    with tempfile.TemporaryDirectory(prefix="rowdiff-", dir=work_dir) as tmpdir:
+        directory = Path(tmpdir)
+        rows_old = _write_partitions(open_old, directory, 0, key_column, partitions, chunk_rows)
+        rows_new = _write_partitions(open_new, directory, 1, key_column, partitions, chunk_rows)
+
+        for partition in range(partitions):
+            added, removed, changed_from, changed_to = _diff_partition(
+                _read_partition(directory, 0, partition),
+                _read_partition(directory, 1, partition),
+                keyed=key_column is not None,
+            )
+            samples["added"].append(added[take("added", added)])
+            samples["removed"].append(removed[take("removed", removed)])
+            window = take("changed", changed_from)
+            samples["changed_from"].append(changed_from[window])
+            samples["changed_to"].append(changed_to[window])
+
+    offsets = {name: np.concatenate(parts)["offset"].tolist() for name, parts in samples.items()}
+    old_rows = _read_rows(open_old, offsets["removed"] + offsets["changed_from"])
+    new_rows = _read_rows(open_new, offsets["added"] + offsets["changed_to"])
+
+    return {
+        "mode": "key" if key_column is not None else "hash",
+        "key_column": key_column,
+        "rows1": rows_old,
+        "rows2": rows_new,
+        "added": counts["added"],
+        "removed": counts["removed"],
+        "changed": counts["changed"],
+        "unchanged": rows_old - counts["removed"] - counts["changed"],
+        "page": page,
+        "page_size": page_size,
+        "samples": {
+            "added": [new_rows[offset] for offset in offsets["added"]],
+            "removed": [old_rows[offset] for offset in offsets["removed"]],
+            "changed": [
+                {"from": old_rows[old], "to": new_rows[new]}
+                for old, new in zip(offsets["changed_from"], offsets["changed_to"])
+            ],
+        },
+    }
+
+
+def _psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    """区間ごとの割合から Population Stability Index を求める"""
+    expected = np.clip(np.asarray(expected, dtype=np.float64), _PSI_EPSILON, None)
+    actual = np.clip(np.asarray(actual, dtype=np.float64), _PSI_EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def _quartile_cdf(stats: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+    """最小値・四分位数・最大値を通る区分線形の累積分布関数の点"""
+    points = np.array([stats[key] for key in ("min", "q1", "median", "q3", "max")])
+    return points, np.array([0.0, 0.25, 0.5, 0.75, 1.0])
+
+
+def _interpolate_cdf(x: np.ndarray, points: np.ndarray, probs: np.ndarray) -> np.ndarray:
+    """区分線形の累積分布関数の値（範囲外は0または1）"""
+    # 同じ値が続く点（定数列など）では、その値以下の割合を最大の確率とする
+    unique_points, last = np.unique(points[::-1], return_index=True)
+    unique_probs = probs[::-1][last]
+    return np.interp(x, unique_points, unique_probs, left=0.0, right=1.0)
+
+
+def _numeric_drift(
+    stats1: Dict[str, float],
+    stats2: Dict[str, float],
+    sketch1: Optional[KLLSketch],
+    sketch2: Optional[KLLSketch],
+) -> Dict[str, Any]:
+    """数値型カラムの分布の変化"""
+    if sketch1 is not None and sketch2 is not None and sketch1.count and sketch2.count:
+        # 比較元の分位点で区切った区間の割合を比べる
+        edges = np.unique(sketch1.quantiles(np.linspace(0, 1, PSI_BINS + 1)[1:-1]))
+        expected = np.diff(np.concatenate([[0.0], sketch1.cdf(edges), [1.0]]))
+        actual = np.diff(np.concatenate([[0.0], sketch2.cdf(edges), [1.0]]))
+        points = np.concatenate(sketch1.levels + sketch2.levels)
+        ks = np.max(np.abs(sketch1.cdf(points) - sketch2.cdf(points)))
+        return {
+            "method": "sketch",
+            "psi": _psi(expected, actual),
+            "ks": float(ks),
+            "rank_error": max(sketch1.rank_error, sketch2.rank_error),
+        }
+
+    if any(np.isnan(stats[key]) for stats in (stats1, stats2) for key in ("min", "max")):
+        return {"method": "quartiles", "psi": None, "ks": None}
+    points1, probs1 = _quartile_cdf(stats1)
+    points2, probs2 = _quartile_cdf(stats2)
+    edges = points1[1:-1]
+    expected = np.diff(np.concatenate([[0.0], _interpolate_cdf(edges, points1, probs1), [1.0]]))
+    actual = np.diff(np.concatenate([[0.0], _interpolate_cdf(edges, points2, probs2), [1.0]]))
+    points = np.concatenate([points1, points2])
+    ks = np.max(np.abs(
+        _interpolate_cdf(points, points1, probs1) - _interpolate_cdf(points, points2, probs2)
+    ))
+    return {"method": "quartiles", "psi": _psi(expected, actual), "ks": float(ks)}
+
+
+def _categorical_drift(
+    stats1: Dict[str, Any],
+    stats2: Dict[str, Any],
+    non_null1: int,
+    non_null2: int,
+) -> Dict[str, Any]:
+    """カテゴリカルカラムの分布の変化（両方の最頻値に含まれる値とそれ以外の割合で比較）"""
+    if not non_null1 or not non_null2:
+        return {"method": "top_values", "psi": None}
+    common = [value for value in stats1["most_common"] if value in stats2["most_common"]]
+    counts1 = np.array([stats1["most_common"][value] for value in common] or [0], dtype=np.float64)
+    counts2 = np.array([stats2["most_common"][value] for value in common] or [0], dtype=np.float64)
+    expected = np.append(counts1, non_null1 - counts1.sum()) / non_null1
+    actual = np.append(counts2, non_null2 - counts2.sum()) / non_null2
+    return {"method": "top_values", "psi": _psi(expected, actual)}
+
+
+def _column_sketch(sketch: Optional[Dict[str, Any]], column: str) -> Optional[KLLSketch]:
+    if not sketch or column not in sketch.get("columns", {}):
+        return None
+    return KLLSketch.from_dict(sketch["columns"][column]["quantiles"])
+
+
+def column_diff(
+    statistics1: Dict[str, Any],
+    statistics2: Dict[str, Any],
+    sketch1: Optional[Dict[str, Any]] = None,
+    sketch2: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    統計情報から列単位の差分を求める
+
+    数値型カラムの分布の変化は、両方のバージョンにストリーミングエンジンのスケッチがあれば
+    比較元の十分位で区切った区間の割合から PSI を、保持されている値での累積分布の差の最大値
+    から KS 統計量を求めます（method が "sketch"）。スケッチがない場合は最小値・四分位数・
+    最大値を通る区分線形の分布で近似します（method が "quartiles"）。カテゴリカルカラムは
+    両方の最頻値に含まれる値とそれ以外の割合から PSI を求めます（method が "top_values"）。
+
+    Args:
+        statistics1: 比較元の統計情報
+        statistics2: 比較先の統計情報
+        sketch1: 比較元のストリーミングエンジンのスケッチ（StreamingStatistics.to_dict の値）
+        sketch2: 比較先のストリーミングエンジンのスケッチ
+
+    Returns:
+        列単位の差分
+    """
+    types1 = statistics1.get("data_types", {})
+    types2 = statistics2.get("data_types", {})
+    rows1 = statistics1.get("row_count", 0)
+    rows2 = statistics2.get("row_count", 0)
+
+    columns = {}
+    for column in [name for name in types1 if name in types2]:
+        nulls1 = statistics1["missing_values"].get(column, 0)
+        nulls2 = statistics2["missing_values"].get(column, 0)
+        null_rate1 = nulls1 / rows1 if rows1 else 0.0
+        null_rate2 = nulls2 / rows2 if rows2 else 0.0
+        result: Dict[str, Any] = {
+            "dtype": {
+                "from": types1[column],
+                "to": types2[column],
+                "changed": types1[column] != types2[column],
+            },
+            "null_rate": {
+                "from": null_rate1,
+                "to": null_rate2,
+                "delta": null_rate2 - null_rate1,
+            },
+        }
+
+        numeric1 = statistics1.get("numeric_statistics", {}).get(column)
+        numeric2 = statistics2.get("numeric_statistics", {}).get(column)
+        categorical1 = statistics1.get("categorical_statistics", {}).get(column)
+        categorical2 = statistics2.get("categorical_statistics", {}).get(column)
+        if numeric1 and numeric2:
+            result["mean"] = {
+                "from": numeric1["mean"],
+                "to": numeric2["mean"],
+                "delta": numeric2["mean"] - numeric1["mean"],
+            }
+            result["drift"] = _numeric_drift(
+                numeric1,
+                numeric2,
+                _column_sketch(sketch1, column),
+                _column_sketch(sketch2, column),
+            )
+        elif categorical1 and categorical2:
+            result["drift"] = _categorical_drift(
+                categorical1, categorical2, rows1 - nulls1, rows2 - nulls2,
+            )
+        columns[column] = result
+
+    return {
+        "added_columns": [name for name in types2 if name not in types1],
+        "removed_columns": [name for name in types1 if name not in types2],
+        "dtype_changes": [name for name, result in columns.items() if result["dtype"]["changed"]],
+        "columns": columns,
+    }
@@ -0,0 +1,217 @@
+"""
+行の重複検出
+
+このモジュールは、メモリに載らないサイズのデータセットでも行の重複を厳密に数えるための機能を
+提供します。行ごとに64ビットのハッシュをベクトル演算で求め、メモリ上のバッファが上限に
+達したらハッシュの値で分割したファイルに書き出します。同じ行は必ず同じファイルに入るため、
+最後にファイルごとにユニークなハッシュを数えて合計すれば、全体のユニークな行数になります。
+
+メモリ使用量はおおよそ「バッファの行数 × 8バイト」と「1ファイルに入るハッシュの数 × 8バイト」の
+大きい方です。異なる行のハッシュが一致する確率は n 行で約 n^2 / 2^65 です（10億行で約3%の
+確率で1件程度を重複と誤判定する程度）。
+"""
+
+import tempfile
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# メモリ上に保持するハッシュの件数の既定値（約32MB）
+DEFAULT_MEMORY_ROWS = 1 << 22
+
+# 書き出すファイルの分割数の既定値
+DEFAULT_SPILL_PARTITIONS = 256
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """splitmix64 の最終ステップ（ビットを拡散させる）"""
+    with np.errstate(over="ignore"):
+        values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
+
+
+def hash_values(series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    列の値の64ビットハッシュ
+
+    数値は浮動小数点数に揃えてからハッシュを求めるため、1 と 1.0 は同じハッシュになります。
+
+    Args:
+        series: 列
+
+    Returns:
+        (値ごとのハッシュ, 欠損値でない位置)
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        # チャンク間で整数と浮動小数点数が揺れても同じ値が同じハッシュになるようにする
+        series = series.astype(np.float64)
+    try:
+        hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+    except TypeError:
+        hashes = pd.util.hash_pandas_object(series.astype(str), index=False).to_numpy()
+    return hashes, series.notnull().to_numpy()
+
+
+def hash_rows(df: pd.DataFrame) -> np.ndarray:
+    """
+    行ごとの64ビットハッシュ
+
+    列名と値の組のハッシュを列の順序によらない方法で結合します。欠損値は結合に含めないため、
+    チャンクによって列の有無や順序が異なっても、同じ内容の行は同じハッシュになります
+    （列がないことと欠損値は区別しません）。
+
+    Args:
+        df: データフレーム
+
+    Returns:
+        行ごとのハッシュ（uint64）
+    """
+    result = np.zeros(len(df), dtype=np.uint64)
+    if len(df) == 0:
+        return result
+
+    names = pd.util.hash_array(np.array([str(name) for name in df.columns], dtype=object))
+    with np.errstate(over="ignore"):
+        for name, (_, series) in zip(names, df.items()):
+            hashes, present = hash_values(series)
+            if present.all():
+                result += _mix(hashes ^ name)
+            else:
+                result[present] += _mix(hashes[present] ^ name)
+    return result
+
+
+class DistinctRowCounter:
+    """
+    ディスクに書き出しながら行のユニーク数を数えるカウンタ
+
+    使い終わったら close を呼ぶか、with 文で使ってください。
+    """
+
+    def __init__(
+        self,
+        memory_rows: int = DEFAULT_MEMORY_ROWS,
+        partitions: int = DEFAULT_SPILL_PARTITIONS,
+        spill_dir: Optional[Union[str, Path]] = None,
+    ):
+        """
+        初期化
+
+        Args:
+            memory_rows: メモリ上に保持するハッシュの件数の上限
+            partitions: 書き出すファイルの分割数
+            spill_dir: 書き出し先の親ディレクトリ（指定しない場合はシステムの一時ディレクトリ）
+        """
+        if memory_rows < 1 or partitions < 1:
+            raise ValueError("memory_rows と partitions は1以上である必要があります")
+        self.memory_rows = memory_rows
+        self.partitions = partitions
+        self.spill_dir = spill_dir
+        self.row_count = 0
+        self._buffer: List[np.ndarray] = []
+        self._buffered = 0
+        self._tmpdir: Optional[tempfile.TemporaryDirectory] = None
+
+    @property
+    def spilled(self) -> bool:
+        """ディスクに書き出したかどうか"""
+        return self._tmpdir is not None
+
+    def update(self, df: pd.DataFrame) -> None:
+        """チャンクの行を追加"""
+        self.update_hashes(hash_rows(df))
+
+    def update_hashes(self, hashes: np.ndarray) -> None:
+        """行のハッシュを追加"""
+        self.row_count += len(hashes)
+        self._buffer.append(np.asarray(hashes, dtype=np.uint64))
+        self._buffered += len(hashes)
+        if self._buffered >= self.memory_rows:
+            self._flush()
+
+    def _drain(self) -> np.ndarray:
+        """バッファを重複を除いたハッシュの配列として取り出す"""
+        hashes = np.unique(np.concatenate(self._buffer)) if self._buffer else \
+            np.empty(0, dtype=np.uint64)
+        self._buffer = []
+        self._buffered = 0
+        return hashes
+
+    def _partition_path(self, partition: int) -> Path:
+        return Path(self._tmpdir.name) / f"{partition:05d}.bin"
+
+    def _flush(self) -> None:
+        """バッファをハッシュの値で分割してファイルに追記"""
+        hashes = self._drain()
+        if self._tmpdir is None:
+            self._tmpdir = tempfile.TemporaryDirectory(prefix="rowhash-", dir=self.spill_dir)
+
+        # ソート済みなので、分割番号で安定ソートすれば各分割が連続した範囲になる
+        parts = (hashes % np.uint64(self.partitions)).astype(np.intp)
+        order = np.argsort(parts, kind="stable")
+        bounds = np.searchsorted(parts[order], np.arange(self.partitions + 1))
+        hashes = hashes[order]
+        for partition in range(self.partitions):
+            start, end = bounds[partition], bounds[partition + 1]
+            if end > start:
+                with open(self._partition_path(partition), "ab") as f:
+                    hashes[start:end].tofile(f)
+
+    def distinct_count(self) -> int:
+        """
+        ユニークな行数を取得
+
+        Returns:
+            ユニークな行数
+        """
+        if not self.spilled:
+            # 次の呼び出しや追加に備え、重複を除いた配列をバッファに戻す
+            hashes = self._drain()
+            self._buffer = [hashes]
+            self._buffered = len(hashes)
+            return int(len(hashes))
+
+        self._flush()
+        total = 0
+        for partition in range(self.partitions):
+            path = self._partition_path(partition)
+            if path.exists():
+                total += int(np.unique(np.fromfile(path, dtype=np.uint64)).size)
+        return total
+
+    def close(self) -> None:
+        """書き出したファイルを削除"""
+        self._buffer = []
+        self._buffered = 0
+        if self._tmpdir is not None:
+            self._tmpdir.cleanup()
+            self._tmpdir = None
+
+    def __enter__(self) -> "DistinctRowCounter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def count_distinct_rows(
+    chunks: Iterable[pd.DataFrame],
+    **options,
+) -> Tuple[int, int]:
+    """
+    チャンクの列から行数とユニークな行数を数える
+
+    Args:
+        chunks: データフレームのチャンク
+        **options: DistinctRowCounter に渡すパラメータ
+
+    Returns:
+        (行数, ユニークな行数)
+    """
+    with DistinctRowCounter(**options) as counter:
+        for chunk in chunks:
+            counter.update(chunk)
+        return counter.row_count, counter.distinct_count()
@@ -0,0 +1,82 @@
+"""
+プロセス内イベントバス
+
+このモジュールは、アクセス権限の変更などをプロセス内の購読者（キャッシュなど）に通知するための
+イベントバスを提供します。イベントは発行したスレッドで同期的に配信されます。
+"""
+
+import threading
+import weakref
+from typing import Any, Callable, Dict, List
+
+# アクセス権限が変わったことを表すイベント（user_ids × dataset_ids の組み合わせが対象）
+ACCESS_CHANGED = "access_changed"
+
+EventHandler = Callable[..., None]
+
+
+class EventBus:
+    """
+    スレッドセーフなイベントバス
+
+    メソッドを購読者として登録した場合は弱参照で保持するため、購読者のオブジェクトが
+    不要になると自動的に登録が解除されます。
+    """
+
+    def __init__(self):
+        """初期化"""
+        self._handlers: Dict[str, List[Callable[[], Any]]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, event_type: str, handler: EventHandler) -> None:
+        """
+        イベントの購読者を登録
+
+        Args:
+            event_type: イベントの種類
+            handler: イベントの内容をキーワード引数として受け取る関数
+        """
+        if hasattr(handler, "__self__"):
+            ref = weakref.WeakMethod(handler)
+        else:
+            ref = lambda: handler  # noqa: E731
+        with self._lock:
+            self._handlers.setdefault(event_type, []).append(ref)
+
+    def unsubscribe(self, event_type: str, handler: EventHandler) -> None:
+        """
+        イベントの購読者の登録を解除
+
+        Args:
+            event_type: イベントの種類
+            handler: 登録した関数
+        """
+        with self._lock:
+            self._handlers[event_type] = [
+                ref for ref in self._handlers.get(event_type, [])
+                if ref() not in (None, handler)
+            ]
+
+    def publish(self, event_type: str, **payload: Any) -> None:
+        """
+        イベントを発行
+
+        Args:
+            event_type: イベントの種類
+            **payload: 購読者に渡すイベントの内容
+        """
+        with self._lock:
+            refs = list(self._handlers.get(event_type, []))
+        handlers = [ref() for ref in refs]
+        if any(handler is None for handler in handlers):
+            with self._lock:
+                self._handlers[event_type] = [
+                    ref for ref in self._handlers.get(event_type, []) if ref() is not None
+                ]
+        for handler in handlers:
+            if handler is not None:
+                handler(**payload)
+
+
+# サービスとキャッシュが既定で使うプロセス全体のイベントバス
+default_event_bus = EventBus()
@@ -0,0 +1,213 @@
+"""
+バックグラウンドジョブ
+
+このモジュールは、統計情報の再計算などの時間のかかる処理を、リクエストを処理するスレッドとは
+別のワーカーで実行するためのジョブキューを提供します。同じキーのジョブが実行待ちまたは実行中の
+場合は新しいジョブを作らず、実行中のジョブを返します（重複リクエストの集約）。
+"""
+
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+# ワーカー数の既定値
+DEFAULT_MAX_WORKERS = 2
+
+# 実行待ちのジョブ数の上限の既定値
+DEFAULT_MAX_PENDING = 100
+
+# 完了したジョブを保持する件数の既定値
+DEFAULT_MAX_FINISHED = 1000
+
+
+class JobError(Exception):
+    """ジョブ関連のエラーを表す例外クラス"""
+    pass
+
+
+class JobStatus(str, Enum):
+    """ジョブの状態を表す列挙型"""
+    PENDING = "pending"  # 実行待ち
+    RUNNING = "running"  # 実行中
+    SUCCEEDED = "succeeded"  # 成功
+    FAILED = "failed"  # 失敗
+
+
+class Job:
+    """キューに登録されたジョブ"""
+
+    def __init__(self, key: Hashable):
+        """
+        初期化
+
+        Args:
+            key: 重複リクエストを集約するためのキー
+        """
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = JobStatus.PENDING
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.owners: Set[Hashable] = set()  # ジョブを登録したユーザー（集約されたものを含む）
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        """ジョブが完了（成功または失敗）したかどうか"""
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        ジョブの完了を待つ
+
+        Args:
+            timeout: 待機する秒数（指定しない場合は完了まで待つ）
+
+        Returns:
+            ジョブが完了したかどうか
+        """
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """ジョブの状態を辞書形式で取得（結果は含まない）"""
+        return {
+            "job_id": self.id,
+            "status": self.status.value,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """
+    ワーカー数を制限したジョブキュー
+
+    ジョブはスレッドプールで実行されます。ジョブ内の処理がデータベースを使う場合は、
+    ジョブごとにセッションを作成してください。
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        max_finished: int = DEFAULT_MAX_FINISHED,
+    ):
+        """
+        初期化
+
+        Args:
+            max_workers: 同時に実行するジョブ数の上限
+            max_pending: 実行待ちまたは実行中のジョブ数の上限
+            max_finished: 状態を問い合わせられるよう保持する完了済みジョブ数の上限
+        """
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[Hashable, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        key: Hashable,
+        func: Callable[..., Any],
+        *args: Any,
+        owner: Optional[Hashable] = None,
+        **kwargs: Any,
+    ) -> Job:
+        """
+        ジョブを登録
+
+        同じキーのジョブが実行待ちまたは実行中の場合は、そのジョブを返します。
+        この場合も owner はそのジョブの登録者に追加されます。
+
+        Args:
+            key: 重複リクエストを集約するためのキー
+            func: 実行する関数
+            *args: 関数の位置引数
+            owner: ジョブを登録したユーザー（get で owner を指定した場合に照合される）
+            **kwargs: 関数のキーワード引数
+
+        Returns:
+            登録された（または集約された）ジョブ
+
+        Raises:
+            JobError: 実行待ちのジョブ数が上限に達している場合
+        """
+        with self._lock:
+            active = self._active.get(key)
+            if active is not None:
+                if owner is not None:
+                    active.owners.add(owner)
+                return active
+            if len(self._active) >= self.max_pending:
+                raise JobError("実行待ちのジョブが多すぎます。しばらくしてから再度実行してください")
+
+            job = Job(key)
+            if owner is not None:
+                job.owners.add(owner)
+            self._jobs[job.id] = job
+            self._active[key] = job
+
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, job_id: str, owner: Optional[Hashable] = None) -> Optional[Job]:
+        """
+        ジョブを取得
+
+        Args:
+            job_id: ジョブID
+            owner: ユーザー（指定した場合は、そのユーザーが登録したジョブのみ返す）
+
+        Returns:
+            ジョブ（存在しない、保持期間を過ぎた、または owner が登録者でない場合はNone）
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or (owner is not None and owner not in job.owners):
+            return None
+        return job
+
+    def _run(self, job: Job, func: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> None:
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        try:
+            job.result = func(*args, **kwargs)
+            job.status = JobStatus.SUCCEEDED
+        except Exception as e:
+            job.error = str(e)
+            job.status = JobStatus.FAILED
+        finally:
+            job.finished_at = datetime.utcnow()
+            with self._lock:
+                self._active.pop(job.key, None)
+                self._trim_finished()
+            job._done.set()
+
+    def _trim_finished(self) -> None:
+        """古い完了済みジョブを削除"""
+        finished = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+        ]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        ワーカーを停止
+
+        Args:
+            wait: 実行中のジョブの完了を待つかどうか
+        """
+        self._executor.shutdown(wait=wait)
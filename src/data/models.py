@@ -8,7 +8,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Dict, List, Optional
 
-from sqlalchemy import Column, DateTime, Enum as SQLEnum, ForeignKey, Integer, JSON, String, Text, Table
+from sqlalchemy import BigInteger, Column, DateTime, Enum as SQLEnum, ForeignKey, Index, Integer, JSON, String, Text, Table, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from ..security.models import Base, User
@@ -23,6 +23,12 @@ class DatasetStatus(str, Enum):
     ARCHIVED = "archived"  # アーカイブ済み
 
 
+class StorageMode(str, Enum):
+    """バージョンファイルの保存形式を表す列挙型"""
+    FILE = "file"  # ファイル全体をブロブとして保存
+    DELTA = "delta"  # チャンク単位で重複排除し、マニフェストで管理
+
+
 class Dataset(Base):
     """学習データセットを表すモデル"""
     __tablename__ = "datasets"
@@ -55,15 +61,22 @@ class DatasetVersion(Base):
     id = Column(Integer, primary_key=True)
     dataset_id = Column(Integer, ForeignKey("datasets.id"), nullable=False)
     version = Column(String(50), nullable=False)  # 例: "1.0.0"
-    storage_path = Column(String(1024), nullable=False)  # データファイルの保存パス
-    file_hash = Column(String(64), nullable=False)  # ファイルのSHA-256ハッシュ
+    storage_path = Column(String(1024), nullable=False)  # データファイル（またはマニフェスト）の保存パス
+    storage_mode = Column(SQLEnum(StorageMode), nullable=False, default=StorageMode.FILE)  # 保存形式
+    columnar_path = Column(String(1024))  # 列指向フォーマット（Parquet）のサイドカーのパス
+    file_hash = Column(String(64), nullable=False, index=True)  # ファイルのSHA-256ハッシュ
+    file_size = Column(BigInteger, index=True)  # ファイルサイズ（バイト）
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     created_by_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     quality_metrics = Column(JSON)  # データ品質指標
+    appended_from_id = Column(Integer, ForeignKey("dataset_versions.id"))  # 追記元のバージョン
+    append_offset = Column(BigInteger)  # 追記部分の開始位置（追記元のファイルサイズ）
+    statistics_sketch = Column(JSON)  # マージ可能な統計情報のスケッチ
 
     # リレーションシップ
     dataset = relationship("Dataset", back_populates="versions")
     created_by = relationship("User")
+    appended_from = relationship("DatasetVersion", remote_side=[id])
 
 
 class Metadata(Base):
@@ -100,6 +113,45 @@ class QualityMetrics(Base):
     dataset_version = relationship("DatasetVersion")
 
 
+class StatisticsCache(Base):
+    """
+    統計情報のキャッシュを表すモデル
+
+    同じ内容のファイルからは同じ統計情報が得られるため、バージョンではなく
+    ファイルのハッシュと統計エンジンのバージョンをキーとして保存します。
+    """
+    __tablename__ = "statistics_cache"
+    __table_args__ = (UniqueConstraint("file_hash", "engine_version"),)
+
+    id = Column(Integer, primary_key=True)
+    file_hash = Column(String(64), nullable=False, index=True)  # ファイルのSHA-256ハッシュ
+    engine_version = Column(String(50), nullable=False)  # 統計エンジンのバージョン（例: "exact/1"）
+    statistics = Column(JSON, nullable=False)  # 統計情報
+    quality_metrics = Column(JSON)  # データ品質指標
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class VersionDiffCache(Base):
+    """
+    バージョン間の差分のキャッシュを表すモデル
+
+    差分はファイルの内容だけで決まるため、2つのファイルのハッシュと差分のオプションを
+    キーとして保存します。件数とサイズの合計が上限を超えると、最後に参照された日時が
+    古いものから削除されます。
+    """
+    __tablename__ = "version_diff_cache"
+    __table_args__ = (UniqueConstraint("file_hash1", "file_hash2", "options"),)
+
+    id = Column(Integer, primary_key=True)
+    file_hash1 = Column(String(64), nullable=False, index=True)  # 比較元のファイルのSHA-256ハッシュ
+    file_hash2 = Column(String(64), nullable=False, index=True)  # 比較先のファイルのSHA-256ハッシュ
+    options = Column(String(255), nullable=False)  # 差分の求め方とオプション（JSON）
+    result = Column(JSON)  # 差分
+    size = Column(BigInteger, nullable=False)  # 差分のJSONのバイト数
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_accessed_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
 # ユーザーグループの関連テーブル
 user_group_association = Table(
     "user_group_association",
@@ -160,6 +212,7 @@ class AccessLevel(str, Enum):
 class DatasetAccess(Base):
     """データセットのアクセス権限を表すモデル"""
     __tablename__ = "dataset_access"
+    __table_args__ = (Index("ix_dataset_access_dataset_group", "dataset_id", "group_id"),)
 
     id = Column(Integer, primary_key=True)
     dataset_id = Column(Integer, ForeignKey("datasets.id"), nullable=False)
@@ -176,4 +229,19 @@ class DatasetAccess(Base):
 
 
 # Datasetモデルにaccess_controlsリレーションシップを追加
-Dataset.access_controls = relationship("DatasetAccess", back_populates="dataset", cascade="all, delete-orphan") 
\ No newline at end of file
+Dataset.access_controls = relationship("DatasetAccess", back_populates="dataset", cascade="all, delete-orphan") 
+
+class DatasetAccessIndex(Base):
+    """
+    ユーザーごとのアクセス可能なデータセットを表すモデル
+
+    作成者であることとグループ経由のアクセス権限から求めた実効的なアクセス権限
+    （最も強いもの）を、ユーザーとデータセットの組み合わせごとに保存します。
+    権限の付与・削除やグループのメンバーの変更のたびに、影響を受ける組み合わせだけが
+    更新されます。
+    """
+    __tablename__ = "dataset_access_index"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    dataset_id = Column(Integer, ForeignKey("datasets.id"), primary_key=True, index=True)
+    max_level = Column(SQLEnum(AccessLevel), nullable=False)  # 実効的なアクセス権限レベル
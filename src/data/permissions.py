@@ -0,0 +1,188 @@
+"""
+実効アクセス権限のキャッシュ
+
+このモジュールは、ユーザーのデータセットに対する実効的なアクセス権限（所属するグループの
+権限のうち最も強いもの）をキャッシュする機能を提供します。エントリは有効期限とエントリ数の
+上限を持ち、権限の付与・削除やグループのメンバーの変更がイベントバスで通知されると、
+影響を受ける (ユーザーID, データセットID) の組み合わせだけが削除されます。
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .cache import LRUCache
+from .events import ACCESS_CHANGED, EventBus, default_event_bus
+
+# エントリの有効期限の既定値（秒）
+DEFAULT_PERMISSION_TTL = 60.0
+
+# プロセス内に保持するエントリ数の既定値
+DEFAULT_PERMISSION_CACHE_SIZE = 100000
+
+# (ユーザーID, データセットID)
+PermissionKey = Tuple[int, int]
+
+
+class PermissionBackend:
+    """
+    実効アクセス権限の保存先の基底クラス
+
+    値はアクセス権限の強さ（整数、権限がない場合は0）です。複数のAPIワーカーで
+    キャッシュを共有する場合は、Redis などの共有ストアを使うサブクラスを実装し、
+    PermissionCache に渡してください。削除が共有ストアに対して行われるため、
+    どのワーカーで権限が変更されても全てのワーカーで古いエントリが使われなくなります。
+    """
+
+    def get_many(self, keys: List[PermissionKey]) -> Dict[PermissionKey, int]:
+        """有効期限内のエントリを取得（存在しないキーは含まない）"""
+        raise NotImplementedError
+
+    def set_many(self, entries: Dict[PermissionKey, int], ttl: float) -> None:
+        """エントリを有効期限付きで保存"""
+        raise NotImplementedError
+
+    def delete_many(self, keys: List[PermissionKey]) -> None:
+        """エントリを削除"""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """全てのエントリを削除"""
+        raise NotImplementedError
+
+
+class MemoryPermissionBackend(PermissionBackend):
+    """プロセス内のLRUキャッシュを使う保存先"""
+
+    def __init__(self, max_entries: int = DEFAULT_PERMISSION_CACHE_SIZE):
+        """
+        初期化
+
+        Args:
+            max_entries: 保持するエントリ数の上限
+        """
+        self._entries = LRUCache(max_entries)
+
+    def get_many(self, keys: List[PermissionKey]) -> Dict[PermissionKey, int]:
+        now = time.monotonic()
+        result = {}
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            rank, expires_at = entry
+            if expires_at <= now:
+                self._entries.pop(key)
+                continue
+            result[key] = rank
+        return result
+
+    def set_many(self, entries: Dict[PermissionKey, int], ttl: float) -> None:
+        expires_at = time.monotonic() + ttl
+        for key, rank in entries.items():
+            self._entries.put(key, (rank, expires_at))
+
+    def delete_many(self, keys: List[PermissionKey]) -> None:
+        for key in keys:
+            self._entries.pop(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class PermissionCache:
+    """
+    (ユーザーID, データセットID) → 実効アクセス権限の強さ のキャッシュ
+
+    生成時にイベントバスの ACCESS_CHANGED を購読し、通知されたユーザーとデータセットの
+    組み合わせのエントリを削除します。データベースからの読み込み中に権限が変更された場合に
+    古い値を保存しないよう、読み込み前に generation を取得して put_many に渡してください。
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_PERMISSION_TTL,
+        max_entries: int = DEFAULT_PERMISSION_CACHE_SIZE,
+        backend: Optional[PermissionBackend] = None,
+        event_bus: Optional[EventBus] = None,
+    ):
+        """
+        初期化
+
+        Args:
+            ttl: エントリの有効期限（秒）
+            max_entries: プロセス内に保持するエントリ数の上限（backend を指定した場合は無視）
+            backend: エントリの保存先（指定しない場合はプロセス内のLRUキャッシュ）
+            event_bus: 権限の変更を受け取るイベントバス（指定しない場合はプロセス全体のもの）
+        """
+        if ttl <= 0:
+            raise ValueError(f"有効期限は正の数である必要があります: {ttl}")
+        self.ttl = ttl
+        self.backend = backend if backend is not None else MemoryPermissionBackend(max_entries)
+        self._generation = 0
+        self._lock = threading.Lock()
+        (event_bus or default_event_bus).subscribe(ACCESS_CHANGED, self._on_access_changed)
+
+    @property
+    def generation(self) -> int:
+        """エントリが削除されるたびに増える世代番号"""
+        return self._generation
+
+    def get_many(self, user_id: int, dataset_ids: Iterable[int]) -> Dict[int, int]:
+        """
+        キャッシュされている実効アクセス権限の強さを取得
+
+        Args:
+            user_id: ユーザーID
+            dataset_ids: データセットIDのリスト
+
+        Returns:
+            データセットID → 強さ（キャッシュされていないデータセットは含まない）
+        """
+        entries = self.backend.get_many([(user_id, dataset_id) for dataset_id in dataset_ids])
+        return {dataset_id: rank for (_, dataset_id), rank in entries.items()}
+
+    def put_many(self, user_id: int, ranks: Dict[int, int], generation: int) -> None:
+        """
+        実効アクセス権限の強さを保存
+
+        Args:
+            user_id: ユーザーID
+            ranks: データセットID → 強さ
+            generation: データベースから読み込む前に取得した generation
+                （その後にエントリが削除されていた場合は保存しない）
+        """
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.backend.set_many(
+                {(user_id, dataset_id): rank for dataset_id, rank in ranks.items()},
+                self.ttl,
+            )
+
+    def invalidate(self, user_ids: Iterable[int], dataset_ids: Iterable[int]) -> None:
+        """
+        ユーザーとデータセットの全ての組み合わせのエントリを削除
+
+        Args:
+            user_ids: ユーザーIDのリスト
+            dataset_ids: データセットIDのリスト
+        """
+        dataset_ids = list(dataset_ids)
+        keys = [(user_id, dataset_id) for user_id in user_ids for dataset_id in dataset_ids]
+        with self._lock:
+            self._generation += 1
+            if keys:
+                self.backend.delete_many(keys)
+
+    def clear(self) -> None:
+        """全てのエントリを削除"""
+        with self._lock:
+            self._generation += 1
+            self.backend.clear()
+
+    def _on_access_changed(self, user_ids: Iterable[int], dataset_ids: Iterable[int]) -> None:
+        self.invalidate(user_ids, dataset_ids)
@@ -4,30 +4,104 @@
 このモジュールは、データセットの管理と検証のためのサービスを提供します。
 """
 
-import hashlib
+import base64
+import copy
+import functools
+import io
 import json
 import os
-import shutil
 import tarfile
-import tempfile
+import threading
+import time
+import uuid
+import weakref
+import zipfile
+import zlib
 from datetime import datetime
 from difflib import unified_diff
 from pathlib import Path
-from typing import Dict, List, Optional, Union, Tuple, Any
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 import numpy as np
 import pandas as pd
-from sqlalchemy.orm import Session
+from sqlalchemy import Exists, String, and_, bindparam, case, cast, func, insert, or_, select, update
+from sqlalchemy.orm import Query, Session
 
 from .models import (
     AccessLevel,
     Dataset,
     DatasetAccess,
+    DatasetAccessIndex,
     DatasetStatus,
     DatasetVersion,
     Metadata,
     QualityMetrics,
+    StatisticsCache,
+    StorageMode,
     UserGroup,
     User,
+    VersionDiffCache,
+    user_group_association,
+)
+from .archive import (
+    ARCHIVE_FORMATS,
+    DEFAULT_COMPRESS_LEVEL,
+    ArchiveError,
+    ThroughputMeter,
+    MANIFEST_SUFFIX,
+    manifest_path_for,
+    match_version,
+    member_name,
+    open_archive_writer,
+)
+from .cache import LRUCache
+from .columnar import (
+    COLUMNAR_SUFFIX,
+    DEFAULT_CHUNK_ROWS,
+    columnar_layout,
+    iter_columnar,
+    read_columnar,
+    write_columnar,
+)
+from .delta import ChunkStore, open_manifest, read_manifest
+from .diff import (
+    DEFAULT_SAMPLE_SIZE,
+    DIFF_ENGINE_VERSION,
+    DIFF_MODES,
+    DiffError,
+    column_diff,
+    row_diff,
+)
+from .duplicates import DistinctRowCounter
+from .events import ACCESS_CHANGED, EventBus, default_event_bus
+from .permissions import PermissionCache
+from .statistics import (
+    DEFAULT_CONFIDENCE,
+    DEFAULT_SAMPLE_ROWS,
+    STATISTICS_ENGINE_VERSION,
+    STATISTICS_ENGINES,
+    ChunkReader,
+    ExactPartition,
+    StreamingStatistics,
+    engine_version,
+    exact_statistics,
+    iter_jsonl_range,
+    parallel_column_statistics,
+    parallel_exact_statistics,
+    parallel_statistics,
+    sample_jsonl,
+    sample_size,
+    sampled_statistics,
+    split_jsonl,
+    streaming_statistics,
+)
+from .storage import (
+    DEFAULT_CHUNK_SIZE,
+    BlobStore,
+    PrefixHash,
+    ProgressCallback,
+    StorageError,
+    hash_file,
+    hash_prefix,
 )
 
 
@@ -46,11 +120,57 @@ class AccessControlError(Exception):
     pass
 
 
+# アクセス権限レベルの強さ（大きいほど強い）
+ACCESS_LEVEL_RANKS = {
+    AccessLevel.READ: 1,
+    AccessLevel.WRITE: 2,
+    AccessLevel.ADMIN: 3,
+}
+RANKED_ACCESS_LEVELS = {rank: level for level, rank in ACCESS_LEVEL_RANKS.items()}
+
+
+def _access_rank():
+    """グループのアクセス権限の強さを求める式"""
+    # 比較式にすることで、列の型（列挙型の名前で保存）に合わせて値がバインドされる
+    return case(
+        *[
+            (DatasetAccess.access_level == level, value)
+            for level, value in ACCESS_LEVEL_RANKS.items()
+        ],
+        else_=0,
+    )
+
+
+def _levels_at_least(access_level: AccessLevel) -> List[AccessLevel]:
+    """指定したアクセス権限レベル以上のレベルのリスト"""
+    required_rank = ACCESS_LEVEL_RANKS[access_level]
+    return [level for level, rank in ACCESS_LEVEL_RANKS.items() if rank >= required_rank]
+
+
 class AccessControlService:
     """アクセス制御サービス"""
 
-    def __init__(self, db_session: Session):
+    # アクセスインデックスを確認済みのデータベース（エンジン）
+    _checked_binds: "weakref.WeakSet" = weakref.WeakSet()
+    _checked_lock = threading.Lock()
+
+    def __init__(
+        self,
+        db_session: Session,
+        permission_cache: Optional[PermissionCache] = None,
+        event_bus: Optional[EventBus] = None,
+    ):
+        """
+        初期化
+
+        Args:
+            db_session: データベースセッション
+            permission_cache: 実効アクセス権限のキャッシュ（指定しない場合は毎回データベースから求める）
+            event_bus: 権限の変更を通知するイベントバス（指定しない場合はプロセス全体のもの）
+        """
         self.db = db_session
+        self.permission_cache = permission_cache
+        self.events = event_bus or default_event_bus
 
     def create_user_group(
         self,
@@ -120,8 +240,13 @@ class AccessControlService:
         users = self.db.query(User).filter(User.id.in_(user_ids)).all()
         group.users.extend(users)
         group.updated_at = datetime.utcnow()
+
+        added_ids = [user.id for user in users]
+        dataset_ids = self._group_dataset_ids(group_id)
+        self.refresh_access_index(added_ids, dataset_ids)
         self.db.commit()
 
+        self._publish_access_changed(added_ids, dataset_ids)
         return group
 
     def remove_users_from_group(
@@ -149,13 +274,19 @@ class AccessControlService:
             raise AccessControlError(f"グループID {group_id} は存在しません")
 
         users = self.db.query(User).filter(User.id.in_(user_ids)).all()
+        removed_ids = []
         for user in users:
             if user in group.users:
                 group.users.remove(user)
+                removed_ids.append(user.id)
 
         group.updated_at = datetime.utcnow()
+
+        dataset_ids = self._group_dataset_ids(group_id)
+        self.refresh_access_index(removed_ids, dataset_ids)
         self.db.commit()
 
+        self._publish_access_changed(removed_ids, dataset_ids)
         return group
 
     def grant_dataset_access(
@@ -194,10 +325,13 @@ class AccessControlService:
             DatasetAccess.group_id == group_id,
         ).first()
 
+        member_ids = self._group_member_ids(group_id)
         if existing_access:
             existing_access.access_level = access_level
             existing_access.updated_at = datetime.utcnow()
+            self.refresh_access_index(member_ids, [dataset_id])
             self.db.commit()
+            self._publish_access_changed(member_ids, [dataset_id])
             return existing_access
 
         # 新しいアクセス権限を作成
@@ -208,8 +342,10 @@ class AccessControlService:
             created_by_id=granted_by_id,
         )
         self.db.add(access)
+        self.refresh_access_index(member_ids, [dataset_id])
         self.db.commit()
 
+        self._publish_access_changed(member_ids, [dataset_id])
         return access
 
     def revoke_dataset_access(
@@ -235,8 +371,145 @@ class AccessControlService:
         ).first()
 
         if access:
+            member_ids = self._group_member_ids(group_id)
             self.db.delete(access)
+            self.refresh_access_index(member_ids, [dataset_id])
+            self.db.commit()
+            self._publish_access_changed(member_ids, [dataset_id])
+
+    def _group_member_ids(self, group_id: int) -> List[int]:
+        """グループに所属するユーザーのIDを取得"""
+        return [
+            user_id for (user_id,) in self.db.query(user_group_association.c.user_id).filter(
+                user_group_association.c.group_id == group_id,
+            )
+        ]
+
+    def _group_dataset_ids(self, group_id: int) -> List[int]:
+        """グループがアクセス権限を持つデータセットのIDを取得"""
+        return [
+            dataset_id for (dataset_id,) in self.db.query(DatasetAccess.dataset_id).filter(
+                DatasetAccess.group_id == group_id,
+            )
+        ]
+
+    def refresh_access_index(self, user_ids: List[int], dataset_ids: List[int]) -> None:
+        """
+        ユーザーとデータセットの組み合わせの実効的なアクセス権限をアクセスインデックスに反映
+
+        組み合わせごとにアクセス権限を求め直し、インデックスの行を置き換えます。
+        コミットは呼び出し元で行ってください。
+
+        Args:
+            user_ids: ユーザーIDのリスト
+            dataset_ids: データセットIDのリスト
+        """
+        if not user_ids or not dataset_ids:
+            return
+        self.db.flush()
+        ranks = self._compute_access_ranks(user_ids, dataset_ids)
+        self.db.query(DatasetAccessIndex).filter(
+            DatasetAccessIndex.user_id.in_(user_ids),
+            DatasetAccessIndex.dataset_id.in_(dataset_ids),
+        ).delete(synchronize_session=False)
+        self._insert_access_index(ranks)
+
+    def rebuild_access_index(self) -> int:
+        """
+        アクセスインデックスを全て作り直す
+
+        Returns:
+            インデックスの行数
+        """
+        self.db.query(DatasetAccessIndex).delete(synchronize_session=False)
+        ranks = self._compute_access_ranks()
+        self._insert_access_index(ranks)
+        self.db.commit()
+        return len(ranks)
+
+    def ensure_access_index(self) -> bool:
+        """
+        アクセスインデックスがなければ作成する
+
+        テーブルを追加する前から存在するデータベースのために、テーブルがなければ作成し、
+        データセットがあるのにインデックスが空の場合は作成者とグループのアクセス権限から
+        作り直します。確認はデータベースごとにプロセス内で1度だけ行います。
+        インデックスの一部だけが古くなった場合は作り直せないため、
+        python -m src.data.access_index を実行してください。
+
+        Returns:
+            インデックスを作り直したかどうか
+        """
+        bind = self.db.get_bind()
+        engine = getattr(bind, "engine", bind)
+        with self._checked_lock:
+            if engine in self._checked_binds:
+                return False
+            self._checked_binds.add(engine)
+
+        DatasetAccessIndex.__table__.create(self.db.connection(), checkfirst=True)
+        if self.db.query(DatasetAccessIndex.user_id).first() is not None \
+                or self.db.query(Dataset.id).first() is None:
             self.db.commit()
+            return False
+        self.rebuild_access_index()
+        return True
+
+    def _compute_access_ranks(
+        self,
+        user_ids: Optional[List[int]] = None,
+        dataset_ids: Optional[List[int]] = None,
+    ) -> Dict[Tuple[int, int], int]:
+        """
+        ユーザーとデータセットの組み合わせごとのアクセス権限の強さを求める
+
+        Args:
+            user_ids: ユーザーIDのリスト（指定しない場合は全てのユーザー）
+            dataset_ids: データセットIDのリスト（指定しない場合は全てのデータセット）
+
+        Returns:
+            (ユーザーID, データセットID) → 強さ（権限がない組み合わせは含まない）
+        """
+        member_id = user_group_association.c.user_id
+        group_query = self.db.query(
+            member_id, DatasetAccess.dataset_id, func.max(_access_rank()),
+        ).join(
+            DatasetAccess, DatasetAccess.group_id == user_group_association.c.group_id,
+        )
+        owner_query = self.db.query(Dataset.created_by_id, Dataset.id)
+        if user_ids is not None:
+            group_query = group_query.filter(member_id.in_(user_ids))
+            owner_query = owner_query.filter(Dataset.created_by_id.in_(user_ids))
+        if dataset_ids is not None:
+            group_query = group_query.filter(DatasetAccess.dataset_id.in_(dataset_ids))
+            owner_query = owner_query.filter(Dataset.id.in_(dataset_ids))
+
+        ranks = {
+            (user_id, dataset_id): rank
+            for user_id, dataset_id, rank in group_query.group_by(member_id, DatasetAccess.dataset_id)
+            if rank
+        }
+        owner_rank = ACCESS_LEVEL_RANKS[AccessLevel.ADMIN]
+        for user_id, dataset_id in owner_query:
+            ranks[(user_id, dataset_id)] = owner_rank
+        return ranks
+
+    def _insert_access_index(self, ranks: Dict[Tuple[int, int], int]) -> None:
+        """アクセス権限の強さをアクセスインデックスの行として追加"""
+        if ranks:
+            self.db.execute(insert(DatasetAccessIndex), [
+                {
+                    "user_id": user_id,
+                    "dataset_id": dataset_id,
+                    "max_level": RANKED_ACCESS_LEVELS[rank],
+                }
+                for (user_id, dataset_id), rank in ranks.items()
+            ])
+
+    def _publish_access_changed(self, user_ids: List[int], dataset_ids: List[int]) -> None:
+        """ユーザーとデータセットの組み合わせのアクセス権限が変わったことを通知"""
+        if user_ids and dataset_ids:
+            self.events.publish(ACCESS_CHANGED, user_ids=user_ids, dataset_ids=dataset_ids)
 
     def check_dataset_access(
         self,
@@ -247,6 +520,9 @@ class AccessControlService:
         """
         ユーザーのデータセットへのアクセス権限を確認
 
+        ユーザーが所属するグループのアクセス権限のうち最も強いものを、1回のクエリで求めます。
+        実効アクセス権限のキャッシュがある場合は、キャッシュされた値を使います。
+
         Args:
             dataset_id: データセットID
             user_id: ユーザーID
@@ -258,41 +534,120 @@ class AccessControlService:
         Raises:
             AccessControlError: データセットまたはユーザーが存在しない場合
         """
-        user = self.db.query(User).get(user_id)
-        if not user:
-            raise AccessControlError(f"ユーザーID {user_id} は存在しません")
-
-        dataset = self.db.query(Dataset).get(dataset_id)
-        if not dataset:
+        ranks = self._cached_access_ranks(user_id, [dataset_id])
+        if dataset_id not in ranks:
             raise AccessControlError(f"データセットID {dataset_id} は存在しません")
+        return ranks[dataset_id] >= ACCESS_LEVEL_RANKS[required_level]
 
-        # データセットの作成者は常にアクセス可能
-        if dataset.created_by_id == user_id:
-            return True
+    def check_dataset_access_many(
+        self,
+        user_id: int,
+        dataset_ids: Iterable[int],
+        required_level: AccessLevel = AccessLevel.READ,
+    ) -> Dict[int, bool]:
+        """
+        複数のデータセットへのアクセス権限を1回のクエリで確認
 
-        # ユーザーのグループを取得
-        user_groups = user.groups
-        if not user_groups:
-            return False
+        Args:
+            user_id: ユーザーID
+            dataset_ids: データセットIDのリスト
+            required_level: 必要なアクセス権限レベル
 
-        # グループのアクセス権限を確認
-        access_levels = {
-            AccessLevel.READ: 1,
-            AccessLevel.WRITE: 2,
-            AccessLevel.ADMIN: 3,
+        Returns:
+            データセットID → アクセスが許可されているかどうか（存在しないデータセットは False）
+
+        Raises:
+            AccessControlError: ユーザーが存在しない場合
+        """
+        dataset_ids = list(dataset_ids)
+        ranks = self._cached_access_ranks(user_id, dataset_ids)
+        required_rank = ACCESS_LEVEL_RANKS[required_level]
+        return {
+            dataset_id: ranks.get(dataset_id, 0) >= required_rank for dataset_id in dataset_ids
         }
 
-        required_level_value = access_levels[required_level]
-        for group in user_groups:
-            access = self.db.query(DatasetAccess).filter(
-                DatasetAccess.dataset_id == dataset_id,
-                DatasetAccess.group_id == group.id,
-            ).first()
+    def get_effective_access_levels(
+        self,
+        user_id: int,
+        dataset_ids: Iterable[int],
+    ) -> Dict[int, Optional[AccessLevel]]:
+        """
+        ユーザーの各データセットに対する実効的なアクセス権限レベルを取得
+
+        データセットの作成者は管理者権限を持つものとして扱います。
+
+        Args:
+            user_id: ユーザーID
+            dataset_ids: データセットIDのリスト
+
+        Returns:
+            データセットID → アクセス権限レベル（権限がない場合はNone、
+            存在しないデータセットは含まない）
+
+        Raises:
+            AccessControlError: ユーザーが存在しない場合
+        """
+        return {
+            dataset_id: RANKED_ACCESS_LEVELS.get(rank)
+            for dataset_id, rank in self._cached_access_ranks(user_id, dataset_ids).items()
+        }
+
+    def _cached_access_ranks(self, user_id: int, dataset_ids: Iterable[int]) -> Dict[int, int]:
+        """
+        実効アクセス権限のキャッシュを使ってアクセス権限の強さを取得
+
+        キャッシュされていないデータセットだけをデータベースから求め、キャッシュに保存します。
+        存在しないデータセットはキャッシュしません。
+        """
+        dataset_ids = list(dataset_ids)
+        if self.permission_cache is None:
+            return self._access_ranks(user_id, dataset_ids)
+
+        ranks = self.permission_cache.get_many(user_id, dataset_ids)
+        missing = [dataset_id for dataset_id in dataset_ids if dataset_id not in ranks]
+        if missing:
+            generation = self.permission_cache.generation
+            loaded = self._access_ranks(user_id, missing)
+            self.permission_cache.put_many(user_id, loaded, generation)
+            ranks.update(loaded)
+        return ranks
+
+    def _access_ranks(self, user_id: int, dataset_ids: Iterable[int]) -> Dict[int, int]:
+        """
+        ユーザーの各データセットに対するアクセス権限の強さを1回のクエリで取得
+
+        ユーザーを起点にデータセットを外部結合し、ユーザーが所属するグループの
+        アクセス権限の強さの最大値を相関サブクエリで求めます。ユーザーが存在しない場合は
+        結果が0行になるため、ユーザーの存在も同じクエリで確認できます。
 
-            if access and access_levels[access.access_level] >= required_level_value:
-                return True
+        Returns:
+            データセットID → 強さ（作成者は管理者と同じ、権限がない場合は0）
+
+        Raises:
+            AccessControlError: ユーザーが存在しない場合
+        """
+        user_groups = select(user_group_association.c.group_id).where(
+            user_group_association.c.user_id == user_id,
+        )
+        group_rank = select(func.max(_access_rank())).where(
+            DatasetAccess.dataset_id == Dataset.id,
+            DatasetAccess.group_id.in_(user_groups),
+        ).correlate(Dataset).scalar_subquery()
+
+        rows = self.db.query(
+            User.id, Dataset.id, Dataset.created_by_id, group_rank,
+        ).select_from(User).outerjoin(
+            Dataset, Dataset.id.in_(list(dataset_ids)),
+        ).filter(User.id == user_id).all()
+        if not rows:
+            raise AccessControlError(f"ユーザーID {user_id} は存在しません")
 
-        return False
+        owner_rank = ACCESS_LEVEL_RANKS[AccessLevel.ADMIN]
+        return {
+            dataset_id: owner_rank if created_by_id == user_id else (group_rank or 0)
+            for _, dataset_id, created_by_id, group_rank in rows
+            if dataset_id is not None
+        }
 
     def get_dataset_access_list(
         self,
@@ -339,7 +694,8 @@ class AccessControlService:
 
         Args:
             user_id: ユーザーID
-            access_level: 必要なアクセス権限レベル（指定しない場合は全てのレベル）
+            access_level: 必要なアクセス権限レベル（このレベル以上の権限を持つデータセットに絞り込む。
+                指定しない場合は全てのレベル）
 
         Returns:
             アクセス可能なデータセットのリスト
@@ -351,41 +707,233 @@ class AccessControlService:
         if not user:
             raise AccessControlError(f"ユーザーID {user_id} は存在しません")
 
-        # ユーザーが作成したデータセットを取得
-        query = self.db.query(Dataset).filter(Dataset.created_by_id == user_id)
+        # 作成したデータセットとグループ経由のアクセス権限を持つデータセットを
+        # アクセスインデックスから取得
+        return self.db.query(Dataset).filter(
+            self.accessible_datasets_filter(user_id, access_level),
+        ).all()
 
-        # グループ経由のアクセス権限を持つデータセットを取得
-        if user.groups:
-            group_ids = [group.id for group in user.groups]
-            group_access_query = self.db.query(Dataset).join(DatasetAccess).filter(
-                DatasetAccess.group_id.in_(group_ids)
-            )
+    def accessible_datasets_filter(
+        self,
+        user_id: int,
+        access_level: Optional[AccessLevel] = None,
+    ) -> Exists:
+        """
+        ユーザーがアクセス可能なデータセットに絞り込む条件を取得
 
-            if access_level:
-                group_access_query = group_access_query.filter(
-                    DatasetAccess.access_level == access_level
-                )
+        アクセスインデックスに対する EXISTS 句を返します。Dataset に対するクエリの
+        filter に渡すことで、アクセス権限の確認をデータベース側で行えます。
+        ユーザーの存在は確認しません。
+
+        Args:
+            user_id: ユーザーID
+            access_level: 必要なアクセス権限レベル（このレベル以上の権限を持つデータセットに絞り込む。
+                指定しない場合は全てのレベル）
+
+        Returns:
+            SQLAlchemy の条件式
+        """
+        condition = select(DatasetAccessIndex.dataset_id).where(
+            DatasetAccessIndex.dataset_id == Dataset.id,
+            DatasetAccessIndex.user_id == user_id,
+        )
+        if access_level:
+            condition = condition.where(
+                DatasetAccessIndex.max_level.in_(_levels_at_least(access_level)),
+            )
+        return condition.exists()
 
-            query = query.union(group_access_query)
 
-        return query.all()
+# プロセス内に保持する統計情報のエントリ数
+STATISTICS_CACHE_SIZE = 256
+
+# 参照されていないブロブを回収対象とするまでの猶予期間（秒）
+# 取り込み中やインポート中で、まだバージョンから参照されていないブロブを削除しないため
+BLOB_GC_GRACE_PERIOD = 3600.0
+
+# プロセス内に保持する差分のエントリ数とサイズの合計の上限
+DIFF_CACHE_SIZE = 128
+DIFF_CACHE_BYTES = 64 * 1024 * 1024
+
+# データベースに保存する差分のエントリ数とサイズの合計の上限
+DIFF_CACHE_MAX_ENTRIES = 10000
+DIFF_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+# データベースの差分の最後に参照された日時をまとめて更新する間隔（秒）
+DIFF_CACHE_TOUCH_INTERVAL = 60.0
+
+# 検索結果の件数をプロセス内に保持するエントリ数と有効期限（秒）
+SEARCH_COUNT_CACHE_SIZE = 1024
+SEARCH_COUNT_CACHE_TTL = 60.0
+
+# データセット一覧のソートに使えるフィールド
+SORT_FIELDS = ("name", "created_at", "updated_at", "status")
+
+# 総件数の求め方（exact: 毎回数える、cached: 一定時間キャッシュした件数を使う、none: 数えない）
+COUNT_MODES = ("exact", "cached", "none")
+
+
+def _encode_cursor(sort_by: str, sort_order: str, dataset: Dataset) -> str:
+    """ページの最後のデータセットの位置を表すカーソルを作成"""
+    value = getattr(dataset, sort_by)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps(
+        {"sort_by": sort_by, "sort_order": sort_order, "value": value, "id": dataset.id},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, int]:
+    """
+    カーソルから (ソート対象フィールドの値, データセットID) を取得
+
+    Raises:
+        DatasetError: カーソルが不正な場合、またはソート条件が作成時と異なる場合
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(data.decode("utf-8"))
+        if payload["sort_by"] != sort_by or payload["sort_order"] != sort_order:
+            raise DatasetError("カーソルのソート条件が一致しません")
+        value = payload["value"]
+        if sort_by in ("created_at", "updated_at"):
+            value = datetime.fromisoformat(value)
+        elif sort_by == "status":
+            value = DatasetStatus(value)
+        return value, int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise DatasetError(f"無効なカーソル: {cursor}")
+
+
+def _escape_like(value: str) -> str:
+    """LIKE のパターンで特別な意味を持つ文字をエスケープ（エスケープ文字は \\）"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _tag_filter(tag: str) -> Any:
+    """
+    メタデータのタグにタグが含まれるデータセットに絞り込む条件を取得
+
+    タグはJSONの配列として保存されるため、JSONの文字列としてのタグ（引用符を含む）を
+    保存された値の文字列から探します。
+    """
+    pattern = f"%{_escape_like(json.dumps(tag))}%"
+    return Dataset.metadata.has(cast(Metadata.tags, String).like(pattern, escape="\\"))
+
+
+def _json_value(field: Any, value: Any) -> Any:
+    """
+    JSONの値を値の型に合わせた型で取り出す式を取得
+
+    Raises:
+        DatasetError: 比較できない型の値が指定された場合
+    """
+    if isinstance(value, bool):
+        return field.as_boolean()
+    if isinstance(value, (int, float)):
+        return field.as_float()
+    if isinstance(value, str):
+        return field.as_string()
+    raise DatasetError(f"メタデータフィールドと比較できない値です: {value!r}")
+
+
+def _metadata_filter(field_name: str, operator: str, value: Any) -> Any:
+    """
+    メタデータのカスタムフィールドの値で絞り込む条件を取得
+
+    Raises:
+        DatasetError: 無効な演算子または値が指定された場合
+    """
+    field = Metadata.custom_fields[field_name]
+    if operator == "eq":
+        condition = _json_value(field, value) == value
+    elif operator == "gt":
+        condition = _json_value(field, value) > value
+    elif operator == "lt":
+        condition = _json_value(field, value) < value
+    elif operator == "contains":
+        if not isinstance(value, str):
+            raise DatasetError(f"contains には文字列を指定してください: {value!r}")
+        condition = field.as_string().like(f"%{_escape_like(value)}%", escape="\\")
+    elif operator == "in":
+        if not isinstance(value, (list, tuple)) or not value:
+            raise DatasetError(f"in には値のリストを指定してください: {value!r}")
+        condition = or_(*[_json_value(field, item) == item for item in value])
+    else:
+        raise DatasetError(f"無効な演算子: {operator}")
+    return Dataset.metadata.has(condition)
+
+
+def _counted(
+    chunks: Iterator[pd.DataFrame],
+    row_counter: DistinctRowCounter,
+) -> Iterator[pd.DataFrame]:
+    """チャンクを行のユニーク数のカウンタにも渡しながら返す"""
+    for chunk in chunks:
+        row_counter.update(chunk)
+        yield chunk
+
+
+class _DiffCacheState:
+    """
+    データベースに保存する差分のキャッシュについて、プロセス内で保持する状態
+
+    参照された日時はエントリIDごとに記録しておき、一定の間隔でまとめて更新します。
+    件数とサイズの合計は初回だけデータベースから求め、以降は保存した差分の分だけ
+    加算した見積もりで上限を超えたかどうかを判定します（他のプロセスの変更は、
+    上限を超えて削除するときにデータベースから求め直して反映します）。
+    """
+
+    def __init__(self):
+        """初期化"""
+        self.lock = threading.Lock()
+        self.touched: Dict[int, datetime] = {}
+        self.flushed_at = time.monotonic()
+        self.count: Optional[int] = None
+        self.total: Optional[int] = None
 
 
 class DatasetService:
     """データセット管理サービス"""
 
-    def __init__(self, db_session: Session, storage_base_path: Union[str, Path]):
+    # 統計情報のプロセス内キャッシュ（(ファイルハッシュ, 統計エンジンのバージョン) → 結果）
+    # サービスはリクエストごとに作成されるため、インスタンス間で共有する
+    statistics_cache = LRUCache(STATISTICS_CACHE_SIZE)
+
+    # 差分のプロセス内キャッシュ（(ファイルハッシュ1, ファイルハッシュ2, オプション) → 差分）
+    diff_cache = LRUCache(DIFF_CACHE_SIZE, max_bytes=DIFF_CACHE_BYTES)
+
+    # データベースに保存する差分のキャッシュの上限
+    diff_cache_max_entries = DIFF_CACHE_MAX_ENTRIES
+    diff_cache_max_bytes = DIFF_CACHE_MAX_BYTES
+    diff_cache_state = _DiffCacheState()
+
+    # 検索結果の件数のプロセス内キャッシュ（(種類, ユーザーID, 条件) → (件数, 有効期限)）
+    search_count_cache = LRUCache(SEARCH_COUNT_CACHE_SIZE)
+
+    def __init__(
+        self,
+        db_session: Session,
+        storage_base_path: Union[str, Path],
+        permission_cache: Optional[PermissionCache] = None,
+    ):
         """
         初期化
 
         Args:
             db_session: データベースセッション
             storage_base_path: データファイルの保存ベースパス
+            permission_cache: 実効アクセス権限のキャッシュ
+                （リクエスト間で共有するため、アプリケーションの起動時に作成したものを渡す）
         """
         self.db = db_session
         self.storage_base_path = Path(storage_base_path)
         self.storage_base_path.mkdir(parents=True, exist_ok=True)
-        self.access_control = AccessControlService(db_session)
+        self.blob_store = BlobStore(self.storage_base_path / "blobs")
+        self.access_control = AccessControlService(db_session, permission_cache)
+        self.access_control.ensure_access_index()
 
     def create_dataset(
         self,
@@ -438,6 +986,9 @@ class DatasetService:
         )
         self.db.add(metadata)
 
+        # 作成者をアクセスインデックスに追加
+        self.access_control.refresh_access_index([created_by_id], [dataset.id])
+
         # 初期アクセス権限を設定
         if initial_access_groups:
             for access_info in initial_access_groups:
@@ -458,22 +1009,50 @@ class DatasetService:
         file_path: Union[str, Path],
         created_by_id: int,
         quality_metrics: Optional[Dict] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        progress_callback: Optional[ProgressCallback] = None,
+        ingest_mode: str = "copy",
+        storage_mode: StorageMode = StorageMode.FILE,
+        materialize_columnar: bool = False,
     ) -> DatasetVersion:
         """
         データセットに新しいバージョンを追加
 
+        ファイルはチャンク単位でストリーミングコピーされ、SHA-256ハッシュも同時に計算されます。
+        そのため、ファイルサイズに関わらずメモリ使用量は一定です。
+        ファイルはハッシュをキーとするブロブストアに保存され、既に同じ内容のブロブが
+        存在する場合はコピーを行わずにメタデータのみを登録します。
+
+        ingest_mode に "link" または "move" を指定すると、ファイルがストレージと同じ
+        ファイルシステム上にある場合に reflink・カーネル内コピー（moveではハードリンクも）を
+        試行し、データを書き直さずに登録します（詳細は storage.INGEST_MODES を参照）。
+        moveモードのコピー元は、バージョンの登録が完了した後に削除されます。
+
+        storage_mode に StorageMode.DELTA を指定すると、ファイルはコンテンツ定義チャンキングで
+        分割され、同じデータセットの他のバージョンと共通するチャンクは保存されません。
+        この場合 storage_path にはチャンクの並びを記録したマニフェストのパスが保存されます。
+
+        materialize_columnar を指定すると、列指向フォーマット（Parquet）のサイドカーも作成され、
+        統計情報の計算などではJSONLの代わりにサイドカーが読み込まれます。
+
         Args:
             dataset_id: データセットID
             version: バージョン番号
             file_path: データファイルのパス
             created_by_id: 作成者ID
             quality_metrics: 品質指標
+            chunk_size: コピー時のチャンクサイズ（バイト）
+            progress_callback: 進捗コールバック（処理済みバイト数, 総バイト数）
+            ingest_mode: 取り込みモード（"copy", "link", "move"）
+            storage_mode: 保存形式
+            materialize_columnar: 列指向フォーマットのサイドカーを作成するかどうか
 
         Returns:
             作成されたバージョン
 
         Raises:
-            DatasetError: データセットが存在しない場合
+            DatasetError: データセットが存在しない場合、ファイルの保存に失敗した場合、
+                または取り込みモードと保存形式の組み合わせが不正な場合
             ValidationError: ファイルの検証に失敗した場合
         """
         dataset = self.db.query(Dataset).get(dataset_id)
@@ -485,298 +1064,1348 @@ class DatasetService:
         if not file_path.exists():
             raise ValidationError(f"ファイル {file_path} が存在しません")
 
-        # ファイルをコピーしてハッシュを計算
-        storage_path = self.storage_base_path / f"{dataset_id}" / f"{version}{file_path.suffix}"
-        storage_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(file_path, "rb") as src, open(storage_path, "wb") as dst:
-            content = src.read()
-            dst.write(content)
-            file_hash = hashlib.sha256(content).hexdigest()
+        file_size = file_path.stat().st_size
+
+        if storage_mode == StorageMode.DELTA and ingest_mode != "copy":
+            raise DatasetError("差分ストレージでは取り込みモード 'copy' のみ使用できます")
+
+        # 前のバージョンへの追記かどうかを、保存時の読み込みで同時に判定する
+        parent = self.db.query(DatasetVersion).filter(
+            DatasetVersion.dataset_id == dataset_id,
+        ).order_by(DatasetVersion.created_at.desc()).first()
+        prefix = None
+        if parent is not None and parent.file_size and parent.file_size < file_size:
+            prefix = PrefixHash(parent.file_size)
+
+        stored = False
+        try:
+            if storage_mode == StorageMode.DELTA:
+                # チャンク単位で重複排除して保存
+                file_hash, storage_path, _ = self._chunk_store(dataset_id).put(
+                    file_path,
+                    suffix=file_path.suffix,
+                    read_size=chunk_size,
+                    progress_callback=progress_callback,
+                    prefix=prefix,
+                )
+            else:
+                file_hash, storage_path, stored = self._store_blob(
+                    file_path, file_size, chunk_size, progress_callback, ingest_mode, prefix,
+                )
+        except StorageError as e:
+            raise DatasetError(str(e))
+
+        try:
+            dataset_version = self._create_version(
+                dataset_id=dataset_id,
+                version=version,
+                storage_path=storage_path,
+                storage_mode=storage_mode,
+                file_hash=file_hash,
+                file_size=file_size,
+                created_by_id=created_by_id,
+                quality_metrics=quality_metrics,
+                chunk_size=chunk_size,
+                materialize_columnar=materialize_columnar,
+                prefix=prefix,
+            )
+        except Exception:
+            # 登録できなかった場合、新たに書き込んだブロブを削除（コピー元は残す）
+            self.db.rollback()
+            if stored and self._count_storage_references(str(storage_path)) == 0:
+                self.blob_store.remove(storage_path)
+            raise
+
+        # moveモードのコピー元は、バージョンの登録が完了してから削除
+        if ingest_mode == "move":
+            file_path.unlink(missing_ok=True)
+
+        return dataset_version
 
-        # バージョンを作成
+    def _create_version(
+        self,
+        dataset_id: int,
+        version: str,
+        storage_path: Union[str, Path],
+        storage_mode: StorageMode,
+        file_hash: str,
+        file_size: int,
+        created_by_id: int,
+        quality_metrics: Optional[Dict] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        materialize_columnar: bool = False,
+        prefix: Optional[PrefixHash] = None,
+    ) -> DatasetVersion:
+        """保存済みのデータファイルからバージョンを作成"""
+        parent = self.db.query(DatasetVersion).filter(
+            DatasetVersion.dataset_id == dataset_id,
+        ).order_by(DatasetVersion.created_at.desc()).first()
         version = DatasetVersion(
             dataset_id=dataset_id,
             version=version,
             storage_path=str(storage_path),
+            storage_mode=storage_mode,
             file_hash=file_hash,
+            file_size=file_size,
             created_by_id=created_by_id,
             quality_metrics=quality_metrics,
         )
+        if parent is not None and self._is_append_of(version, parent, chunk_size, prefix):
+            version.appended_from = parent
+            version.append_offset = parent.file_size
+        if materialize_columnar:
+            version.columnar_path = str(self._write_columnar(version))
         self.db.add(version)
         self.db.commit()
 
         return version
 
-    def get_dataset(
+    def _is_append_of(
+        self,
+        dataset_version: DatasetVersion,
+        parent: DatasetVersion,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        prefix: Optional[PrefixHash] = None,
+    ) -> bool:
+        """
+        バージョンが前のバージョンへの追記のみで作られたかどうかを判定
+
+        前のバージョンが改行で終わっており、先頭から前のバージョンのサイズ分の
+        ハッシュが前のバージョンのハッシュと一致する場合に追記とみなします。
+        保存時の読み込みで先頭のハッシュが記録されていれば（prefix）、ファイルは読み込みません。
+        """
+        if not parent.file_size or not dataset_version.file_size:
+            return False
+        if parent.file_size >= dataset_version.file_size:
+            return False
+        if prefix is not None and prefix.size == parent.file_size and prefix.hash is not None:
+            return prefix.hash == parent.file_hash and prefix.last_byte == b"\n"
+
+        with self._open_version(dataset_version) as f:
+            if hash_prefix(f, parent.file_size, chunk_size) != parent.file_hash:
+                return False
+            f.seek(parent.file_size - 1)
+            return f.read(1) == b"\n"
+
+    def materialize_columnar(
         self,
         dataset_id: int,
-        user_id: int,
-        required_level: AccessLevel = AccessLevel.READ,
-    ) -> Optional[Dataset]:
+        version: str,
+    ) -> DatasetVersion:
         """
-        データセットを取得（アクセス権限チェック付き）
+        既存のバージョンに列指向フォーマット（Parquet）のサイドカーを作成
 
         Args:
             dataset_id: データセットID
-            user_id: ユーザーID
-            required_level: 必要なアクセス権限レベル
+            version: バージョン番号
 
         Returns:
-            データセット（アクセス権限がない場合はNone）
+            更新されたバージョン
 
         Raises:
-            AccessControlError: データセットまたはユーザーが存在しない場合
+            DatasetError: バージョンが存在しない場合、またはサイドカーの作成に失敗した場合
         """
-        if not self.access_control.check_dataset_access(dataset_id, user_id, required_level):
-            return None
-
-        return self.db.query(Dataset).get(dataset_id)
+        dataset_version = self.db.query(DatasetVersion).filter(
+            DatasetVersion.dataset_id == dataset_id,
+            DatasetVersion.version == version,
+        ).first()
+        if not dataset_version:
+            raise DatasetError("指定されたバージョンが存在しません")
 
-    def list_datasets(
-        self,
-        user_id: int,
-        status: Optional[DatasetStatus] = None,
-        tags: Optional[List[str]] = None,
-        access_level: Optional[AccessLevel] = None,
-    ) -> List[Dataset]:
-        """
-        データセット一覧を取得（アクセス権限チェック付き）
+        dataset_version.columnar_path = str(self._write_columnar(dataset_version))
+        self.db.commit()
 
-        Args:
-            user_id: ユーザーID
-            status: ステータスでフィルタリング
-            tags: タグでフィルタリング
-            access_level: 必要なアクセス権限レベル
+        return dataset_version
 
-        Returns:
-            アクセス可能なデータセットのリスト
+    def _write_columnar(self, dataset_version: DatasetVersion) -> Path:
+        """
+        サイドカーを作成（同じ内容のサイドカーが既にあれば再利用）
 
-        Raises:
-            AccessControlError: ユーザーが存在しない場合
+        サイドカーはデータファイルのハッシュをキーとしてブロブストアに保存されます。
         """
-        # アクセス可能なデータセットを取得
-        accessible_datasets = self.access_control.get_user_accessible_datasets(
-            user_id=user_id,
-            access_level=access_level,
-        )
+        columnar_path = self.blob_store.path_for(dataset_version.file_hash, COLUMNAR_SUFFIX)
+        if columnar_path.exists():
+            return columnar_path
 
-        # フィルタリング
-        if status:
-            accessible_datasets = [d for d in accessible_datasets if d.status == status]
-        if tags:
-            accessible_datasets = [
-                d for d in accessible_datasets
-                if all(tag in d.metadata.tags for tag in tags)
-            ]
+        columnar_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            return write_columnar(
+                lambda: self._open_version_text(dataset_version),
+                columnar_path,
+            )
+        except StorageError as e:
+            raise DatasetError(str(e))
 
-        return accessible_datasets
+    def _store_blob(
+        self,
+        file_path: Path,
+        file_size: int,
+        chunk_size: int,
+        progress_callback: Optional[ProgressCallback],
+        ingest_mode: str,
+        prefix: Optional[PrefixHash] = None,
+    ) -> Tuple[str, Path, bool]:
+        """ファイルをブロブストアに保存し、(ハッシュ, 保存パス, 新たに書き込んだかどうか) を返す"""
+        # 同じサイズのバージョンが存在する場合のみ、重複の可能性があるため先にハッシュを計算
+        known_hash = None
+        if ingest_mode == "copy" and self.db.query(DatasetVersion.id).filter(
+            DatasetVersion.file_size == file_size,
+        ).first():
+            known_hash, _ = hash_file(file_path, chunk_size, progress_callback, prefix)
+
+        # ブロブストアに保存（同じ内容のブロブが既にあればコピーしない）
+        return self.blob_store.put(
+            file_path,
+            suffix=file_path.suffix,
+            file_hash=known_hash,
+            chunk_size=chunk_size,
+            progress_callback=progress_callback,
+            mode=ingest_mode,
+            prefix=prefix,
+        )
 
-    def update_dataset(
+    def delete_version(
         self,
         dataset_id: int,
-        updated_by_id: int,
-        description: Optional[str] = None,
-        status: Optional[DatasetStatus] = None,
-        tags: Optional[List[str]] = None,
-    ) -> Dataset:
+        version: str,
+        deleted_by_id: int,
+    ) -> None:
         """
-        データセットを更新（アクセス権限チェック付き）
+        データセットのバージョンを削除
+
+        バージョンが参照していたブロブは、他のバージョンから参照されていない場合にのみ削除されます。
 
         Args:
             dataset_id: データセットID
-            updated_by_id: 更新者ID
-            description: 新しい説明
-            status: 新しいステータス
-            tags: 新しいタグリスト
-
-        Returns:
-            更新されたデータセット
+            version: バージョン番号
+            deleted_by_id: 削除者ID
 
         Raises:
-            DatasetError: データセットが存在しない場合
+            DatasetError: バージョンが存在しない場合
             AccessControlError: アクセス権限がない場合
         """
         if not self.access_control.check_dataset_access(
-            dataset_id, updated_by_id, AccessLevel.WRITE
+            dataset_id, deleted_by_id, AccessLevel.WRITE
         ):
             raise AccessControlError("データセットの更新権限がありません")
 
-        dataset = self.get_dataset(dataset_id, updated_by_id)
-        if not dataset:
-            raise DatasetError(f"データセットID {dataset_id} は存在しません")
+        dataset_version = self.db.query(DatasetVersion).filter(
+            DatasetVersion.dataset_id == dataset_id,
+            DatasetVersion.version == version,
+        ).first()
+        if not dataset_version:
+            raise DatasetError("指定されたバージョンが存在しません")
 
-        if description is not None:
-            dataset.description = description
-        if status is not None:
+        storage_path = dataset_version.storage_path
+        storage_mode = dataset_version.storage_mode
+        columnar_path = dataset_version.columnar_path
+
+        file_hash = dataset_version.file_hash
+
+        # このバージョンに追記したバージョンは、以降は通常のバージョンとして扱う
+        self.db.query(DatasetVersion).filter(
+            DatasetVersion.appended_from_id == dataset_version.id,
+        ).update(
+            {DatasetVersion.appended_from_id: None, DatasetVersion.append_offset: None},
+            synchronize_session=False,
+        )
+        self.db.delete(dataset_version)
+        self.db.commit()
+
+        # 同じ内容のバージョンがなくなれば統計情報と差分のキャッシュも削除
+        if not self.db.query(DatasetVersion.id).filter(
+            DatasetVersion.file_hash == file_hash,
+        ).first():
+            for entry in self.db.query(StatisticsCache).filter(
+                StatisticsCache.file_hash == file_hash,
+            ):
+                self.statistics_cache.pop((file_hash, entry.engine_version))
+                self.db.delete(entry)
+            for entry in self.db.query(VersionDiffCache).filter(
+                (VersionDiffCache.file_hash1 == file_hash)
+                | (VersionDiffCache.file_hash2 == file_hash),
+            ):
+                self.diff_cache.pop((entry.file_hash1, entry.file_hash2, entry.options))
+                self.db.delete(entry)
+            self.db.commit()
+
+        if columnar_path and not self.db.query(DatasetVersion.id).filter(
+            DatasetVersion.columnar_path == columnar_path,
+        ).first():
+            self.blob_store.remove(columnar_path)
+
+        if self._count_storage_references(storage_path) == 0:
+            if storage_mode == StorageMode.DELTA:
+                chunk_store = self._chunk_store(dataset_id)
+                chunk_store.remove_manifest(storage_path)
+                chunk_store.collect_unreferenced_chunks()
+            else:
+                self.blob_store.remove(storage_path)
+
+    def collect_unreferenced_blobs(self, grace_period: float = BLOB_GC_GRACE_PERIOD) -> List[Path]:
+        """
+        どのバージョンからも参照されていないブロブを削除
+
+        インポートの中断などで取り残されたブロブを回収するために使用します。
+        ブロブはファイル名（ハッシュと拡張子）で照合するため、ストレージのパスの表記が
+        バージョンの登録時と異なっていても参照中のブロブは削除されません。
+
+        Args:
+            grace_period: 作成・変更されてからこの秒数が経過していないブロブは削除しない
+                （取り込み中のブロブを保護するため）
+
+        Returns:
+            削除されたブロブのパスのリスト
+        """
+        referenced = set()
+        for storage_path, columnar_path in self.db.query(
+            DatasetVersion.storage_path, DatasetVersion.columnar_path,
+        ).distinct():
+            referenced.add(Path(storage_path).name)
+            if columnar_path:
+                referenced.add(Path(columnar_path).name)
+
+        cutoff = time.time() - grace_period
+        removed = []
+        for blob_path in self.blob_store.iter_blobs():
+            if blob_path.name in referenced:
+                continue
+            try:
+                stat = blob_path.stat()
+            except FileNotFoundError:
+                continue
+            # ハードリンクで取り込んだブロブは mtime が古いままのため ctime も確認
+            if max(stat.st_mtime, stat.st_ctime) > cutoff:
+                continue
+            self.blob_store.remove(blob_path)
+            removed.append(blob_path)
+
+        return removed
+
+    def _count_storage_references(self, storage_path: str) -> int:
+        """保存ファイルを参照しているバージョン数を取得"""
+        return self.db.query(DatasetVersion).filter(
+            DatasetVersion.storage_path == storage_path,
+        ).count()
+
+    def _chunk_store(self, dataset_id: int) -> ChunkStore:
+        """データセットのチャンクストアを取得"""
+        return ChunkStore(self.storage_base_path / f"{dataset_id}")
+
+    def _open_version(self, dataset_version: DatasetVersion) -> io.BufferedIOBase:
+        """
+        バージョンのデータファイルをバイナリストリームとして開く
+
+        差分ストレージのバージョンはマニフェストから透過的に再構成されます。
+        """
+        try:
+            return self._version_opener(dataset_version)()
+        except (OSError, StorageError) as e:
+            raise DatasetError(f"データファイルを開けません: {e}")
+
+    def _version_opener(self, dataset_version: DatasetVersion) -> Callable[[], BinaryIO]:
+        """
+        バージョンのデータファイルを開く関数を取得
+
+        ワーカープロセスに渡せるよう pickle 可能な関数を返します。
+        """
+        if dataset_version.storage_mode == StorageMode.DELTA:
+            return functools.partial(open_manifest, dataset_version.storage_path)
+        return functools.partial(open, dataset_version.storage_path, "rb")
+
+    def _open_version_text(self, dataset_version: DatasetVersion) -> io.TextIOBase:
+        """バージョンのデータファイルをテキストストリームとして開く"""
+        return io.TextIOWrapper(self._open_version(dataset_version), encoding="utf-8")
+
+    def _load_dataframe(
+        self,
+        dataset_version: DatasetVersion,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        バージョンのデータをデータフレームとして読み込む
+
+        列指向フォーマットのサイドカーがあればそれを優先し、必要な列だけを読み込みます。
+        サイドカーがない場合はJSONLを解析します。
+        """
+        try:
+            if dataset_version.columnar_path and Path(dataset_version.columnar_path).exists():
+                return read_columnar(dataset_version.columnar_path, columns=columns)
+
+            with self._open_version_text(dataset_version) as f:
+                df = pd.read_json(f, lines=True)
+        except Exception as e:
+            raise DatasetError(f"データファイルの読み込みに失敗しました: {e}")
+
+        return df[columns] if columns is not None else df
+
+    def _iter_dataframes(
+        self,
+        dataset_version: DatasetVersion,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        columns: Optional[List[str]] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        バージョンのデータをチャンク単位のデータフレームとして読み込む
+
+        列指向フォーマットのサイドカーがあればそれを優先します。
+        """
+        if dataset_version.columnar_path and Path(dataset_version.columnar_path).exists():
+            yield from iter_columnar(dataset_version.columnar_path, columns, chunk_rows)
+            return
+
+        with self._open_version_text(dataset_version) as f:
+            for chunk in pd.read_json(f, lines=True, chunksize=chunk_rows):
+                yield chunk[columns] if columns is not None else chunk
+
+    def _streaming_accumulator(
+        self,
+        dataset_version: DatasetVersion,
+        workers: int,
+        chunk_rows: int,
+        row_counter: Optional[DistinctRowCounter] = None,
+    ) -> StreamingStatistics:
+        """
+        ストリーミングエンジンでバージョン全体のスケッチを作成
+
+        追記で作られたバージョンで追記元のスケッチが同じバージョンの統計エンジンで
+        保存されている場合は、追記部分だけを読み込んで追記元のスケッチに結合します。
+
+        row_counter を指定した場合、バージョン全体を1プロセスで読み込むときは
+        同じ読み込みで行のハッシュも数えます。
+        """
+        parent = dataset_version.appended_from
+        if parent is None or not parent.statistics_sketch \
+                or parent.statistics_sketch.get("engine_version") != STATISTICS_ENGINE_VERSION:
+            if workers > 1:
+                return parallel_column_statistics(
+                    self._statistics_partitions(dataset_version, workers, chunk_rows),
+                    workers,
+                )
+            chunks = self._iter_dataframes(dataset_version, chunk_rows)
+            if row_counter is not None:
+                chunks = _counted(chunks, row_counter)
+            return streaming_statistics(chunks)
+
+        accumulator = StreamingStatistics.from_dict(parent.statistics_sketch)
+        opener = self._version_opener(dataset_version)
+        accumulator.merge(parallel_statistics(
+            [
+                (functools.partial(iter_jsonl_range, opener, start, end, chunk_rows), "all")
+                for start, end in split_jsonl(opener, workers, dataset_version.append_offset)
+            ],
+            workers,
+        ))
+        return accumulator
+
+    def _statistics_partitions(
+        self,
+        dataset_version: DatasetVersion,
+        workers: int,
+        chunk_rows: int,
+    ) -> List[List[ChunkReader]]:
+        """
+        統計情報を並列に計算するためのパーティションを作成
+
+        行の範囲ごとに、列のグループを読み込む関数のリストを返します
+        （parallel_column_statistics を参照）。JSONLは行の境界で分割します。
+        列指向フォーマットのサイドカーがある場合は行グループで分割し、行グループが
+        ワーカー数より少なければ列のグループでも分割します。各パーティションは担当する
+        列だけを読み込み、行の重複は列のグループごとの行のハッシュへの寄与から数えます。
+        """
+        columnar_path = dataset_version.columnar_path
+        if not (columnar_path and Path(columnar_path).exists()):
+            opener = self._version_opener(dataset_version)
+            return [
+                [functools.partial(iter_jsonl_range, opener, start, end, chunk_rows)]
+                for start, end in split_jsonl(opener, workers)
+            ]
+
+        num_row_groups, columns = columnar_layout(columnar_path)
+        row_parts = max(1, min(workers, num_row_groups))
+        column_parts = max(1, min(len(columns), workers // row_parts))
+        row_ranges: List[List[ChunkReader]] = []
+        for row_groups in np.array_split(np.arange(num_row_groups), row_parts):
+            row_groups = row_groups.tolist()
+            if column_parts == 1:
+                row_ranges.append([
+                    functools.partial(iter_columnar, columnar_path, None, chunk_rows, row_groups),
+                ])
+                continue
+            row_ranges.append([
+                functools.partial(
+                    iter_columnar, columnar_path, column_group.tolist(), chunk_rows, row_groups,
+                )
+                for column_group in np.array_split(np.array(columns, dtype=object), column_parts)
+            ])
+        return row_ranges
+
+    def _exact_partitions(
+        self,
+        dataset_version: DatasetVersion,
+        workers: int,
+    ) -> List[ExactPartition]:
+        """
+        厳密な統計情報を並列に計算するための列のグループを作成
+
+        列指向フォーマットのサイドカーがある場合は、各ワーカーが担当する列だけを
+        読み込みます。サイドカーがない場合はJSONLを1度だけ解析し、列のグループに分けます。
+        """
+        columnar_path = dataset_version.columnar_path
+        if columnar_path and Path(columnar_path).exists():
+            try:
+                _, columns = columnar_layout(columnar_path)
+            except StorageError as e:
+                raise DatasetError(f"データファイルの読み込みに失敗しました: {e}")
+            groups = np.array_split(np.array(columns, dtype=object), max(1, min(workers, len(columns))))
+            return [functools.partial(read_columnar, columnar_path, group.tolist()) for group in groups]
+
+        df = self._load_dataframe(dataset_version)
+        columns = list(df.columns)
+        groups = np.array_split(np.array(columns, dtype=object), max(1, min(workers, len(columns))))
+        return [df[group.tolist()] for group in groups]
+
+    def _version_suffix(self, dataset_version: DatasetVersion) -> str:
+        """バージョンの元ファイルの拡張子を取得"""
+        if dataset_version.storage_mode == StorageMode.DELTA:
+            try:
+                return read_manifest(dataset_version.storage_path)["suffix"]
+            except StorageError as e:
+                raise DatasetError(str(e))
+        return Path(dataset_version.storage_path).suffix
+
+    def get_dataset(
+        self,
+        dataset_id: int,
+        user_id: int,
+        required_level: AccessLevel = AccessLevel.READ,
+    ) -> Optional[Dataset]:
+        """
+        データセットを取得（アクセス権限チェック付き）
+
+        Args:
+            dataset_id: データセットID
+            user_id: ユーザーID
+            required_level: 必要なアクセス権限レベル
+
+        Returns:
+            データセット（アクセス権限がない場合はNone）
+
+        Raises:
+            AccessControlError: データセットまたはユーザーが存在しない場合
+        """
+        if not self.access_control.check_dataset_access(dataset_id, user_id, required_level):
+            return None
+
+        return self.db.query(Dataset).get(dataset_id)
+
+    def _load_dataset(self, dataset_id: int) -> Optional[Dataset]:
+        """
+        データセットを取得（アクセス権限チェックなし）
+
+        アクセス権限の確認は呼び出し元（APIなど）で行う内部処理用です。
+        """
+        return self.db.query(Dataset).get(dataset_id)
+
+    def list_datasets(
+        self,
+        user_id: int,
+        status: Optional[DatasetStatus] = None,
+        tags: Optional[List[str]] = None,
+        access_level: Optional[AccessLevel] = None,
+    ) -> List[Dataset]:
+        """
+        データセット一覧を取得（アクセス権限チェック付き）
+
+        Args:
+            user_id: ユーザーID
+            status: ステータスでフィルタリング
+            tags: タグでフィルタリング
+            access_level: 必要なアクセス権限レベル
+
+        Returns:
+            アクセス可能なデータセットのリスト
+
+        Raises:
+            AccessControlError: ユーザーが存在しない場合
+        """
+        # アクセス可能なデータセットを取得
+        accessible_datasets = self.access_control.get_user_accessible_datasets(
+            user_id=user_id,
+            access_level=access_level,
+        )
+
+        # フィルタリング
+        if status:
+            accessible_datasets = [d for d in accessible_datasets if d.status == status]
+        if tags:
+            accessible_datasets = [
+                d for d in accessible_datasets
+                if all(tag in d.metadata.tags for tag in tags)
+            ]
+
+        return accessible_datasets
+
+    def list_datasets_page(
+        self,
+        user_id: int,
+        status: Optional[DatasetStatus] = None,
+        tags: Optional[List[str]] = None,
+        access_level: Optional[AccessLevel] = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        count: str = "none",
+    ) -> Tuple[List[Dataset], Optional[str], Optional[int]]:
+        """
+        データセット一覧を取得（アクセス権限チェック付き、カーソルによるページネーション）
+
+        Args:
+            user_id: ユーザーID
+            status: ステータスでフィルタリング
+            tags: タグでフィルタリング
+            access_level: 必要なアクセス権限レベル
+            sort_by: ソート対象フィールド（"name", "created_at", "updated_at", "status"）
+            sort_order: ソート順序（"asc" or "desc"）
+            limit: 1ページあたりの件数
+            cursor: 前のページで返されたカーソル（指定しない場合は最初のページ）
+            count: 総件数の求め方（"exact", "cached", "none"）
+
+        Returns:
+            (データセットのリスト, 次のページのカーソル（最後のページの場合はNone),
+            総件数（count が "none" の場合はNone）)
+
+        Raises:
+            AccessControlError: ユーザーが存在しない場合
+            DatasetError: 無効なパラメータまたはカーソルが指定された場合
+        """
+        if count not in COUNT_MODES:
+            raise DatasetError(f"無効な件数の求め方: {count}")
+        if not self.db.query(User.id).filter(User.id == user_id).first():
+            raise AccessControlError(f"ユーザーID {user_id} は存在しません")
+
+        datasets = self.db.query(Dataset).filter(
+            self.access_control.accessible_datasets_filter(user_id, access_level),
+        )
+        if status:
+            datasets = datasets.filter(Dataset.status == status)
+        if tags:
+            for tag in tags:
+                datasets = datasets.filter(_tag_filter(tag))
+
+        page, next_cursor = self._keyset_page(datasets, sort_by, sort_order, limit, cursor)
+        filters = json.dumps(
+            {"status": status, "tags": tags, "access_level": access_level},
+            sort_keys=True,
+            default=str,
+        )
+        total = self._page_count(
+            datasets, count, ("list", user_id, filters), page, next_cursor, cursor,
+        )
+        return page, next_cursor, total
+
+    def update_dataset(
+        self,
+        dataset_id: int,
+        updated_by_id: int,
+        description: Optional[str] = None,
+        status: Optional[DatasetStatus] = None,
+        tags: Optional[List[str]] = None,
+    ) -> Dataset:
+        """
+        データセットを更新（アクセス権限チェック付き）
+
+        Args:
+            dataset_id: データセットID
+            updated_by_id: 更新者ID
+            description: 新しい説明
+            status: 新しいステータス
+            tags: 新しいタグリスト
+
+        Returns:
+            更新されたデータセット
+
+        Raises:
+            DatasetError: データセットが存在しない場合
+            AccessControlError: アクセス権限がない場合
+        """
+        if not self.access_control.check_dataset_access(
+            dataset_id, updated_by_id, AccessLevel.WRITE
+        ):
+            raise AccessControlError("データセットの更新権限がありません")
+
+        dataset = self.get_dataset(dataset_id, updated_by_id)
+        if not dataset:
+            raise DatasetError(f"データセットID {dataset_id} は存在しません")
+
+        if description is not None:
+            dataset.description = description
+        if status is not None:
             dataset.status = status
         dataset.updated_by_id = updated_by_id
         dataset.updated_at = datetime.utcnow()
 
-        if tags is not None and dataset.metadata:
-            dataset.metadata.tags = tags
+        if tags is not None and dataset.metadata:
+            dataset.metadata.tags = tags
+
+        self.db.commit()
+        return dataset
+
+    def export_dataset(
+        self,
+        dataset_id: int,
+        export_path: Union[str, Path],
+        include_versions: bool = True,
+        include_metrics: bool = True,
+        compression_workers: Optional[int] = None,
+        compress_level: int = DEFAULT_COMPRESS_LEVEL,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        progress_callback: Optional[ProgressCallback] = None,
+        report_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        base_manifest: Optional[Union[str, Path, Dict[str, Any]]] = None,
+        known_hashes: Optional[Iterable[str]] = None,
+        archive_format: str = "tar.gz",
+    ) -> Path:
+        """
+        データセットをエクスポート
+
+        バージョンのデータファイルは一時ファイルにコピーせず、ストレージから直接アーカイブに
+        書き込まれます。アーカイブはブロック単位で複数のスレッドにより並列に圧縮されます
+        （archive.ParallelGzipWriter を参照）。作成されるファイルは通常の tar.gz として
+        読み込めます。アーカイブの先頭には metadata.json が置かれます。
+
+        エクスポートごとにマニフェスト（エクスポートID、ベースのエクスポートID、
+        復元に必要なブロブの一覧）が作成され、metadata.json と、アーカイブと同じ場所の
+        ``<名前>.manifest.json`` に保存されます。base_manifest に前回のエクスポートの
+        マニフェストを指定すると、差分エクスポートになります。バージョンの情報は全て含みますが、
+        データファイルはベースまでのエクスポートに含まれていないものだけを含みます。
+        差分エクスポートは import_dataset_chain でベースから順にインポートしてください。
+
+        archive_format に "zip" を指定すると、メンバーごとに独立して圧縮された zip64 形式で
+        書き込まれます。末尾の中央ディレクトリからメンバーの位置を直接求められるため、
+        import_dataset の versions で一部のバージョンだけを復元する場合に、前にあるメンバーを
+        読み飛ばす必要がありません（zip 形式ではメンバーの圧縮は並列化されません）。
+
+        Args:
+            dataset_id: データセットID
+            export_path: エクスポート先のパス
+            include_versions: バージョンデータを含めるかどうか
+            include_metrics: 品質指標を含めるかどうか
+            compression_workers: 圧縮に使うスレッド数（指定しない場合はCPUコア数）
+            compress_level: 圧縮レベル（1〜9）
+            chunk_size: 読み込み時のチャンクサイズ（バイト）
+            progress_callback: 進捗コールバック（書き込んだデータファイルのバイト数, 総バイト数）
+            report_callback: 完了時にスループットの報告（経過秒数、圧縮前後のバイト数、
+                スループット（バイト/秒）、圧縮率、スレッド数）を受け取るコールバック
+            base_manifest: ベースとするエクスポートのマニフェスト（マニフェストまたはアーカイブの
+                パス、あるいは load_export_manifest で読み込んだ辞書）
+            known_hashes: 復元先に既に存在するデータファイルのハッシュ（これらも含めない）
+            archive_format: アーカイブの形式（"tar.gz" または "zip"）
+
+        Returns:
+            エクスポートされたファイルのパス
+
+        Raises:
+            DatasetError: データセットが存在しない場合、ベースのマニフェストが不正な場合、
+                またはアーカイブの作成に失敗した場合
+        """
+        dataset = self._load_dataset(dataset_id)
+        if not dataset:
+            raise DatasetError(f"データセットID {dataset_id} は存在しません")
+
+        if archive_format not in ARCHIVE_FORMATS:
+            raise DatasetError(f"無効なアーカイブの形式: {archive_format}")
+
+        export_path = Path(export_path)
+        if not export_path.name.endswith(f".{archive_format}"):
+            export_path = export_path.with_suffix(f".{archive_format}")
+
+        if isinstance(base_manifest, (str, Path)):
+            base_manifest = self.load_export_manifest(base_manifest)
+        known_blobs = set(base_manifest["blobs"]) if base_manifest else set()
+        known_hashes = set(known_hashes or [])
+
+        # メタデータをエクスポート
+        metadata = {
+            "dataset": {
+                "id": dataset.id,
+                "name": dataset.name,
+                "description": dataset.description,
+                "status": dataset.status.value,
+                "created_at": dataset.created_at.isoformat(),
+                "updated_at": dataset.updated_at.isoformat(),
+            },
+            "metadata": {
+                "schema": dataset.metadata.schema,
+                "statistics": dataset.metadata.statistics,
+                "tags": dataset.metadata.tags,
+                "custom_fields": dataset.metadata.custom_fields,
+            }
+        }
+
+        # アーカイブに含めるファイル（アーカイブ内の名前, バージョン）
+        members = []
+        included = set()
+        if include_versions:
+            metadata["versions"] = []
+            for version in dataset.versions:
+                version_data = {
+                    "version": version.version,
+                    "created_at": version.created_at.isoformat(),
+                    "file_hash": version.file_hash,
+                    "file_size": version.file_size,
+                }
+                if include_metrics and version.quality_metrics:
+                    version_data["quality_metrics"] = version.quality_metrics
+                metadata["versions"].append(version_data)
+
+                if not version.storage_path or not Path(version.storage_path).exists():
+                    continue
+                suffix = self._version_suffix(version)
+                version_data["suffix"] = suffix
+
+                # ベースまでのエクスポートに含まれるデータファイルと、このアーカイブに含めたものは除く
+                blob = f"{version.file_hash}{suffix}"
+                if blob in known_blobs or blob in included or version.file_hash in known_hashes:
+                    continue
+                included.add(blob)
+                members.append((f"versions/{version.version}{suffix}", version))
+
+        metadata["manifest"] = {
+            "export_id": uuid.uuid4().hex,
+            "dataset_id": dataset.id,
+            "created_at": datetime.utcnow().isoformat(),
+            "base_export_id": base_manifest["export_id"] if base_manifest else None,
+            "included_blobs": sorted(included),
+            "blobs": sorted(known_blobs | included),
+        }
+
+        total_size = sum(version.file_size or 0 for _, version in members)
+        meter = ThroughputMeter()
+        manifest_path = manifest_path_for(export_path)
+        tmp_path = export_path.with_name(f"{export_path.name}.part")
+        try:
+            with open(tmp_path, "wb") as f:
+                with open_archive_writer(
+                    archive_format, f, compress_level, compression_workers, chunk_size,
+                ) as writer:
+                    data = json.dumps(metadata, ensure_ascii=False, indent=2).encode("utf-8")
+                    writer.add("metadata.json", io.BytesIO(data), len(data))
+
+                    processed = 0
+                    for arcname, version in members:
+                        with self._version_opener(version)() as src:
+                            # ヘッダーにはサイズが必要なため、末尾へのシークで求める
+                            # （差分ストレージのバージョンもマニフェストから求められる）
+                            size = src.seek(0, io.SEEK_END)
+                            src.seek(0)
+                            writer.add(arcname, src, size)
+                        processed += size
+                        if progress_callback:
+                            progress_callback(processed, total_size)
+            os.replace(tmp_path, export_path)
+            with open(manifest_path, "w", encoding="utf-8") as f:
+                json.dump(metadata["manifest"], f, ensure_ascii=False, indent=2)
+        except (OSError, StorageError, ArchiveError, tarfile.TarError, zipfile.LargeZipFile) as e:
+            tmp_path.unlink(missing_ok=True)
+            raise DatasetError(f"アーカイブの作成に失敗しました: {e}")
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        meter.stop()
+        if report_callback:
+            report_callback(meter.report(
+                writer.bytes_in, writer.bytes_out, workers=writer.workers, format=archive_format,
+            ))
+        return export_path
+
+    def load_export_manifest(self, path: Union[str, Path]) -> Dict[str, Any]:
+        """
+        エクスポートのマニフェストを読み込む
+
+        Args:
+            path: マニフェスト（.manifest.json）またはアーカイブのパス
+
+        Returns:
+            マニフェスト
+
+        Raises:
+            DatasetError: 読み込みに失敗した場合、またはマニフェストのないアーカイブの場合
+        """
+        path = Path(path)
+        if path.name.endswith(MANIFEST_SUFFIX):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError) as e:
+                raise DatasetError(f"マニフェストの読み込みに失敗しました: {e}")
+        else:
+            manifest = self._read_archive_header(path).get("manifest")
+        if not isinstance(manifest, dict) or not {"export_id", "blobs"} <= manifest.keys():
+            raise DatasetError(f"{path} にはエクスポートのマニフェストがありません")
+        return manifest
+
+    def _read_archive_header(self, import_path: Path) -> Dict[str, Any]:
+        """アーカイブの metadata.json だけを読み込む（tar.gz の場合は先頭にあること）"""
+        try:
+            if zipfile.is_zipfile(import_path):
+                with zipfile.ZipFile(import_path) as zf:
+                    with zf.open("metadata.json") as f:
+                        return self._read_archive_metadata(f)
+            with tarfile.open(import_path, "r|gz") as tar:
+                for member in iter(tar.next, None):
+                    if member.isfile():
+                        if member_name(member) != "metadata.json":
+                            break
+                        return self._read_archive_metadata(tar.extractfile(member))
+        except KeyError:
+            pass
+        except (tarfile.TarError, zipfile.BadZipFile, OSError, EOFError, zlib.error) as e:
+            raise DatasetError(f"アーカイブの展開に失敗しました: {e}")
+        raise DatasetError(
+            f"メタデータの読み込みに失敗しました: {import_path} に metadata.json がありません"
+        )
+
+    def import_dataset(
+        self,
+        import_path: Union[str, Path],
+        created_by_id: int,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        progress_callback: Optional[ProgressCallback] = None,
+        versions: Optional[List[str]] = None,
+    ) -> Tuple[Dataset, List[DatasetVersion]]:
+        """
+        データセットをインポート
+
+        アーカイブは展開せずに先頭から1回だけ読み込まれ、バージョンのデータファイルは
+        ハッシュを計算しながらブロブストアに直接書き込まれます（一時ディレクトリは使用せず、
+        メモリ使用量はチャンクサイズ程度です）。アーカイブの先頭の metadata.json を最初に
+        読み込むため、メタデータが不正な場合はデータファイルを読み込む前に失敗します。
+        メタデータにファイルのハッシュが記録されている場合は、読み込んだ内容と照合します。
+
+        metadata.json が先頭にない古い形式のアーカイブは、メンバーの一覧を読み込んでから
+        metadata.json、データファイルの順に読み込みます。
+
+        差分エクスポートのアーカイブに含まれないデータファイルは参照できないため、
+        差分エクスポートは import_dataset_chain でベースのアーカイブと一緒にインポートしてください。
+        インポートに失敗した場合、新たに書き込んだブロブは削除されます。
+
+        versions を指定すると、指定したバージョンだけを復元します。zip 形式のアーカイブでは
+        末尾の中央ディレクトリから必要なメンバーの位置に直接シークするため、読み込むのは
+        指定したバージョンのデータファイルだけです（tar.gz 形式では他のメンバーを読み飛ばします）。
+
+        Args:
+            import_path: インポートするファイルのパス（tar.gz または zip）
+            created_by_id: 作成者ID
+            name: 新しいデータセット名（指定しない場合は元の名前を使用）
+            description: 新しい説明（指定しない場合は元の説明を使用）
+            chunk_size: 書き込み時のチャンクサイズ（バイト）
+            progress_callback: 進捗コールバック（読み込んだデータファイルのバイト数, 総バイト数）
+            versions: 復元するバージョン番号（指定しない場合は全てのバージョン）
+
+        Returns:
+            (作成されたデータセット, 作成されたバージョンのリスト)
+
+        Raises:
+            DatasetError: インポートに失敗した場合、または指定したバージョンがアーカイブにない場合
+        """
+        import_path = Path(import_path)
+        if not import_path.exists():
+            raise DatasetError(f"インポートファイル {import_path} が存在しません")
+
+        selected = set(versions) if versions is not None else None
+        return self._import_archives(
+            [import_path], created_by_id, name, description, chunk_size, progress_callback,
+            selected,
+        )
+
+    def import_dataset_chain(
+        self,
+        import_paths: List[Union[str, Path]],
+        created_by_id: int,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        progress_callback: Optional[ProgressCallback] = None,
+        versions: Optional[List[str]] = None,
+    ) -> Tuple[Dataset, List[DatasetVersion]]:
+        """
+        差分エクスポートの連鎖をインポート
+
+        各アーカイブのマニフェストでベースのエクスポートIDをたどれることを先に確認してから、
+        古いアーカイブから順にデータファイルをブロブストアに取り込み、最後のアーカイブの
+        メタデータに従ってデータセットを作成します。最後のアーカイブに含まれないデータファイルは、
+        この連鎖のアーカイブから取り込んでハッシュを照合したものだけを参照します。
+        インポートに失敗した場合、新たに書き込んだブロブは削除されます。
+
+        Args:
+            import_paths: アーカイブのパス（完全なエクスポートから新しい順に並べたもの）
+            created_by_id: 作成者ID
+            name: 新しいデータセット名（指定しない場合は元の名前を使用）
+            description: 新しい説明（指定しない場合は元の説明を使用）
+            chunk_size: 書き込み時のチャンクサイズ（バイト）
+            progress_callback: 進捗コールバック（アーカイブごとに、読み込んだデータファイルの
+                バイト数, 総バイト数）
+            versions: 復元するバージョン番号（指定しない場合は全てのバージョン）
+
+        Returns:
+            (作成されたデータセット, 作成されたバージョンのリスト)
+
+        Raises:
+            DatasetError: 連鎖が正しくない場合、またはインポートに失敗した場合
+        """
+        import_paths = [Path(path) for path in import_paths]
+        if not import_paths:
+            raise DatasetError("インポートするアーカイブが指定されていません")
+        for import_path in import_paths:
+            if not import_path.exists():
+                raise DatasetError(f"インポートファイル {import_path} が存在しません")
+
+        # データを読み込む前に、全てのアーカイブのマニフェストで連鎖を確認
+        manifests = [self.load_export_manifest(path) for path in import_paths]
+        for index in range(1, len(manifests)):
+            if manifests[index].get("base_export_id") != manifests[index - 1]["export_id"]:
+                raise DatasetError(
+                    f"{import_paths[index]} は {import_paths[index - 1]} の差分エクスポートではありません"
+                )
+
+        # 古いアーカイブからは、最後のアーカイブで指定したバージョンが参照するブロブだけを読み込む
+        selected = set(versions) if versions is not None else None
+        selected_blobs = None
+        if selected is not None:
+            selected_blobs = self._selected_blobs(
+                self._read_archive_header(import_paths[-1]), selected
+            )
+
+        return self._import_archives(
+            import_paths, created_by_id, name, description, chunk_size, progress_callback,
+            selected, selected_blobs,
+        )
+
+    def _import_archives(
+        self,
+        import_paths: List[Path],
+        created_by_id: int,
+        name: Optional[str],
+        description: Optional[str],
+        chunk_size: int,
+        progress_callback: Optional[ProgressCallback],
+        versions: Optional[Set[str]] = None,
+        blobs: Optional[Set[str]] = None,
+    ) -> Tuple[Dataset, List[DatasetVersion]]:
+        """
+        アーカイブを古い順に取り込み、最後のアーカイブのメタデータに従ってデータセットを作成
+
+        途中で失敗した場合は、取り込みで新たに書き込んだブロブのうち、
+        どのバージョンからも参照されていないものを削除します。
+        """
+        staged: List[Path] = []
+        try:
+            base_blobs: Dict[str, Tuple[str, Path, int]] = {}
+            for import_path in import_paths[:-1]:
+                _, ingested = self._ingest_archive(
+                    import_path, chunk_size, progress_callback, versions, blobs, staged,
+                )
+                for file_hash, storage_path, file_size in ingested.values():
+                    base_blobs[storage_path.name] = (file_hash, storage_path, file_size)
+
+            metadata, ingested = self._ingest_archive(
+                import_paths[-1], chunk_size, progress_callback, versions, staged=staged,
+            )
+            return self._restore_dataset(
+                metadata, ingested, created_by_id, name, description, chunk_size, versions,
+                base_blobs,
+            )
+        except BaseException:
+            self.db.rollback()
+            self._remove_staged_blobs(staged)
+            raise
+
+    def _remove_staged_blobs(self, staged: List[Path]) -> None:
+        """インポート中に書き込んだブロブのうち、どのバージョンからも参照されていないものを削除"""
+        for blob_path in staged:
+            if not self.db.query(DatasetVersion.id).filter(
+                (DatasetVersion.storage_path == str(blob_path))
+                | (DatasetVersion.columnar_path == str(blob_path)),
+            ).first():
+                self.blob_store.remove(blob_path)
+
+    def _ingest_archive(
+        self,
+        import_path: Path,
+        chunk_size: int,
+        progress_callback: Optional[ProgressCallback],
+        versions: Optional[Set[str]] = None,
+        blobs: Optional[Set[str]] = None,
+        staged: Optional[List[Path]] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Tuple[str, Path, int]]]:
+        """
+        アーカイブのデータファイルとサイドカーをブロブストアに取り込む
+
+        Args:
+            import_path: アーカイブのパス
+            chunk_size: 書き込み時のチャンクサイズ（バイト）
+            progress_callback: 進捗コールバック
+            versions: 取り込むバージョン番号（指定しない場合は全て）
+            blobs: バージョン番号に加えて取り込むブロブ（指定しない場合はこのアーカイブの
+                メタデータで versions が参照するブロブ）
+            staged: 新たに書き込んだブロブのパスを追加するリスト
+
+        Returns:
+            (メタデータ, バージョン番号 → (ハッシュ, ブロブのパス, サイズ))
+        """
+        def ingest(metadata, members):
+            selected_blobs = blobs
+            if versions is not None and selected_blobs is None:
+                selected_blobs = self._selected_blobs(metadata, versions)
+            return metadata, self._ingest_members(
+                members, metadata, chunk_size, progress_callback, versions, selected_blobs,
+                staged,
+            )
+
+        try:
+            # zip 形式（中央ディレクトリから必要なメンバーだけを読み込む）
+            if zipfile.is_zipfile(import_path):
+                with zipfile.ZipFile(import_path) as zf:
+                    try:
+                        metadata_info = zf.getinfo("metadata.json")
+                    except KeyError:
+                        raise DatasetError("メタデータの読み込みに失敗しました: metadata.json がありません")
+                    with zf.open(metadata_info) as f:
+                        metadata = self._read_archive_metadata(f)
+                    return ingest(metadata, [
+                        (info.filename, info.file_size, functools.partial(zf.open, info))
+                        for info in zf.infolist() if not info.is_dir()
+                    ])
+
+            with tarfile.open(import_path, "r|gz") as tar:
+                member = tar.next()
+                while member is not None and not member.isfile():
+                    member = tar.next()
+                if member is not None and member_name(member) == "metadata.json":
+                    metadata = self._read_archive_metadata(tar.extractfile(member))
+                    return ingest(metadata, (
+                        (member_name(m), m.size, functools.partial(tar.extractfile, m))
+                        for m in iter(tar.next, None) if m.isfile()
+                    ))
+
+            # 古い形式のアーカイブ（メンバーの一覧を読み込んでから必要なメンバーを読み込む）
+            with tarfile.open(import_path, "r:gz") as tar:
+                members = [member for member in tar.getmembers() if member.isfile()]
+                metadata_member = next(
+                    (m for m in members if member_name(m) == "metadata.json"), None
+                )
+                if metadata_member is None:
+                    raise DatasetError("メタデータの読み込みに失敗しました: metadata.json がありません")
+                metadata = self._read_archive_metadata(tar.extractfile(metadata_member))
+
+                # データファイルを先に、サイドカーはその後に読み込む
+                members.sort(key=lambda member: not member_name(member).startswith("versions/"))
+                return ingest(metadata, [
+                    (member_name(m), m.size, functools.partial(tar.extractfile, m))
+                    for m in members
+                ])
+        except (tarfile.TarError, zipfile.BadZipFile, OSError, EOFError, zlib.error) as e:
+            raise DatasetError(f"アーカイブの展開に失敗しました: {e}")
+
+    def _read_archive_metadata(self, src: BinaryIO) -> Dict[str, Any]:
+        """アーカイブの metadata.json を読み込んで必須の項目を検証"""
+        try:
+            metadata = json.load(src)
+            for key in ["name", "description"]:
+                metadata["dataset"][key]
+            for key in ["schema", "tags"]:
+                metadata["metadata"][key]
+            for version_data in metadata.get("versions", []):
+                version_data["version"]
+        except Exception as e:
+            raise DatasetError(f"メタデータの読み込みに失敗しました: {e}")
+        return metadata
 
-        self.db.commit()
-        return dataset
+    def _blob_name(self, version_data: Dict[str, Any]) -> Optional[str]:
+        """メタデータに記録されたバージョンのブロブ名（ハッシュ + 拡張子）"""
+        if not version_data.get("file_hash") or version_data.get("suffix") is None:
+            return None
+        return f"{version_data['file_hash']}{version_data['suffix']}"
 
-    def export_dataset(
+    def _selected_blobs(self, metadata: Dict[str, Any], versions: Set[str]) -> Set[str]:
+        """
+        指定したバージョンが参照するブロブ名を取得
+
+        Raises:
+            DatasetError: 指定したバージョンがメタデータにない場合
+        """
+        versions_data = {
+            version_data["version"]: version_data
+            for version_data in metadata.get("versions", [])
+        }
+        unknown = sorted(versions - versions_data.keys())
+        if unknown:
+            raise DatasetError(f"指定されたバージョンがアーカイブにありません: {', '.join(unknown)}")
+        return {
+            self._blob_name(versions_data[version]) for version in versions
+        } - {None}
+
+    def _ingest_members(
         self,
-        dataset_id: int,
-        export_path: Union[str, Path],
-        include_versions: bool = True,
-        include_metrics: bool = True,
-    ) -> Path:
+        members: Iterable[Tuple[str, int, Callable[[], BinaryIO]]],
+        metadata: Dict[str, Any],
+        chunk_size: int,
+        progress_callback: Optional[ProgressCallback],
+        versions: Optional[Set[str]] = None,
+        blobs: Optional[Set[str]] = None,
+        staged: Optional[List[Path]] = None,
+    ) -> Dict[str, Tuple[str, Path, int]]:
         """
-        データセットをエクスポート
+        アーカイブのメンバーを順に読み込んでブロブストアに取り込む
+
+        アーカイブに列指向フォーマットのサイドカー（columnar/）が含まれていても取り込みません。
+        サイドカーはハッシュで共有されるため、照合できない内容を書き込まないようにしています
+        （必要であれば materialize_columnar で再作成してください）。
 
         Args:
-            dataset_id: データセットID
-            export_path: エクスポート先のパス
-            include_versions: バージョンデータを含めるかどうか
-            include_metrics: 品質指標を含めるかどうか
+            members: (メンバー名, バイト数, メンバーを開く関数) の列
+            metadata: アーカイブのメタデータ
+            chunk_size: 書き込み時のチャンクサイズ（バイト）
+            progress_callback: 進捗コールバック
+            versions: 取り込むバージョン番号（指定しない場合は全て）
+            blobs: バージョン番号に加えて取り込むブロブ名
+            staged: 新たに書き込んだブロブのパスを追加するリスト
 
         Returns:
-            エクスポートされたファイルのパス
-
-        Raises:
-            DatasetError: データセットが存在しない場合
+            バージョン番号 → (ハッシュ, ブロブのパス, サイズ)
         """
-        dataset = self.get_dataset(dataset_id)
-        if not dataset:
-            raise DatasetError(f"データセットID {dataset_id} は存在しません")
+        versions_data = {
+            version_data["version"]: version_data
+            for version_data in metadata.get("versions", [])
+        }
 
-        export_path = Path(export_path)
-        if export_path.suffix != ".tar.gz":
-            export_path = export_path.with_suffix(".tar.gz")
-
-        # 一時ディレクトリを作成
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmpdir = Path(tmpdir)
-            
-            # メタデータをエクスポート
-            metadata = {
-                "dataset": {
-                    "id": dataset.id,
-                    "name": dataset.name,
-                    "description": dataset.description,
-                    "status": dataset.status.value,
-                    "created_at": dataset.created_at.isoformat(),
-                    "updated_at": dataset.updated_at.isoformat(),
-                },
-                "metadata": {
-                    "schema": dataset.metadata.schema,
-                    "statistics": dataset.metadata.statistics,
-                    "tags": dataset.metadata.tags,
-                    "custom_fields": dataset.metadata.custom_fields,
-                }
-            }
+        def selected(version: str) -> bool:
+            return versions is None or version in versions \
+                or self._blob_name(versions_data[version]) in (blobs or ())
 
-            # バージョン情報を含める場合
-            if include_versions:
-                metadata["versions"] = []
-                for version in dataset.versions:
-                    version_data = {
-                        "version": version.version,
-                        "created_at": version.created_at.isoformat(),
-                        "file_hash": version.file_hash,
-                    }
-                    if include_metrics and version.quality_metrics:
-                        version_data["quality_metrics"] = version.quality_metrics
-                    metadata["versions"].append(version_data)
-
-                    # データファイルをコピー
-                    if version.storage_path:
-                        src_path = Path(version.storage_path)
-                        if src_path.exists():
-                            dst_path = tmpdir / "versions" / f"{version.version}{src_path.suffix}"
-                            dst_path.parent.mkdir(parents=True, exist_ok=True)
-                            shutil.copy2(src_path, dst_path)
-
-            # メタデータを保存
-            with open(tmpdir / "metadata.json", "w", encoding="utf-8") as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-
-            # アーカイブを作成
-            with tarfile.open(export_path, "w:gz") as tar:
-                tar.add(tmpdir, arcname="")
+        total_size = sum(
+            version_data.get("file_size") or 0 for version, version_data in versions_data.items()
+            if selected(version) and self._archive_includes(metadata, version_data)
+        )
+        ingested: Dict[str, Tuple[str, Path, int]] = {}
+        processed = 0
 
-        return export_path
+        for name, size, open_member in members:
+            directory, _, filename = name.rpartition("/")
+            version = match_version(filename, versions_data)
+            if version is None or not selected(version):
+                continue
 
-    def import_dataset(
+            if directory == "versions" and version not in ingested:
+                callback = None
+                if progress_callback:
+                    def callback(done: int, _: int, base: int = processed) -> None:
+                        progress_callback(base + done, total_size)
+                try:
+                    with open_member() as src:
+                        file_hash, storage_path, stored = self.blob_store.put_stream(
+                            src,
+                            suffix=filename[len(version):],
+                            file_hash=versions_data[version].get("file_hash"),
+                            total_size=size,
+                            chunk_size=chunk_size,
+                            progress_callback=callback,
+                        )
+                except StorageError as e:
+                    raise DatasetError(f"バージョン {version} の取り込みに失敗しました: {e}")
+                processed += size
+                ingested[version] = (file_hash, storage_path, size)
+                if stored and staged is not None:
+                    staged.append(storage_path)
+
+        return ingested
+
+    def _archive_includes(self, metadata: Dict[str, Any], version_data: Dict[str, Any]) -> bool:
+        """バージョンのデータファイルがアーカイブに含まれるかどうか（マニフェストがない場合は True）"""
+        manifest = metadata.get("manifest")
+        blob = self._blob_name(version_data)
+        if not manifest or blob is None:
+            return True
+        return blob in manifest["included_blobs"]
+
+    def _restore_dataset(
         self,
-        import_path: Union[str, Path],
+        metadata: Dict[str, Any],
+        blobs: Dict[str, Tuple[str, Path, int]],
         created_by_id: int,
-        name: Optional[str] = None,
-        description: Optional[str] = None,
+        name: Optional[str],
+        description: Optional[str],
+        chunk_size: int,
+        versions: Optional[Set[str]] = None,
+        base_blobs: Optional[Dict[str, Tuple[str, Path, int]]] = None,
     ) -> Tuple[Dataset, List[DatasetVersion]]:
         """
-        データセットをインポート
+        取り込んだデータファイルからメタデータの順にバージョンを作成
 
-        Args:
-            import_path: インポートするファイルのパス
-            created_by_id: 作成者ID
-            name: 新しいデータセット名（指定しない場合は元の名前を使用）
-            description: 新しい説明（指定しない場合は元の説明を使用）
-
-        Returns:
-            (作成されたデータセット, 作成されたバージョンのリスト)
+        アーカイブに含まれないデータファイルは、同じアーカイブまたは base_blobs（連鎖のベースの
+        アーカイブ）から取り込んでハッシュを照合したブロブだけを参照します。ブロブストアに
+        あるだけのブロブを参照すると、アーカイブに記録したハッシュで他のデータセットの
+        データを読めてしまうためです。
 
         Raises:
-            DatasetError: インポートに失敗した場合
+            DatasetError: アーカイブに含まれないデータファイルを参照できない場合
         """
-        import_path = Path(import_path)
-        if not import_path.exists():
-            raise DatasetError(f"インポートファイル {import_path} が存在しません")
+        available = dict(base_blobs or {})
+        for file_hash, storage_path, file_size in blobs.values():
+            available[storage_path.name] = (file_hash, storage_path, file_size)
+
+        resolved = []
+        for version_data in metadata.get("versions", []):
+            version = version_data["version"]
+            if versions is not None and version not in versions:
+                continue
+            if version in blobs:
+                resolved.append((version_data, *blobs[version]))
+                continue
 
-        # 一時ディレクトリを作成
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmpdir = Path(tmpdir)
-            
-            # アーカイブを展開
-            try:
-                with tarfile.open(import_path, "r:gz") as tar:
-                    tar.extractall(tmpdir)
-            except Exception as e:
-                raise DatasetError(f"アーカイブの展開に失敗しました: {e}")
+            blob = self._blob_name(version_data)
+            if blob is None:
+                continue
+            if blob not in available:
+                raise DatasetError(
+                    f"バージョン {version} のデータファイルがありません。"
+                    "ベースのエクスポートから順にインポートしてください"
+                )
+            resolved.append((version_data, *available[blob]))
 
-            # メタデータを読み込み
-            try:
-                with open(tmpdir / "metadata.json", "r", encoding="utf-8") as f:
-                    metadata = json.load(f)
-            except Exception as e:
-                raise DatasetError(f"メタデータの読み込みに失敗しました: {e}")
-
-            # データセットを作成
-            dataset = self.create_dataset(
-                name=name or metadata["dataset"]["name"],
-                description=description or metadata["dataset"]["description"],
+        dataset = self.create_dataset(
+            name=name or metadata["dataset"]["name"],
+            description=description or metadata["dataset"]["description"],
+            created_by_id=created_by_id,
+            schema=metadata["metadata"]["schema"],
+            tags=metadata["metadata"]["tags"],
+        )
+
+        restored = []
+        for version_data, file_hash, storage_path, file_size in resolved:
+            dataset_version = self._create_version(
+                dataset_id=dataset.id,
+                version=version_data["version"],
+                storage_path=storage_path,
+                storage_mode=StorageMode.FILE,
+                file_hash=file_hash,
+                file_size=file_size,
                 created_by_id=created_by_id,
-                schema=metadata["metadata"]["schema"],
-                tags=metadata["metadata"]["tags"],
+                quality_metrics=version_data.get("quality_metrics"),
+                chunk_size=chunk_size,
             )
+            columnar_path = self.blob_store.path_for(file_hash, COLUMNAR_SUFFIX)
+            if columnar_path.exists():
+                dataset_version.columnar_path = str(columnar_path)
+                self.db.commit()
+            restored.append(dataset_version)
 
-            # バージョンをインポート
-            versions = []
-            if "versions" in metadata:
-                versions_dir = tmpdir / "versions"
-                if versions_dir.exists():
-                    for version_data in metadata["versions"]:
-                        version = version_data["version"]
-                        file_pattern = f"{version}.*"
-                        matching_files = list(versions_dir.glob(file_pattern))
-                        
-                        if matching_files:
-                            file_path = matching_files[0]
-                            version = self.add_version(
-                                dataset_id=dataset.id,
-                                version=version,
-                                file_path=file_path,
-                                created_by_id=created_by_id,
-                                quality_metrics=version_data.get("quality_metrics"),
-                            )
-                            versions.append(version)
-
-            return dataset, versions
+        return dataset, restored
 
     def compare_versions(
         self,
@@ -785,24 +2414,60 @@ class DatasetService:
         version2: str,
         include_metadata: bool = True,
         include_metrics: bool = True,
+        diff_mode: str = "text",
+        key_column: Optional[str] = None,
+        sample_page: int = 0,
+        sample_size: int = DEFAULT_SAMPLE_SIZE,
+        include_columns: bool = True,
+        compute_statistics: bool = False,
     ) -> Dict[str, Any]:
         """
         2つのバージョン間の差分を比較
 
+        diff_mode に "rows" を指定すると、ファイルのテキストの差分（file_diff）の代わりに
+        行単位の差分（row_diff）を求めます。各ファイルを1回ずつ読み込んで行のハッシュを
+        一時ファイルに分割して書き出し、分割ごとに突き合わせるため、メモリに載らないサイズの
+        バージョンも比較できます。追加・削除・変更された行の件数と、ページに分けたサンプルを
+        返します。key_column を指定すると、キー列の値が同じで内容が異なる行を変更された行として
+        数えます。
+
+        2つのバージョンのファイルのハッシュが一致する場合は、ファイルを開かずに差分なしとして
+        返します（identical が True）。ファイルの差分（file_diff、row_diff）は
+        (ファイルハッシュ1, ファイルハッシュ2, オプション) をキーとしてキャッシュされるため、
+        同じ組の比較を繰り返してもファイルは読み込みません。
+
+        列単位の差分（column_diff）は、バージョンごとにキャッシュされた統計情報とスケッチから
+        求めるため、データファイルは読み込みません。統計情報がまだ計算されていないバージョンが
+        ある場合は {"available": False, "missing_versions": [...]} を返します。
+        compute_statistics を指定すると、そのバージョンの統計情報をストリーミングエンジンで
+        1度だけ計算してキャッシュします（データファイルを全て読み込みます）。
+
         Args:
             dataset_id: データセットID
             version1: 比較元のバージョン
             version2: 比較先のバージョン
             include_metadata: メタデータの差分を含めるかどうか
             include_metrics: 品質指標の差分を含めるかどうか
+            diff_mode: ファイルの差分の求め方（"text" または "rows"）
+            key_column: 行単位の差分で行を対応付けるキー列
+            sample_page: 行単位の差分のサンプルのページ番号（0から）
+            sample_size: 行単位の差分の1ページのサンプルの件数
+            include_columns: 列単位の差分（データ型、欠損率、分布の変化）を含めるかどうか
+            compute_statistics: 統計情報がキャッシュされていないバージョンの統計情報を計算するかどうか
 
         Returns:
             差分情報を含む辞書
 
         Raises:
-            DatasetError: データセットまたはバージョンが存在しない場合
+            DatasetError: データセットまたはバージョンが存在しない場合、差分の求め方が無効な場合、
+                またはキー列が存在しない場合
         """
-        dataset = self.get_dataset(dataset_id)
+        if diff_mode not in DIFF_MODES:
+            raise DatasetError(f"無効な差分の求め方です: {diff_mode}")
+        if key_column is not None and diff_mode != "rows":
+            raise DatasetError("キー列は行単位の差分でのみ指定できます")
+
+        dataset = self._load_dataset(dataset_id)
         if not dataset:
             raise DatasetError(f"データセットID {dataset_id} は存在しません")
 
@@ -824,29 +2489,85 @@ class DatasetService:
             "dataset_id": dataset_id,
             "version1": version1,
             "version2": version2,
+            "identical": bool(v1.file_hash) and v1.file_hash == v2.file_hash,
             "file_diff": None,
+            "row_diff": None,
+            "column_diff": None,
             "metadata_diff": None,
             "metrics_diff": None,
         }
 
-        # ファイルの差分を比較
-        if v1.storage_path and v2.storage_path:
-            try:
-                with open(v1.storage_path, "r", encoding="utf-8") as f1, \
-                     open(v2.storage_path, "r", encoding="utf-8") as f2:
-                    file1_lines = f1.readlines()
-                    file2_lines = f2.readlines()
-                    diff = list(unified_diff(
-                        file1_lines,
-                        file2_lines,
-                        fromfile=f"version {version1}",
-                        tofile=f"version {version2}",
-                        lineterm="",
-                    ))
-                    if diff:
-                        diff_info["file_diff"] = "".join(diff)
-            except Exception as e:
-                diff_info["file_diff"] = f"ファイルの差分比較中にエラーが発生しました: {e}"
+        # 行単位の差分を比較
+        if diff_mode == "rows":
+            options = {
+                "mode": "rows",
+                "key_column": key_column,
+                "page": sample_page,
+                "page_size": sample_size,
+            }
+            found, cached = self._cached_diff(v1, v2, options)
+            if found:
+                diff_info["row_diff"] = cached
+            elif diff_info["identical"]:
+                diff_info["row_diff"] = self._identical_row_diff(v1, options)
+            else:
+                try:
+                    diff_info["row_diff"] = row_diff(
+                        self._version_opener(v1),
+                        self._version_opener(v2),
+                        key_column=key_column,
+                        page=sample_page,
+                        page_size=sample_size,
+                        work_dir=self.storage_base_path,
+                    )
+                except DiffError as e:
+                    raise DatasetError(str(e))
+                except (OSError, StorageError, ValueError) as e:
+                    raise DatasetError(f"ファイルの差分比較中にエラーが発生しました: {e}")
+                self._store_cached_diff(v1, v2, options, diff_info["row_diff"])
+
+        # ファイルの差分を比較（ハッシュが一致する場合は差分なし）
+        elif v1.storage_path and v2.storage_path and not diff_info["identical"]:
+            # ファイルの内容だけで決まるハンクをキャッシュし、バージョン名の見出しは毎回付ける
+            options = {"mode": "text"}
+            header = f"--- version {version1}+++ version {version2}"
+            found, hunks = self._cached_diff(v1, v2, options)
+            if not found:
+                try:
+                    with self._open_version_text(v1) as f1, \
+                         self._open_version_text(v2) as f2:
+                        file1_lines = f1.readlines()
+                        file2_lines = f2.readlines()
+                        diff = list(unified_diff(file1_lines, file2_lines, lineterm=""))
+                        hunks = "".join(diff[2:]) if diff else None
+                    self._store_cached_diff(v1, v2, options, hunks)
+                    found = True
+                except Exception as e:
+                    diff_info["file_diff"] = f"ファイルの差分比較中にエラーが発生しました: {e}"
+            if found and hunks:
+                diff_info["file_diff"] = header + hunks
+
+        # 列単位の差分を比較
+        if include_columns:
+            result1 = self._version_statistics(v1, compute_statistics)
+            result2 = result1 if diff_info["identical"] else \
+                self._version_statistics(v2, compute_statistics)
+            if result1 is None or result2 is None:
+                diff_info["column_diff"] = {
+                    "available": False,
+                    "missing_versions": [
+                        dataset_version.version
+                        for dataset_version, result in [(v1, result1), (v2, result2)]
+                        if result is None
+                    ],
+                }
+            else:
+                diff_info["column_diff"] = column_diff(
+                    result1["statistics"],
+                    result2["statistics"],
+                    v1.statistics_sketch,
+                    v2.statistics_sketch,
+                )
 
         # メタデータの差分を比較
         if include_metadata:
@@ -878,6 +2599,217 @@ class DatasetService:
 
         return diff_info
 
+    def _identical_row_diff(
+        self,
+        dataset_version: DatasetVersion,
+        options: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """内容が同じバージョンの行単位の差分（行数はキャッシュされた統計情報から取得）"""
+        rows = None
+        for engine in ("exact", "streaming"):
+            cached = self._cached_statistics(dataset_version, engine)
+            if cached is not None:
+                rows = cached["statistics"]["row_count"]
+                break
+        return {
+            "mode": "key" if options["key_column"] is not None else "hash",
+            "key_column": options["key_column"],
+            "rows1": rows,
+            "rows2": rows,
+            "added": 0,
+            "removed": 0,
+            "changed": 0,
+            "unchanged": rows,
+            "page": options["page"],
+            "page_size": options["page_size"],
+            "samples": {"added": [], "removed": [], "changed": []},
+        }
+
+    def _diff_cache_key(
+        self,
+        v1: DatasetVersion,
+        v2: DatasetVersion,
+        options: Dict[str, Any],
+    ) -> Tuple[str, str, str]:
+        options = dict(options, engine=DIFF_ENGINE_VERSION)
+        return v1.file_hash, v2.file_hash, json.dumps(options, sort_keys=True)
+
+    def _cached_diff(
+        self,
+        v1: DatasetVersion,
+        v2: DatasetVersion,
+        options: Dict[str, Any],
+    ) -> Tuple[bool, Any]:
+        """
+        キャッシュから差分を取得
+
+        プロセス内のキャッシュになければデータベースを参照します。どちらで見つかった場合も
+        参照された日時を記録し、DIFF_CACHE_TOUCH_INTERVAL ごとにまとめてデータベースに反映します。
+
+        Returns:
+            (キャッシュにあったかどうか, 差分)
+        """
+        if not v1.file_hash or not v2.file_hash:
+            return False, None
+        key = self._diff_cache_key(v1, v2, options)
+        cached = self.diff_cache.get(key)
+        if cached is None:
+            entry = self.db.query(VersionDiffCache).filter(
+                VersionDiffCache.file_hash1 == key[0],
+                VersionDiffCache.file_hash2 == key[1],
+                VersionDiffCache.options == key[2],
+            ).first()
+            if not entry:
+                return False, None
+            cached = {"id": entry.id, "result": entry.result}
+            self.diff_cache.put(key, cached, size=entry.size)
+
+        state = self.diff_cache_state
+        with state.lock:
+            state.touched[cached["id"]] = datetime.utcnow()
+        if time.monotonic() - state.flushed_at >= DIFF_CACHE_TOUCH_INTERVAL:
+            self._flush_diff_cache_touches()
+
+        # 呼び出し元での変更がキャッシュに影響しないようコピーを返す
+        return True, copy.deepcopy(cached["result"])
+
+    def _flush_diff_cache_touches(self) -> None:
+        """記録した差分の参照日時をまとめてデータベースに反映"""
+        state = self.diff_cache_state
+        with state.lock:
+            touched, state.touched = state.touched, {}
+            state.flushed_at = time.monotonic()
+        if not touched:
+            return
+        table = VersionDiffCache.__table__
+        self.db.execute(
+            update(table)
+            .where(table.c.id == bindparam("entry_id"))
+            .values(last_accessed_at=bindparam("accessed_at")),
+            [{"entry_id": entry_id, "accessed_at": at} for entry_id, at in touched.items()],
+        )
+        self.db.commit()
+
+    def _store_cached_diff(
+        self,
+        v1: DatasetVersion,
+        v2: DatasetVersion,
+        options: Dict[str, Any],
+        result: Any,
+    ) -> None:
+        """差分をキャッシュに保存し、件数かサイズの合計が上限を超えた場合は古いエントリを削除"""
+        if not v1.file_hash or not v2.file_hash:
+            return
+        key = self._diff_cache_key(v1, v2, options)
+        size = len(json.dumps(result, ensure_ascii=False).encode("utf-8"))
+        if size > self.diff_cache_max_bytes:
+            return
+
+        state = self.diff_cache_state
+        if state.count is None:
+            count, total = self._diff_cache_usage()
+            with state.lock:
+                state.count, state.total = count, total
+
+        entry = self.db.query(VersionDiffCache).filter(
+            VersionDiffCache.file_hash1 == key[0],
+            VersionDiffCache.file_hash2 == key[1],
+            VersionDiffCache.options == key[2],
+        ).first()
+        added, previous_size = entry is None, 0
+        if added:
+            entry = VersionDiffCache(file_hash1=key[0], file_hash2=key[1], options=key[2])
+            self.db.add(entry)
+        else:
+            previous_size = entry.size
+        entry.result = result
+        entry.size = size
+        entry.created_at = entry.last_accessed_at = datetime.utcnow()
+        self.db.commit()
+        self.diff_cache.put(key, {"id": entry.id, "result": copy.deepcopy(result)}, size=size)
+
+        with state.lock:
+            state.count += int(added)
+            state.total += size - previous_size
+            over_limit = state.count > self.diff_cache_max_entries \
+                or state.total > self.diff_cache_max_bytes
+        if over_limit:
+            self._evict_cached_diffs()
+
+    def _diff_cache_usage(self) -> Tuple[int, int]:
+        """データベースに保存されている差分の (件数, サイズの合計) を取得"""
+        count, total = self.db.query(
+            func.count(VersionDiffCache.id),
+            func.coalesce(func.sum(VersionDiffCache.size), 0),
+        ).one()
+        return int(count), int(total)
+
+    def _evict_cached_diffs(self) -> None:
+        """件数とサイズの合計が上限以下になるまで、最後に参照された日時が古い差分を削除"""
+        # 記録した参照日時を反映してから、他のプロセスの変更も含めた件数とサイズを求め直す
+        self._flush_diff_cache_touches()
+        count, total = self._diff_cache_usage()
+
+        evicted = []
+        if count > self.diff_cache_max_entries or total > self.diff_cache_max_bytes:
+            for entry_id, file_hash1, file_hash2, options, size in self.db.query(
+                VersionDiffCache.id,
+                VersionDiffCache.file_hash1,
+                VersionDiffCache.file_hash2,
+                VersionDiffCache.options,
+                VersionDiffCache.size,
+            ).order_by(
+                VersionDiffCache.last_accessed_at.asc(),
+                VersionDiffCache.id.asc(),
+            ):
+                if count <= self.diff_cache_max_entries and total <= self.diff_cache_max_bytes:
+                    break
+                count -= 1
+                total -= size
+                evicted.append(entry_id)
+                self.diff_cache.pop((file_hash1, file_hash2, options))
+            self.db.query(VersionDiffCache).filter(
+                VersionDiffCache.id.in_(evicted),
+            ).delete(synchronize_session=False)
+            self.db.commit()
+
+        state = self.diff_cache_state
+        with state.lock:
+            state.count, state.total = count, total
+
+    def _version_statistics(
+        self,
+        dataset_version: DatasetVersion,
+        compute: bool = True,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        バージョンの統計情報を取得
+
+        キャッシュにあれば厳密なエンジン、ストリーミングエンジンの順に使い、なければ
+        ストリーミングエンジンで計算してキャッシュとスケッチを保存します
+        （バージョンの品質指標は更新しません）。compute が False の場合は計算せずにNoneを返します。
+        """
+        for engine in ("exact", "streaming"):
+            cached = self._cached_statistics(dataset_version, engine)
+            if cached is not None:
+                return cached
+        if not compute:
+            return None
+
+        try:
+            accumulator = self._streaming_accumulator(dataset_version, 1, DEFAULT_CHUNK_ROWS)
+            statistics, quality_metrics = accumulator.result()
+        except (OSError, StorageError, ValueError) as e:
+            raise DatasetError(f"データファイルの読み込みに失敗しました: {e}")
+        dataset_version.statistics_sketch = accumulator.to_dict()
+
+        result = {
+            "statistics": statistics,
+            "quality_metrics": quality_metrics,
+        }
+        self._store_cached_statistics(dataset_version, "streaming", result)
+        return result
+
     def get_version_history(
         self,
         dataset_id: int,
@@ -898,7 +2830,7 @@ class DatasetService:
         Raises:
             DatasetError: データセットが存在しない場合
         """
-        dataset = self.get_dataset(dataset_id)
+        dataset = self._load_dataset(dataset_id)
         if not dataset:
             raise DatasetError(f"データセットID {dataset_id} は存在しません")
 
@@ -931,22 +2863,71 @@ class DatasetService:
         dataset_id: int,
         version: Optional[str] = None,
         update_metadata: bool = True,
+        engine: str = "exact",
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        workers: Optional[int] = 1,
+        sample_rows: Optional[int] = None,
+        error_target: Optional[float] = None,
+        confidence: float = DEFAULT_CONFIDENCE,
+        exact_uniqueness: bool = False,
     ) -> Dict[str, Any]:
         """
         データセットの統計情報を計算
 
+        engine に "streaming" を指定すると、ファイルをチャンク単位で読み込んで
+        マージ可能なスケッチに集約するため、メモリに載らないサイズのバージョンも扱えます。
+        この場合、分位点・最頻値・ユニーク数は近似値となり、統計情報の "estimation" に
+        誤差の上限が記録されます。
+
+        workers に2以上を指定すると、厳密なエンジンは列のグループごとに、ストリーミング
+        エンジンは行の範囲と列のグループごとに、プロセスプールで並列に計算します
+        （近似エンジンは並列計算に対応していません）。
+
+        ストリーミングエンジンのスケッチはバージョンに保存されます。前のバージョンへの
+        追記で作られたバージョンでは、前のバージョンのスケッチに追記部分だけを結合するため、
+        計算時間は追記したデータの量に比例します。追記部分だけの計算はストリーミングエンジンでのみ
+        行われ、厳密なエンジン（"exact"）は分位点やユニーク数を正確に求めるため常にバージョン全体を
+        読み込みます（追記を繰り返すデータセットでは engine="streaming" を使用してください）。
+
+        exact_uniqueness を指定すると、ストリーミングエンジンでも行の一意性
+        （uniqueness.overall）を近似ではなく厳密に数えます。行のハッシュはメモリの上限を
+        超えるとストレージのディレクトリに一時ファイルとして書き出されるため、メモリに
+        載らないサイズのバージョンでも計算できます。並列計算や追記部分だけの計算の場合は、
+        行のハッシュを数えるためにバージョン全体をもう1度読み込みます。
+
+        engine に "sample" を指定すると、ファイルから無作為に抽出した行のブロックから
+        推定するため、計算時間はバージョンのサイズによらずほぼ一定です。統計情報の
+        "estimation" に近似であること（approximate）と信頼区間が記録されます。近似値で
+        厳密な値を上書きしないよう、メタデータとバージョンの品質指標は更新しません。
+
         Args:
             dataset_id: データセットID
             version: バージョン（指定しない場合は最新バージョン）
             update_metadata: メタデータを更新するかどうか
+            engine: 計算エンジン（"exact"、"streaming" または "sample"）
+            chunk_rows: ストリーミングエンジンで1度に読み込む行数
+            workers: ワーカープロセス数（None の場合はCPUコア数）
+            sample_rows: 近似エンジンの標本の行数（指定しない場合は10000行）
+            error_target: 近似エンジンで比率の推定誤差の目標（指定した場合は
+                sample_rows の代わりに必要な標本の行数を求める）
+            confidence: 近似エンジンの信頼区間の信頼係数
+            exact_uniqueness: ストリーミングエンジンで行の一意性を厳密に数えるかどうか
 
         Returns:
             計算された統計情報
 
         Raises:
-            DatasetError: データセットまたはバージョンが存在しない場合
+            DatasetError: データセットまたはバージョンが存在しない場合、またはエンジンが無効な場合
         """
-        dataset = self.get_dataset(dataset_id)
+        if engine not in STATISTICS_ENGINES:
+            raise DatasetError(f"無効な計算エンジンです: {engine}")
+        workers = workers if workers is not None else (os.cpu_count() or 1)
+        if workers < 1:
+            raise DatasetError("ワーカー数は1以上である必要があります")
+        if workers > 1 and engine == "sample":
+            raise DatasetError("並列計算は厳密なエンジンとストリーミングエンジンでのみ利用できます")
+
+        dataset = self._load_dataset(dataset_id)
         if not dataset:
             raise DatasetError(f"データセットID {dataset_id} は存在しません")
 
@@ -964,58 +2945,62 @@ class DatasetService:
         if not dataset_version:
             raise DatasetError("指定されたバージョンが存在しません")
 
-        # データファイルを読み込み
-        try:
-            df = pd.read_json(dataset_version.storage_path, lines=True)
-        except Exception as e:
-            raise DatasetError(f"データファイルの読み込みに失敗しました: {e}")
-
-        # 基本統計量を計算
-        statistics = {
-            "row_count": len(df),
-            "column_count": len(df.columns),
-            "missing_values": df.isnull().sum().to_dict(),
-            "data_types": df.dtypes.astype(str).to_dict(),
-        }
-
-        # 数値型カラムの統計量
-        numeric_stats = {}
-        for col in df.select_dtypes(include=[np.number]).columns:
-            numeric_stats[col] = {
-                "mean": float(df[col].mean()),
-                "std": float(df[col].std()),
-                "min": float(df[col].min()),
-                "max": float(df[col].max()),
-                "median": float(df[col].median()),
-                "q1": float(df[col].quantile(0.25)),
-                "q3": float(df[col].quantile(0.75)),
-            }
-        if numeric_stats:
-            statistics["numeric_statistics"] = numeric_stats
-
-        # カテゴリカルカラムの統計量
-        categorical_stats = {}
-        for col in df.select_dtypes(include=["object", "category"]).columns:
-            value_counts = df[col].value_counts()
-            categorical_stats[col] = {
-                "unique_count": int(value_counts.nunique()),
-                "most_common": value_counts.head(5).to_dict(),
-                "missing_ratio": float(df[col].isnull().mean()),
+        if engine == "sample":
+            try:
+                rows = sample_rows or DEFAULT_SAMPLE_ROWS
+                if error_target is not None:
+                    rows = sample_size(error_target, confidence)
+                statistics, quality_metrics = sampled_statistics(
+                    *sample_jsonl(self._version_opener(dataset_version), rows),
+                    confidence=confidence,
+                )
+                # 末尾のブロックが短い場合に備え、キャッシュの判定には要求した行数を使う
+                statistics["estimation"]["requested_rows"] = rows
+            except (OSError, StorageError, ValueError) as e:
+                raise DatasetError(f"データファイルの読み込みに失敗しました: {e}")
+
+            result = {
+                "statistics": statistics,
+                "quality_metrics": quality_metrics,
             }
-        if categorical_stats:
-            statistics["categorical_statistics"] = categorical_stats
-
-        # データ品質指標
-        quality_metrics = {
-            "completeness": {
-                "overall": float(1 - df.isnull().mean().mean()),
-                "by_column": (1 - df.isnull().mean()).to_dict(),
-            },
-            "uniqueness": {
-                "overall": float(len(df.drop_duplicates()) / len(df)),
-                "by_column": (df.nunique() / len(df)).to_dict(),
-            },
-        }
+            self._store_cached_statistics(dataset_version, engine, result)
+            return result
+
+        if engine == "streaming":
+            try:
+                with DistinctRowCounter(spill_dir=self.storage_base_path) as row_counter:
+                    accumulator = self._streaming_accumulator(
+                        dataset_version,
+                        workers,
+                        chunk_rows,
+                        row_counter if exact_uniqueness else None,
+                    )
+                    statistics, quality_metrics = accumulator.result()
+                    dataset_version.statistics_sketch = accumulator.to_dict()
+
+                    if exact_uniqueness:
+                        # 同じ読み込みで数えられなかった場合は全体をもう1度読み込む
+                        if row_counter.row_count < accumulator.row_count:
+                            for chunk in self._iter_dataframes(dataset_version, chunk_rows):
+                                row_counter.update(chunk)
+                        distinct_rows = row_counter.distinct_count()
+                        quality_metrics["uniqueness"]["overall"] = (
+                            distinct_rows / row_counter.row_count if row_counter.row_count else 0.0
+                        )
+                        statistics["estimation"]["row_uniqueness"] = "exact"
+            except (OSError, StorageError, ValueError) as e:
+                raise DatasetError(f"データファイルの読み込みに失敗しました: {e}")
+        elif workers > 1:
+            try:
+                statistics, quality_metrics = parallel_exact_statistics(
+                    self._exact_partitions(dataset_version, workers), workers,
+                )
+            except (OSError, StorageError, ValueError) as e:
+                raise DatasetError(f"データファイルの読み込みに失敗しました: {e}")
+        else:
+            # データファイルを読み込み
+            df = self._load_dataframe(dataset_version)
+            statistics, quality_metrics = exact_statistics(df)
 
         # メタデータを更新
         if update_metadata and dataset.metadata:
@@ -1026,24 +3011,94 @@ class DatasetService:
         dataset_version.quality_metrics = quality_metrics
         self.db.commit()
 
-        return {
+        result = {
             "statistics": statistics,
             "quality_metrics": quality_metrics,
         }
+        self._store_cached_statistics(dataset_version, engine, result)
+
+        return result
+
+    def _cached_statistics(
+        self,
+        dataset_version: DatasetVersion,
+        engine: str,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        キャッシュから統計情報を取得
+
+        プロセス内のキャッシュになければ永続化されたキャッシュを参照します。
+        """
+        key = (dataset_version.file_hash, engine_version(engine))
+        cached = self.statistics_cache.get(key)
+        if cached is None:
+            entry = self.db.query(StatisticsCache).filter(
+                StatisticsCache.file_hash == key[0],
+                StatisticsCache.engine_version == key[1],
+            ).first()
+            if not entry:
+                return None
+            cached = {
+                "statistics": entry.statistics,
+                "quality_metrics": entry.quality_metrics,
+            }
+            self.statistics_cache.put(key, cached)
+
+        # 呼び出し元での変更がキャッシュに影響しないようコピーを返す
+        return copy.deepcopy(cached)
+
+    def _store_cached_statistics(
+        self,
+        dataset_version: DatasetVersion,
+        engine: str,
+        result: Dict[str, Any],
+    ) -> None:
+        """統計情報をキャッシュに保存"""
+        key = (dataset_version.file_hash, engine_version(engine))
+        entry = self.db.query(StatisticsCache).filter(
+            StatisticsCache.file_hash == key[0],
+            StatisticsCache.engine_version == key[1],
+        ).first()
+        if not entry:
+            entry = StatisticsCache(file_hash=key[0], engine_version=key[1])
+            self.db.add(entry)
+        entry.statistics = result["statistics"]
+        entry.quality_metrics = result["quality_metrics"]
+        entry.created_at = datetime.utcnow()
+        self.db.commit()
+
+        self.statistics_cache.put(key, copy.deepcopy(result))
 
     def get_statistics(
         self,
         dataset_id: int,
         version: Optional[str] = None,
         recalculate: bool = False,
+        engine: str = "exact",
+        workers: Optional[int] = 1,
+        sample_rows: Optional[int] = None,
+        error_target: Optional[float] = None,
     ) -> Dict[str, Any]:
         """
         データセットの統計情報を取得
 
+        統計情報はファイルのハッシュと統計エンジンのバージョンをキーとしてキャッシュされるため、
+        同じ内容のバージョンについては再計算せずにキャッシュから返します。
+
+        近似エンジン（"sample"）を指定した場合、厳密なエンジンまたはストリーミングエンジンの
+        結果がキャッシュにあればそちらを返します。近似エンジンの結果は、標本の行数が
+        要求以上の場合にのみキャッシュから返します。
+
+        計算した場合、データセットのメタデータの統計情報は最新バージョンのときだけ更新します。
+
         Args:
             dataset_id: データセットID
             version: バージョン（指定しない場合は最新バージョン）
             recalculate: 統計情報を再計算するかどうか
+            engine: 再計算に使う計算エンジン（"exact"、"streaming" または "sample"）
+            workers: 再計算に使うワーカープロセス数（None の場合はCPUコア数）
+            sample_rows: 近似エンジンの標本の行数
+            error_target: 近似エンジンで比率の推定誤差の目標
 
         Returns:
             統計情報
@@ -1051,7 +3106,7 @@ class DatasetService:
         Raises:
             DatasetError: データセットまたはバージョンが存在しない場合
         """
-        dataset = self.get_dataset(dataset_id)
+        dataset = self._load_dataset(dataset_id)
         if not dataset:
             raise DatasetError(f"データセットID {dataset_id} は存在しません")
 
@@ -1069,14 +3124,48 @@ class DatasetService:
         if not dataset_version:
             raise DatasetError("指定されたバージョンが存在しません")
 
-        # 統計情報を再計算するか、既存の情報を返す
-        if recalculate or not dataset.metadata.statistics:
-            return self.calculate_statistics(dataset_id, version, update_metadata=True)
-        else:
-            return {
-                "statistics": dataset.metadata.statistics,
-                "quality_metrics": dataset_version.quality_metrics,
-            }
+        # バージョンごとのキャッシュを返すか、統計情報を再計算する
+        if not recalculate:
+            if engine == "sample":
+                for exact_engine in ("exact", "streaming"):
+                    cached = self._cached_statistics(dataset_version, exact_engine)
+                    if cached is not None:
+                        return cached
+            cached = self._cached_statistics(dataset_version, engine)
+            if cached is not None and (
+                engine != "sample"
+                or self._sample_covers(cached, sample_rows, error_target)
+            ):
+                return cached
+
+        # データセット全体の統計情報は最新バージョンの場合のみ更新する
+        latest = self.db.query(DatasetVersion.id).filter(
+            DatasetVersion.dataset_id == dataset_id,
+        ).order_by(DatasetVersion.created_at.desc()).first()
+        return self.calculate_statistics(
+            dataset_id,
+            dataset_version.version,
+            update_metadata=latest is not None and latest.id == dataset_version.id,
+            engine=engine,
+            workers=workers,
+            sample_rows=sample_rows,
+            error_target=error_target,
+        )
+
+    @staticmethod
+    def _sample_covers(
+        cached: Dict[str, Any],
+        sample_rows: Optional[int],
+        error_target: Optional[float],
+    ) -> bool:
+        """キャッシュされた近似値の標本が要求された行数以上かどうか"""
+        estimation = cached["statistics"].get("estimation", {})
+        if not estimation.get("approximate", False):
+            return True
+        rows = sample_rows or DEFAULT_SAMPLE_ROWS
+        if error_target is not None:
+            rows = sample_size(error_target, estimation["confidence"])
+        return estimation.get("requested_rows", estimation["sample_rows"]) >= rows
 
     def search_datasets(
         self,
@@ -1121,19 +3210,119 @@ class DatasetService:
             AccessControlError: ユーザーが存在しない場合
             DatasetError: 無効な検索パラメータが指定された場合
         """
-        # アクセス可能なデータセットを取得
-        accessible_datasets = self.access_control.get_user_accessible_datasets(user_id)
-        if not accessible_datasets:
-            return [], 0
+        search = self._search_query(
+            user_id, query, tags, status, created_after, created_before, metadata_filters,
+        )
+
+        # 総件数を取得
+        total_count = search.count()
+
+        # ソート
+        if sort_by:
+            sort_column = self._sort_column(sort_by)
+            if sort_order == "desc":
+                search = search.order_by(sort_column.desc())
+            else:
+                search = search.order_by(sort_column.asc())
+
+        # ページネーション
+        search = search.offset((page - 1) * per_page).limit(per_page)
+
+        return search.all(), total_count
+
+    def search_datasets_page(
+        self,
+        user_id: int,
+        query: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        status: Optional[DatasetStatus] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        count: str = "none",
+    ) -> Tuple[List[Dataset], Optional[str], Optional[int]]:
+        """
+        データセットを検索（カーソルによるページネーション）
+
+        (ソート対象フィールド, データセットID) の順で並べ、前のページの最後のデータセットより
+        後ろのものを取得します。OFFSET を使わないため、深いページでも取得時間が変わりません。
+
+        Args:
+            user_id: ユーザーID
+            query: 検索クエリ（名前と説明を検索）
+            tags: タグでフィルタリング
+            status: ステータスでフィルタリング
+            created_after: 作成日時（以降）
+            created_before: 作成日時（以前）
+            metadata_filters: メタデータフィールドによるフィルタリング（search_datasets と同じ形式）
+            sort_by: ソート対象フィールド（"name", "created_at", "updated_at", "status"）
+            sort_order: ソート順序（"asc" or "desc"）
+            limit: 1ページあたりの件数
+            cursor: 前のページで返されたカーソル（指定しない場合は最初のページ）
+            count: 総件数の求め方（"exact", "cached", "none"）
+
+        Returns:
+            (検索結果のデータセットリスト, 次のページのカーソル（最後のページの場合はNone),
+            総件数（count が "none" の場合はNone）)
+
+        Raises:
+            AccessControlError: ユーザーが存在しない場合
+            DatasetError: 無効な検索パラメータまたはカーソルが指定された場合
+        """
+        if count not in COUNT_MODES:
+            raise DatasetError(f"無効な件数の求め方: {count}")
+
+        search = self._search_query(
+            user_id, query, tags, status, created_after, created_before, metadata_filters,
+        )
+        datasets, next_cursor = self._keyset_page(search, sort_by, sort_order, limit, cursor)
+
+        filters = json.dumps({
+            "query": query,
+            "tags": tags,
+            "status": status,
+            "created_after": created_after,
+            "created_before": created_before,
+            "metadata_filters": metadata_filters,
+        }, sort_keys=True, default=str)
+        total = self._page_count(
+            search, count, ("search", user_id, filters), datasets, next_cursor, cursor,
+        )
+        return datasets, next_cursor, total
+
+    def _search_query(
+        self,
+        user_id: int,
+        query: Optional[str],
+        tags: Optional[List[str]],
+        status: Optional[DatasetStatus],
+        created_after: Optional[datetime],
+        created_before: Optional[datetime],
+        metadata_filters: Optional[Dict[str, Any]],
+    ) -> Query:
+        """
+        検索条件に一致するアクセス可能なデータセットのクエリを作成
+
+        Raises:
+            AccessControlError: ユーザーが存在しない場合
+            DatasetError: 無効な演算子が指定された場合
+        """
+        if not self.db.query(User.id).filter(User.id == user_id).first():
+            raise AccessControlError(f"ユーザーID {user_id} は存在しません")
 
-        # 検索条件を構築
-        dataset_ids = [d.id for d in accessible_datasets]
-        query = self.db.query(Dataset).filter(Dataset.id.in_(dataset_ids))
+        # 検索条件を構築（アクセス権限の確認も同じクエリで行い、返すページだけを読み込む）
+        search = self.db.query(Dataset).filter(
+            self.access_control.accessible_datasets_filter(user_id),
+        )
 
         # テキスト検索
         if query:
             search_query = f"%{query}%"
-            query = query.filter(
+            search = search.filter(
                 (Dataset.name.ilike(search_query)) |
                 (Dataset.description.ilike(search_query))
             )
@@ -1141,72 +3330,117 @@ class DatasetService:
         # タグでフィルタリング
         if tags:
             for tag in tags:
-                query = query.filter(Dataset.metadata.has(tags=tag))
+                search = search.filter(_tag_filter(tag))
 
         # ステータスでフィルタリング
         if status:
-            query = query.filter(Dataset.status == status)
+            search = search.filter(Dataset.status == status)
 
         # 作成日時でフィルタリング
         if created_after:
-            query = query.filter(Dataset.created_at >= created_after)
+            search = search.filter(Dataset.created_at >= created_after)
         if created_before:
-            query = query.filter(Dataset.created_at <= created_before)
+            search = search.filter(Dataset.created_at <= created_before)
 
         # メタデータフィールドでフィルタリング
         if metadata_filters:
             for field_name, filter_info in metadata_filters.items():
-                operator = filter_info.get("operator", "eq")
-                value = filter_info.get("value")
+                search = search.filter(_metadata_filter(
+                    field_name, filter_info.get("operator", "eq"), filter_info.get("value"),
+                ))
 
-                if operator == "eq":
-                    query = query.filter(Dataset.metadata.has(
-                        custom_fields={field_name: value}
-                    ))
-                elif operator == "gt":
-                    query = query.filter(Dataset.metadata.has(
-                        custom_fields={field_name: {"$gt": value}}
-                    ))
-                elif operator == "lt":
-                    query = query.filter(Dataset.metadata.has(
-                        custom_fields={field_name: {"$lt": value}}
-                    ))
-                elif operator == "contains":
-                    query = query.filter(Dataset.metadata.has(
-                        custom_fields={field_name: {"$contains": value}}
-                    ))
-                elif operator == "in":
-                    query = query.filter(Dataset.metadata.has(
-                        custom_fields={field_name: {"$in": value}}
-                    ))
-                else:
-                    raise DatasetError(f"無効な演算子: {operator}")
+        return search
 
-        # 総件数を取得
-        total_count = query.count()
+    @staticmethod
+    def _sort_column(sort_by: str) -> Any:
+        """ソート対象フィールドの列を取得"""
+        if sort_by not in SORT_FIELDS:
+            raise DatasetError(f"無効なソートフィールド: {sort_by}")
+        return getattr(Dataset, sort_by)
 
-        # ソート
-        if sort_by:
-            if sort_by == "name":
-                sort_column = Dataset.name
-            elif sort_by == "created_at":
-                sort_column = Dataset.created_at
-            elif sort_by == "updated_at":
-                sort_column = Dataset.updated_at
-            elif sort_by == "status":
-                sort_column = Dataset.status
-            else:
-                raise DatasetError(f"無効なソートフィールド: {sort_by}")
+    def _keyset_page(
+        self,
+        datasets: Query,
+        sort_by: str,
+        sort_order: str,
+        limit: int,
+        cursor: Optional[str],
+    ) -> Tuple[List[Dataset], Optional[str]]:
+        """
+        (ソート対象フィールド, データセットID) のキーでページを取得
+
+        limit + 1 件を取得して次のページがあるかを判定します。
 
+        Returns:
+            (データセットリスト, 次のページのカーソル)
+
+        Raises:
+            DatasetError: ソート条件、件数またはカーソルが不正な場合
+        """
+        sort_column = self._sort_column(sort_by)
+        if sort_order not in ("asc", "desc"):
+            raise DatasetError(f"無効なソート順序: {sort_order}")
+        if limit <= 0:
+            raise DatasetError(f"1ページあたりの件数は正の整数である必要があります: {limit}")
+
+        if sort_order == "desc":
+            order = [sort_column.desc(), Dataset.id.desc()]
+        else:
+            order = [sort_column.asc(), Dataset.id.asc()]
+        position = _decode_cursor(cursor, sort_by, sort_order) if cursor else None
+
+        if position is not None:
+            value, last_id = position
             if sort_order == "desc":
-                query = query.order_by(sort_column.desc())
+                after = or_(sort_column < value, and_(sort_column == value, Dataset.id < last_id))
             else:
-                query = query.order_by(sort_column.asc())
+                after = or_(sort_column > value, and_(sort_column == value, Dataset.id > last_id))
+            datasets = datasets.filter(after)
+        rows = datasets.order_by(*order).limit(limit + 1).all()
 
-        # ページネーション
-        query = query.offset((page - 1) * per_page).limit(per_page)
+        page = rows[:limit]
+        next_cursor = _encode_cursor(sort_by, sort_order, page[-1]) if len(rows) > limit else None
+        return page, next_cursor
+
+    def _page_count(
+        self,
+        datasets: Query,
+        count: str,
+        cache_key: Tuple[str, int, str],
+        page: List[Dataset],
+        next_cursor: Optional[str],
+        cursor: Optional[str],
+    ) -> Optional[int]:
+        """
+        ページネーションの総件数を取得
+
+        最初のページで全件が取得できた場合は、クエリを発行せずにその件数を返します。
+
+        Args:
+            datasets: ページネーションする前のクエリ
+            count: 総件数の求め方（"exact", "cached", "none"）
+            cache_key: 件数のキャッシュのキー（(種類, ユーザーID, 条件のJSON)）
+            page: 取得したページ
+            next_cursor: 次のページのカーソル
+            cursor: 取得したページのカーソル
 
-        return query.all(), total_count
+        Returns:
+            総件数（count が "none" の場合はNone）
+        """
+        if count == "none":
+            return None
+        if cursor is None and next_cursor is None:
+            return len(page)
+
+        if count == "cached":
+            entry = self.search_count_cache.get(cache_key)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0]
+
+        total = datasets.count()
+        if count == "cached":
+            self.search_count_cache.put(cache_key, (total, time.monotonic() + SEARCH_COUNT_CACHE_TTL))
+        return total
 
     def get_dataset_tags(
         self,
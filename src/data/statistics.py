@@ -0,0 +1,1438 @@
+"""
+データセットの統計情報計算
+
+このモジュールは、データセットのバージョンから統計情報と品質指標を計算する機能を提供します。
+データフレーム全体をメモリに載せて計算する厳密なエンジン（exact）と、ファイルをチャンク単位で
+読み込んでマージ可能なスケッチに集約するストリーミングエンジン（streaming）があります。
+ストリーミングエンジンのスケッチは結合できるため、行の範囲や列で分割して複数のプロセスで
+並列に集約することもできます（parallel_statistics、parallel_column_statistics）。
+厳密なエンジンは列のグループごとに独立して計算できるため、列で分割して並列に計算します
+（parallel_exact_statistics）。
+
+ストリーミングエンジンの誤差は以下の通りです。
+
+- 行数、列数、欠損値数、データ型、平均、標準偏差、最小値、最大値、完全性: 厳密
+  （平均と標準偏差は Welford 法とチャンク間の Chan の公式で計算）
+- 中央値、四分位数: KLL スケッチ（k=200）による近似。順位の誤差は全体の約1.3%以内（99%信頼）。
+  スケッチが圧縮されない程度の件数（k件以下）では厳密
+- 最頻値の出現回数: Misra-Gries 要約（k=1024）による近似。真の値より小さくなることはあっても
+  大きくなることはなく、差は ``estimation.top_k_count_error`` に列ごとに示される値以下
+- ユニーク数、一意性: HyperLogLog（p=14）による近似。相対標準誤差は約0.81%
+
+対話的なダッシュボード向けに、ファイルから行のブロックを無作為に抽出した標本から推定する
+近似エンジン（sample）もあります。長い行から始まるブロックほど選ばれやすい偏りは、ブロックの
+重みで補正します。推定値には信頼区間が ``estimation.confidence_intervals`` に記録されます
+（sampled_statistics を参照）。
+"""
+
+import base64
+import io
+import math
+import zlib
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .duplicates import hash_rows, hash_values
+
+# 統計情報の計算エンジン
+STATISTICS_ENGINES = ("exact", "streaming", "sample")
+
+# 統計エンジンのバージョン（計算結果が変わる変更を加えた場合は更新し、キャッシュを無効化する）
+STATISTICS_ENGINE_VERSION = 3
+
+# スケッチの既定パラメータ
+DEFAULT_KLL_K = 200
+DEFAULT_TOP_K = 1024
+DEFAULT_HLL_PRECISION = 14
+
+# 最頻値として返す件数
+MOST_COMMON_COUNT = 5
+
+# 標本抽出の既定パラメータ（標本の行数、1ブロックの行数、信頼係数）
+DEFAULT_SAMPLE_ROWS = 10000
+DEFAULT_SAMPLE_BLOCK_ROWS = 100
+DEFAULT_CONFIDENCE = 0.95
+
+# 行の先頭を探すときに1度に後ろから読み込むバイト数
+_LINE_SCAN_BYTES = 4096
+
+
+def engine_version(engine: str) -> str:
+    """統計情報のキャッシュのキーに使うエンジンのバージョン（例: "exact/1"）"""
+    return f"{engine}/{STATISTICS_ENGINE_VERSION}"
+
+
+def numeric_statistics(df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+    """
+    数値型カラムの統計量をまとめて計算
+
+    数値型カラムを列ごとに連続した1つの2次元配列にまとめて1回だけソートし、
+    最小値・最大値・分位点（pandas の quantile と同じ線形補間）は各列の有効な件数から
+    位置を求めて取り出します。平均と標準偏差も同じ配列に対するベクトル演算で求めるため、
+    列ごとに何度も走査する必要がありません。
+
+    Args:
+        df: データフレーム
+
+    Returns:
+        カラム名をキーとする統計量
+    """
+    numeric = df.select_dtypes(include=[np.number])
+    if numeric.shape[1] == 0:
+        return {}
+
+    # 行 i が列 i の値になるよう転置し、欠損値（NaN）が末尾に来るようにソート
+    block = np.array(numeric.to_numpy(dtype=np.float64, na_value=np.nan).T, order="C")
+    block.sort(axis=1)
+    missing = np.isnan(block)
+    counts = block.shape[1] - np.count_nonzero(missing, axis=1)
+    columns = np.arange(block.shape[0])
+    last = np.maximum(counts - 1, 0)
+
+    def take(q: float) -> np.ndarray:
+        position = q * last
+        lower = np.floor(position).astype(np.intp)
+        upper = np.ceil(position).astype(np.intp)
+        low_values = block[columns, lower]
+        return low_values + (block[columns, upper] - low_values) * (position - lower)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mins = block[:, 0].copy()
+        maxs = block[columns, last]
+        medians, q1s, q3s = take(0.5), take(0.25), take(0.75)
+
+        # 欠損値を平均で埋めて偏差が0になるようにしてから分散を求める
+        block[missing] = 0.0
+        means = block.sum(axis=1) / counts
+        block[missing] = np.broadcast_to(means[:, None], block.shape)[missing]
+        block -= means[:, None]
+        stds = np.sqrt(np.einsum("ij,ij->i", block, block) / (counts - 1))
+
+    # 全て欠損値の列、1件しかない列の標準偏差は NaN（pandas と同じ）
+    empty = counts == 0
+    for values in (mins, maxs, medians, q1s, q3s, means):
+        values[empty] = np.nan
+    stds[counts < 2] = np.nan
+
+    return {
+        col: {
+            "mean": float(means[i]),
+            "std": float(stds[i]),
+            "min": float(mins[i]),
+            "max": float(maxs[i]),
+            "median": float(medians[i]),
+            "q1": float(q1s[i]),
+            "q3": float(q3s[i]),
+        }
+        for i, col in enumerate(numeric.columns)
+    }
+
+
+def exact_statistics(df: pd.DataFrame) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    データフレーム全体から統計情報と品質指標を計算
+
+    欠損値の判定は1回だけ行い、欠損値数・完全性・欠損率で共有します。
+    行の重複は、重複を除いたデータフレームを作る代わりに行ごとのハッシュで数えます。
+
+    Args:
+        df: データフレーム
+
+    Returns:
+        (統計情報, 品質指標)
+    """
+    statistics, quality_metrics, row_hashes = _exact_column_statistics(df)
+    quality_metrics["uniqueness"]["overall"] = float(np.unique(row_hashes).size / len(df))
+    return statistics, quality_metrics
+
+
+def _exact_column_statistics(
+    df: pd.DataFrame,
+) -> Tuple[Dict[str, Any], Dict[str, Any], np.ndarray]:
+    """
+    列ごとの統計情報と品質指標、行ごとのハッシュを計算（行の一意性は呼び出し側で求める）
+
+    行ごとのハッシュ（duplicates.hash_rows）は列ごとの寄与の和のため、列のグループごとに
+    求めた値を足し合わせるとデータフレーム全体の値になります。
+    """
+    null_counts = df.isnull().sum()
+    null_ratios = null_counts / len(df)
+
+    # 基本統計量を計算
+    statistics = {
+        "row_count": len(df),
+        "column_count": len(df.columns),
+        "missing_values": null_counts.to_dict(),
+        "data_types": df.dtypes.astype(str).to_dict(),
+    }
+
+    # 数値型カラムの統計量
+    numeric_stats = numeric_statistics(df)
+    if numeric_stats:
+        statistics["numeric_statistics"] = numeric_stats
+
+    # カテゴリカルカラムの統計量
+    categorical_stats = {}
+    for col in df.select_dtypes(include=["object", "category"]).columns:
+        value_counts = df[col].value_counts()
+        categorical_stats[col] = {
+            "unique_count": int(len(value_counts)),
+            "most_common": value_counts.head(MOST_COMMON_COUNT).to_dict(),
+            "missing_ratio": float(null_ratios[col]),
+        }
+    if categorical_stats:
+        statistics["categorical_statistics"] = categorical_stats
+
+    # データ品質指標
+    quality_metrics = {
+        "completeness": {
+            "overall": float(1 - null_ratios.mean()),
+            "by_column": (1 - null_ratios).to_dict(),
+        },
+        "uniqueness": {
+            "overall": None,
+            "by_column": (df.nunique() / len(df)).to_dict(),
+        },
+    }
+
+    return statistics, quality_metrics, hash_rows(df)
+
+
+# 厳密なエンジンのパーティション（列のグループのデータフレーム、またはそれを読み込む関数）
+ExactPartition = Union[pd.DataFrame, Callable[[], pd.DataFrame]]
+
+
+def _exact_partition(
+    partition: ExactPartition,
+) -> Tuple[Dict[str, Any], Dict[str, Any], np.ndarray]:
+    """1つの列のグループを計算（ワーカープロセスで実行）"""
+    df = partition() if callable(partition) else partition
+    return _exact_column_statistics(df)
+
+
+def parallel_exact_statistics(
+    partitions: List[ExactPartition],
+    workers: int,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    列のグループごとにプロセスプールで厳密な統計情報を計算
+
+    列ごとの統計量は他の列に依存しないため、各グループの結果をそのまま並べるだけで
+    exact_statistics と同じ結果になります。行の一意性は、グループごとの行のハッシュへの
+    寄与を足し合わせて求めます。パーティションは同じ行を同じ順序で含む必要があります。
+    読み込む関数はワーカープロセスに渡すため、pickle 可能である必要があります。
+
+    Args:
+        partitions: 列のグループのデータフレーム、またはそれを読み込む関数のリスト
+        workers: ワーカープロセス数
+
+    Returns:
+        (統計情報, 品質指標)
+    """
+    if workers <= 1 or len(partitions) <= 1:
+        results = [_exact_partition(partition) for partition in partitions]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(partitions))) as pool:
+            results = list(pool.map(_exact_partition, partitions))
+
+    row_count = results[0][0]["row_count"]
+    statistics: Dict[str, Any] = {
+        "row_count": row_count,
+        "column_count": 0,
+        "missing_values": {},
+        "data_types": {},
+    }
+    numeric_stats: Dict[str, Any] = {}
+    categorical_stats: Dict[str, Any] = {}
+    completeness: Dict[str, Any] = {}
+    uniqueness: Dict[str, Any] = {}
+    row_hashes = np.zeros(row_count, dtype=np.uint64)
+    for part_statistics, part_quality, part_hashes in results:
+        statistics["column_count"] += part_statistics["column_count"]
+        statistics["missing_values"].update(part_statistics["missing_values"])
+        statistics["data_types"].update(part_statistics["data_types"])
+        numeric_stats.update(part_statistics.get("numeric_statistics", {}))
+        categorical_stats.update(part_statistics.get("categorical_statistics", {}))
+        completeness.update(part_quality["completeness"]["by_column"])
+        uniqueness.update(part_quality["uniqueness"]["by_column"])
+        with np.errstate(over="ignore"):
+            row_hashes += part_hashes
+    if numeric_stats:
+        statistics["numeric_statistics"] = numeric_stats
+    if categorical_stats:
+        statistics["categorical_statistics"] = categorical_stats
+
+    null_ratios = pd.Series(statistics["missing_values"], dtype=np.float64) / row_count
+    quality_metrics = {
+        "completeness": {
+            "overall": float(1 - null_ratios.mean()),
+            "by_column": completeness,
+        },
+        "uniqueness": {
+            "overall": float(np.unique(row_hashes).size / row_count),
+            "by_column": uniqueness,
+        },
+    }
+    return statistics, quality_metrics
+
+
+class RunningMoments:
+    """
+    件数・平均・分散・最小値・最大値の累積
+
+    チャンク内はNumPyでまとめて計算し、チャンク間は Chan の公式で結合します。
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: np.ndarray) -> None:
+        """欠損値を除いた値の配列を追加"""
+        if len(values) == 0:
+            return
+        other = RunningMoments()
+        other.count = len(values)
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        self.merge(other)
+
+    def merge(self, other: "RunningMoments") -> None:
+        """別の累積を結合"""
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self) -> float:
+        """標本標準偏差（件数が2未満の場合はNaN）"""
+        if self.count < 2:
+            return math.nan
+        return math.sqrt(self.m2 / (self.count - 1))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunningMoments":
+        moments = cls()
+        moments.count = data["count"]
+        moments.mean = data["mean"]
+        moments.m2 = data["m2"]
+        if moments.count:
+            moments.min = data["min"]
+            moments.max = data["max"]
+        return moments
+
+
+class KLLSketch:
+    """
+    分位点を近似する KLL スケッチ
+
+    レベル h の要素は 2^h 件分の重みを持ち、各レベルは容量を超えると
+    ソートして1つおきに上位レベルへ昇格します。
+    """
+
+    def __init__(self, k: int = DEFAULT_KLL_K, seed: Optional[int] = None):
+        """
+        初期化
+
+        Args:
+            k: 最上位レベルの容量（大きいほど高精度）
+            seed: 圧縮時の乱数シード
+        """
+        self.k = k
+        self.count = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def rank_error(self) -> float:
+        """正規化された順位誤差の目安（99%信頼）"""
+        return 2.296 / self.k ** 0.9723
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values: np.ndarray) -> None:
+        """欠損値を除いた値の配列を追加"""
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype=np.float64)])
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        """別のスケッチを結合"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+
+    def _compress(self) -> None:
+        compressed = True
+        while compressed:
+            compressed = False
+            for level in range(len(self.levels)):
+                items = self.levels[level]
+                if len(items) <= self._capacity(level):
+                    continue
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # 奇数個の場合は1件をこのレベルに残す
+                keep = items[:len(items) % 2]
+                pairs = items[len(keep):]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                compressed = True
+
+    def quantiles(self, qs: Iterable[float]) -> List[float]:
+        """
+        分位点を取得
+
+        圧縮が一度も行われていない場合は全ての値を保持しているため、
+        pandas と同じ線形補間で厳密な値を返します。
+        """
+        qs = list(qs)
+        if self.count == 0:
+            return [math.nan] * len(qs)
+        if len(self.levels) == 1:
+            return [float(v) for v in np.quantile(self.levels[0], qs)]
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(level_items), 2 ** level, dtype=np.float64)
+            for level, level_items in enumerate(self.levels)
+        ])
+        order = np.argsort(items, kind="stable")
+        items = items[order]
+        cumulative = np.cumsum(weights[order])
+        total = cumulative[-1]
+        indices = np.searchsorted(cumulative, [q * total for q in qs], side="left")
+        return [float(items[min(i, len(items) - 1)]) for i in indices]
+
+    def cdf(self, points: Iterable[float]) -> np.ndarray:
+        """
+        値以下の要素の割合（累積分布関数）を取得
+
+        分位点と同じく、誤差は順位の誤差（rank_error）の範囲です。
+        """
+        points = np.asarray(list(points), dtype=np.float64)
+        if self.count == 0:
+            return np.full(points.shape, math.nan)
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(level_items), 2 ** level, dtype=np.float64)
+            for level, level_items in enumerate(self.levels)
+        ])
+        order = np.argsort(items, kind="stable")
+        cumulative = np.concatenate([[0.0], np.cumsum(weights[order])])
+        indices = np.searchsorted(items[order], points, side="right")
+        return cumulative[indices] / cumulative[-1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "k": self.k,
+            "count": self.count,
+            "levels": [level.tolist() for level in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KLLSketch":
+        sketch = cls(k=data["k"])
+        sketch.count = data["count"]
+        sketch.levels = [np.asarray(level, dtype=np.float64) for level in data["levels"]]
+        return sketch
+
+
+class MisraGries:
+    """
+    頻出値を近似する Misra-Gries 要約
+
+    カウンタが k 個を超えると、k+1 番目に大きいカウントを全カウンタから差し引きます。
+    差し引いた量の合計が出現回数の過小評価の上限になります。
+    """
+
+    def __init__(self, k: int = DEFAULT_TOP_K):
+        """
+        初期化
+
+        Args:
+            k: 保持するカウンタ数
+        """
+        self.k = k
+        self.counters: Dict[Any, int] = {}
+        self.error = 0
+
+    def update(self, counts: Dict[Any, int]) -> None:
+        """値ごとの出現回数を追加"""
+        for value, count in counts.items():
+            self.counters[value] = self.counters.get(value, 0) + int(count)
+        self._reduce()
+
+    def merge(self, other: "MisraGries") -> None:
+        """別の要約を結合"""
+        self.error += other.error
+        self.update(other.counters)
+
+    def _reduce(self) -> None:
+        if len(self.counters) <= self.k:
+            return
+        threshold = sorted(self.counters.values(), reverse=True)[self.k]
+        self.counters = {
+            value: count - threshold
+            for value, count in self.counters.items()
+            if count > threshold
+        }
+        self.error += threshold
+
+    def most_common(self, n: int) -> Dict[Any, int]:
+        """出現回数の多い順に n 件を取得"""
+        items = sorted(self.counters.items(), key=lambda item: item[1], reverse=True)
+        return dict(items[:n])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "k": self.k,
+            "error": self.error,
+            "counters": [
+                [value.item() if isinstance(value, np.generic) else value, count]
+                for value, count in self.counters.items()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MisraGries":
+        summary = cls(k=data["k"])
+        summary.error = data["error"]
+        summary.counters = {value: count for value, count in data["counters"]}
+        return summary
+
+
+class HyperLogLog:
+    """ユニーク数を近似する HyperLogLog"""
+
+    def __init__(self, precision: int = DEFAULT_HLL_PRECISION):
+        """
+        初期化
+
+        Args:
+            precision: レジスタ数の対数（レジスタ数は 2^precision）
+        """
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        """相対標準誤差"""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update_hashes(self, hashes: np.ndarray) -> None:
+        """64ビットのハッシュ値の配列を追加"""
+        if len(hashes) == 0:
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        rest = hashes << np.uint64(self.precision)
+        # 上位53ビットは浮動小数点数で厳密に表せるため、frexp の指数がビット長になる
+        _, bit_length = np.frexp((rest >> np.uint64(11)).astype(np.float64))
+        bit_length = np.where(bit_length > 0, bit_length + 11, 0)
+        rank = np.minimum(64 - bit_length + 1, 64 - self.precision + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def update(self, series: pd.Series) -> None:
+        """欠損値を除いた値を追加"""
+        hashes, present = hash_values(series)
+        self.update_hashes(hashes[present])
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """別のスケッチを結合"""
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        """ユニーク数の推定値"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return estimate
+
+    def to_dict(self) -> Dict[str, Any]:
+        # ユニーク数の少ない列ではレジスタの大半が0になるため圧縮して保存
+        registers = zlib.compress(self.registers.tobytes())
+        return {
+            "precision": self.precision,
+            "registers": base64.b64encode(registers).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HyperLogLog":
+        sketch = cls(precision=data["precision"])
+        registers = zlib.decompress(base64.b64decode(data["registers"]))
+        sketch.registers = np.frombuffer(registers, dtype=np.uint8).copy()
+        return sketch
+
+
+def _is_numeric(series: pd.Series) -> bool:
+    """数値型の列かどうか（真偽値は含めない）"""
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def _is_categorical(series: pd.Series) -> bool:
+    """カテゴリカルな列かどうか"""
+    return (
+        pd.api.types.is_object_dtype(series)
+        or pd.api.types.is_string_dtype(series)
+        or isinstance(series.dtype, pd.CategoricalDtype)
+    )
+
+
+def _resolve_dtype(dtypes: List[str], has_nulls: bool) -> str:
+    """チャンクごとのデータ型から列全体のデータ型を決める"""
+    if not dtypes:
+        return "object"
+    if len(dtypes) == 1:
+        dtype = dtypes[0]
+    else:
+        try:
+            resolved = np.result_type(*[np.dtype(d) for d in dtypes])
+        except TypeError:
+            return "object"
+        if not np.issubdtype(resolved, np.number) or resolved == np.bool_:
+            return "object"
+        dtype = str(resolved)
+    # 欠損値を含む整数列は pandas では浮動小数点数になる
+    if has_nulls and dtype.startswith(("int", "uint")):
+        return "float64"
+    return dtype
+
+
+class ColumnSketch:
+    """1列分の統計情報の累積"""
+
+    def __init__(
+        self,
+        kll_k: int = DEFAULT_KLL_K,
+        top_k: int = DEFAULT_TOP_K,
+        hll_precision: int = DEFAULT_HLL_PRECISION,
+    ):
+        self.rows = 0
+        self.nulls = 0
+        self.dtypes: List[str] = []
+        self.has_categorical = False
+        self.moments = RunningMoments()
+        self.quantiles = KLLSketch(k=kll_k)
+        self.frequent = MisraGries(k=top_k)
+        self.distinct = HyperLogLog(precision=hll_precision)
+
+    def update(self, series: pd.Series) -> None:
+        """チャンクの列を追加"""
+        null_count = int(series.isnull().sum())
+        self.rows += len(series)
+        self.nulls += null_count
+        if null_count == len(series):
+            return
+
+        dtype = str(series.dtype)
+        if dtype not in self.dtypes:
+            self.dtypes.append(dtype)
+
+        if _is_numeric(series):
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            values = values[~np.isnan(values)]
+            self.moments.update(values)
+            self.quantiles.update(values)
+        elif _is_categorical(series):
+            self.has_categorical = True
+        if self.has_categorical:
+            self.frequent.update(series.value_counts().to_dict())
+        self.distinct.update(series)
+
+    def merge(self, other: "ColumnSketch") -> None:
+        """別の累積を結合"""
+        self.rows += other.rows
+        self.nulls += other.nulls
+        for dtype in other.dtypes:
+            if dtype not in self.dtypes:
+                self.dtypes.append(dtype)
+        self.has_categorical = self.has_categorical or other.has_categorical
+        self.moments.merge(other.moments)
+        self.quantiles.merge(other.quantiles)
+        self.frequent.merge(other.frequent)
+        self.distinct.merge(other.distinct)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "nulls": self.nulls,
+            "dtypes": list(self.dtypes),
+            "has_categorical": self.has_categorical,
+            "moments": self.moments.to_dict(),
+            "quantiles": self.quantiles.to_dict(),
+            "frequent": self.frequent.to_dict(),
+            "distinct": self.distinct.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ColumnSketch":
+        sketch = cls()
+        sketch.rows = data["rows"]
+        sketch.nulls = data["nulls"]
+        sketch.dtypes = list(data["dtypes"])
+        sketch.has_categorical = data["has_categorical"]
+        sketch.moments = RunningMoments.from_dict(data["moments"])
+        sketch.quantiles = KLLSketch.from_dict(data["quantiles"])
+        sketch.frequent = MisraGries.from_dict(data["frequent"])
+        sketch.distinct = HyperLogLog.from_dict(data["distinct"])
+        return sketch
+
+
+class StreamingStatistics:
+    """
+    チャンク単位で統計情報を集約するストリーミングエンジン
+
+    チャンクごとに update を呼び出し、最後に result で exact_statistics と
+    同じ形式の統計情報と品質指標を取得します。累積は merge で結合でき、
+    to_dict/from_dict でJSONに保存できます。
+    """
+
+    def __init__(
+        self,
+        kll_k: int = DEFAULT_KLL_K,
+        top_k: int = DEFAULT_TOP_K,
+        hll_precision: int = DEFAULT_HLL_PRECISION,
+    ):
+        """
+        初期化
+
+        Args:
+            kll_k: KLL スケッチのパラメータ
+            top_k: Misra-Gries 要約のカウンタ数
+            hll_precision: HyperLogLog の精度
+        """
+        self.kll_k = kll_k
+        self.top_k = top_k
+        self.hll_precision = hll_precision
+        self.row_count = 0
+        self.columns: Dict[str, ColumnSketch] = {}
+        self.rows = HyperLogLog(precision=hll_precision)
+
+    def _column(self, name: str) -> ColumnSketch:
+        if name not in self.columns:
+            self.columns[name] = ColumnSketch(self.kll_k, self.top_k, self.hll_precision)
+        return self.columns[name]
+
+    def update(self, df: pd.DataFrame) -> None:
+        """チャンクを追加"""
+        self.update_columns(df)
+        self.update_rows(df)
+
+    def update_columns(self, df: pd.DataFrame) -> None:
+        """チャンクの列ごとの統計情報だけを追加（列単位で分割して計算する場合に使用）"""
+        if len(df) == 0:
+            return
+        for name in df.columns:
+            self._column(name).update(df[name])
+
+    def update_rows(self, df: pd.DataFrame) -> None:
+        """チャンクの行数と行の重複の統計情報だけを追加（列単位で分割して計算する場合に使用）"""
+        if len(df) == 0:
+            return
+        self.row_count += len(df)
+        self.rows.update_hashes(hash_rows(df))
+
+    def merge(self, other: "StreamingStatistics") -> None:
+        """別の累積を結合"""
+        self.row_count += other.row_count
+        for name, sketch in other.columns.items():
+            self._column(name).merge(sketch)
+        self.rows.merge(other.rows)
+
+    def result(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        統計情報と品質指標を取得
+
+        Returns:
+            (統計情報, 品質指標)
+        """
+        row_count = self.row_count
+        missing_values = {}
+        data_types = {}
+        numeric_stats = {}
+        categorical_stats = {}
+        top_k_count_error = {}
+        completeness = {}
+        uniqueness = {}
+
+        for name, sketch in self.columns.items():
+            # チャンクに列が現れなかった行は欠損値として扱う
+            nulls = sketch.nulls + (row_count - sketch.rows)
+            dtype = _resolve_dtype(sketch.dtypes, nulls > 0)
+            missing_values[name] = nulls
+            data_types[name] = dtype
+            completeness[name] = 1 - nulls / row_count if row_count else 0.0
+            distinct = min(sketch.distinct.estimate(), row_count - nulls)
+            uniqueness[name] = distinct / row_count if row_count else 0.0
+
+            if sketch.moments.count and not sketch.has_categorical:
+                median, q1, q3 = sketch.quantiles.quantiles([0.5, 0.25, 0.75])
+                numeric_stats[name] = {
+                    "mean": sketch.moments.mean,
+                    "std": sketch.moments.std,
+                    "min": sketch.moments.min,
+                    "max": sketch.moments.max,
+                    "median": median,
+                    "q1": q1,
+                    "q3": q3,
+                }
+            elif sketch.has_categorical:
+                categorical_stats[name] = {
+                    "unique_count": int(round(distinct)),
+                    "most_common": sketch.frequent.most_common(MOST_COMMON_COUNT),
+                    "missing_ratio": nulls / row_count if row_count else 0.0,
+                }
+                top_k_count_error[name] = sketch.frequent.error
+
+        statistics = {
+            "row_count": row_count,
+            "column_count": len(self.columns),
+            "missing_values": missing_values,
+            "data_types": data_types,
+        }
+        if numeric_stats:
+            statistics["numeric_statistics"] = numeric_stats
+        if categorical_stats:
+            statistics["categorical_statistics"] = categorical_stats
+        statistics["estimation"] = {
+            "engine": "streaming",
+            "quantile_rank_error": KLLSketch(k=self.kll_k).rank_error,
+            "distinct_relative_error": self.rows.relative_error,
+            "top_k_count_error": top_k_count_error,
+        }
+
+        distinct_rows = min(self.rows.estimate(), row_count)
+        quality_metrics = {
+            "completeness": {
+                "overall": float(np.mean(list(completeness.values()))) if completeness else 0.0,
+                "by_column": completeness,
+            },
+            "uniqueness": {
+                "overall": distinct_rows / row_count if row_count else 0.0,
+                "by_column": uniqueness,
+            },
+        }
+
+        return statistics, quality_metrics
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            # 行のハッシュの求め方が異なるスケッチを結合しないよう、エンジンのバージョンを記録
+            "engine_version": STATISTICS_ENGINE_VERSION,
+            "kll_k": self.kll_k,
+            "top_k": self.top_k,
+            "hll_precision": self.hll_precision,
+            "row_count": self.row_count,
+            "columns": {name: sketch.to_dict() for name, sketch in self.columns.items()},
+            "rows": self.rows.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StreamingStatistics":
+        engine = cls(data["kll_k"], data["top_k"], data["hll_precision"])
+        engine.row_count = data["row_count"]
+        engine.columns = {
+            name: ColumnSketch.from_dict(sketch) for name, sketch in data["columns"].items()
+        }
+        engine.rows = HyperLogLog.from_dict(data["rows"])
+        return engine
+
+
+def streaming_statistics(
+    chunks: Iterable[pd.DataFrame],
+    **sketch_options: Any,
+) -> StreamingStatistics:
+    """
+    チャンクの列から統計情報を集約
+
+    Args:
+        chunks: データフレームのチャンク
+        **sketch_options: StreamingStatistics に渡すスケッチのパラメータ
+
+    Returns:
+        集約された累積
+    """
+    engine = StreamingStatistics(**sketch_options)
+    for chunk in chunks:
+        engine.update(chunk)
+    return engine
+
+
+def split_jsonl(
+    open_binary: Callable[[], BinaryIO],
+    parts: int,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> List[Tuple[int, int]]:
+    """
+    JSONLファイルを行の境界で分割
+
+    Args:
+        open_binary: ファイルをシーク可能なバイナリストリームとして開く関数
+        parts: 分割数
+        start: 分割する範囲の開始位置（行の先頭）
+        end: 分割する範囲の終了位置（指定しない場合はファイル末尾）
+
+    Returns:
+        各範囲の (開始位置, 終了位置) のリスト
+    """
+    boundaries = [start]
+    with open_binary() as f:
+        size = f.seek(0, io.SEEK_END) if end is None else end
+        for i in range(1, parts):
+            nominal = start + (size - start) * i // parts
+            if nominal <= boundaries[-1]:
+                continue
+            # 直前の位置から改行まで読み飛ばした位置を境界とする
+            f.seek(nominal - 1)
+            f.readline()
+            boundary = f.tell()
+            if boundary >= size:
+                break
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+    boundaries.append(size)
+    return [
+        (start, end) for start, end in zip(boundaries[:-1], boundaries[1:]) if end > start
+    ]
+
+
+def iter_jsonl_range(
+    open_binary: Callable[[], BinaryIO],
+    start: int,
+    end: int,
+    chunk_rows: int,
+) -> Iterator[pd.DataFrame]:
+    """
+    JSONLファイルの指定した範囲をチャンク単位で読み込む
+
+    Args:
+        open_binary: ファイルをバイナリストリームとして開く関数
+        start: 開始位置（行の先頭）
+        end: 終了位置（行の先頭またはファイル末尾）
+        chunk_rows: 1度に読み込む行数
+
+    Yields:
+        チャンクごとのデータフレーム
+    """
+    with open_binary() as f:
+        f.seek(start)
+        position = start
+        lines: List[bytes] = []
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            if line.strip():
+                lines.append(line)
+            if len(lines) >= chunk_rows:
+                yield pd.read_json(io.BytesIO(b"".join(lines)), lines=True)
+                lines = []
+        if lines:
+            yield pd.read_json(io.BytesIO(b"".join(lines)), lines=True)
+
+
+# パーティションの集計範囲（全て、列ごとの統計情報のみ、行の統計情報のみ）
+PARTITION_SCOPES = ("all", "columns", "rows")
+
+# チャンクを読み込む関数
+ChunkReader = Callable[[], Iterable[pd.DataFrame]]
+
+Partition = Tuple[ChunkReader, str]
+
+
+def _scan_partition(
+    read_chunks: Callable[[], Iterable[pd.DataFrame]],
+    scope: str,
+    sketch_options: Dict[str, Any],
+) -> StreamingStatistics:
+    """1つのパーティションを集約（ワーカープロセスで実行）"""
+    engine = StreamingStatistics(**sketch_options)
+    for chunk in read_chunks():
+        if scope == "columns":
+            engine.update_columns(chunk)
+        elif scope == "rows":
+            engine.update_rows(chunk)
+        else:
+            engine.update(chunk)
+    return engine
+
+
+def parallel_statistics(
+    partitions: List[Partition],
+    workers: int,
+    **sketch_options: Any,
+) -> StreamingStatistics:
+    """
+    パーティションごとにプロセスプールで集約し、結果を結合
+
+    パーティションは (チャンクを読み込む関数, 集計範囲) の組です。行の範囲で分割した場合は
+    集計範囲を "all" に、列で分割した場合は列のグループごとに "columns"、行の重複を数える
+    パーティションを1つだけ "rows" にします。読み込む関数はワーカープロセスに渡すため、
+    pickle 可能（モジュールレベルの関数の functools.partial など）である必要があります。
+
+    Args:
+        partitions: パーティションのリスト
+        workers: ワーカープロセス数
+        **sketch_options: StreamingStatistics に渡すスケッチのパラメータ
+
+    Returns:
+        結合された累積
+    """
+    for _, scope in partitions:
+        if scope not in PARTITION_SCOPES:
+            raise ValueError(f"無効な集計範囲です: {scope}")
+
+    merged = StreamingStatistics(**sketch_options)
+    if workers <= 1 or len(partitions) <= 1:
+        for read_chunks, scope in partitions:
+            merged.merge(_scan_partition(read_chunks, scope, sketch_options))
+        return merged
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(partitions))) as pool:
+        futures = [
+            pool.submit(_scan_partition, read_chunks, scope, sketch_options)
+            for read_chunks, scope in partitions
+        ]
+        # 列の順序を保つため、パーティションの順に結合
+        for future in futures:
+            merged.merge(future.result())
+    return merged
+
+
+def _scan_column_group(
+    read_chunks: ChunkReader,
+    whole_rows: bool,
+    sketch_options: Dict[str, Any],
+) -> Tuple[StreamingStatistics, Optional[np.ndarray]]:
+    """
+    列のグループを集約し、行のハッシュへの寄与を返す（ワーカープロセスで実行）
+
+    whole_rows が True の場合はグループが全ての列を含むため、行の統計情報も集約して
+    寄与は返しません。
+    """
+    engine = StreamingStatistics(**sketch_options)
+    if whole_rows:
+        for chunk in read_chunks():
+            engine.update(chunk)
+        return engine, None
+
+    hashes = []
+    for chunk in read_chunks():
+        engine.update_columns(chunk)
+        hashes.append(hash_rows(chunk))
+    return engine, np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+
+
+def parallel_column_statistics(
+    row_ranges: List[List[ChunkReader]],
+    workers: int,
+    **sketch_options: Any,
+) -> StreamingStatistics:
+    """
+    行の範囲と列のグループで分割してプロセスプールで集約し、結果を結合
+
+    row_ranges は行の範囲ごとの、列のグループのチャンクを読み込む関数のリストです。
+    各パーティションは担当する列だけを読み込みます。行のハッシュ（duplicates.hash_rows）は
+    列ごとの寄与の和のため、行の範囲ごとにグループの寄与を足し合わせて行の重複を数えます
+    （全ての列を読み込むパーティションは不要です）。寄与は行の範囲の行数 × 8バイトの
+    メモリを使うため、列で分割するのは行の範囲が小さい場合に限ってください。
+    グループが1つだけの行の範囲は、ワーカープロセス内で行の統計情報も集約します。
+
+    Args:
+        row_ranges: 行の範囲ごとの、列のグループを読み込む関数のリスト
+        workers: ワーカープロセス数
+        **sketch_options: StreamingStatistics に渡すスケッチのパラメータ
+
+    Returns:
+        結合された累積
+    """
+    tasks = [
+        (index, read_chunks, len(groups) == 1)
+        for index, groups in enumerate(row_ranges)
+        for read_chunks in groups
+    ]
+
+    merged = StreamingStatistics(**sketch_options)
+    row_hashes: Dict[int, np.ndarray] = {}
+
+    def add_row_hashes(index: int) -> None:
+        hashes = row_hashes.pop(index, None)
+        if hashes is not None:
+            merged.row_count += len(hashes)
+            merged.rows.update_hashes(hashes)
+
+    def combine(index: int, result: Tuple[StreamingStatistics, Optional[np.ndarray]]) -> None:
+        engine, hashes = result
+        merged.merge(engine)
+        if hashes is None:
+            return
+        if index in row_hashes:
+            with np.errstate(over="ignore"):
+                row_hashes[index] += hashes
+        else:
+            row_hashes[index] = hashes
+
+    if workers <= 1 or len(tasks) <= 1:
+        for index, read_chunks, whole_rows in tasks:
+            add_row_hashes(index - 1)
+            combine(index, _scan_column_group(read_chunks, whole_rows, sketch_options))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            futures = [
+                (index, pool.submit(_scan_column_group, read_chunks, whole_rows, sketch_options))
+                for index, read_chunks, whole_rows in tasks
+            ]
+            # 列の順序を保つため、パーティションの順に結合（前の行の範囲の寄与は結合が終わっている）
+            for index, future in futures:
+                add_row_hashes(index - 1)
+                combine(index, future.result())
+    add_row_hashes(len(row_ranges) - 1)
+    return merged
+
+
+def _z_score(confidence: float) -> float:
+    """信頼係数に対応する標準正規分布の両側の分位点"""
+    if not 0 < confidence < 1:
+        raise ValueError(f"信頼係数は0より大きく1未満である必要があります: {confidence}")
+    return NormalDist().inv_cdf((1 + confidence) / 2)
+
+
+def sample_size(error_target: float, confidence: float = DEFAULT_CONFIDENCE) -> int:
+    """
+    比率の推定誤差を目標以下にするのに必要な標本の行数
+
+    最も誤差が大きくなる比率0.5の場合の単純無作為抽出の式 n = z^2 * 0.25 / e^2 で求めます。
+
+    Args:
+        error_target: 比率（欠損率など）の推定誤差の目標（信頼区間の半幅、例: 0.01）
+        confidence: 信頼係数
+
+    Returns:
+        標本の行数
+    """
+    if not 0 < error_target < 1:
+        raise ValueError(f"誤差の目標は0より大きく1未満である必要があります: {error_target}")
+    return math.ceil(_z_score(confidence) ** 2 * 0.25 / error_target ** 2)
+
+
+def _line_start(f: BinaryIO, offset: int) -> int:
+    """offset のバイトを含む行の先頭の位置（直前の改行を後ろから探す）"""
+    end = offset
+    while end > 0:
+        start = max(0, end - _LINE_SCAN_BYTES)
+        f.seek(start)
+        newline = f.read(end - start).rfind(b"\n")
+        if newline >= 0:
+            return start + newline + 1
+        end = start
+    return 0
+
+
+def sample_jsonl(
+    open_binary: Callable[[], BinaryIO],
+    rows: int,
+    block_rows: int = DEFAULT_SAMPLE_BLOCK_ROWS,
+    seed: Optional[int] = None,
+) -> Tuple[List[bytes], List[int], Optional[int], List[float]]:
+    """
+    JSONLファイルから行のブロックを無作為に抽出
+
+    ファイル内の位置を無作為に選び、その位置を含む行から block_rows 行をブロックとします。
+    ある行から始まるブロックが選ばれる確率はその行のバイト数に比例するため、長い行から
+    始まるブロックほど選ばれやすくなります。この偏りを打ち消すため、ブロックごとに先頭の行の
+    バイト数の逆数を重みとして返します（sampled_statistics はこの重みで推定します）。
+    空行に当たった位置からはブロックを作りません。
+
+    位置は昇順に読むため、ブロックが重なるのは直前までに読んだ範囲とだけです。重なった行は
+    ブロックの行数には含めますが、バイト列には最初のブロックにだけ含めるため、同じ行が2回
+    解析されることはありません（ブロックの行は、連結したバイト列のそのブロックの末尾までの
+    block_lines 行です）。ファイルの行数が標本の行数以下と見込まれる場合はファイル全体を
+    読み込みます。
+
+    Args:
+        open_binary: ファイルをシーク可能なバイナリストリームとして開く関数
+        rows: 標本の行数
+        block_rows: 1ブロックの行数
+        seed: 乱数のシード
+
+    Returns:
+        (ブロックごとの新しく読み込んだ行を連結したバイト列のリスト, ブロックごとの行数,
+        ファイルサイズ（ファイル全体を読み込んだ場合は None）, ブロックごとの重み)
+    """
+    blocks: List[bytes] = []
+    block_lines: List[int] = []
+    block_weights: List[float] = []
+    with open_binary() as f:
+        size = f.seek(0, io.SEEK_END)
+        num_blocks = max(1, math.ceil(rows / block_rows))
+        offsets = np.sort(np.random.default_rng(seed).integers(0, max(size, 1), num_blocks))
+
+        position = 0  # 読み込み済みの範囲の末尾
+        for offset in offsets.tolist():
+            line_start = _line_start(f, offset)
+            f.seek(line_start)
+            line = f.readline()
+            if not line.strip():
+                continue
+            weight = 1.0 / len(line)
+
+            count = 0
+            new_lines = []
+            while line:
+                if line.strip():
+                    count += 1
+                    if line_start >= position:
+                        new_lines.append(line if line.endswith(b"\n") else line + b"\n")
+                line_start += len(line)
+                if count >= block_rows:
+                    break
+                line = f.readline()
+            position = max(position, line_start)
+            blocks.append(b"".join(new_lines))
+            block_lines.append(count)
+            block_weights.append(weight)
+
+        # 行数の推定値（位置ごとに選んだ行の数の Hansen-Hurwitz 推定量）が標本の行数以下なら
+        # 全体を読む（全ての位置が空行に当たってブロックを作れなかった場合も同様）
+        if not block_lines or size * sum(block_weights) / num_blocks <= rows:
+            f.seek(0)
+            lines = [line if line.endswith(b"\n") else line + b"\n" for line in f if line.strip()]
+            return [b"".join(lines)], [len(lines)], None, [1.0]
+    return blocks, block_lines, size, block_weights
+
+
+def _ratio_interval(
+    totals: np.ndarray,
+    sizes: np.ndarray,
+    z: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    ブロック（集落）単位の比推定量とその標準誤差
+
+    totals と sizes はブロックごとの合計（行がブロック、列が推定する量）です。
+    同じブロックの行は相関しうるため、分散はブロック間のばらつきから求めます。
+    """
+    total = totals.sum(axis=0)
+    size = sizes.sum(axis=0)
+    blocks = totals.shape[0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = total / size
+        residuals = totals - ratio * sizes
+        if blocks < 2:
+            se = np.full_like(ratio, np.nan, dtype=np.float64)
+        else:
+            se = np.sqrt(blocks / (blocks - 1) * (residuals ** 2).sum(axis=0)) / size
+    return ratio, z * se
+
+
+def _interval(low: float, high: float) -> List[float]:
+    return [float(low), float(high)]
+
+
+def _weighted_quantile(values: np.ndarray, weights: np.ndarray, q: float) -> float:
+    """重み付きの分位点（重みの累積が q 以上になる最小の値）"""
+    if values.size == 0:
+        return float("nan")
+    order = np.argsort(values, kind="stable")
+    cumulative = np.cumsum(weights[order])
+    index = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+    return float(values[order][min(index, values.size - 1)])
+
+
+def sampled_statistics(
+    blocks: List[bytes],
+    block_lines: List[int],
+    population_bytes: Optional[int],
+    block_weights: Optional[List[float]] = None,
+    confidence: float = DEFAULT_CONFIDENCE,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    抽出したブロックから全体の統計情報と品質指標を推定
+
+    ブロックの選ばれやすさの偏りを block_weights（sample_jsonl を参照）で打ち消した
+    比推定量で、全体の値を推定します。行数はファイルサイズを1行あたりの平均バイト数で割って
+    推定し、欠損値数と最頻値の出現回数は推定した比率に推定した行数を掛けて求めます。
+    平均・標準偏差・分位点も重み付きで求めます。信頼区間はブロックを集落とみなした比推定量の
+    標準誤差から求め、分位点の信頼区間は Woodruff の方法（分位点以下の割合の信頼区間を
+    分位点に戻す）で求めます。点推定値と信頼区間は同じ重みの推定量から求めるため、
+    点推定値は常に信頼区間に含まれます。
+
+    最小値・最大値・ユニーク数・一意性は標本内の値で、信頼区間はありません
+    （最小値と最大値は全体の範囲の内側、ユニーク数は全体の値以下になります）。
+    行数の信頼区間の上限は、標本のばらつきが大きく上限が定まらない場合は None です。
+    ブロックがファイル全体を含む場合は、厳密な値を返します。
+
+    Args:
+        blocks: sample_jsonl で抽出したブロック
+        block_lines: ブロックごとの行数
+        population_bytes: ファイルサイズ（ブロックがファイル全体の場合は None）
+        block_weights: ブロックごとの重み（指定しない場合は全て同じ重み）
+        confidence: 信頼係数
+
+    Returns:
+        (統計情報, 品質指標)
+
+    Raises:
+        ValueError: 標本が空の場合、または信頼係数が無効な場合
+    """
+    z = _z_score(confidence)
+    if not sum(block_lines):
+        raise ValueError("標本に行がありません")
+    data = b"".join(blocks)
+    df = pd.read_json(io.BytesIO(data), lines=True)
+    statistics, quality_metrics = exact_statistics(df)
+    n = len(df)
+
+    estimation: Dict[str, Any] = {
+        "engine": "sample",
+        "confidence": confidence,
+        "sample_rows": n,
+        "sample_blocks": len(blocks),
+    }
+    if population_bytes is None:
+        estimation["approximate"] = False
+        statistics["estimation"] = estimation
+        return statistics, quality_metrics
+
+    # ブロックの行は、連結した行のそのブロックの末尾までの block_lines 行（重なりを含む）
+    weights = np.ones(len(block_lines)) if block_weights is None \
+        else np.asarray(block_weights, dtype=np.float64)
+    ends = np.cumsum([block.count(b"\n") for block in blocks])
+    starts = ends - np.asarray(block_lines)
+    lines = np.asarray(block_lines, dtype=np.float64) * weights
+
+    def block_totals(values: np.ndarray) -> np.ndarray:
+        """行ごとの値のブロックごとの重み付きの合計"""
+        cumulative = np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+        totals = cumulative[ends] - cumulative[starts]
+        return totals * weights.reshape((-1,) + (1,) * (values.ndim - 1))
+
+    # 行ごとの重み（行を含むブロックの重みの合計）
+    boundaries = np.zeros(n + 1)
+    np.add.at(boundaries, starts, weights)
+    np.add.at(boundaries, ends, -weights)
+    row_weights = np.cumsum(boundaries)[:-1]
+
+    # 行数: ファイルサイズ / 1行あたりの平均バイト数
+    row_bytes = np.array([len(line) for line in data.splitlines(keepends=True)], dtype=np.float64)
+    bytes_per_row, margin = _ratio_interval(block_totals(row_bytes), lines, z)
+    row_count = population_bytes / bytes_per_row
+    # 行数は整数のため、区間は外側に丸める（丸めた推定値が区間から外れないように）。
+    # 誤差が1行あたりの平均バイト数以上の場合、上限はない（JSON に保存できるよう None）
+    row_interval = [
+        float(math.floor(population_bytes / (bytes_per_row + margin))),
+        float(math.ceil(population_bytes / (bytes_per_row - margin)))
+        if margin < bytes_per_row else None,
+    ]
+
+    # 欠損率
+    null_ratios, null_margins = _ratio_interval(
+        block_totals(df.isnull().to_numpy(dtype=np.float64)), lines[:, None], z,
+    )
+    null_ratios = pd.Series(null_ratios, index=df.columns)
+    missing_intervals = {
+        col: _interval(max(0.0, ratio - m), min(1.0, ratio + m))
+        for col, ratio, m in zip(df.columns, null_ratios, null_margins)
+    }
+
+    # 数値型カラムの平均・標準偏差・分位点
+    numeric_intervals: Dict[str, Dict[str, List[float]]] = {}
+    numeric = df.select_dtypes(include=[np.number])
+    if numeric.shape[1]:
+        values = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~np.isnan(values)
+        counts = block_totals(valid.astype(np.float64))
+        means, mean_margins = _ratio_interval(
+            block_totals(np.where(valid, values, 0.0)), counts, z,
+        )
+        for i, col in enumerate(numeric.columns):
+            col_stats = statistics["numeric_statistics"][col]
+            column, column_weights = values[valid[:, i], i], row_weights[valid[:, i]]
+            col_stats["mean"] = float(means[i])
+            if column.size > 1:
+                variance = np.average((column - means[i]) ** 2, weights=column_weights)
+                col_stats["std"] = float(np.sqrt(variance * column.size / (column.size - 1)))
+            intervals = {"mean": _interval(means[i] - mean_margins[i], means[i] + mean_margins[i])}
+            for key, q in (("q1", 0.25), ("median", 0.5), ("q3", 0.75)):
+                estimate = _weighted_quantile(column, column_weights, q)
+                col_stats[key] = estimate
+                if column.size == 0:
+                    intervals[key] = _interval(np.nan, np.nan)
+                    continue
+                below = block_totals((valid[:, i] & (values[:, i] <= estimate)).astype(np.float64))
+                _, m = _ratio_interval(below, counts[:, i], z)
+                m = 0.0 if np.isnan(m) else float(m)
+                intervals[key] = _interval(
+                    _weighted_quantile(column, column_weights, max(0.0, q - m)),
+                    _weighted_quantile(column, column_weights, min(1.0, q + m)),
+                )
+            numeric_intervals[col] = intervals
+
+    # 件数は推定した比率に推定した行数を掛けて求める
+    statistics["row_count"] = int(round(row_count))
+    statistics["missing_values"] = {
+        col: int(round(ratio * row_count)) for col, ratio in null_ratios.items()
+    }
+    total_weight = row_weights.sum()
+    for col, col_stats in statistics.get("categorical_statistics", {}).items():
+        frequencies = pd.Series(row_weights, index=df.index).groupby(df[col]).sum()
+        col_stats["most_common"] = {
+            value: int(round(weight / total_weight * row_count))
+            for value, weight in frequencies.nlargest(MOST_COMMON_COUNT).items()
+        }
+        col_stats["missing_ratio"] = float(null_ratios[col])
+    quality_metrics["completeness"] = {
+        "overall": float(1 - null_ratios.mean()),
+        "by_column": (1 - null_ratios).to_dict(),
+    }
+
+    estimation.update({
+        "approximate": True,
+        "confidence_intervals": {
+            "row_count": row_interval,
+            "missing_ratio": missing_intervals,
+            "numeric_statistics": numeric_intervals,
+        },
+    })
+    statistics["estimation"] = estimation
+    return statistics, quality_metrics
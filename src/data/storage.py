@@ -0,0 +1,509 @@
+"""
+データファイル保存モジュール
+
+このモジュールは、データセットのバージョンファイルを保存するためのストレージ機能を提供します。
+ファイルは固定サイズのチャンク単位で処理されるため、ファイルサイズに関わらずメモリ使用量は一定です。
+"""
+
+import errno
+import hashlib
+import os
+import sys
+import uuid
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterator, Optional, Tuple, Union
+
+# 1回の読み書きで扱うデフォルトのチャンクサイズ（1MiB）
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# 進捗コールバック: (処理済みバイト数, 総バイト数) を受け取る
+ProgressCallback = Callable[[int, int], None]
+
+# ファイルの取り込みモード
+#   copy: チャンク単位のストリーミングコピー（コピー元は変更されない）
+#   link: reflink・カーネル内コピーを順に試行（コピー元は変更されない）
+#   move: linkに加えてハードリンクも試行し、参照の登録後にコピー元を削除
+INGEST_MODES = ("copy", "link", "move")
+
+# Linuxのioctl FICLONE（reflinkによるブロック共有コピー）
+_FICLONE = 0x40049409
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class StorageError(Exception):
+    """ストレージ関連のエラーを表す例外クラス"""
+    pass
+
+
+class PrefixHash:
+    """
+    ファイル全体のハッシュを計算する読み込みの途中で、先頭から指定したバイト数の
+    SHA-256ハッシュとその最後のバイトを記録する
+
+    前のバージョンへの追記かどうかを、ファイルをもう1度読み込まずに判定するために使います。
+    読み込みが先頭から size バイトに達しなかった場合、hash と last_byte はNoneのままです。
+    """
+
+    def __init__(self, size: int):
+        """
+        初期化
+
+        Args:
+            size: ハッシュを記録するバイト数（正の整数）
+        """
+        if size <= 0:
+            raise StorageError(f"バイト数は正の整数である必要があります: {size}")
+        self.size = size
+        self.hash: Optional[str] = None
+        self.last_byte: Optional[bytes] = None
+
+    def update(self, hasher: Any, chunk: memoryview, offset: int) -> None:
+        """
+        チャンクでハッシュを更新し、先頭から size バイトの位置を含む場合はハッシュを記録
+
+        Args:
+            hasher: ファイル全体のハッシュ
+            chunk: 読み込んだチャンク
+            offset: チャンクのファイル内の開始位置
+        """
+        split = self.size - offset
+        if not 0 < split <= len(chunk):
+            hasher.update(chunk)
+            return
+        hasher.update(chunk[:split])
+        self.hash = hasher.hexdigest()
+        self.last_byte = bytes(chunk[split - 1:split])
+        hasher.update(chunk[split:])
+
+
+def _copy_with_hash(
+    src: BinaryIO,
+    dst: Optional[BinaryIO],
+    chunk_size: int,
+    total_size: int,
+    progress_callback: Optional[ProgressCallback],
+    prefix: Optional[PrefixHash] = None,
+) -> Tuple[str, int]:
+    """
+    ストリームをチャンク単位で読み込み、SHA-256ハッシュを逐次更新しながら書き込む
+
+    Args:
+        src: 読み込み元のストリーム
+        dst: 書き込み先のストリーム（Noneの場合はハッシュ計算のみ）
+        chunk_size: チャンクサイズ（バイト）
+        total_size: 総バイト数（進捗通知用）
+        progress_callback: 進捗コールバック
+        prefix: 先頭から指定したバイト数のハッシュを記録する場合に指定
+
+    Returns:
+        (SHA-256ハッシュ, 処理したバイト数)
+    """
+    hasher = hashlib.sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    processed = 0
+
+    while True:
+        n = src.readinto(buffer)
+        if not n:
+            break
+        chunk = view[:n]
+        if prefix is not None:
+            prefix.update(hasher, chunk, processed)
+        else:
+            hasher.update(chunk)
+        if dst is not None:
+            dst.write(chunk)
+        processed += n
+        if progress_callback:
+            progress_callback(processed, total_size)
+
+    return hasher.hexdigest(), processed
+
+
+def stream_copy(
+    src_path: Union[str, Path],
+    dst_path: Union[str, Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress_callback: Optional[ProgressCallback] = None,
+    prefix: Optional[PrefixHash] = None,
+) -> Tuple[str, int]:
+    """
+    ファイルをチャンク単位でコピーし、同じパスでSHA-256ハッシュを計算
+
+    コピー中のファイルは一時ファイルに書き込まれ、完了後にアトミックに置き換えられます。
+    途中で失敗した場合、書き込み先に不完全なファイルは残りません。
+
+    Args:
+        src_path: コピー元のパス
+        dst_path: コピー先のパス
+        chunk_size: チャンクサイズ（バイト）
+        progress_callback: 進捗コールバック（チャンクごとに呼び出される）
+        prefix: 先頭から指定したバイト数のハッシュを記録する場合に指定
+
+    Returns:
+        (SHA-256ハッシュ, コピーしたバイト数)
+
+    Raises:
+        StorageError: チャンクサイズが不正な場合、またはコピーに失敗した場合
+    """
+    if chunk_size <= 0:
+        raise StorageError(f"チャンクサイズは正の整数である必要があります: {chunk_size}")
+
+    src_path = Path(src_path)
+    dst_path = Path(dst_path)
+    tmp_path = dst_path.with_name(f"{dst_path.name}.part")
+
+    try:
+        total_size = src_path.stat().st_size
+        with open(src_path, "rb") as src, open(tmp_path, "wb") as dst:
+            result = _copy_with_hash(src, dst, chunk_size, total_size, progress_callback, prefix)
+        os.replace(tmp_path, dst_path)
+    except OSError as e:
+        tmp_path.unlink(missing_ok=True)
+        raise StorageError(f"ファイルのコピーに失敗しました: {e}")
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return result
+
+
+def hash_file(
+    path: Union[str, Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress_callback: Optional[ProgressCallback] = None,
+    prefix: Optional[PrefixHash] = None,
+) -> Tuple[str, int]:
+    """
+    ファイルをチャンク単位で読み込み、SHA-256ハッシュを計算
+
+    Args:
+        path: ファイルのパス
+        chunk_size: チャンクサイズ（バイト）
+        progress_callback: 進捗コールバック
+        prefix: 先頭から指定したバイト数のハッシュを記録する場合に指定
+
+    Returns:
+        (SHA-256ハッシュ, ファイルサイズ)
+
+    Raises:
+        StorageError: チャンクサイズが不正な場合、または読み込みに失敗した場合
+    """
+    if chunk_size <= 0:
+        raise StorageError(f"チャンクサイズは正の整数である必要があります: {chunk_size}")
+
+    path = Path(path)
+    try:
+        total_size = path.stat().st_size
+        with open(path, "rb") as f:
+            return _copy_with_hash(f, None, chunk_size, total_size, progress_callback, prefix)
+    except OSError as e:
+        raise StorageError(f"ファイルの読み込みに失敗しました: {e}")
+
+
+def hash_prefix(
+    src: BinaryIO,
+    size: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Optional[str]:
+    """
+    ストリームの先頭から指定したバイト数のSHA-256ハッシュを計算
+
+    Args:
+        src: 読み込み元のストリーム（先頭に位置していること）
+        size: ハッシュを計算するバイト数
+        chunk_size: チャンクサイズ（バイト）
+
+    Returns:
+        SHA-256ハッシュ（ストリームが size バイトに満たない場合はNone）
+    """
+    hasher = hashlib.sha256()
+    remaining = size
+    while remaining > 0:
+        block = src.read(min(chunk_size, remaining))
+        if not block:
+            return None
+        hasher.update(block)
+        remaining -= len(block)
+    return hasher.hexdigest()
+
+
+def _try_reflink(src_path: Path, dst_path: Path) -> bool:
+    """reflink（FICLONE）でファイルを複製（ブロックを共有するためデータのコピーは発生しない）"""
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+
+    try:
+        with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        return True
+    except OSError:
+        dst_path.unlink(missing_ok=True)
+        return False
+
+
+def _try_hardlink(src_path: Path, dst_path: Path) -> bool:
+    """ハードリンクでファイルを複製"""
+    try:
+        os.link(src_path, dst_path)
+        return True
+    except OSError:
+        return False
+
+
+def _try_kernel_copy(src_path: Path, dst_path: Path) -> Optional[str]:
+    """copy_file_range または sendfile でカーネル内コピーを実行"""
+    methods = []
+    if hasattr(os, "copy_file_range"):
+        methods.append("copy_file_range")
+    if hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+        methods.append("sendfile")
+
+    for method in methods:
+        try:
+            with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+                remaining = os.fstat(src.fileno()).st_size
+                offset = 0
+                while remaining > 0:
+                    if method == "copy_file_range":
+                        n = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    else:
+                        n = os.sendfile(dst.fileno(), src.fileno(), offset, remaining)
+                    if n == 0:
+                        raise OSError(errno.EIO, "コピー元の終端に予期せず到達しました")
+                    offset += n
+                    remaining -= n
+            return method
+        except OSError:
+            dst_path.unlink(missing_ok=True)
+
+    return None
+
+
+def zero_copy(
+    src_path: Union[str, Path],
+    dst_path: Union[str, Path],
+    allow_hardlink: bool = True,
+) -> Optional[str]:
+    """
+    データを書き直さずにファイルを複製
+
+    reflink（FICLONE）、ハードリンク、カーネル内コピー（copy_file_range/sendfile）を
+    この順に試行します。いずれも失敗した場合は何もせずにNoneを返すため、
+    呼び出し側でストリーミングコピーにフォールバックしてください。
+    ハードリンクはコピー元と同じファイルシステム上でのみ成功します。
+
+    Args:
+        src_path: コピー元のパス
+        dst_path: コピー先のパス
+        allow_hardlink: ハードリンクを許可するかどうか
+
+    Returns:
+        使用した方式（"reflink", "hardlink", "copy_file_range", "sendfile"）、
+        全て失敗した場合はNone
+    """
+    src_path = Path(src_path)
+    dst_path = Path(dst_path)
+    tmp_path = dst_path.with_name(f"{dst_path.name}.part")
+    tmp_path.unlink(missing_ok=True)
+
+    if _try_reflink(src_path, tmp_path):
+        method = "reflink"
+    elif allow_hardlink and _try_hardlink(src_path, tmp_path):
+        method = "hardlink"
+    else:
+        method = _try_kernel_copy(src_path, tmp_path)
+        if method is None:
+            return None
+
+    os.replace(tmp_path, dst_path)
+    return method
+
+
+class BlobStore:
+    """
+    SHA-256ハッシュで内容をアドレス指定するブロブストア
+
+    同一内容のファイルは1つのブロブとして保存されます。ブロブのパスは
+    ``<root>/<ハッシュ先頭2文字>/<ハッシュ><拡張子>`` です。
+    ブロブの参照数はストア自身では管理せず、呼び出し側（DatasetVersion）が管理します。
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        """
+        初期化
+
+        Args:
+            root: ブロブを保存するルートディレクトリ
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, file_hash: str, suffix: str = "") -> Path:
+        """
+        ブロブの保存パスを取得
+
+        Args:
+            file_hash: SHA-256ハッシュ
+            suffix: ファイルの拡張子
+
+        Returns:
+            ブロブの保存パス
+        """
+        return self.root / file_hash[:2] / f"{file_hash}{suffix}"
+
+    def exists(self, file_hash: str, suffix: str = "") -> bool:
+        """ブロブが存在するかどうかを確認"""
+        return self.path_for(file_hash, suffix).exists()
+
+    def put(
+        self,
+        src_path: Union[str, Path],
+        suffix: str = "",
+        file_hash: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        progress_callback: Optional[ProgressCallback] = None,
+        mode: str = "copy",
+        prefix: Optional[PrefixHash] = None,
+    ) -> Tuple[str, Path, bool]:
+        """
+        ファイルをブロブとして保存
+
+        ハッシュが既知で同じブロブが存在する場合、ファイルはコピーされません。
+        copyモードでハッシュが未知の場合は、コピーと同じパスでハッシュを計算してから配置します。
+        link/moveモードでは、zero_copy でストア内の一時ファイルに複製し、複製した内容の
+        ハッシュを計算してから配置します（使えない場合はストリーミングコピー）。
+        コピー元を後から書き換えてもブロブが変わらないよう、ハードリンクはmoveモードでのみ使用します。
+        moveモードでもコピー元はここでは削除しないため、参照の登録が完了してから呼び出し側で削除してください。
+
+        Args:
+            src_path: 保存するファイルのパス
+            suffix: ファイルの拡張子
+            file_hash: 事前に計算済みのSHA-256ハッシュ
+            chunk_size: チャンクサイズ（バイト）
+            progress_callback: 進捗コールバック
+            mode: 取り込みモード（INGEST_MODES のいずれか）
+            prefix: ハッシュの計算と同じ読み込みで、先頭から指定したバイト数のハッシュを
+                記録する場合に指定（ハッシュが既知で同じブロブが存在する場合は記録されない）
+
+        Returns:
+            (SHA-256ハッシュ, ブロブのパス, 新たに書き込んだかどうか)
+
+        Raises:
+            StorageError: 保存に失敗した場合、ハッシュが一致しない場合、またはモードが不正な場合
+        """
+        if mode not in INGEST_MODES:
+            raise StorageError(f"無効な取り込みモード: {mode}")
+
+        src_path = Path(src_path)
+        if file_hash and self.exists(file_hash, suffix):
+            return file_hash, self.path_for(file_hash, suffix), False
+
+        tmp_path = self.root / f"incoming-{uuid.uuid4().hex}"
+        method = None
+        if mode != "copy":
+            method = zero_copy(src_path, tmp_path, allow_hardlink=mode == "move")
+        if method is not None:
+            # 配置した内容そのもののハッシュを計算し、ブロブの内容とハッシュを一致させる
+            try:
+                copied_hash, _ = hash_file(tmp_path, chunk_size, progress_callback, prefix)
+            except StorageError:
+                tmp_path.unlink(missing_ok=True)
+                raise
+        else:
+            copied_hash, _ = stream_copy(src_path, tmp_path, chunk_size, progress_callback, prefix)
+        if file_hash and copied_hash != file_hash:
+            tmp_path.unlink(missing_ok=True)
+            raise StorageError("コピー中にファイルが変更されました")
+
+        return (copied_hash, *self._place(tmp_path, copied_hash, suffix))
+
+    def put_stream(
+        self,
+        src: BinaryIO,
+        suffix: str = "",
+        file_hash: Optional[str] = None,
+        total_size: int = 0,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        progress_callback: Optional[ProgressCallback] = None,
+    ) -> Tuple[str, Path, bool]:
+        """
+        ストリームをブロブとして保存
+
+        アーカイブのメンバーなど、シークできないストリームを1回の読み込みで保存します。
+        ハッシュが既知で同じブロブが存在する場合は書き込まず、ハッシュの検証のみ行います。
+
+        Args:
+            src: 読み込み元のストリーム
+            suffix: ファイルの拡張子
+            file_hash: 期待するSHA-256ハッシュ（指定した場合は読み込んだ内容と照合）
+            total_size: 総バイト数（進捗通知用）
+            chunk_size: チャンクサイズ（バイト）
+            progress_callback: 進捗コールバック
+
+        Returns:
+            (SHA-256ハッシュ, ブロブのパス, 新たに書き込んだかどうか)
+
+        Raises:
+            StorageError: 保存に失敗した場合、またはハッシュが一致しない場合
+        """
+        if chunk_size <= 0:
+            raise StorageError(f"チャンクサイズは正の整数である必要があります: {chunk_size}")
+
+        if file_hash and self.exists(file_hash, suffix):
+            copied_hash, _ = _copy_with_hash(src, None, chunk_size, total_size, progress_callback)
+            if copied_hash != file_hash:
+                raise StorageError("ファイルのハッシュが一致しません")
+            return file_hash, self.path_for(file_hash, suffix), False
+
+        tmp_path = self.root / f"incoming-{uuid.uuid4().hex}"
+        try:
+            with open(tmp_path, "wb") as dst:
+                copied_hash, _ = _copy_with_hash(
+                    src, dst, chunk_size, total_size, progress_callback
+                )
+        except OSError as e:
+            tmp_path.unlink(missing_ok=True)
+            raise StorageError(f"ファイルの保存に失敗しました: {e}")
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        if file_hash and copied_hash != file_hash:
+            tmp_path.unlink(missing_ok=True)
+            raise StorageError("ファイルのハッシュが一致しません")
+
+        return (copied_hash, *self._place(tmp_path, copied_hash, suffix))
+
+    def _place(self, tmp_path: Path, file_hash: str, suffix: str) -> Tuple[Path, bool]:
+        """一時ファイルをブロブの保存パスへ移動（既に存在する場合は破棄）"""
+        blob_path = self.path_for(file_hash, suffix)
+        if blob_path.exists():
+            tmp_path.unlink(missing_ok=True)
+            return blob_path, False
+
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, blob_path)
+        return blob_path, True
+
+    def remove(self, blob_path: Union[str, Path]) -> None:
+        """
+        ブロブを削除
+
+        Args:
+            blob_path: 削除するブロブのパス
+        """
+        blob_path = Path(blob_path)
+        if blob_path.parent.parent == self.root:
+            blob_path.unlink(missing_ok=True)
+
+    def iter_blobs(self) -> Iterator[Path]:
+        """保存されている全てのブロブのパスを列挙"""
+        for path in self.root.glob("??/*"):
+            if path.is_file() and not path.name.endswith(".part"):
+                yield path
@@ -37,6 +37,9 @@ class VisualizationService:
         dataset_id: int,
         version: Optional[str] = None,
         output_path: Optional[Union[str, Path]] = None,
+        engine: str = "exact",
+        sample_rows: Optional[int] = None,
+        error_target: Optional[float] = None,
     ) -> Dict[str, Any]:
         """
         データセットの統計情報ダッシュボードを作成
@@ -45,16 +48,28 @@ class VisualizationService:
             dataset_id: データセットID
             version: バージョン（指定しない場合は最新バージョン）
             output_path: 出力先のパス（指定しない場合はHTMLとして返す）
+            engine: 統計情報がキャッシュにない場合の計算エンジン
+                （"sample" の場合は標本からの近似値）
+            sample_rows: 近似エンジンの標本の行数
+            error_target: 近似エンジンで比率の推定誤差の目標
 
         Returns:
-            ダッシュボードの情報（グラフのJSONデータ）
+            ダッシュボードの情報（グラフのJSONデータ。近似値の場合は推定の情報 "estimation" を含む）
 
         Raises:
             DatasetError: データセットまたはバージョンが存在しない場合
         """
         # 統計情報を取得
-        stats = self.dataset_service.get_statistics(dataset_id, version)
-        dataset = self.dataset_service.get_dataset(dataset_id)
+        stats = self.dataset_service.get_statistics(
+            dataset_id,
+            version,
+            engine=engine,
+            sample_rows=sample_rows,
+            error_target=error_target,
+        )
+        estimation = stats["statistics"].get("estimation", {})
+        approximate = estimation.get("approximate", False)
+        dataset = self.dataset_service._load_dataset(dataset_id)
 
         # サブプロットのレイアウトを作成
         n_plots = 0
@@ -145,8 +160,11 @@ class VisualizationService:
         )
 
         # レイアウトを更新
+        title = f"データセット統計ダッシュボード: {dataset.name}"
+        if approximate:
+            title += "（近似値）"
         fig.update_layout(
-            title=f"データセット統計ダッシュボード: {dataset.name}",
+            title=title,
             height=300 * n_plots,
             showlegend=False,
         )
@@ -158,9 +176,12 @@ class VisualizationService:
                 fig.write_html(str(output_path))
             else:
                 fig.write_json(str(output_path))
-            return {"output_path": str(output_path)}
+            result = {"output_path": str(output_path)}
         else:
-            return {"figure": json.loads(fig.to_json())}
+            result = {"figure": json.loads(fig.to_json())}
+        if approximate:
+            result["estimation"] = estimation
+        return result
 
     def create_version_comparison_dashboard(
         self,
@@ -187,7 +208,7 @@ class VisualizationService:
         # バージョンの統計情報を取得
         stats1 = self.dataset_service.get_statistics(dataset_id, version1)
         stats2 = self.dataset_service.get_statistics(dataset_id, version2)
-        dataset = self.dataset_service.get_dataset(dataset_id)
+        dataset = self.dataset_service._load_dataset(dataset_id)
 
         # サブプロットのレイアウトを作成
         n_plots = 2  # 品質指標の比較と欠損値の比較
@@ -351,7 +372,7 @@ class VisualizationService:
             dataset_id,
             include_metrics=True,
         )
-        dataset = self.dataset_service.get_dataset(dataset_id)
+        dataset = self.dataset_service._load_dataset(dataset_id)
 
         # 品質指標の時系列データを準備
         versions = []
@@ -11,7 +11,7 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
-from src.api.visualization import router
+from src.api.visualization import DATASET_STORAGE_PATH, router, statistics_jobs
 from src.data.service import DatasetService
 from src.data.visualization import VisualizationService
 from src.models import User
@@ -215,6 +215,57 @@ def test_get_quality_metrics_dashboard(
             os.unlink(f.name)
 
 
+def test_get_statistics_dashboard_approximate(
+    client, auth_headers, sample_dataset_with_versions, db_session, test_user,
+):
+    """近似値による統計情報ダッシュボード取得のテスト"""
+    dataset, _, _ = sample_dataset_with_versions
+
+    # 標本より十分に行数の多いバージョンを作成
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl", delete=False) as f:
+        for i in range(5000):
+            f.write(f'{{"numeric": {i}, "category": "{"ABC"[i % 3]}"}}\n')
+    try:
+        DatasetService(db_session, DATASET_STORAGE_PATH).add_version(
+            dataset_id=dataset.id,
+            version="2.0.0",
+            file_path=f.name,
+            created_by_id=test_user.id,
+        )
+    finally:
+        os.unlink(f.name)
+
+    response = client.get(
+        f"/api/v1/visualization/datasets/{dataset.id}/statistics",
+        params={"version": "2.0.0", "approximate": True, "sample_rows": 500},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert "figure" in data
+    assert data["estimation"]["approximate"] is True
+    assert "confidence_intervals" in data["estimation"]
+
+    # 厳密な値の再計算がバックグラウンドで登録される
+    job = statistics_jobs.get(data["exact_job"]["job_id"])
+    assert job.wait(timeout=30)
+    response = client.get(
+        f"/api/v1/visualization/jobs/{job.id}/result", headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["statistics"]["row_count"] == 5000
+
+    # 再計算後は厳密な値が返される
+    response = client.get(
+        f"/api/v1/visualization/datasets/{dataset.id}/statistics",
+        params={"version": "2.0.0", "approximate": True},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert "estimation" not in response.json()
+    assert "exact_job" not in response.json()
+
+
 def test_refresh_statistics(client, auth_headers, sample_dataset_with_versions):
     """統計情報の再計算のテスト"""
     dataset, version1, _ = sample_dataset_with_versions
@@ -224,19 +275,130 @@ def test_refresh_statistics(client, auth_headers, sample_dataset_with_versions):
         params={"version": "1.0.0"},
         headers=auth_headers,
     )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    # 同じバージョンの再計算は実行中のジョブに集約される
+    job = statistics_jobs.get(job_id)
+    if not job.done:
+        response = client.post(
+            f"/api/v1/visualization/datasets/{dataset.id}/statistics/refresh",
+            params={"version": "1.0.0"},
+            headers=auth_headers,
+        )
+        assert response.json()["job_id"] == job_id
+
+    assert job.wait(timeout=30)
+    response = client.get(f"/api/v1/visualization/jobs/{job_id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "succeeded"
+
+    response = client.get(f"/api/v1/visualization/jobs/{job_id}/result", headers=auth_headers)
     assert response.status_code == 200
     data = response.json()
     assert "statistics" in data
     assert "quality_metrics" in data
 
 
+def test_get_job_nonexistent(client, auth_headers):
+    """存在しないジョブの取得のテスト"""
+    response = client.get("/api/v1/visualization/jobs/unknown", headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_get_job_other_user(client, auth_headers):
+    """他のユーザーが登録したジョブの取得のテスト"""
+    job = statistics_jobs.submit(("other_user_job",), lambda: {}, owner=-1)
+    assert job.wait(timeout=5)
+
+    response = client.get(f"/api/v1/visualization/jobs/{job.id}", headers=auth_headers)
+    assert response.status_code == 404
+    response = client.get(f"/api/v1/visualization/jobs/{job.id}/result", headers=auth_headers)
+    assert response.status_code == 404
+
+
+@pytest.fixture
+def other_user_dataset(db_session):
+    """テスト用のユーザーにアクセス権限のない、他のユーザーのデータセットを作成"""
+    owner = User(username="other", email="other@example.com", password_hash="x", is_active=True)
+    db_session.add(owner)
+    db_session.commit()
+    dataset_service = DatasetService(db_session, DATASET_STORAGE_PATH)
+    dataset = dataset_service.create_dataset(
+        name="other_dataset",
+        description="他のユーザーのデータセット",
+        created_by_id=owner.id,
+        schema={"type": "object"},
+    )
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl", delete=False) as f:
+        for i in range(5000):
+            f.write(f'{{"numeric": {i}}}\n')
+    try:
+        for version in ["1.0.0", "1.0.1"]:
+            dataset_service.add_version(dataset.id, version, f.name, owner.id)
+    finally:
+        os.unlink(f.name)
+    return dataset
+
+
+def test_get_statistics_dashboard_other_user(client, auth_headers, other_user_dataset):
+    """アクセス権限のないデータセットの統計情報ダッシュボード取得のテスト"""
+    response = client.get(
+        f"/api/v1/visualization/datasets/{other_user_dataset.id}/statistics",
+        headers=auth_headers,
+    )
+    assert response.status_code == 403
+
+
+def test_get_statistics_dashboard_approximate_other_user(
+    client, auth_headers, other_user_dataset,
+):
+    """アクセス権限のないデータセットで標本を抽出せず、再計算も登録しないことのテスト"""
+    jobs = set(statistics_jobs._jobs)
+    response = client.get(
+        f"/api/v1/visualization/datasets/{other_user_dataset.id}/statistics",
+        params={"approximate": True, "sample_rows": 500},
+        headers=auth_headers,
+    )
+    assert response.status_code == 403
+    assert set(statistics_jobs._jobs) == jobs
+
+
+def test_get_version_comparison_dashboard_other_user(client, auth_headers, other_user_dataset):
+    """アクセス権限のないデータセットのバージョン比較ダッシュボード取得のテスト"""
+    response = client.get(
+        f"/api/v1/visualization/datasets/{other_user_dataset.id}/version-comparison",
+        params={"version1": "1.0.0", "version2": "1.0.1"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 403
+
+
+def test_get_quality_metrics_dashboard_other_user(client, auth_headers, other_user_dataset):
+    """アクセス権限のないデータセットの品質指標ダッシュボード取得のテスト"""
+    response = client.get(
+        f"/api/v1/visualization/datasets/{other_user_dataset.id}/quality-metrics",
+        headers=auth_headers,
+    )
+    assert response.status_code == 403
+
+
+def test_refresh_statistics_nonexistent_dataset(client, auth_headers):
+    """存在しないデータセットの統計情報の再計算のテスト"""
+    response = client.post(
+        "/api/v1/visualization/datasets/999/statistics/refresh",
+        headers=auth_headers,
+    )
+    assert response.status_code == 404
+
+
 def test_get_statistics_dashboard_nonexistent_dataset(client, auth_headers):
     """存在しないデータセットの統計情報ダッシュボード取得のテスト"""
     response = client.get(
         "/api/v1/visualization/datasets/999/statistics",
         headers=auth_headers,
     )
-    assert response.status_code == 400
+    assert response.status_code == 404
     assert "データセットID 999 は存在しません" in response.json()["detail"]
 
 
@@ -263,7 +425,7 @@ def test_get_quality_metrics_dashboard_nonexistent_dataset(client, auth_headers)
         "/api/v1/visualization/datasets/999/quality-metrics",
         headers=auth_headers,
     )
-    assert response.status_code == 400
+    assert response.status_code == 404
     assert "データセットID 999 は存在しません" in response.json()["detail"]
 
 
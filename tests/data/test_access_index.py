@@ -0,0 +1,82 @@
+"""
+アクセスインデックスの再構築のテスト
+
+このモジュールは、アクセスインデックスを作り直すコマンドと、既存のデータベースで
+インデックスを自動的に作成する処理のテストを提供します。
+"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.data.access_index import main
+from src.data.models import AccessLevel, Dataset, DatasetAccess, DatasetAccessIndex, UserGroup
+from src.data.service import AccessControlService, DatasetService
+from src.security.models import Base, User
+
+
+def test_rebuild_access_index_command(tmp_path, capsys):
+    """作成者とグループのアクセス権限からインデックスを作り直すことのテスト"""
+    database_url = f"sqlite:///{tmp_path / 'data.db'}"
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    owner = User(username="owner", email="owner@example.com", password_hash="x")
+    member = User(username="member", email="member@example.com", password_hash="x")
+    session.add_all([owner, member])
+    session.flush()
+    group = UserGroup(name="group", created_by_id=owner.id, users=[member])
+    dataset = Dataset(name="dataset", created_by_id=owner.id, updated_by_id=owner.id)
+    session.add_all([group, dataset])
+    session.flush()
+    for level in [AccessLevel.READ, AccessLevel.WRITE]:
+        other = UserGroup(name=f"group_{level.value}", created_by_id=owner.id, users=[member])
+        session.add(other)
+        session.flush()
+        session.add(DatasetAccess(
+            dataset_id=dataset.id, group_id=other.id, access_level=level, created_by_id=owner.id,
+        ))
+    session.add(DatasetAccessIndex(user_id=owner.id, dataset_id=dataset.id, max_level=AccessLevel.READ))
+    session.commit()
+    ids = (owner.id, member.id, dataset.id)
+    session.close()
+
+    assert main(["--database-url", database_url]) == 0
+    assert "2 件" in capsys.readouterr().out
+
+    session = sessionmaker(bind=engine)()
+    rows = {(row.user_id, row.dataset_id): row.max_level for row in session.query(DatasetAccessIndex)}
+    session.close()
+    engine.dispose()
+    owner_id, member_id, dataset_id = ids
+    assert rows == {
+        (owner_id, dataset_id): AccessLevel.ADMIN,
+        (member_id, dataset_id): AccessLevel.WRITE,
+    }
+
+
+def test_ensure_access_index_backfill(tmp_path):
+    """インデックスが空の既存のデータベースで、サービスの作成時に作り直すことのテスト"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'data.db'}")
+    Base.metadata.create_all(engine)
+    DatasetAccessIndex.__table__.drop(engine)
+    session = sessionmaker(bind=engine)()
+
+    owner = User(username="owner", email="owner@example.com", password_hash="x")
+    session.add(owner)
+    session.flush()
+    dataset = Dataset(name="dataset", created_by_id=owner.id, updated_by_id=owner.id)
+    session.add(dataset)
+    session.commit()
+
+    DatasetService(session, tmp_path / "storage")
+    rows = [(row.user_id, row.dataset_id, row.max_level) for row in session.query(DatasetAccessIndex)]
+    assert rows == [(owner.id, dataset.id, AccessLevel.ADMIN)]
+
+    # 確認はデータベースごとに1度だけ
+    session.query(DatasetAccessIndex).delete()
+    session.commit()
+    assert AccessControlService(session).ensure_access_index() is False
+    assert session.query(DatasetAccessIndex).count() == 0
+    session.close()
+    engine.dispose()
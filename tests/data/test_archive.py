@@ -0,0 +1,92 @@
+"""
+アーカイブモジュールのテスト
+
+このモジュールは、並列gzip圧縮のテストを提供します。
+"""
+
+import gzip
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from src.data.archive import (
+    ArchiveError,
+    ParallelGzipWriter,
+    ThroughputMeter,
+    manifest_path_for,
+    match_version,
+    open_archive_writer,
+)
+
+
+def test_parallel_gzip_writer_roundtrip():
+    """ブロックごとに圧縮したストリームが通常のgzipとして展開できることのテスト"""
+    data = os.urandom(50000) + b"abc" * 100000
+    output = io.BytesIO()
+    with ParallelGzipWriter(output, workers=3, block_size=8192) as writer:
+        for start in range(0, len(data), 7000):
+            writer.write(data[start:start + 7000])
+
+    assert writer.bytes_in == len(data)
+    assert writer.bytes_out == len(output.getvalue())
+    assert gzip.decompress(output.getvalue()) == data
+    assert not output.closed
+
+
+def test_parallel_gzip_writer_tar_stream():
+    """tarfile のストリームモードと組み合わせたテスト"""
+    output = io.BytesIO()
+    with ParallelGzipWriter(output, workers=2, block_size=1024) as writer:
+        with tarfile.open(fileobj=writer, mode="w|") as tar:
+            info = tarfile.TarInfo("versions/1.0.0.jsonl")
+            info.size = 5000
+            tar.addfile(info, io.BytesIO(b"x" * 5000))
+
+    output.seek(0)
+    with tarfile.open(fileobj=output, mode="r:gz") as tar:
+        assert tar.extractfile("versions/1.0.0.jsonl").read() == b"x" * 5000
+
+
+def test_parallel_gzip_writer_empty_and_invalid():
+    """空のストリームと不正なパラメータのテスト"""
+    output = io.BytesIO()
+    ParallelGzipWriter(output, workers=1).close()
+    assert gzip.decompress(output.getvalue()) == b""
+
+    with pytest.raises(ArchiveError):
+        ParallelGzipWriter(io.BytesIO(), level=0)
+    with pytest.raises(ArchiveError):
+        ParallelGzipWriter(io.BytesIO(), workers=0)
+
+    report = ThroughputMeter().report(100, 40, workers=2)
+    assert report["compression_ratio"] == 0.4
+    assert report["workers"] == 2
+
+
+def test_zip_archive_writer():
+    """zip64 形式のアーカイブの書き込みのテスト"""
+    output = io.BytesIO()
+    with open_archive_writer("zip", output, level=1) as writer:
+        writer.add("metadata.json", io.BytesIO(b"{}"), 2)
+        writer.add("versions/1.0.0.jsonl", io.BytesIO(b"y" * 5000), 5000)
+
+    assert writer.bytes_in == 5002
+    assert writer.bytes_out == len(output.getvalue())
+    with zipfile.ZipFile(output) as zf:
+        assert zf.namelist() == ["metadata.json", "versions/1.0.0.jsonl"]
+        assert zf.read("versions/1.0.0.jsonl") == b"y" * 5000
+
+    with pytest.raises(ArchiveError):
+        open_archive_writer("rar", io.BytesIO())
+
+
+def test_archive_names():
+    """マニフェストのパスとバージョン番号の対応のテスト"""
+    assert manifest_path_for("backup/export.tar.gz").name == "export.manifest.json"
+    assert manifest_path_for("export.zip").name == "export.manifest.json"
+    assert match_version("1.0.0.jsonl", ["1.0", "1.0.0"]) == "1.0.0"
+    assert match_version("1.0.jsonl", ["1.0", "1.0.0"]) == "1.0"
+    assert match_version("2.0.jsonl", ["1.0"]) is None
@@ -0,0 +1,59 @@
+"""
+プロセス内キャッシュのテスト
+
+このモジュールは、LRUキャッシュのテストを提供します。
+"""
+
+import pytest
+
+from src.data.cache import LRUCache
+
+
+def test_lru_cache_eviction():
+    """上限を超えた場合に最も古いエントリが削除されることのテスト"""
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" を最近参照したエントリにする
+
+    cache.put("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_lru_cache_pop_and_clear():
+    """エントリの削除のテスト"""
+    cache = LRUCache()
+    cache.put("a", 1)
+    assert cache.pop("a") == 1
+    assert cache.get("a", "missing") == "missing"
+
+    cache.put("b", 2)
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_lru_cache_invalid_size():
+    """不正な上限のテスト"""
+    with pytest.raises(ValueError):
+        LRUCache(max_entries=0)
+
+
+def test_lru_cache_size_limit():
+    """サイズの合計が上限を超えた場合のテスト"""
+    cache = LRUCache(max_entries=10, max_bytes=100)
+    cache.put("a", 1, size=40)
+    cache.put("b", 2, size=40)
+    cache.put("c", 3, size=40)
+    assert "a" not in cache
+    assert cache.total_bytes == 80
+
+    cache.put("b", 4, size=10)
+    assert cache.total_bytes == 50
+
+    # 上限より大きいエントリは保持しない
+    cache.put("d", 5, size=101)
+    assert "d" not in cache
+    assert len(cache) == 2
@@ -0,0 +1,69 @@
+"""
+列指向フォーマットのテスト
+
+このモジュールは、JSONLからParquetのサイドカーを作成する機能のテストを提供します。
+"""
+
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src.data.columnar import read_columnar, write_columnar
+from src.data.storage import StorageError
+
+
+@pytest.fixture
+def work_dir():
+    """テスト用の作業ディレクトリを作成"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+def test_write_columnar(work_dir):
+    """JSONLからParquetへの変換のテスト"""
+    src = work_dir / "data.jsonl"
+    df = pd.DataFrame({
+        "id": range(1000),
+        "value": [i * 0.5 for i in range(1000)],
+        "category": ["A", "B", "C", "D"] * 250,
+    })
+    df.to_json(src, orient="records", lines=True)
+
+    dst = write_columnar(lambda: open(src, "r", encoding="utf-8"), work_dir / "data.parquet",
+                         chunk_rows=128)
+
+    result = read_columnar(dst)
+    pd.testing.assert_frame_equal(result, df, check_dtype=False)
+    assert list(read_columnar(dst, columns=["value"]).columns) == ["value"]
+
+
+def test_write_columnar_unifies_chunk_schemas(work_dir):
+    """チャンク間で型や列が異なる場合のテスト"""
+    src = work_dir / "data.jsonl"
+    src.write_text(
+        '{"a": 1}\n{"a": 2}\n'
+        '{"a": 2.5, "b": "x"}\n{"a": null, "b": "y"}\n'
+    )
+
+    dst = write_columnar(lambda: open(src, "r", encoding="utf-8"), work_dir / "data.parquet",
+                         chunk_rows=2)
+
+    result = read_columnar(dst)
+    assert result["a"].tolist()[:3] == [1.0, 2.0, 2.5]
+    assert result["a"].isnull().sum() == 1
+    assert result["b"].isnull().sum() == 2
+
+
+def test_write_columnar_invalid_source(work_dir):
+    """解析できないファイルのテスト"""
+    src = work_dir / "data.jsonl"
+    src.write_text("invalid\n")
+    dst = work_dir / "data.parquet"
+
+    with pytest.raises(StorageError):
+        write_columnar(lambda: open(src, "r", encoding="utf-8"), dst)
+    assert list(work_dir.glob("data.parquet*")) == []
@@ -0,0 +1,123 @@
+"""
+差分ストレージのテスト
+
+このモジュールは、コンテンツ定義チャンキングとチャンクストアのテストを提供します。
+"""
+
+import hashlib
+import io
+import random
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from src.data.delta import ChunkStore, ManifestReader, MAX_CHUNK_SIZE, MIN_CHUNK_SIZE, iter_chunks
+from src.data.storage import StorageError
+
+
+@pytest.fixture
+def work_dir():
+    """テスト用の作業ディレクトリを作成"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture
+def sample_lines():
+    """サンプルのJSONL行を作成"""
+    rng = random.Random(0)
+    return [
+        f'{{"id": {i}, "value": {rng.random()}, "category": "{rng.choice("ABC")}"}}\n'
+        for i in range(20000)
+    ]
+
+
+def test_iter_chunks(sample_lines):
+    """チャンク分割のテスト"""
+    data = "".join(sample_lines).encode()
+    chunks = list(iter_chunks(io.BytesIO(data), read_size=10000))
+
+    assert b"".join(chunks) == data
+    assert all(MIN_CHUNK_SIZE <= len(c) <= MAX_CHUNK_SIZE for c in chunks[:-1])
+
+
+def test_iter_chunks_independent_of_read_size(sample_lines):
+    """チャンク境界が読み込みサイズに依存しないことのテスト"""
+    data = "".join(sample_lines).encode()
+    assert list(iter_chunks(io.BytesIO(data), read_size=7777)) == \
+        list(iter_chunks(io.BytesIO(data), read_size=1024 * 1024))
+
+
+def test_iter_chunks_resynchronizes_after_insert(sample_lines):
+    """先頭付近に挿入があっても以降のチャンクが再利用されることのテスト"""
+    original = "".join(sample_lines).encode()
+    modified = "".join(sample_lines[:10] + ['{"id": -1}\n'] + sample_lines[10:]).encode()
+
+    original_chunks = set(iter_chunks(io.BytesIO(original)))
+    modified_chunks = list(iter_chunks(io.BytesIO(modified)))
+    shared = [c for c in modified_chunks if c in original_chunks]
+
+    assert len(shared) >= len(modified_chunks) - 2
+
+
+def test_chunk_store_deduplicates_versions(work_dir, sample_lines):
+    """バージョン間でチャンクが重複排除されることのテスト"""
+    v1 = work_dir / "v1.jsonl"
+    v1.write_text("".join(sample_lines))
+    lines = list(sample_lines)
+    lines[len(lines) // 2] = '{"id": -1, "value": 0.0, "category": "Z"}\n'
+    v2 = work_dir / "v2.jsonl"
+    v2.write_text("".join(lines))
+
+    store = ChunkStore(work_dir / "store")
+    hash1, manifest1, written1 = store.put(v1, suffix=".jsonl")
+    hash2, manifest2, written2 = store.put(v2, suffix=".jsonl")
+
+    assert hash1 == hashlib.sha256(v1.read_bytes()).hexdigest()
+    assert hash2 == hashlib.sha256(v2.read_bytes()).hexdigest()
+    assert written1 == v1.stat().st_size
+    assert written2 <= 2 * MAX_CHUNK_SIZE
+
+    with ManifestReader(manifest2) as reader:
+        assert reader.read() == v2.read_bytes()
+
+
+def test_manifest_reader_seek(work_dir, sample_lines):
+    """マニフェストからのランダムアクセスのテスト"""
+    path = work_dir / "v1.jsonl"
+    path.write_text("".join(sample_lines))
+    data = path.read_bytes()
+    _, manifest, _ = ChunkStore(work_dir / "store").put(path)
+
+    with io.BufferedReader(ManifestReader(manifest)) as reader:
+        reader.seek(123457)
+        assert reader.read(10000) == data[123457:133457]
+        reader.seek(-100, io.SEEK_END)
+        assert reader.read() == data[-100:]
+
+
+def test_collect_unreferenced_chunks(work_dir, sample_lines):
+    """参照されていないチャンクの回収のテスト"""
+    v1 = work_dir / "v1.jsonl"
+    v1.write_text("".join(sample_lines))
+    v2 = work_dir / "v2.jsonl"
+    v2.write_text("".join(sample_lines[:100]))
+
+    store = ChunkStore(work_dir / "store")
+    _, manifest1, _ = store.put(v1)
+    _, manifest2, _ = store.put(v2)
+
+    store.remove_manifest(manifest1)
+    assert store.collect_unreferenced_chunks() > 0
+
+    with ManifestReader(manifest2) as reader:
+        assert reader.read() == v2.read_bytes()
+
+
+def test_manifest_reader_invalid_manifest(work_dir):
+    """不正なマニフェストのテスト"""
+    path = work_dir / "manifest.json"
+    path.write_text("invalid")
+    with pytest.raises(StorageError):
+        ManifestReader(path)
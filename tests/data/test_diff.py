@@ -0,0 +1,139 @@
+"""
+行単位のバージョン差分のテスト
+
+このモジュールは、ハッシュとキー列による行単位の差分のテストを提供します。
+"""
+
+import functools
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.diff import DiffError, column_diff, row_diff
+from src.data.statistics import exact_statistics, streaming_statistics
+
+
+def _opener(rows):
+    data = "".join(json.dumps(row) + "\n" for row in rows).encode()
+    return functools.partial(io.BytesIO, data)
+
+
+@pytest.fixture
+def versions():
+    """比較元と比較先の行を作成"""
+    old = [{"id": i, "value": i * 2} for i in range(1000)]
+    new = [dict(row) for row in old]
+    new[3]["value"] = -1  # 変更
+    del new[5]  # 削除
+    new.append({"id": 1000, "value": 0})  # 追加
+    new.insert(0, {"value": 4, "id": 2.0})  # 列の順序と型が異なる重複行
+    return _opener(old), _opener(new)
+
+
+def test_row_diff_hash(versions):
+    """行の内容のハッシュによる差分のテスト"""
+    result = row_diff(*versions, partitions=4)
+
+    assert result["mode"] == "hash"
+    assert (result["rows1"], result["rows2"]) == (1000, 1001)
+    assert (result["added"], result["removed"], result["changed"]) == (3, 2, 0)
+    assert result["unchanged"] == 998
+    assert {"id": 3, "value": -1} in result["samples"]["added"]
+    assert {"id": 5, "value": 10} in result["samples"]["removed"]
+
+
+def test_row_diff_key(versions):
+    """キー列による差分のテスト"""
+    result = row_diff(*versions, key_column="id", partitions=4)
+
+    assert (result["added"], result["removed"], result["changed"]) == (2, 1, 1)
+    assert result["samples"]["changed"] == [
+        {"from": {"id": 3, "value": 6}, "to": {"id": 3, "value": -1}},
+    ]
+    assert result["samples"]["removed"] == [{"id": 5, "value": 10}]
+
+
+def test_row_diff_pagination(versions):
+    """サンプルのページ分けのテスト"""
+    pages = [row_diff(*versions, page=page, page_size=1, partitions=4) for page in range(4)]
+
+    added = [row for page in pages for row in page["samples"]["added"]]
+    assert len(added) == 3
+    assert all(len(page["samples"]["added"]) <= 1 for page in pages)
+    assert row_diff(*versions, page_size=3, partitions=4)["samples"]["added"] == added
+
+
+def test_row_diff_rows_without_key():
+    """キー列の値が欠損している行を追加・削除された行として数えることのテスト"""
+    old = [{"id": 1, "value": 1}, {"id": None, "value": 2}, {"value": 3}]
+    new = [{"id": 1, "value": 1}, {"id": None, "value": 4}, {"value": 5}, {"id": 0, "value": 6}]
+    result = row_diff(_opener(old), _opener(new), key_column="id", partitions=4)
+
+    assert (result["added"], result["removed"], result["changed"]) == (3, 2, 0)
+    assert result["samples"]["changed"] == []
+    assert {"id": 0, "value": 6} in result["samples"]["added"]
+
+
+def test_row_diff_missing_key(versions):
+    """存在しないキー列のテスト"""
+    with pytest.raises(DiffError):
+        row_diff(*versions, key_column="unknown")
+
+
+@pytest.fixture
+def drifted_frames():
+    """列の追加・削除と分布の変化があるデータフレームを作成"""
+    rng = np.random.default_rng(0)
+    n = 20000
+    old = pd.DataFrame({
+        "x": rng.normal(0, 1, n),
+        "category": rng.choice(["a", "b", "c"], n),
+        "dropped": 1,
+    })
+    new = pd.DataFrame({
+        "x": np.where(np.arange(n) % 5 == 0, np.nan, rng.normal(0.5, 1, n)),
+        "category": rng.choice(["a", "b", "c"], n, p=[0.6, 0.2, 0.2]),
+        "added": "z",
+    })
+    return old, new
+
+
+def test_column_diff_from_statistics(drifted_frames):
+    """統計情報からの列単位の差分のテスト"""
+    old, new = drifted_frames
+    result = column_diff(exact_statistics(old)[0], exact_statistics(new)[0])
+
+    assert result["added_columns"] == ["added"]
+    assert result["removed_columns"] == ["dropped"]
+    assert result["dtype_changes"] == []
+    x = result["columns"]["x"]
+    assert x["null_rate"]["delta"] == pytest.approx(0.2)
+    assert x["mean"]["delta"] == pytest.approx(0.5, abs=0.05)
+    assert x["drift"]["method"] == "quartiles"
+    assert 0.1 < x["drift"]["ks"] < 0.3
+    assert result["columns"]["category"]["drift"]["psi"] > 0.1
+
+    same = column_diff(exact_statistics(old)[0], exact_statistics(old)[0])
+    assert same["columns"]["x"]["drift"]["psi"] == pytest.approx(0.0, abs=1e-9)
+    assert same["columns"]["x"]["drift"]["ks"] == 0.0
+
+
+def test_column_diff_from_sketches(drifted_frames):
+    """スケッチからの分布の変化のテスト"""
+    old, new = drifted_frames
+    sketches = [streaming_statistics([df]) for df in (old, new)]
+    result = column_diff(
+        sketches[0].result()[0],
+        sketches[1].result()[0],
+        sketches[0].to_dict(),
+        sketches[1].to_dict(),
+    )
+
+    drift = result["columns"]["x"]["drift"]
+    assert drift["method"] == "sketch"
+    # 平均が標準偏差の0.5倍ずれた正規分布の KS 統計量は約0.197
+    assert drift["ks"] == pytest.approx(0.197, abs=0.03)
+    assert drift["psi"] > 0.1
@@ -0,0 +1,60 @@
+"""
+行の重複検出のテスト
+
+このモジュールは、行のハッシュとディスクに書き出しながら数えるユニーク数のテストを提供します。
+"""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.duplicates import DistinctRowCounter, count_distinct_rows, hash_rows
+
+
+@pytest.fixture
+def duplicated_df():
+    """重複した行を含むデータフレームを作成"""
+    rng = np.random.default_rng(0)
+    n = 100000
+    return pd.DataFrame({
+        "a": rng.integers(0, 50, n),
+        "b": rng.choice(np.array(["x", "y", None], dtype=object), n),
+        "c": np.where(rng.random(n) < 0.1, np.nan, rng.integers(0, 20, n).astype(float)),
+    })
+
+
+def test_hash_rows_matches_drop_duplicates(duplicated_df):
+    """行のハッシュで数えたユニーク数が drop_duplicates と一致することのテスト"""
+    assert np.unique(hash_rows(duplicated_df)).size == len(duplicated_df.drop_duplicates())
+
+
+def test_hash_rows_ignores_column_order_and_missing_columns():
+    """列の順序や列の有無によらず同じ行が同じハッシュになることのテスト"""
+    first = pd.DataFrame({"a": [1, 2], "b": [None, "q"]})
+    second = pd.DataFrame({"b": ["q"], "a": [2.0]})
+    third = pd.DataFrame({"a": [1]})
+
+    assert hash_rows(first)[1] == hash_rows(second)[0]
+    assert hash_rows(first)[0] == hash_rows(third)[0]
+    assert hash_rows(pd.DataFrame({"a": [0.0]}))[0] != hash_rows(pd.DataFrame({"a": [None]}))[0]
+
+
+def test_distinct_row_counter_spills_to_disk(duplicated_df):
+    """メモリの上限を超えた場合にディスクに書き出して数えることのテスト"""
+    expected = len(duplicated_df.drop_duplicates())
+    chunks = [duplicated_df.iloc[i:i + 5000] for i in range(0, len(duplicated_df), 5000)]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with DistinctRowCounter(memory_rows=8000, partitions=8, spill_dir=tmpdir) as counter:
+            for chunk in chunks:
+                counter.update(chunk)
+            assert counter.spilled
+            assert counter.row_count == len(duplicated_df)
+            assert counter.distinct_count() == expected
+        # 書き出したファイルは削除される
+        assert list(Path(tmpdir).iterdir()) == []
+
+    assert count_distinct_rows(chunks) == (len(duplicated_df), expected)
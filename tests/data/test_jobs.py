@@ -0,0 +1,106 @@
+"""
+バックグラウンドジョブのテスト
+
+このモジュールは、ジョブキューのテストを提供します。
+"""
+
+import threading
+
+import pytest
+
+from src.data.jobs import JobError, JobQueue, JobStatus
+
+
+@pytest.fixture
+def queue():
+    """テスト用のジョブキューを作成"""
+    queue = JobQueue(max_workers=2, max_pending=2, max_finished=2)
+    yield queue
+    queue.shutdown()
+
+
+def test_submit_job(queue):
+    """ジョブの実行と結果取得のテスト"""
+    job = queue.submit("key", lambda a, b: a + b, 1, b=2)
+
+    assert job.wait(timeout=5)
+    assert job.status == JobStatus.SUCCEEDED
+    assert job.result == 3
+    assert queue.get(job.id) is job
+    assert job.to_dict()["status"] == "succeeded"
+
+
+def test_submit_job_failure(queue):
+    """失敗したジョブのテスト"""
+    def fail():
+        raise ValueError("計算に失敗しました")
+
+    job = queue.submit("key", fail)
+
+    assert job.wait(timeout=5)
+    assert job.status == JobStatus.FAILED
+    assert job.error == "計算に失敗しました"
+
+
+def test_submit_job_coalesced(queue):
+    """同じキーのジョブが集約されることのテスト"""
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return "done"
+
+    first = queue.submit("key", work)
+    second = queue.submit("key", work)
+    other = queue.submit("other", work)
+    assert first is second
+    assert other is not first
+
+    release.set()
+    assert first.wait(timeout=5) and other.wait(timeout=5)
+    assert len(calls) == 2
+
+    # 完了後は新しいジョブが作られる
+    third = queue.submit("key", lambda: "again")
+    assert third is not first
+    assert third.wait(timeout=5)
+
+
+def test_job_owners(queue):
+    """ジョブの登録者だけがジョブを取得できることのテスト"""
+    release = threading.Event()
+    job = queue.submit("key", release.wait, 5, owner=1)
+    assert queue.submit("key", release.wait, 5, owner=2) is job
+    release.set()
+    assert job.wait(timeout=5)
+
+    assert queue.get(job.id, owner=1) is job
+    assert queue.get(job.id, owner=2) is job
+    assert queue.get(job.id, owner=3) is None
+    assert queue.get(job.id) is job
+
+
+def test_submit_job_queue_full(queue):
+    """実行待ちのジョブ数が上限に達した場合のテスト"""
+    release = threading.Event()
+    queue.submit("a", release.wait, 5)
+    queue.submit("b", release.wait, 5)
+
+    with pytest.raises(JobError):
+        queue.submit("c", release.wait, 5)
+    release.set()
+
+
+def test_finished_jobs_are_trimmed(queue):
+    """完了済みジョブの保持件数のテスト"""
+    jobs = [queue.submit(i, lambda: None) for i in range(2)]
+    for job in jobs:
+        job.wait(timeout=5)
+    jobs += [queue.submit(i, lambda: None) for i in range(2, 4)]
+    for job in jobs:
+        job.wait(timeout=5)
+
+    assert queue.get(jobs[0].id) is None
+    assert queue.get(jobs[-1].id) is jobs[-1]
@@ -0,0 +1,84 @@
+"""
+実効アクセス権限のキャッシュのテスト
+
+このモジュールは、イベントバスと実効アクセス権限のキャッシュのテストを提供します。
+"""
+
+import gc
+
+import pytest
+
+from src.data import permissions
+from src.data.events import ACCESS_CHANGED, EventBus
+from src.data.permissions import MemoryPermissionBackend, PermissionCache
+
+
+def test_event_bus_publish():
+    """購読者へのイベントの配信と登録の解除のテスト"""
+    bus = EventBus()
+    received = []
+
+    def handler(**payload):
+        received.append(payload)
+
+    bus.subscribe("test", handler)
+    bus.publish("test", value=1)
+    bus.publish("other", value=2)
+    bus.unsubscribe("test", handler)
+    bus.publish("test", value=3)
+
+    assert received == [{"value": 1}]
+
+
+def test_event_bus_weak_method():
+    """不要になった購読者のメソッドが自動的に解除されることのテスト"""
+    bus = EventBus()
+    cache = PermissionCache(event_bus=bus)
+    cache.put_many(1, {10: 2}, cache.generation)
+    bus.publish(ACCESS_CHANGED, user_ids=[1], dataset_ids=[10])
+    assert cache.get_many(1, [10]) == {}
+
+    del cache
+    gc.collect()
+    bus.publish(ACCESS_CHANGED, user_ids=[1], dataset_ids=[10])
+    assert bus._handlers[ACCESS_CHANGED] == []
+
+
+def test_permission_cache_invalidate():
+    """通知された組み合わせのエントリだけが削除されることのテスト"""
+    bus = EventBus()
+    cache = PermissionCache(event_bus=bus)
+    cache.put_many(1, {10: 1, 11: 3}, cache.generation)
+    cache.put_many(2, {10: 2}, cache.generation)
+
+    bus.publish(ACCESS_CHANGED, user_ids=[1, 3], dataset_ids=[10])
+    assert cache.get_many(1, [10, 11]) == {11: 3}
+    assert cache.get_many(2, [10]) == {10: 2}
+
+
+def test_permission_cache_stale_generation():
+    """読み込み中に権限が変更された場合に古い値を保存しないことのテスト"""
+    cache = PermissionCache(event_bus=EventBus())
+    generation = cache.generation
+    cache.invalidate([1], [10])
+    cache.put_many(1, {10: 3}, generation)
+    assert cache.get_many(1, [10]) == {}
+
+
+def test_permission_cache_ttl_and_size(monkeypatch):
+    """有効期限とエントリ数の上限のテスト"""
+    now = [1000.0]
+    monkeypatch.setattr(permissions.time, "monotonic", lambda: now[0])
+    backend = MemoryPermissionBackend(max_entries=2)
+    cache = PermissionCache(ttl=30, backend=backend, event_bus=EventBus())
+
+    cache.put_many(1, {10: 1, 11: 1, 12: 1}, cache.generation)
+    assert len(backend) == 2
+    assert cache.get_many(1, [10, 11, 12]) == {11: 1, 12: 1}
+
+    now[0] += 31
+    assert cache.get_many(1, [11, 12]) == {}
+    assert len(backend) == 0
+
+    with pytest.raises(ValueError):
+        PermissionCache(ttl=0)
@@ -4,20 +4,34 @@
 このモジュールは、データセット管理サービスと検証サービスのテストを提供します。
 """
 
+import hashlib
+import json
 import os
 import tempfile
 import tarfile
+from datetime import datetime
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
-from src.data.models import Dataset, DatasetStatus, DatasetVersion, Metadata, QualityMetrics
-from src.data.service import DatasetError, DatasetService, ValidationError, ValidationService
+from src.data.cache import LRUCache
+from src.data.models import AccessLevel, Dataset, DatasetAccessIndex, DatasetStatus, DatasetVersion, Metadata, QualityMetrics, StatisticsCache, StorageMode, VersionDiffCache
+from src.data.events import EventBus
+from src.data.permissions import PermissionCache
+from src.data.service import (
+    DIFF_CACHE_TOUCH_INTERVAL,
+    AccessControlError,
+    AccessControlService,
+    DatasetError,
+    DatasetService,
+    ValidationError,
+    ValidationService,
+    _DiffCacheState,
+)
 from src.security.models import Base, User
-from src.security.service import AccessControlService, AccessLevel
 
 
 @pytest.fixture
@@ -29,7 +43,7 @@ def db_session():
     session = Session()
 
     # テスト用のユーザーを作成
-    user = User(username="testuser", email="test@example.com")
+    user = User(username="testuser", email="test@example.com", password_hash="x")
     session.add(user)
     session.commit()
 
@@ -72,6 +86,7 @@ def sample_users(db_session):
         user = User(
             username=f"testuser{i}",
             email=f"test{i}@example.com",
+            password_hash="x",
         )
         db_session.add(user)
         users.append(user)
@@ -159,6 +174,235 @@ def test_add_version(dataset_service, sample_dataset, sample_file, db_session):
     assert Path(version.storage_path).exists()
 
 
+def test_add_version_streaming(dataset_service, sample_dataset, db_session):
+    """チャンク単位でのバージョン追加のテスト"""
+    user = db_session.query(User).first()
+
+    with tempfile.NamedTemporaryFile(mode="w", delete=False) as f:
+        for i in range(1000):
+            f.write(f'{{"value": {i}}}\n')
+
+    try:
+        progress = []
+        version = dataset_service.add_version(
+            dataset_id=sample_dataset.id,
+            version="1.0.0",
+            file_path=f.name,
+            created_by_id=user.id,
+            chunk_size=1024,
+            progress_callback=lambda done, total: progress.append((done, total)),
+        )
+
+        content = Path(f.name).read_bytes()
+        assert Path(version.storage_path).read_bytes() == content
+        assert version.file_hash == hashlib.sha256(content).hexdigest()
+        assert len(progress) > 1
+        assert progress[-1] == (len(content), len(content))
+
+    finally:
+        os.unlink(f.name)
+
+
+def test_add_version_deduplicated(dataset_service, sample_dataset, sample_file, db_session):
+    """同一内容のバージョン追加でブロブが共有されることのテスト"""
+    user = db_session.query(User).first()
+    version1 = dataset_service.add_version(
+        dataset_id=sample_dataset.id,
+        version="1.0.0",
+        file_path=sample_file,
+        created_by_id=user.id,
+    )
+    version2 = dataset_service.add_version(
+        dataset_id=sample_dataset.id,
+        version="1.0.1",
+        file_path=sample_file,
+        created_by_id=user.id,
+    )
+
+    assert version1.file_hash == version2.file_hash
+    assert version1.storage_path == version2.storage_path
+    assert len(list(dataset_service.blob_store.iter_blobs())) == 1
+
+
+def test_add_version_move(dataset_service, sample_dataset, db_session):
+    """moveモードでのバージョン追加のテスト"""
+    user = db_session.query(User).first()
+
+    with tempfile.NamedTemporaryFile(mode="w", delete=False) as f:
+        f.write('{"value": 42}\n{"value": 43}\n')
+    content = Path(f.name).read_bytes()
+
+    version = dataset_service.add_version(
+        dataset_id=sample_dataset.id,
+        version="1.0.0",
+        file_path=f.name,
+        created_by_id=user.id,
+        ingest_mode="move",
+    )
+
+    assert Path(version.storage_path).read_bytes() == content
+    assert version.file_hash == hashlib.sha256(content).hexdigest()
+    assert not Path(f.name).exists()
+
+
+def test_add_version_move_commit_failure(dataset_service, sample_dataset, db_session, monkeypatch):
+    """登録に失敗した場合にmoveモードのコピー元が残ることのテスト"""
+    user = db_session.query(User).first()
+
+    with tempfile.NamedTemporaryFile(mode="w", delete=False) as f:
+        f.write('{"value": 42}\n')
+
+    def fail_commit():
+        raise RuntimeError("commit failed")
+
+    monkeypatch.setattr(db_session, "commit", fail_commit)
+    try:
+        with pytest.raises(RuntimeError):
+            dataset_service.add_version(
+                dataset_id=sample_dataset.id,
+                version="1.0.0",
+                file_path=f.name,
+                created_by_id=user.id,
+                ingest_mode="move",
+            )
+        assert Path(f.name).exists()
+        assert list(dataset_service.blob_store.iter_blobs()) == []
+    finally:
+        os.unlink(f.name)
+
+
+def test_collect_unreferenced_blobs(dataset_service, sample_dataset, sample_file, storage_dir, db_session):
+    """参照されていないブロブの回収のテスト"""
+    user = db_session.query(User).first()
+    version = dataset_service.add_version(
+        sample_dataset.id, "1.0.0", sample_file, user.id, materialize_columnar=True,
+    )
+    orphan = dataset_service.blob_store.path_for("ab" * 32, ".jsonl")
+    orphan.parent.mkdir(parents=True, exist_ok=True)
+    orphan.write_text("{}\n")
+
+    # 作成直後のブロブは猶予期間内のため削除されない
+    assert dataset_service.collect_unreferenced_blobs() == []
+    assert orphan.exists()
+
+    # ストレージのパスの表記が異なっていても参照中のブロブは削除されない
+    other_service = DatasetService(db_session, storage_dir / "sub" / "..")
+    assert other_service.collect_unreferenced_blobs(grace_period=0) == [
+        other_service.blob_store.path_for("ab" * 32, ".jsonl")
+    ]
+    assert not orphan.exists()
+    assert Path(version.storage_path).exists()
+    assert Path(version.columnar_path).exists()
+
+
+def test_add_version_invalid_ingest_mode(dataset_service, sample_dataset, sample_file, db_session):
+    """不正な取り込みモードでのバージョン追加のテスト"""
+    user = db_session.query(User).first()
+    with pytest.raises(DatasetError) as exc_info:
+        dataset_service.add_version(
+            dataset_id=sample_dataset.id,
+            version="1.0.0",
+            file_path=sample_file,
+            created_by_id=user.id,
+            ingest_mode="symlink",
+        )
+    assert "無効な取り込みモード" in str(exc_info.value)
+
+
+def test_add_version_delta(dataset_service, sample_dataset, db_session):
+    """差分ストレージでのバージョン追加のテスト"""
+    user = db_session.query(User).first()
+    lines = [f'{{"numeric": {i}, "category": "{"ABC"[i % 3]}"}}\n' for i in range(5000)]
+
+    with tempfile.NamedTemporaryFile(mode="w", delete=False) as f1:
+        f1.write("".join(lines))
+    lines[2500] = '{"numeric": -1, "category": "Z"}\n'
+    with tempfile.NamedTemporaryFile(mode="w", delete=False) as f2:
+        f2.write("".join(lines))
+
+    try:
+        for version, path in [("1.0.0", f1.name), ("1.0.1", f2.name)]:
+            dataset_service.add_version(
+                dataset_id=sample_dataset.id,
+                version=version,
+                file_path=path,
+                created_by_id=user.id,
+                storage_mode=StorageMode.DELTA,
+            )
+
+        version = sample_dataset.versions[1]
+        assert version.storage_mode == StorageMode.DELTA
+        with dataset_service._open_version(version) as reader:
+            assert reader.read() == Path(f2.name).read_bytes()
+
+        # 統計情報はマニフェストから再構成したデータで計算される
+        stats = dataset_service.calculate_statistics(
+            dataset_id=sample_dataset.id,
+            version="1.0.1",
+        )
+        assert stats["statistics"]["row_count"] == 5000
+
+    finally:
+        os.unlink(f1.name)
+        os.unlink(f2.name)
+
+
+def test_add_version_delta_with_zero_copy(dataset_service, sample_dataset, sample_file, db_session):
+    """差分ストレージとzero-copy取り込みの組み合わせのテスト"""
+    user = db_session.query(User).first()
+    with pytest.raises(DatasetError):
+        dataset_service.add_version(
+            dataset_id=sample_dataset.id,
+            version="1.0.0",
+            file_path=sample_file,
+            created_by_id=user.id,
+            ingest_mode="link",
+            storage_mode=StorageMode.DELTA,
+        )
+
+
+def test_add_version_materialize_columnar(dataset_service, sample_dataset, sample_file, db_session):
+    """列指向フォーマットのサイドカー作成のテスト"""
+    pytest.importorskip("pyarrow")
+    user = db_session.query(User).first()
+    version = dataset_service.add_version(
+        dataset_id=sample_dataset.id,
+        version="1.0.0",
+        file_path=sample_file,
+        created_by_id=user.id,
+        materialize_columnar=True,
+    )
+
+    assert version.columnar_path is not None
+    assert Path(version.columnar_path).exists()
+
+    stats = dataset_service.calculate_statistics(sample_dataset.id, "1.0.0")
+    assert stats["statistics"]["row_count"] == 2
+    assert stats["statistics"]["numeric_statistics"]["value"]["mean"] == 42.5
+
+    dataset_service.delete_version(sample_dataset.id, "1.0.0", user.id)
+    assert not Path(version.columnar_path).exists()
+
+
+def test_delete_version_keeps_shared_blob(dataset_service, sample_dataset, sample_file, db_session):
+    """他のバージョンから参照されているブロブが削除されないことのテスト"""
+    user = db_session.query(User).first()
+    for version in ["1.0.0", "1.0.1"]:
+        dataset_service.add_version(
+            dataset_id=sample_dataset.id,
+            version=version,
+            file_path=sample_file,
+            created_by_id=user.id,
+        )
+    blob_path = Path(sample_dataset.versions[0].storage_path)
+
+    dataset_service.delete_version(sample_dataset.id, "1.0.0", user.id)
+    assert blob_path.exists()
+
+    dataset_service.delete_version(sample_dataset.id, "1.0.1", user.id)
+    assert not blob_path.exists()
+
+
 def test_add_version_nonexistent_dataset(dataset_service, sample_file, db_session):
     """存在しないデータセットへのバージョン追加のテスト"""
     user = db_session.query(User).first()
@@ -296,7 +540,7 @@ def test_get_validation_history(validation_service, db_session, sample_dataset):
     assert accuracy_history[0].metrics_type == "accuracy"
 
 
-def test_export_dataset(dataset_service, sample_dataset, sample_file, db_session):
+def test_export_dataset(dataset_service, sample_dataset, sample_file, db_session, tmp_path):
     """データセットエクスポートのテスト"""
     # バージョンを追加
     user = db_session.query(User).first()
@@ -310,32 +554,59 @@ def test_export_dataset(dataset_service, sample_dataset, sample_file, db_session
     # エクスポート
     export_path = dataset_service.export_dataset(
         dataset_id=sample_dataset.id,
-        export_path="test_export.tar.gz",
+        export_path=tmp_path / "test_export.tar.gz",
     )
 
     assert export_path.exists()
-    assert export_path.suffix == ".tar.gz"
+    assert export_path.name.endswith(".tar.gz")
 
-    # エクスポートファイルを削除
-    export_path.unlink()
 
-
-def test_export_dataset_without_versions(dataset_service, sample_dataset):
+def test_export_dataset_without_versions(dataset_service, sample_dataset, tmp_path):
     """バージョンなしでのデータセットエクスポートのテスト"""
     export_path = dataset_service.export_dataset(
         dataset_id=sample_dataset.id,
-        export_path="test_export.tar.gz",
+        export_path=tmp_path / "test_export.tar.gz",
         include_versions=False,
     )
 
     assert export_path.exists()
-    assert export_path.suffix == ".tar.gz"
+    assert export_path.name.endswith(".tar.gz")
 
-    # エクスポートファイルを削除
-    export_path.unlink()
 
+def test_export_dataset_streaming(dataset_service, sample_dataset, db_session, tmp_path):
+    """データファイルを直接書き込むエクスポートのテスト"""
+    user = db_session.query(User).first()
+    contents = {}
+    for version, storage_mode in [("1.0.0", StorageMode.FILE), ("1.0.1", StorageMode.DELTA)]:
+        path = tmp_path / f"{version}.jsonl"
+        contents[version] = "".join(f'{{"id": {i}, "version": "{version}"}}\n' for i in range(1000)).encode()
+        path.write_bytes(contents[version])
+        dataset_service.add_version(
+            sample_dataset.id, version, path, user.id, storage_mode=storage_mode,
+        )
+
+    progress = []
+    reports = []
+    export_path = dataset_service.export_dataset(
+        dataset_id=sample_dataset.id,
+        export_path=tmp_path / "export.tar.gz",
+        compression_workers=2,
+        progress_callback=lambda done, total: progress.append((done, total)),
+        report_callback=reports.append,
+    )
+
+    assert export_path == tmp_path / "export.tar.gz"
+    with tarfile.open(export_path, "r:gz") as tar:
+        assert tar.getnames()[0] == "metadata.json"
+        for version, content in contents.items():
+            assert tar.extractfile(f"versions/{version}.jsonl").read() == content
+    assert progress[-1] == (sum(len(content) for content in contents.values()),) * 2
+    assert reports[0]["bytes_in"] > reports[0]["bytes_out"] == export_path.stat().st_size
+    assert reports[0]["workers"] == 2
+    assert not list(tmp_path.glob("*.part"))
 
-def test_import_dataset(dataset_service, sample_dataset, sample_file, db_session):
+
+def test_import_dataset(dataset_service, sample_dataset, sample_file, db_session, tmp_path):
     """データセットインポートのテスト"""
     # バージョンを追加してエクスポート
     user = db_session.query(User).first()
@@ -348,7 +619,7 @@ def test_import_dataset(dataset_service, sample_dataset, sample_file, db_session
 
     export_path = dataset_service.export_dataset(
         dataset_id=sample_dataset.id,
-        export_path="test_export.tar.gz",
+        export_path=tmp_path / "test_export.tar.gz",
     )
 
     # インポート
@@ -366,8 +637,209 @@ def test_import_dataset(dataset_service, sample_dataset, sample_file, db_session
     assert imported_versions[0].version == "1.0.0"
     assert imported_versions[0].file_hash == version.file_hash
 
-    # エクスポートファイルを削除
-    export_path.unlink()
+
+def test_import_dataset_streaming(dataset_service, sample_dataset, db_session, tmp_path, monkeypatch):
+    """アーカイブを展開せずに読み込むインポートのテスト"""
+    user = db_session.query(User).first()
+    for version, values in [("1.0", [1, 2]), ("1.0.0", [1, 2, 3])]:
+        path = tmp_path / f"{version}.jsonl"
+        path.write_text("".join(f'{{"value": {v}}}\n' for v in values))
+        dataset_service.add_version(sample_dataset.id, version, path, user.id)
+    dataset_service.materialize_columnar(sample_dataset.id, "1.0.0")
+    export_path = dataset_service.export_dataset(sample_dataset.id, tmp_path / "export.tar.gz")
+
+    # 一時ディレクトリを使わない
+    monkeypatch.setattr(tempfile, "TemporaryDirectory", None)
+    progress = []
+    dataset, versions = dataset_service.import_dataset(
+        export_path, user.id, name="imported",
+        progress_callback=lambda done, total: progress.append((done, total)),
+    )
+
+    assert [v.version for v in versions] == ["1.0", "1.0.0"]
+    assert [v.file_hash for v in versions] == [v.file_hash for v in sample_dataset.versions]
+    assert versions[1].appended_from == versions[0]
+    assert versions[1].columnar_path == sample_dataset.versions[1].columnar_path
+    assert progress[-1][0] == progress[-1][1] == sum(v.file_size for v in versions)
+
+
+def test_import_dataset_ignores_sidecar(dataset_service, sample_dataset, db_session, tmp_path):
+    """アーカイブに含まれるサイドカーを取り込まないことのテスト"""
+    user = db_session.query(User).first()
+    path = tmp_path / "1.0.0.jsonl"
+    path.write_text('{"value": 1}\n{"value": 2}\n')
+    file_hash = hashlib.sha256(path.read_bytes()).hexdigest()
+
+    # データファイルは正しいが、サイドカーの内容が異なるアーカイブ
+    metadata = {
+        "dataset": {"name": "crafted", "description": ""},
+        "metadata": {"schema": {}, "tags": []},
+        "versions": [{"version": "1.0.0", "file_hash": file_hash, "suffix": ".jsonl"}],
+    }
+    (tmp_path / "metadata.json").write_text(json.dumps(metadata))
+    (tmp_path / "sidecar.parquet").write_bytes(b"crafted")
+    with tarfile.open(tmp_path / "crafted.tar.gz", "w:gz") as tar:
+        tar.add(tmp_path / "metadata.json", arcname="metadata.json")
+        tar.add(path, arcname="versions/1.0.0.jsonl")
+        tar.add(tmp_path / "sidecar.parquet", arcname="columnar/1.0.0.parquet")
+
+    dataset, versions = dataset_service.import_dataset(tmp_path / "crafted.tar.gz", user.id)
+    assert versions[0].file_hash == file_hash
+    assert versions[0].columnar_path is None
+    assert not dataset_service.blob_store.path_for(file_hash, ".parquet").exists()
+
+    # サイドカーはデータファイルから再作成する
+    version = dataset_service.materialize_columnar(dataset.id, "1.0.0")
+    assert Path(version.columnar_path).read_bytes() != b"crafted"
+
+
+def test_import_dataset_legacy_archive(dataset_service, sample_dataset, db_session, tmp_path):
+    """metadata.json が先頭にないアーカイブとハッシュの照合のテスト"""
+    user = db_session.query(User).first()
+    (tmp_path / "archive" / "versions").mkdir(parents=True)
+    (tmp_path / "archive" / "versions" / "1.0.0.jsonl").write_text('{"value": 1}\n')
+    metadata = {
+        "dataset": {"name": "legacy", "description": "legacy archive"},
+        "metadata": {"schema": {}, "tags": []},
+        "versions": [{"version": "1.0.0", "file_hash": None}],
+    }
+    (tmp_path / "archive" / "metadata.json").write_text(json.dumps(metadata))
+    with tarfile.open(tmp_path / "legacy.tar.gz", "w:gz") as tar:
+        tar.add(tmp_path / "archive" / "versions", arcname="versions")
+        tar.add(tmp_path / "archive" / "metadata.json", arcname="metadata.json")
+
+    dataset, versions = dataset_service.import_dataset(tmp_path / "legacy.tar.gz", user.id)
+    assert dataset.name == "legacy"
+    assert [v.version for v in versions] == ["1.0.0"]
+    assert Path(versions[0].storage_path).read_text() == '{"value": 1}\n'
+
+    # 記録されたハッシュと内容が一致しない場合は失敗
+    metadata["dataset"]["name"] = "corrupted"
+    metadata["versions"][0]["file_hash"] = "0" * 64
+    (tmp_path / "archive" / "metadata.json").write_text(json.dumps(metadata))
+    with tarfile.open(tmp_path / "corrupted.tar.gz", "w:gz") as tar:
+        tar.add(tmp_path / "archive" / "metadata.json", arcname="metadata.json")
+        tar.add(tmp_path / "archive" / "versions", arcname="versions")
+    with pytest.raises(DatasetError) as exc_info:
+        dataset_service.import_dataset(tmp_path / "corrupted.tar.gz", user.id)
+    assert "取り込みに失敗しました" in str(exc_info.value)
+
+
+def test_export_dataset_incremental(dataset_service, sample_dataset, db_session, tmp_path):
+    """差分エクスポートと連鎖のインポートのテスト"""
+    user = db_session.query(User).first()
+
+    def add_version(version):
+        path = tmp_path / f"{version}.jsonl"
+        path.write_text(f'{{"version": "{version}"}}\n')
+        dataset_service.add_version(sample_dataset.id, version, path, user.id)
+
+    add_version("1.0.0")
+    full = dataset_service.export_dataset(sample_dataset.id, tmp_path / "full.tar.gz")
+    add_version("1.0.1")
+    incremental = dataset_service.export_dataset(
+        sample_dataset.id,
+        tmp_path / "incremental.tar.gz",
+        base_manifest=tmp_path / "full.manifest.json",
+    )
+
+    with tarfile.open(incremental, "r:gz") as tar:
+        assert [n for n in tar.getnames() if n.startswith("versions/")] == ["versions/1.0.1.jsonl"]
+    manifest = dataset_service.load_export_manifest(incremental)
+    assert manifest["base_export_id"] == dataset_service.load_export_manifest(full)["export_id"]
+    assert len(manifest["blobs"]) == 2
+
+    # 別のストレージに復元
+    restore_service = DatasetService(db_session, tmp_path / "restore")
+    with pytest.raises(DatasetError):
+        restore_service.import_dataset(incremental, user.id, name="partial")
+    with pytest.raises(DatasetError):
+        restore_service.import_dataset_chain([incremental, full], user.id, name="reversed")
+
+    dataset, versions = restore_service.import_dataset_chain(
+        [full, incremental], user.id, name="restored",
+    )
+    assert [v.version for v in versions] == ["1.0.0", "1.0.1"]
+    assert [v.file_hash for v in versions] == [v.file_hash for v in sample_dataset.versions]
+    assert all(Path(v.storage_path).is_relative_to(tmp_path / "restore") for v in versions)
+
+    # 連鎖から一部のバージョンだけを復元
+    partial_service = DatasetService(db_session, tmp_path / "partial")
+    _, versions = partial_service.import_dataset_chain(
+        [full, incremental], user.id, name="partial", versions=["1.0.0"],
+    )
+    assert [v.version for v in versions] == ["1.0.0"]
+    assert len(list(partial_service.blob_store.iter_blobs())) == 1
+
+
+def test_import_dataset_foreign_blob(dataset_service, sample_dataset, db_session, tmp_path):
+    """アーカイブに含まれないブロブをハッシュだけで参照できないことのテスト"""
+    user = db_session.query(User).first()
+    path = tmp_path / "secret.jsonl"
+    path.write_text('{"secret": 1}\n')
+    secret = dataset_service.add_version(sample_dataset.id, "1.0.0", path, user.id)
+
+    # 他のデータセットのハッシュを記録し、データファイルを含まないアーカイブ
+    metadata = {
+        "dataset": {"name": "crafted", "description": ""},
+        "metadata": {"schema": {}, "tags": []},
+        "versions": [{"version": "1.0.0", "file_hash": secret.file_hash, "suffix": ".jsonl"}],
+    }
+    (tmp_path / "metadata.json").write_text(json.dumps(metadata))
+    (tmp_path / "sidecar.parquet").write_bytes(b"crafted")
+    with tarfile.open(tmp_path / "crafted.tar.gz", "w:gz") as tar:
+        tar.add(tmp_path / "metadata.json", arcname="metadata.json")
+        tar.add(tmp_path / "sidecar.parquet", arcname="columnar/1.0.0.parquet")
+
+    with pytest.raises(DatasetError):
+        dataset_service.import_dataset(tmp_path / "crafted.tar.gz", user.id)
+    assert db_session.query(Dataset).filter(Dataset.name == "crafted").first() is None
+    assert not dataset_service.blob_store.path_for(secret.file_hash, ".parquet").exists()
+
+
+def test_import_dataset_chain_cleanup(dataset_service, sample_dataset, db_session, tmp_path):
+    """連鎖のインポートに失敗した場合に取り込んだブロブが削除されることのテスト"""
+    user = db_session.query(User).first()
+    path = tmp_path / "1.0.0.jsonl"
+    path.write_text('{"version": "1.0.0"}\n')
+    dataset_service.add_version(sample_dataset.id, "1.0.0", path, user.id)
+    full = dataset_service.export_dataset(sample_dataset.id, tmp_path / "full.tar.gz")
+    incremental = dataset_service.export_dataset(
+        sample_dataset.id,
+        tmp_path / "incremental.tar.gz",
+        base_manifest=tmp_path / "full.manifest.json",
+    )
+
+    restore_service = DatasetService(db_session, tmp_path / "restore")
+    with patch.object(restore_service, "create_dataset", side_effect=DatasetError("failed")):
+        with pytest.raises(DatasetError):
+            restore_service.import_dataset_chain([full, incremental], user.id, name="restored")
+    assert list(restore_service.blob_store.iter_blobs()) == []
+
+
+def test_import_dataset_partial_zip(dataset_service, sample_dataset, db_session, tmp_path):
+    """zip 形式のアーカイブから一部のバージョンだけを復元するテスト"""
+    user = db_session.query(User).first()
+    for version in ["1.0.0", "1.0.1", "1.0.2"]:
+        path = tmp_path / f"{version}.jsonl"
+        path.write_text(f'{{"version": "{version}"}}\n')
+        dataset_service.add_version(sample_dataset.id, version, path, user.id)
+    export_path = dataset_service.export_dataset(
+        sample_dataset.id, tmp_path / "export", archive_format="zip",
+    )
+    assert export_path.name == "export.zip"
+    assert dataset_service.load_export_manifest(export_path)["base_export_id"] is None
+
+    restore_service = DatasetService(db_session, tmp_path / "restore")
+    with pytest.raises(DatasetError):
+        restore_service.import_dataset(export_path, user.id, name="unknown", versions=["9.9.9"])
+
+    dataset, versions = restore_service.import_dataset(
+        export_path, user.id, name="partial", versions=["1.0.1"],
+    )
+    assert [v.version for v in versions] == ["1.0.1"]
+    assert versions[0].file_hash == sample_dataset.versions[1].file_hash
+    assert list(restore_service.blob_store.iter_blobs()) == [Path(versions[0].storage_path)]
 
 
 def test_import_dataset_nonexistent_file(dataset_service, db_session):
@@ -477,12 +949,157 @@ def test_compare_versions(dataset_service, sample_dataset, db_session):
         assert "accuracy" in diff["metrics_diff"]
         assert diff["metrics_diff"]["accuracy"]["from"] == 0.95
         assert diff["metrics_diff"]["accuracy"]["to"] == 0.98
+        # 統計情報が計算されていないバージョンはデータファイルを読み込まない
+        assert diff["column_diff"] == {"available": False, "missing_versions": ["1.0.0", "1.0.1"]}
+
+        diff = dataset_service.compare_versions(
+            dataset_id=sample_dataset.id,
+            version1="1.0.0",
+            version2="1.0.1",
+            compute_statistics=True,
+        )
+        assert diff["column_diff"]["columns"]["value"]["null_rate"]["delta"] == 0.0
+        assert diff["column_diff"]["added_columns"] == []
+
+        # 計算した統計情報はキャッシュから使われる
+        with patch.object(dataset_service, "_streaming_accumulator") as accumulator:
+            diff = dataset_service.compare_versions(
+                dataset_id=sample_dataset.id,
+                version1="1.0.0",
+                version2="1.0.1",
+            )
+        accumulator.assert_not_called()
+        assert diff["column_diff"]["added_columns"] == []
 
     finally:
         os.unlink(f1.name)
         os.unlink(f2.name)
 
 
+def test_compare_versions_rows(dataset_service, sample_dataset, db_session):
+    """行単位の差分によるバージョン比較のテスト"""
+    user = db_session.query(User).first()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for version, values in [("1.0.0", [1, 2, 3, 4]), ("1.0.1", [1, 2, 30, 5, 6])]:
+            path = Path(tmpdir) / f"{version}.jsonl"
+            path.write_text("".join(
+                f'{{"id": {i}, "value": {v}}}\n' for i, v in enumerate(values)
+            ))
+            dataset_service.add_version(sample_dataset.id, version, path, user.id)
+
+    diff = dataset_service.compare_versions(
+        sample_dataset.id, "1.0.0", "1.0.1", diff_mode="rows", key_column="id",
+    )
+    assert diff["file_diff"] is None
+    row_diff = diff["row_diff"]
+    assert (row_diff["added"], row_diff["removed"], row_diff["changed"]) == (1, 0, 2)
+    assert row_diff["unchanged"] == 2
+
+    diff = dataset_service.compare_versions(sample_dataset.id, "1.0.0", "1.0.1", diff_mode="rows")
+    assert (diff["row_diff"]["added"], diff["row_diff"]["removed"]) == (3, 2)
+
+    with pytest.raises(DatasetError):
+        dataset_service.compare_versions(
+            sample_dataset.id, "1.0.0", "1.0.1", diff_mode="rows", key_column="unknown",
+        )
+    with pytest.raises(DatasetError):
+        dataset_service.compare_versions(sample_dataset.id, "1.0.0", "1.0.1", diff_mode="invalid")
+
+
+def test_compare_versions_cached(dataset_service, sample_dataset, db_session, monkeypatch):
+    """同じ内容のバージョンの比較と差分のキャッシュのテスト"""
+    user = db_session.query(User).first()
+    monkeypatch.setattr(dataset_service, "diff_cache", LRUCache(16))
+    monkeypatch.setattr(dataset_service, "diff_cache_state", _DiffCacheState())
+    monkeypatch.setattr(dataset_service, "diff_cache_max_entries", 2)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for version, values in [("1.0.0", [1, 2]), ("1.0.1", [1, 2]), ("1.0.2", [1, 3])]:
+            path = Path(tmpdir) / f"{version}.jsonl"
+            path.write_text("".join(f'{{"id": {i}, "value": {v}}}\n' for i, v in enumerate(values)))
+            dataset_service.add_version(sample_dataset.id, version, path, user.id)
+    dataset_service.calculate_statistics(sample_dataset.id, "1.0.0")
+
+    opened = []
+    version_opener = dataset_service._version_opener
+    def counting_opener(dataset_version):
+        opened.append(dataset_version.version)
+        return version_opener(dataset_version)
+    monkeypatch.setattr(dataset_service, "_version_opener", counting_opener)
+
+    # ハッシュが一致する場合はファイルを開かない
+    diff = dataset_service.compare_versions(
+        sample_dataset.id, "1.0.0", "1.0.1", diff_mode="rows", include_columns=False,
+    )
+    assert diff["identical"] is True
+    assert diff["row_diff"]["rows1"] == diff["row_diff"]["unchanged"] == 2
+    assert diff["row_diff"]["added"] == diff["row_diff"]["removed"] == 0
+    assert opened == []
+
+    # 2回目以降はキャッシュから返す（プロセス内のキャッシュがなくてもデータベースから返す）
+    first = dataset_service.compare_versions(
+        sample_dataset.id, "1.0.0", "1.0.2", diff_mode="rows", include_columns=False,
+    )
+    assert first["identical"] is False
+    assert opened == ["1.0.0", "1.0.2"]
+    monkeypatch.setattr(dataset_service, "diff_cache", LRUCache(16))
+    second = dataset_service.compare_versions(
+        sample_dataset.id, "1.0.0", "1.0.2", diff_mode="rows", include_columns=False,
+    )
+    assert second["row_diff"] == first["row_diff"]
+    assert opened == ["1.0.0", "1.0.2"]
+
+    # 上限を超えると最後に参照された日時が古いものから削除
+    dataset_service.compare_versions(
+        sample_dataset.id, "1.0.0", "1.0.2", include_columns=False,
+    )
+    dataset_service.compare_versions(
+        sample_dataset.id, "1.0.2", "1.0.0", diff_mode="rows", include_columns=False,
+    )
+    modes = sorted(json.loads(entry.options)["mode"] for entry in db_session.query(VersionDiffCache))
+    assert modes == ["rows", "text"]
+    dataset_service.compare_versions(
+        sample_dataset.id, "1.0.0", "1.0.2", diff_mode="rows", include_columns=False,
+    )
+    assert opened[-2:] == ["1.0.0", "1.0.2"]
+
+
+def test_compare_versions_cache_touch(dataset_service, sample_dataset, db_session, monkeypatch):
+    """差分の参照日時をまとめて更新し、テキストの差分をバージョン名によらず共有するテスト"""
+    user = db_session.query(User).first()
+    monkeypatch.setattr(dataset_service, "diff_cache", LRUCache(16))
+    monkeypatch.setattr(dataset_service, "diff_cache_state", _DiffCacheState())
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for version, values in [("1.0.0", [1, 2]), ("1.0.1", [1, 3]), ("1.0.2", [1, 3])]:
+            path = Path(tmpdir) / f"{version}.jsonl"
+            path.write_text("".join(f'{{"id": {i}, "value": {v}}}\n' for i, v in enumerate(values)))
+            dataset_service.add_version(sample_dataset.id, version, path, user.id)
+
+    first = dataset_service.compare_versions(sample_dataset.id, "1.0.0", "1.0.1", include_columns=False)
+    assert first["file_diff"].startswith("--- version 1.0.0+++ version 1.0.1@@")
+    entry = db_session.query(VersionDiffCache).one()
+    assert json.loads(entry.options)["mode"] == "text"
+    stored_at = entry.last_accessed_at
+
+    # 内容が同じ別のバージョンとの比較はキャッシュを使い、見出しだけが異なる
+    second = dataset_service.compare_versions(sample_dataset.id, "1.0.0", "1.0.2", include_columns=False)
+    assert second["file_diff"] == first["file_diff"].replace("1.0.1", "1.0.2")
+    assert db_session.query(VersionDiffCache).count() == 1
+
+    # プロセス内のキャッシュで見つかった参照も記録し、間隔が経過するまでは反映しない
+    db_session.refresh(entry)
+    assert entry.last_accessed_at == stored_at
+    assert list(dataset_service.diff_cache_state.touched) == [entry.id]
+
+    dataset_service.diff_cache_state.flushed_at -= DIFF_CACHE_TOUCH_INTERVAL
+    dataset_service.compare_versions(sample_dataset.id, "1.0.0", "1.0.1", include_columns=False)
+    db_session.refresh(entry)
+    assert entry.last_accessed_at > stored_at
+    assert dataset_service.diff_cache_state.touched == {}
+
+
 def test_compare_nonexistent_versions(dataset_service, sample_dataset):
     """存在しないバージョンの比較テスト"""
     with pytest.raises(DatasetError) as exc_info:
@@ -646,6 +1263,104 @@ def test_calculate_statistics_with_missing_values(dataset_service, sample_datase
         os.unlink(f.name)
 
 
+def test_calculate_statistics_streaming(dataset_service, sample_dataset, db_session):
+    """ストリーミングエンジンによる統計情報計算のテスト"""
+    user = db_session.query(User).first()
+
+    with tempfile.NamedTemporaryFile(mode="w", delete=False) as f:
+        for i in range(1000):
+            category = "null" if i % 10 == 0 else f'"{"ABC"[i % 3]}"'
+            f.write(f'{{"numeric": {i}, "category": {category}}}\n')
+
+    try:
+        dataset_service.add_version(
+            dataset_id=sample_dataset.id,
+            version="1.0.0",
+            file_path=f.name,
+            created_by_id=user.id,
+        )
+
+        exact = dataset_service.calculate_statistics(sample_dataset.id, "1.0.0")
+        stats = dataset_service.calculate_statistics(
+            sample_dataset.id, "1.0.0", engine="streaming", chunk_rows=128,
+        )
+
+        assert stats["statistics"]["row_count"] == 1000
+        assert stats["statistics"]["missing_values"] == exact["statistics"]["missing_values"]
+        assert stats["statistics"]["numeric_statistics"]["numeric"]["mean"] == 499.5
+        assert stats["statistics"]["categorical_statistics"]["category"]["unique_count"] == 3
+        assert stats["statistics"]["estimation"]["engine"] == "streaming"
+        assert stats["quality_metrics"]["completeness"]["overall"] == \
+            exact["quality_metrics"]["completeness"]["overall"]
+
+        parallel = dataset_service.calculate_statistics(
+            sample_dataset.id, "1.0.0", engine="streaming", chunk_rows=128, workers=2,
+        )
+        assert parallel["statistics"]["row_count"] == 1000
+        assert parallel["statistics"]["missing_values"] == exact["statistics"]["missing_values"]
+
+        for workers in [1, 2]:
+            counted = dataset_service.calculate_statistics(
+                sample_dataset.id, "1.0.0", engine="streaming", chunk_rows=128,
+                workers=workers, exact_uniqueness=True,
+            )
+            assert counted["statistics"]["estimation"]["row_uniqueness"] == "exact"
+            assert counted["quality_metrics"]["uniqueness"]["overall"] == \
+                exact["quality_metrics"]["uniqueness"]["overall"]
+
+        with pytest.raises(DatasetError):
+            dataset_service.calculate_statistics(sample_dataset.id, "1.0.0", engine="unknown")
+        parallel_exact = dataset_service.calculate_statistics(sample_dataset.id, "1.0.0", workers=2)
+        assert parallel_exact["statistics"] == exact["statistics"]
+        assert parallel_exact["quality_metrics"]["uniqueness"] == exact["quality_metrics"]["uniqueness"]
+        assert parallel_exact["quality_metrics"]["completeness"]["overall"] == \
+            pytest.approx(exact["quality_metrics"]["completeness"]["overall"])
+
+        with pytest.raises(DatasetError):
+            dataset_service.calculate_statistics(sample_dataset.id, "1.0.0", engine="sample", workers=2)
+
+    finally:
+        os.unlink(f.name)
+
+
+def test_calculate_statistics_incremental(dataset_service, sample_dataset, db_session, monkeypatch):
+    """追記で作られたバージョンの統計情報を追記部分だけから計算するテスト"""
+    user = db_session.query(User).first()
+    lines = [f'{{"numeric": {i}, "category": "{"AB"[i % 2]}"}}\n' for i in range(300)]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        v1_path = Path(tmpdir) / "v1.jsonl"
+        v1_path.write_text("".join(lines[:200]))
+        v2_path = Path(tmpdir) / "v2.jsonl"
+        v2_path.write_text("".join(lines))
+
+        v1 = dataset_service.add_version(sample_dataset.id, "1.0.0", v1_path, user.id)
+        # 追記かどうかは保存時の読み込みで判定し、保存したファイルを読み直さない
+        with patch.object(dataset_service, "_open_version", side_effect=AssertionError):
+            v2 = dataset_service.add_version(sample_dataset.id, "1.0.1", v2_path, user.id)
+
+    assert v1.appended_from_id is None
+    assert v2.appended_from_id == v1.id
+    assert v2.append_offset == v1.file_size
+
+    dataset_service.calculate_statistics(sample_dataset.id, "1.0.0", engine="streaming")
+    assert v1.statistics_sketch is not None
+
+    # 追記元のスケッチがあるため、バージョン全体は読み込まれない
+    monkeypatch.setattr(dataset_service, "_iter_dataframes", None)
+    stats = dataset_service.calculate_statistics(sample_dataset.id, "1.0.1", engine="streaming")
+
+    assert stats["statistics"]["row_count"] == 300
+    assert stats["statistics"]["numeric_statistics"]["numeric"]["mean"] == 149.5
+    assert stats["statistics"]["categorical_statistics"]["category"]["most_common"] == \
+        {"A": 150, "B": 150}
+
+    # 追記元を削除すると通常のバージョンとして扱われる
+    dataset_service.delete_version(sample_dataset.id, "1.0.0", user.id)
+    db_session.refresh(v2)
+    assert v2.appended_from_id is None
+
+
 def test_get_statistics(dataset_service, sample_dataset, db_session):
     """統計情報取得のテスト"""
     user = db_session.query(User).first()
@@ -693,6 +1408,74 @@ def test_get_statistics(dataset_service, sample_dataset, db_session):
         os.unlink(f.name)
 
 
+def test_get_statistics_per_version(dataset_service, sample_dataset, db_session, monkeypatch):
+    """統計情報がバージョンごとにキャッシュされることのテスト"""
+    user = db_session.query(User).first()
+    DatasetService.statistics_cache.clear()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for version, values in [("1.0.0", [1, 2]), ("1.0.1", [10, 20, 30])]:
+            path = Path(tmpdir) / f"{version}.jsonl"
+            path.write_text("".join(f'{{"numeric": {v}}}\n' for v in values))
+            dataset_service.add_version(sample_dataset.id, version, path, user.id)
+
+    stats2 = dataset_service.get_statistics(sample_dataset.id, "1.0.1")
+    stats1 = dataset_service.get_statistics(sample_dataset.id, "1.0.0")
+    assert stats1["statistics"]["row_count"] == 2
+    assert stats2["statistics"]["row_count"] == 3
+    assert db_session.query(StatisticsCache).count() == 2
+
+    # 古いバージョンの統計情報でデータセットの統計情報を上書きしない
+    assert sample_dataset.metadata.statistics["row_count"] == 3
+
+    # プロセス内のキャッシュがなくても永続化されたキャッシュから返される
+    DatasetService.statistics_cache.clear()
+    monkeypatch.setattr(dataset_service, "calculate_statistics", None)
+    assert dataset_service.get_statistics(sample_dataset.id, "1.0.0") == stats1
+
+
+def test_get_statistics_sample(dataset_service, sample_dataset, db_session):
+    """標本から推定する近似エンジンのテスト"""
+    user = db_session.query(User).first()
+    DatasetService.statistics_cache.clear()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "data.jsonl"
+        path.write_text("".join(
+            f'{{"numeric": {i % 100}, "category": "{"AB"[i % 2]}"}}\n' for i in range(20000)
+        ))
+        dataset_service.add_version(sample_dataset.id, "1.0.0", path, user.id)
+
+    stats = dataset_service.get_statistics(
+        sample_dataset.id, "1.0.0", engine="sample", sample_rows=2000,
+    )
+    estimation = stats["statistics"]["estimation"]
+    assert estimation["approximate"] is True
+    assert estimation["sample_rows"] <= 2000
+    low, high = estimation["confidence_intervals"]["row_count"]
+    assert low <= stats["statistics"]["row_count"] <= high
+    assert stats["statistics"]["row_count"] == pytest.approx(20000, rel=0.05)
+    low, high = estimation["confidence_intervals"]["numeric_statistics"]["numeric"]["mean"]
+    assert low <= stats["statistics"]["numeric_statistics"]["numeric"]["mean"] <= high
+
+    # 近似値はメタデータを上書きせず、同じ標本の行数ならキャッシュから返される
+    assert sample_dataset.metadata.statistics == {}
+    assert dataset_service.get_statistics(
+        sample_dataset.id, "1.0.0", engine="sample", sample_rows=2000,
+    ) == stats
+
+    # 厳密な値がキャッシュにあればそちらを返す
+    exact = dataset_service.calculate_statistics(sample_dataset.id, "1.0.0")
+    assert dataset_service.get_statistics(sample_dataset.id, "1.0.0", engine="sample") == exact
+
+    # 行数が標本より少ないバージョンは全体から計算される
+    small = dataset_service.calculate_statistics(
+        sample_dataset.id, "1.0.0", engine="sample", sample_rows=50000,
+    )
+    assert small["statistics"]["estimation"]["approximate"] is False
+    assert small["statistics"]["row_count"] == 20000
+
+
 def test_get_statistics_nonexistent_dataset(dataset_service):
     """存在しないデータセットの統計情報取得テスト"""
     with pytest.raises(DatasetError) as exc_info:
@@ -789,6 +1572,174 @@ def test_search_datasets(
     assert total == 3
     assert len(results) == 2
 
+    # タグの部分一致やワイルドカードでは一致しない
+    results, total = dataset_service.search_datasets(user_id=sample_users[1].id, tags=["common"])
+    assert total == 0
+    results, total = dataset_service.search_datasets(user_id=sample_users[1].id, tags=["tag_"])
+    assert total == 0
+
+    # その他の演算子
+    results, total = dataset_service.search_datasets(
+        user_id=sample_users[1].id,
+        metadata_filters={"field1": {"operator": "in", "value": [0, 2]}},
+    )
+    assert sorted(d.id for d in results) == [datasets[0].id, datasets[2].id]
+    results, total = dataset_service.search_datasets(
+        user_id=sample_users[1].id,
+        metadata_filters={"field2": {"operator": "contains", "value": "lue1"}},
+    )
+    assert [d.id for d in results] == [datasets[1].id]
+    with pytest.raises(DatasetError):
+        dataset_service.search_datasets(
+            user_id=sample_users[1].id,
+            metadata_filters={"field1": {"operator": "regex", "value": "1"}},
+        )
+
+
+def test_search_datasets_access_filter(dataset_service, sample_users, sample_group, db_session):
+    """アクセス権限の確認が検索のクエリの中で行われることのテスト"""
+    for i in range(5):
+        dataset_service.create_dataset(
+            name=f"shared{i}",
+            description="",
+            created_by_id=sample_users[0].id,
+            schema={},
+            initial_access_groups=[{"group_id": sample_group.id, "access_level": AccessLevel.READ}],
+        )
+    dataset_service.create_dataset(
+        name="private",
+        description="",
+        created_by_id=sample_users[0].id,
+        schema={},
+    )
+    user_ids = [u.id for u in sample_users]
+
+    statements = []
+    engine = db_session.get_bind()
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        results, total = dataset_service.search_datasets(
+            user_id=user_ids[1], sort_by="name", sort_order="asc", page=2, per_page=2,
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert total == 5
+    assert [d.name for d in results] == ["shared2", "shared3"]
+    # ユーザーの確認、件数、結果のページの3回だけで、全件を読み込まない
+    assert len(statements) == 3
+    assert all("EXISTS" in statement for statement in statements[1:])
+
+    results, total = dataset_service.search_datasets(user_id=user_ids[0], query="priv")
+    assert total == 1 and results[0].name == "private"
+    assert dataset_service.search_datasets(user_id=user_ids[2]) == ([], 0)
+    with pytest.raises(AccessControlError):
+        dataset_service.search_datasets(user_id=9999)
+
+
+def test_search_datasets_page(dataset_service, sample_users, sample_group, db_session):
+    """カーソルによるページネーションのテスト"""
+    for i in range(7):
+        dataset_service.create_dataset(
+            name=f"dataset{i}",
+            description="",
+            created_by_id=sample_users[0].id,
+            schema={},
+            initial_access_groups=[{"group_id": sample_group.id, "access_level": AccessLevel.READ}],
+        )
+    # 同じ作成日時のデータセットはIDの順に並ぶ
+    db_session.query(Dataset).update({Dataset.created_at: datetime(2024, 1, 1)})
+    db_session.commit()
+    user_id = sample_users[1].id
+    DatasetService.search_count_cache.clear()
+
+    names = []
+    cursor = None
+    while True:
+        results, cursor, total = dataset_service.search_datasets_page(
+            user_id=user_id, limit=3, cursor=cursor, count="exact",
+        )
+        assert total == 7
+        names.extend(d.name for d in results)
+        if cursor is None:
+            break
+    assert names == [f"dataset{i}" for i in reversed(range(7))]
+
+    results, cursor, total = dataset_service.search_datasets_page(
+        user_id=user_id, sort_by="name", sort_order="asc", limit=4, count="cached",
+    )
+    assert [d.name for d in results] == ["dataset0", "dataset1", "dataset2", "dataset3"]
+    assert total == 7
+    results, cursor, total = dataset_service.search_datasets_page(
+        user_id=user_id, sort_by="name", sort_order="asc", limit=4, cursor=cursor, count="cached",
+    )
+    assert [d.name for d in results] == ["dataset4", "dataset5", "dataset6"]
+    assert cursor is None and total == 7
+
+    # 最初のページで全件が取得できた場合と、件数を求めない場合
+    assert dataset_service.search_datasets_page(user_id=user_id, query="dataset3", count="exact")[2] == 1
+    assert dataset_service.search_datasets_page(user_id=user_id)[2] is None
+
+    _, cursor, _ = dataset_service.search_datasets_page(user_id=user_id, limit=2)
+    with pytest.raises(DatasetError):
+        dataset_service.search_datasets_page(user_id=user_id, sort_by="name", cursor=cursor)
+    with pytest.raises(DatasetError):
+        dataset_service.search_datasets_page(user_id=user_id, cursor="invalid")
+    with pytest.raises(DatasetError):
+        dataset_service.search_datasets_page(user_id=user_id, count="approximate")
+
+
+def test_list_datasets_page(dataset_service, sample_users, sample_group, db_session):
+    """データセット一覧のカーソルによるページネーションのテスト"""
+    for i in range(6):
+        dataset_service.create_dataset(
+            name=f"dataset{i}",
+            description="",
+            created_by_id=sample_users[0].id,
+            schema={},
+            tags=["even"] if i % 2 == 0 else ["odd"],
+            initial_access_groups=[{
+                "group_id": sample_group.id,
+                "access_level": AccessLevel.WRITE if i < 4 else AccessLevel.READ,
+            }],
+        )
+    user_id = sample_users[1].id
+
+    results, cursor, total = dataset_service.list_datasets_page(
+        user_id=user_id, tags=["even"], sort_by="name", sort_order="asc", limit=2, count="exact",
+    )
+    assert [d.name for d in results] == ["dataset0", "dataset2"]
+    assert total == 3
+    results, cursor, _ = dataset_service.list_datasets_page(
+        user_id=user_id, tags=["even"], sort_by="name", sort_order="asc", limit=2, cursor=cursor,
+    )
+    assert [d.name for d in results] == ["dataset4"]
+    assert cursor is None
+
+    # タグの絞り込みはクエリの中で行い、一致しないデータセットを読み込まない
+    statements = []
+    engine = db_session.get_bind()
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        results, _, _ = dataset_service.list_datasets_page(user_id=user_id, tags=["odd"], limit=1)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert [d.name for d in results] == ["dataset5"]
+    assert len([s for s in statements if "LIKE" in s]) == 1
+
+    results, cursor, total = dataset_service.list_datasets_page(
+        user_id=user_id, access_level=AccessLevel.WRITE, sort_by="name", limit=10, count="exact",
+    )
+    assert [d.name for d in results] == ["dataset3", "dataset2", "dataset1", "dataset0"]
+    assert cursor is None and total == 4
+
 
 def test_get_dataset_tags(
     dataset_service,
@@ -886,4 +1837,186 @@ def test_get_dataset_metadata_fields(
         limit=2,
     )
     assert len(fields) == 2
-    assert fields[0]["count"] >= fields[1]["count"] 
\ No newline at end of file
+    assert fields[0]["count"] >= fields[1]["count"] 
+
+
+def test_check_dataset_access_single_query(
+    access_control_service,
+    sample_users,
+    sample_group,
+    db_session,
+):
+    """アクセス権限の確認が1回のクエリで行われることのテスト"""
+    other_group = access_control_service.create_user_group(
+        name="other_group",
+        description="別のグループ",
+        created_by_id=sample_users[0].id,
+        user_ids=[sample_users[1].id],
+    )
+    datasets = []
+    for i in range(2):
+        dataset = Dataset(
+            name=f"dataset{i}",
+            description="",
+            created_by_id=sample_users[0].id,
+            updated_by_id=sample_users[0].id,
+        )
+        db_session.add(dataset)
+        datasets.append(dataset)
+    db_session.commit()
+    access_control_service.grant_dataset_access(
+        datasets[0].id, sample_group.id, AccessLevel.READ, sample_users[0].id,
+    )
+    access_control_service.grant_dataset_access(
+        datasets[0].id, other_group.id, AccessLevel.WRITE, sample_users[0].id,
+    )
+
+    dataset_ids = [d.id for d in datasets]
+    user_ids = [u.id for u in sample_users]
+
+    statements = []
+    engine = db_session.get_bind()
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        # 複数のグループのうち最も強い権限が使われる
+        assert access_control_service.check_dataset_access(
+            dataset_ids[0], user_ids[1], AccessLevel.WRITE,
+        )
+        assert len(statements) == 1
+        assert not access_control_service.check_dataset_access(
+            dataset_ids[0], user_ids[1], AccessLevel.ADMIN,
+        )
+
+        statements.clear()
+        allowed = access_control_service.check_dataset_access_many(
+            user_ids[1], [dataset_ids[0], dataset_ids[1], 9999],
+        )
+        assert len(statements) == 1
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert allowed == {dataset_ids[0]: True, dataset_ids[1]: False, 9999: False}
+
+    # 作成者は管理者権限を持つ
+    levels = access_control_service.get_effective_access_levels(
+        user_ids[0], dataset_ids,
+    )
+    assert levels == {dataset_ids[0]: AccessLevel.ADMIN, dataset_ids[1]: AccessLevel.ADMIN}
+    levels = access_control_service.get_effective_access_levels(
+        user_ids[2], dataset_ids,
+    )
+    assert levels == {dataset_ids[0]: None, dataset_ids[1]: None}
+
+    with pytest.raises(AccessControlError):
+        access_control_service.check_dataset_access(9999, user_ids[1], AccessLevel.READ)
+    with pytest.raises(AccessControlError):
+        access_control_service.check_dataset_access(dataset_ids[0], 9999, AccessLevel.READ)
+
+
+def test_check_dataset_access_cached(sample_users, sample_group, db_session):
+    """実効アクセス権限のキャッシュと権限の変更による削除のテスト"""
+    bus = EventBus()
+    service = AccessControlService(db_session, PermissionCache(event_bus=bus), bus)
+    dataset = Dataset(
+        name="cached_dataset",
+        description="",
+        created_by_id=sample_users[0].id,
+        updated_by_id=sample_users[0].id,
+    )
+    db_session.add(dataset)
+    db_session.commit()
+    dataset_id = dataset.id
+    group_id = sample_group.id
+    user_ids = [u.id for u in sample_users]
+
+    statements = []
+    engine = db_session.get_bind()
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        assert not service.check_dataset_access(dataset_id, user_ids[1], AccessLevel.READ)
+        assert not service.check_dataset_access(dataset_id, user_ids[1], AccessLevel.READ)
+        assert len(statements) == 1
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    # 権限の付与・変更・削除
+    service.grant_dataset_access(dataset_id, group_id, AccessLevel.READ, user_ids[0])
+    assert service.check_dataset_access(dataset_id, user_ids[1], AccessLevel.READ)
+    service.grant_dataset_access(dataset_id, group_id, AccessLevel.WRITE, user_ids[0])
+    assert service.check_dataset_access(dataset_id, user_ids[1], AccessLevel.WRITE)
+
+    # グループのメンバーの変更
+    assert not service.check_dataset_access(dataset_id, user_ids[2], AccessLevel.READ)
+    service.add_users_to_group(group_id, [user_ids[2]], user_ids[0])
+    assert service.check_dataset_access(dataset_id, user_ids[2], AccessLevel.WRITE)
+    service.remove_users_from_group(group_id, [user_ids[2]], user_ids[0])
+    assert not service.check_dataset_access(dataset_id, user_ids[2], AccessLevel.READ)
+
+    service.revoke_dataset_access(dataset_id, group_id, user_ids[0])
+    assert not service.check_dataset_access(dataset_id, user_ids[1], AccessLevel.READ)
+
+
+def test_get_user_accessible_datasets_index(
+    dataset_service,
+    access_control_service,
+    sample_users,
+    sample_group,
+    db_session,
+):
+    """アクセスインデックスが権限とグループのメンバーの変更に追従することのテスト"""
+    owned = dataset_service.create_dataset(
+        name="owned",
+        description="",
+        created_by_id=sample_users[1].id,
+        schema={},
+    )
+    shared = dataset_service.create_dataset(
+        name="shared",
+        description="",
+        created_by_id=sample_users[0].id,
+        schema={},
+        initial_access_groups=[{"group_id": sample_group.id, "access_level": AccessLevel.READ}],
+    )
+
+    def accessible(user, access_level=None):
+        datasets = access_control_service.get_user_accessible_datasets(user.id, access_level)
+        return sorted(d.name for d in datasets)
+
+    assert accessible(sample_users[1]) == ["owned", "shared"]
+    assert accessible(sample_users[1], AccessLevel.WRITE) == ["owned"]
+    assert accessible(sample_users[2]) == []
+
+    access_control_service.grant_dataset_access(
+        shared.id, sample_group.id, AccessLevel.WRITE, sample_users[0].id,
+    )
+    assert accessible(sample_users[1], AccessLevel.WRITE) == ["owned", "shared"]
+
+    access_control_service.add_users_to_group(sample_group.id, [sample_users[2].id], sample_users[0].id)
+    assert accessible(sample_users[2], AccessLevel.WRITE) == ["shared"]
+    access_control_service.remove_users_from_group(
+        sample_group.id, [sample_users[2].id], sample_users[0].id,
+    )
+    assert accessible(sample_users[2]) == []
+
+    access_control_service.revoke_dataset_access(shared.id, sample_group.id, sample_users[0].id)
+    assert accessible(sample_users[1]) == ["owned"]
+    assert accessible(sample_users[0]) == ["shared"]
+
+    # 作り直しても同じ内容になる
+    rows = sorted(
+        (row.user_id, row.dataset_id, row.max_level)
+        for row in db_session.query(DatasetAccessIndex)
+    )
+    assert access_control_service.rebuild_access_index() == len(rows)
+    assert sorted(
+        (row.user_id, row.dataset_id, row.max_level)
+        for row in db_session.query(DatasetAccessIndex)
+    ) == rows
+    assert rows[0][2] == AccessLevel.ADMIN
@@ -0,0 +1,374 @@
+"""
+統計情報計算モジュールのテスト
+
+このモジュールは、ストリーミング統計エンジンとスケッチのテストを提供します。
+"""
+
+import functools
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.statistics import (
+    HyperLogLog,
+    KLLSketch,
+    MisraGries,
+    RunningMoments,
+    StreamingStatistics,
+    exact_statistics,
+    iter_jsonl_range,
+    numeric_statistics,
+    parallel_column_statistics,
+    parallel_exact_statistics,
+    parallel_statistics,
+    sample_jsonl,
+    sample_size,
+    sampled_statistics,
+    split_jsonl,
+    streaming_statistics,
+)
+
+
+@pytest.fixture
+def sample_df():
+    """サンプルのデータフレームを作成"""
+    rng = np.random.default_rng(0)
+    n = 50000
+    return pd.DataFrame({
+        "id": np.arange(n),
+        "value": np.where(np.arange(n) % 10 == 0, np.nan, rng.normal(100, 15, n)),
+        "category": rng.choice(["A", "B", "C"], n, p=[0.5, 0.3, 0.2]),
+    })
+
+
+def _chunks(df, size):
+    return [df.iloc[i:i + size] for i in range(0, len(df), size)]
+
+
+def test_numeric_statistics_matches_pandas():
+    """まとめて計算した数値型カラムの統計量が pandas と一致することのテスト"""
+    df = pd.DataFrame({
+        "float": [1.5, np.nan, -2.0, 8.25, 3.0],
+        "int": [5, 1, 4, 2, 3],
+        "large": [1e9 + 1, 1e9 + 3, np.nan, 1e9 + 2, 1e9],
+        "single": [np.nan, np.nan, 7.0, np.nan, np.nan],
+        "empty": [np.nan] * 5,
+        "text": list("abcde"),
+    })
+    stats = numeric_statistics(df)
+
+    assert list(stats) == ["float", "int", "large", "single", "empty"]
+    for col, result in stats.items():
+        expected = {
+            "mean": df[col].mean(),
+            "std": df[col].std(),
+            "min": df[col].min(),
+            "max": df[col].max(),
+            "median": df[col].median(),
+            "q1": df[col].quantile(0.25),
+            "q3": df[col].quantile(0.75),
+        }
+        assert result == pytest.approx(expected, nan_ok=True)
+
+
+def test_numeric_statistics_single_float_block():
+    """全ての列が同じ浮動小数点数のブロックにあるデータフレームのテスト"""
+    df = pd.DataFrame(np.arange(12, dtype=np.float64).reshape(4, 3), columns=list("abc"))
+    stats = numeric_statistics(df)
+    assert stats["a"]["median"] == 4.5
+    assert df["a"].tolist() == [0.0, 3.0, 6.0, 9.0]
+
+
+def test_running_moments_merge():
+    """チャンク間で結合した平均と標準偏差のテスト"""
+    values = np.random.default_rng(1).normal(5, 2, 10001)
+    moments = RunningMoments()
+    for chunk in np.array_split(values, 7):
+        moments.update(chunk)
+
+    assert moments.count == len(values)
+    assert moments.mean == pytest.approx(values.mean())
+    assert moments.std == pytest.approx(values.std(ddof=1))
+    assert moments.min == values.min()
+    assert moments.max == values.max()
+
+
+def test_kll_sketch_error_bound():
+    """KLLスケッチの分位点が誤差の範囲内であることのテスト"""
+    values = np.random.default_rng(2).exponential(size=200000)
+    sketch = KLLSketch(seed=0)
+    for chunk in np.array_split(values, 20):
+        sketch.update(chunk)
+
+    sorted_values = np.sort(values)
+    for q, estimate in zip([0.1, 0.5, 0.9], sketch.quantiles([0.1, 0.5, 0.9])):
+        rank = np.searchsorted(sorted_values, estimate) / len(values)
+        assert abs(rank - q) <= sketch.rank_error
+
+
+def test_kll_sketch_cdf():
+    """KLLスケッチの累積分布関数が誤差の範囲内であることのテスト"""
+    values = np.random.default_rng(4).normal(size=100000)
+    sketch = KLLSketch(seed=0)
+    sketch.update(values)
+
+    points = np.array([-1.0, 0.0, 1.5])
+    expected = np.searchsorted(np.sort(values), points, side="right") / len(values)
+    assert np.all(np.abs(sketch.cdf(points) - expected) <= sketch.rank_error)
+
+
+def test_kll_sketch_exact_for_small_input():
+    """件数が少ない場合に分位点が厳密であることのテスト"""
+    values = np.arange(100, dtype=float)
+    sketch = KLLSketch()
+    sketch.update(values)
+    assert sketch.quantiles([0.25, 0.5]) == [24.75, 49.5]
+
+
+def test_misra_gries_error_bound():
+    """Misra-Gries要約の出現回数が誤差の範囲内であることのテスト"""
+    rng = np.random.default_rng(3)
+    values = pd.Series(rng.zipf(1.5, 100000) % 5000)
+    summary = MisraGries(k=64)
+    for start in range(0, len(values), 10000):
+        chunk = values.iloc[start:start + 10000]
+        summary.update(chunk.value_counts().to_dict())
+
+    true_counts = values.value_counts()
+    for value, count in summary.most_common(5).items():
+        assert true_counts[value] - summary.error <= count <= true_counts[value]
+    assert list(summary.most_common(3)) == list(true_counts.index[:3])
+
+
+def test_hyperloglog_estimate():
+    """HyperLogLogのユニーク数の推定のテスト"""
+    sketch = HyperLogLog()
+    other = HyperLogLog()
+    sketch.update(pd.Series(np.arange(60000)))
+    other.update(pd.Series(np.arange(40000, 100000)))
+    sketch.merge(other)
+
+    assert sketch.estimate() == pytest.approx(100000, rel=4 * sketch.relative_error)
+
+
+def test_streaming_statistics_matches_exact(sample_df):
+    """ストリーミングエンジンが厳密な計算と同じ形式・近い値を返すことのテスト"""
+    exact_stats, exact_quality = exact_statistics(sample_df)
+    stats, quality = streaming_statistics(_chunks(sample_df, 7000)).result()
+
+    for key in ["row_count", "column_count", "missing_values", "data_types"]:
+        assert stats[key] == exact_stats[key]
+    assert set(stats["numeric_statistics"]) == set(exact_stats["numeric_statistics"])
+    for col, exact in exact_stats["numeric_statistics"].items():
+        for key in ["mean", "std", "min", "max"]:
+            assert stats["numeric_statistics"][col][key] == pytest.approx(exact[key])
+    assert stats["categorical_statistics"]["category"]["most_common"] == \
+        exact_stats["categorical_statistics"]["category"]["most_common"]
+    assert stats["estimation"]["engine"] == "streaming"
+
+    assert quality["completeness"]["overall"] == pytest.approx(exact_quality["completeness"]["overall"])
+    assert quality["completeness"]["by_column"] == exact_quality["completeness"]["by_column"]
+    assert quality["uniqueness"]["by_column"]["id"] == pytest.approx(1.0, rel=0.05)
+
+
+def test_streaming_statistics_missing_columns():
+    """一部のチャンクにしか現れない列のテスト"""
+    chunks = [
+        pd.DataFrame({"a": [1, 2]}),
+        pd.DataFrame({"a": [3, 4], "b": ["x", "y"]}),
+    ]
+    stats, _ = streaming_statistics(chunks).result()
+
+    assert stats["missing_values"] == {"a": 0, "b": 2}
+    assert stats["categorical_statistics"]["b"]["missing_ratio"] == 0.5
+
+
+def test_streaming_statistics_row_uniqueness_matches_exact():
+    """行の重複の判定がチャンクの列構成によらず厳密なエンジンと一致することのテスト"""
+    chunks = [
+        pd.DataFrame({"a": [1, 2]}),
+        pd.DataFrame({"b": [None, None], "a": [1.0, 3.0]}),
+    ]
+    _, quality = streaming_statistics(chunks).result()
+    _, exact_quality = exact_statistics(pd.concat(chunks, ignore_index=True))
+
+    assert exact_quality["uniqueness"]["overall"] == 0.75
+    assert quality["uniqueness"]["overall"] == pytest.approx(0.75, abs=0.01)
+
+
+def test_streaming_statistics_serialization(sample_df):
+    """累積の保存と結合のテスト"""
+    first, second = _chunks(sample_df, 25000)
+    engine = StreamingStatistics()
+    engine.update(first)
+    restored = StreamingStatistics.from_dict(json.loads(json.dumps(engine.to_dict())))
+    restored.update(second)
+
+    stats, _ = restored.result()
+    assert stats["row_count"] == len(sample_df)
+    assert stats["numeric_statistics"]["id"]["mean"] == pytest.approx(sample_df["id"].mean())
+
+
+def _select(df, columns, size):
+    """パーティションの読み込み関数（pickle 可能なモジュールレベルの関数）"""
+    return _chunks(df[columns] if columns is not None else df, size)
+
+
+def test_split_jsonl(sample_df):
+    """JSONLの行境界での分割のテスト"""
+    data = sample_df.to_json(orient="records", lines=True).encode()
+    opener = functools.partial(io.BytesIO, data)
+    ranges = split_jsonl(opener, 4)
+
+    assert len(ranges) == 4
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(data[start - 1:start] == b"\n" for start, _ in ranges[1:])
+
+    rows = sum(len(chunk) for start, end in ranges
+               for chunk in iter_jsonl_range(opener, start, end, chunk_rows=5000))
+    assert rows == len(sample_df)
+
+
+def test_parallel_statistics_matches_serial(sample_df):
+    """行と列で分割した並列計算が逐次計算と一致することのテスト"""
+    serial, serial_quality = streaming_statistics(_chunks(sample_df, 10000)).result()
+
+    half = len(sample_df) // 2
+    partitions = []
+    for part in [sample_df.iloc[:half], sample_df.iloc[half:]]:
+        partitions.append((functools.partial(_select, part, None, 10000), "rows"))
+        for columns in [["id", "value"], ["category"]]:
+            partitions.append((functools.partial(_select, part, columns, 10000), "columns"))
+    stats, quality = parallel_statistics(partitions, workers=2).result()
+
+    assert stats["row_count"] == serial["row_count"]
+    assert list(stats["data_types"]) == list(serial["data_types"])
+    assert stats["missing_values"] == serial["missing_values"]
+    assert stats["numeric_statistics"]["value"]["mean"] == \
+        pytest.approx(serial["numeric_statistics"]["value"]["mean"])
+    assert stats["categorical_statistics"] == serial["categorical_statistics"]
+    assert quality["uniqueness"]["overall"] == serial_quality["uniqueness"]["overall"]
+
+
+def test_parallel_column_statistics_matches_serial(sample_df):
+    """列のグループだけを読み込む並列計算が逐次計算と一致することのテスト"""
+    serial, serial_quality = streaming_statistics(_chunks(sample_df, 10000)).result()
+
+    half = len(sample_df) // 2
+    row_ranges = [
+        [functools.partial(_select, sample_df.iloc[:half], None, 10000)],
+        [
+            functools.partial(_select, sample_df.iloc[half:], columns, 10000)
+            for columns in [["id", "value"], ["category"]]
+        ],
+    ]
+    stats, quality = parallel_column_statistics(row_ranges, workers=2).result()
+
+    assert stats["row_count"] == serial["row_count"]
+    assert list(stats["data_types"]) == list(serial["data_types"])
+    assert stats["missing_values"] == serial["missing_values"]
+    assert stats["categorical_statistics"] == serial["categorical_statistics"]
+    assert quality["uniqueness"]["overall"] == serial_quality["uniqueness"]["overall"]
+
+
+def test_parallel_exact_statistics_matches_serial(sample_df):
+    """列のグループごとの厳密な並列計算が逐次計算と一致することのテスト"""
+    df = pd.concat([sample_df, sample_df.iloc[:100]], ignore_index=True)
+    serial, serial_quality = exact_statistics(df)
+
+    partitions = [df[["id", "value"]], functools.partial(df.__getitem__, ["category"])]
+    for workers in [1, 2]:
+        stats, quality = parallel_exact_statistics(partitions, workers=workers)
+        assert stats == serial
+        assert quality["uniqueness"] == serial_quality["uniqueness"]
+        assert quality["completeness"]["by_column"] == serial_quality["completeness"]["by_column"]
+        assert quality["completeness"]["overall"] == \
+            pytest.approx(serial_quality["completeness"]["overall"])
+
+
+def test_sample_size():
+    """誤差の目標から求める標本の行数のテスト"""
+    assert sample_size(0.01) == 9604
+    assert sample_size(0.01, confidence=0.99) > sample_size(0.01)
+    with pytest.raises(ValueError):
+        sample_size(0)
+
+
+def test_sampled_statistics_confidence_intervals(sample_df):
+    """標本からの推定値と信頼区間のテスト"""
+    data = sample_df.to_json(orient="records", lines=True).encode()
+    blocks, block_lines, size, weights = sample_jsonl(
+        functools.partial(io.BytesIO, data), 5000, seed=0,
+    )
+    stats, quality = sampled_statistics(blocks, block_lines, size, weights, confidence=0.99)
+
+    estimation = stats["estimation"]
+    intervals = estimation["confidence_intervals"]
+    assert estimation["approximate"] is True
+    assert estimation["sample_rows"] <= sum(block_lines) <= 5000
+
+    low, high = intervals["row_count"]
+    assert low <= len(sample_df) <= high
+    # 欠損値は10行ごとのため、どのブロックでも欠損率は0.1（区間の幅は丸め誤差程度）
+    low, high = intervals["missing_ratio"]["value"]
+    assert low - 1e-12 <= 0.1 <= high + 1e-12
+    exact, _ = exact_statistics(sample_df)
+    for key in ["mean", "q1", "median", "q3"]:
+        expected = exact["numeric_statistics"]["value"][key]
+        low, high = intervals["numeric_statistics"]["value"][key]
+        assert low <= expected <= high
+    assert set(stats["categorical_statistics"]["category"]["most_common"]) == {"A", "B", "C"}
+    assert quality["completeness"]["by_column"]["id"] == 1.0
+
+
+def test_sampled_statistics_row_length_bias():
+    """行の長さによるブロックの選ばれやすさの偏りを重みで補正することのテスト"""
+    # 前半は長い行（value=1）、後半は短い行（value=0）で、バイト数の約9割が前半にある
+    n = 20000
+    rows = [{"value": 1, "pad": "x" * 200}] * (n // 2) + [{"value": 0}] * (n // 2)
+    data = "".join(json.dumps(row) + "\n" for row in rows).encode()
+
+    blocks, block_lines, size, weights = sample_jsonl(
+        functools.partial(io.BytesIO, data), 2000, block_rows=10, seed=0,
+    )
+    assert max(weights) > 5 * min(weights)
+    stats, _ = sampled_statistics(blocks, block_lines, size, weights)
+
+    # 重みがなければ平均は約0.9になる
+    intervals = stats["estimation"]["confidence_intervals"]
+    mean = stats["numeric_statistics"]["value"]["mean"]
+    low, high = intervals["numeric_statistics"]["value"]["mean"]
+    assert low <= mean <= high
+    assert low <= 0.5 <= high and mean < 0.7
+    low, high = intervals["missing_ratio"]["pad"]
+    assert low <= 0.5 <= high
+    low, high = intervals["row_count"]
+    assert low <= stats["row_count"] <= high
+    assert low <= n <= high
+
+
+def test_sampled_statistics_unbounded_row_count():
+    """行数の信頼区間の上限が定まらない場合に None とすることのテスト"""
+    # 短い行と長い行の2ブロックだけの標本（誤差が1行あたりの平均バイト数を超える）
+    blocks = [b'{"value": 1}\n', json.dumps({"value": 2, "pad": "x" * 1000}).encode() + b"\n"]
+    stats, _ = sampled_statistics(blocks, [1, 1], 100000, [1.0, 1.0])
+
+    low, high = stats["estimation"]["confidence_intervals"]["row_count"]
+    assert high is None
+    assert 0 <= low <= stats["row_count"]
+    json.dumps(stats["estimation"]["confidence_intervals"]["row_count"], allow_nan=False)
+
+
+def test_sampled_statistics_small_file(sample_df):
+    """行数が標本より少ないファイルで厳密な値を返すことのテスト"""
+    df = sample_df.head(200)
+    data = df.to_json(orient="records", lines=True).encode()
+    stats, _ = sampled_statistics(*sample_jsonl(functools.partial(io.BytesIO, data), 1000))
+    exact, _ = exact_statistics(df)
+
+    assert stats["estimation"]["approximate"] is False
+    assert stats["row_count"] == 200
+    assert stats["missing_values"] == exact["missing_values"]
@@ -0,0 +1,257 @@
+"""
+データファイル保存モジュールのテスト
+
+このモジュールは、ストリーミングコピーなどのストレージ機能のテストを提供します。
+"""
+
+import hashlib
+import io
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from src.data import storage
+from src.data.storage import BlobStore, PrefixHash, StorageError, hash_file, hash_prefix, stream_copy, zero_copy
+
+
+@pytest.fixture
+def work_dir():
+    """テスト用の作業ディレクトリを作成"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture
+def large_file(work_dir):
+    """複数チャンクにまたがるサンプルファイルを作成"""
+    path = work_dir / "source.jsonl"
+    content = b"".join(b'{"value": %d}\n' % i for i in range(10000))
+    path.write_bytes(content)
+    return path
+
+
+def test_stream_copy(work_dir, large_file):
+    """ストリーミングコピーのテスト"""
+    dst = work_dir / "copy.jsonl"
+    file_hash, size = stream_copy(large_file, dst, chunk_size=4096)
+
+    content = large_file.read_bytes()
+    assert dst.read_bytes() == content
+    assert file_hash == hashlib.sha256(content).hexdigest()
+    assert size == len(content)
+    assert not (work_dir / "copy.jsonl.part").exists()
+
+
+def test_stream_copy_progress_callback(work_dir, large_file):
+    """進捗コールバックのテスト"""
+    progress = []
+    stream_copy(
+        large_file,
+        work_dir / "copy.jsonl",
+        chunk_size=4096,
+        progress_callback=lambda done, total: progress.append((done, total)),
+    )
+
+    total = large_file.stat().st_size
+    assert len(progress) == -(-total // 4096)
+    assert progress[-1] == (total, total)
+    assert all(a[0] < b[0] for a, b in zip(progress, progress[1:]))
+
+
+def test_stream_copy_invalid_chunk_size(work_dir, large_file):
+    """不正なチャンクサイズのテスト"""
+    with pytest.raises(StorageError) as exc_info:
+        stream_copy(large_file, work_dir / "copy.jsonl", chunk_size=0)
+    assert "チャンクサイズ" in str(exc_info.value)
+
+
+def test_stream_copy_nonexistent_source(work_dir):
+    """存在しないコピー元のテスト"""
+    with pytest.raises(StorageError):
+        stream_copy(work_dir / "missing.jsonl", work_dir / "copy.jsonl")
+    assert not (work_dir / "copy.jsonl").exists()
+    assert not (work_dir / "copy.jsonl.part").exists()
+
+
+def test_hash_prefix(large_file):
+    """先頭部分のハッシュ計算のテスト"""
+    content = large_file.read_bytes()
+    with open(large_file, "rb") as f:
+        assert hash_prefix(f, 10000, chunk_size=4096) == hashlib.sha256(content[:10000]).hexdigest()
+    with open(large_file, "rb") as f:
+        assert hash_prefix(f, len(content) + 1) is None
+
+
+def test_prefix_hash(work_dir, large_file):
+    """ファイル全体のハッシュと同じ読み込みで先頭部分のハッシュを記録するテスト"""
+    content = large_file.read_bytes()
+    for size in [1, 4096, 10000, len(content)]:
+        prefix = PrefixHash(size)
+        file_hash, _ = hash_file(large_file, chunk_size=4096, prefix=prefix)
+        assert file_hash == hashlib.sha256(content).hexdigest()
+        assert prefix.hash == hashlib.sha256(content[:size]).hexdigest()
+        assert prefix.last_byte == content[size - 1:size]
+
+    prefix = PrefixHash(10000)
+    stream_copy(large_file, work_dir / "copy.jsonl", chunk_size=4096, prefix=prefix)
+    assert prefix.hash == hashlib.sha256(content[:10000]).hexdigest()
+
+    prefix = PrefixHash(len(content) + 1)
+    hash_file(large_file, prefix=prefix)
+    assert prefix.hash is None
+
+    with pytest.raises(StorageError):
+        PrefixHash(0)
+
+
+def test_blob_store_put(work_dir, large_file):
+    """ブロブストアへの保存のテスト"""
+    store = BlobStore(work_dir / "blobs")
+    file_hash, blob_path, stored = store.put(large_file, suffix=".jsonl", chunk_size=4096)
+
+    assert stored
+    assert file_hash == hashlib.sha256(large_file.read_bytes()).hexdigest()
+    assert blob_path == store.path_for(file_hash, ".jsonl")
+    assert blob_path.read_bytes() == large_file.read_bytes()
+    assert list(store.iter_blobs()) == [blob_path]
+
+
+def test_blob_store_put_duplicate(work_dir, large_file):
+    """同一内容のブロブを保存した場合にコピーされないことのテスト"""
+    store = BlobStore(work_dir / "blobs")
+    file_hash, blob_path, _ = store.put(large_file, suffix=".jsonl")
+
+    progress = []
+    dup_hash, dup_path, stored = store.put(
+        large_file,
+        suffix=".jsonl",
+        file_hash=file_hash,
+        progress_callback=lambda done, total: progress.append(done),
+    )
+
+    assert not stored
+    assert dup_hash == file_hash
+    assert dup_path == blob_path
+    assert progress == []
+
+
+def test_blob_store_put_hash_mismatch(work_dir, large_file):
+    """事前計算したハッシュと内容が一致しない場合のテスト"""
+    store = BlobStore(work_dir / "blobs")
+    with pytest.raises(StorageError):
+        store.put(large_file, file_hash="0" * 64)
+    assert list(store.iter_blobs()) == []
+
+
+def test_blob_store_put_stream(work_dir, large_file):
+    """ストリームからのブロブの保存とハッシュの照合のテスト"""
+    store = BlobStore(work_dir / "blobs")
+    content = large_file.read_bytes()
+    expected = hashlib.sha256(content).hexdigest()
+
+    with open(large_file, "rb") as f:
+        file_hash, blob_path, stored = store.put_stream(f, suffix=".jsonl", chunk_size=4096)
+    assert (file_hash, stored) == (expected, True)
+    assert blob_path.read_bytes() == content
+
+    # 既存のブロブは書き込まずに照合のみ行う
+    with open(large_file, "rb") as f:
+        assert store.put_stream(f, suffix=".jsonl", file_hash=expected)[2] is False
+    with pytest.raises(StorageError):
+        store.put_stream(io.BytesIO(b"changed"), suffix=".jsonl", file_hash=expected)
+    with pytest.raises(StorageError):
+        store.put_stream(io.BytesIO(content), file_hash="0" * 64)
+    assert list(store.iter_blobs()) == [blob_path]
+
+
+def test_blob_store_remove(work_dir, large_file):
+    """ブロブ削除のテスト"""
+    store = BlobStore(work_dir / "blobs")
+    _, blob_path, _ = store.put(large_file)
+
+    store.remove(blob_path)
+    assert not blob_path.exists()
+
+    # ストア外のファイルは削除しない
+    store.remove(large_file)
+    assert large_file.exists()
+
+
+def test_zero_copy(work_dir, large_file):
+    """データを書き直さない複製のテスト"""
+    dst = work_dir / "copy.jsonl"
+    method = zero_copy(large_file, dst)
+
+    assert method in ("reflink", "hardlink", "copy_file_range", "sendfile")
+    assert dst.read_bytes() == large_file.read_bytes()
+    assert large_file.exists()
+
+
+def test_zero_copy_fallback(work_dir, large_file, monkeypatch):
+    """全ての方式が使えない場合にNoneを返すことのテスト"""
+    monkeypatch.setattr(storage, "_try_reflink", lambda src, dst: False)
+    monkeypatch.setattr(storage, "_try_hardlink", lambda src, dst: False)
+    monkeypatch.setattr(storage, "_try_kernel_copy", lambda src, dst: None)
+
+    dst = work_dir / "copy.jsonl"
+    assert zero_copy(large_file, dst) is None
+    assert not dst.exists()
+
+
+def test_blob_store_put_link(work_dir, large_file):
+    """linkモードでのブロブ保存のテスト"""
+    store = BlobStore(work_dir / "blobs")
+    file_hash, blob_path, stored = store.put(large_file, suffix=".jsonl", mode="link")
+
+    assert stored
+    assert file_hash == hashlib.sha256(large_file.read_bytes()).hexdigest()
+    assert blob_path.read_bytes() == large_file.read_bytes()
+    assert not blob_path.samefile(large_file)
+
+    # コピー元を書き換えてもブロブは変わらない
+    content = blob_path.read_bytes()
+    with open(large_file, "r+b") as f:
+        f.write(b"x")
+    assert blob_path.read_bytes() == content
+
+
+def test_blob_store_put_link_changed(work_dir, large_file):
+    """配置した内容が事前に計算したハッシュと一致しない場合のテスト"""
+    store = BlobStore(work_dir / "blobs")
+    with pytest.raises(StorageError):
+        store.put(large_file, suffix=".jsonl", file_hash="0" * 64, mode="link")
+    assert list(store.iter_blobs()) == []
+    assert list((work_dir / "blobs").glob("incoming-*")) == []
+
+
+def test_blob_store_put_move(work_dir, large_file):
+    """moveモードでのブロブ保存のテスト"""
+    content = large_file.read_bytes()
+    store = BlobStore(work_dir / "blobs")
+    _, blob_path, stored = store.put(large_file, suffix=".jsonl", mode="move")
+
+    # コピー元の削除は呼び出し側が参照を登録してから行う
+    assert stored
+    assert blob_path.read_bytes() == content
+    assert large_file.exists()
+
+
+def test_blob_store_put_move_fallback(work_dir, large_file, monkeypatch):
+    """zero_copyが使えない場合にストリーミングコピーへフォールバックすることのテスト"""
+    monkeypatch.setattr(storage, "zero_copy", lambda *args, **kwargs: None)
+    content = large_file.read_bytes()
+    store = BlobStore(work_dir / "blobs")
+    _, blob_path, stored = store.put(large_file, mode="move")
+
+    assert stored
+    assert blob_path.read_bytes() == content
+    assert large_file.exists()
+
+
+def test_blob_store_put_invalid_mode(work_dir, large_file):
+    """不正な取り込みモードのテスト"""
+    store = BlobStore(work_dir / "blobs")
+    with pytest.raises(StorageError) as exc_info:
+        store.put(large_file, mode="symlink")
+    assert "無効な取り込みモード" in str(exc_info.value)
@@ -0,0 +1,69 @@
+"""
+統計情報計算のパフォーマンステスト
+
+このモジュールは、列数の多いテーブルでの数値型カラムの統計量計算のベンチマークを提供します。
+列ごとに pandas のメソッドを呼び出す従来の方法と、数値型カラムをまとめて計算する
+numeric_statistics を比較します。結果は ``pytest tests/performance/ -v -s`` で表示されます。
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.statistics import numeric_statistics
+
+
+def _per_column_statistics(df):
+    """列ごとに7回走査する従来の計算方法"""
+    stats = {}
+    for col in df.select_dtypes(include=[np.number]).columns:
+        stats[col] = {
+            "mean": float(df[col].mean()),
+            "std": float(df[col].std()),
+            "min": float(df[col].min()),
+            "max": float(df[col].max()),
+            "median": float(df[col].median()),
+            "q1": float(df[col].quantile(0.25)),
+            "q3": float(df[col].quantile(0.75)),
+        }
+    return stats
+
+
+def _best_of(func, df, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+@pytest.fixture(scope="module")
+def wide_df():
+    """600列（うち整数列100、欠損値を含む列あり）のテーブルを作成"""
+    rng = np.random.default_rng(0)
+    rows = 20000
+    data = {f"float_{i}": rng.normal(i, 1, rows) for i in range(500)}
+    data.update({f"int_{i}": rng.integers(0, 1000, rows) for i in range(100)})
+    df = pd.DataFrame(data)
+    df.iloc[::7, ::3] = np.nan
+    return df
+
+
+def test_numeric_statistics_wide_table(wide_df):
+    """列数の多いテーブルでの高速化と結果の一致のテスト"""
+    baseline, expected = _best_of(_per_column_statistics, wide_df)
+    vectorized, result = _best_of(numeric_statistics, wide_df)
+
+    print(
+        f"\n{wide_df.shape[1]}列 x {len(wide_df)}行: "
+        f"列ごと {baseline:.3f}秒, まとめて計算 {vectorized:.3f}秒 "
+        f"({baseline / vectorized:.1f}倍)"
+    )
+
+    assert result.keys() == expected.keys()
+    for col, stats in expected.items():
+        assert result[col] == pytest.approx(stats, nan_ok=True)
+    assert vectorized < baseline